@@ -54,12 +54,23 @@ course_generation_jobs_table_name = "course_generation_jobs"
 task_generation_jobs_table_name = "task_generation_jobs"
 org_api_keys_table_name = "org_api_keys"
 code_drafts_table_name = "code_drafts"
+user_daily_activity_table_name = "user_daily_activity"
+cohort_leaderboard_table_name = "cohort_leaderboard"
+websocket_messages_table_name = "websocket_messages"
+leases_table_name = "leases"
+
+# cohort_id under which user_daily_activity keeps a user's activity across all cohorts
+all_cohorts_activity_cohort_id = 0
 
 UPLOAD_FOLDER_NAME = "uploads"
 
 uncategorized_milestone_name = "[UNASSIGNED]"
 uncategorized_milestone_color = "#808080"
 
+# course tasks and milestones are ordered with this much space between neighbours so
+# that a row can be inserted between two others without moving any of the rows after it
+ordering_gap = 1024
+
 openai_plan_to_model_name = {
     "reasoning": "o3-mini-2025-01-31",
     "text": "gpt-4.1-2025-04-14",
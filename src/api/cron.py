@@ -1,15 +1,63 @@
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Tuple
+import pandas as pd
 from api.db.analytics import get_usage_summary_by_organization
 from api.slack import send_slack_notification_for_usage_stats
-from api.utils.phoenix import get_raw_traces, save_daily_traces
+from api.utils.concurrency import run_in_process
+from api.utils.phoenix import (
+    FILTER_PERIODS,
+    get_filter_period_start_time,
+    get_raw_traces,
+    get_raw_traces_between,
+    save_daily_traces,
+)
+
+# seconds the spans of the whole year may take to be pulled and counted
+MODEL_SUMMARY_STATS_TIMEOUT = 600
+
+
+def count_spans_by_model(df: pd.DataFrame) -> Dict[str, int]:
+    # Group by model name and count occurrences
+    return df.groupby("attributes.llm.model_name").size().to_dict()
 
 
 def get_model_summary_stats(filter_period: str) -> Dict[str, int]:
     df = get_raw_traces(filter_period)
 
-    # Group by model name and count occurrences
-    model_counts = df.groupby("attributes.llm.model_name").size().to_dict()
-    return model_counts
+    return count_spans_by_model(df)
+
+
+def get_model_summary_stats_for_periods(
+    filter_periods: Tuple[str, ...] = FILTER_PERIODS,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Count the spans of every model over each of the periods from a single pull of
+    the spans since the earliest start among them, instead of one pull per period.
+    """
+    end_time = datetime.now()
+    start_times = {
+        filter_period: get_filter_period_start_time(filter_period, end_time)
+        for filter_period in filter_periods
+    }
+
+    df = get_raw_traces_between(min(start_times.values()), end_time)
+
+    if df.empty:
+        return {filter_period: {} for filter_period in filter_periods}
+
+    span_start_times = pd.to_datetime(df["start_time"])
+
+    model_stats = {}
+    for filter_period, start_time in start_times.items():
+        if span_start_times.dt.tz is not None:
+            # the spans are timestamped in UTC while the periods are in local time
+            start_time = start_time.astimezone()
+
+        model_stats[filter_period] = count_spans_by_model(
+            df[span_start_times >= pd.Timestamp(start_time)]
+        )
+
+    return model_stats
 
 
 async def send_usage_summary_stats():
@@ -20,18 +68,25 @@ async def send_usage_summary_stats():
     then sends a formatted summary to a Slack channel via webhook.
     """
     try:
+        # pulling and counting the spans blocks, so it is done in another process
+        model_stats = await run_in_process(
+            get_model_summary_stats_for_periods,
+            FILTER_PERIODS,
+            timeout=MODEL_SUMMARY_STATS_TIMEOUT,
+        )
+
         # Get usage statistics for different time periods
         last_day_stats = {
             "org": await get_usage_summary_by_organization("last_day"),
-            "model": get_model_summary_stats("last_day"),
+            "model": model_stats["last_day"],
         }
         current_month_stats = {
             "org": await get_usage_summary_by_organization("current_month"),
-            "model": get_model_summary_stats("current_month"),
+            "model": model_stats["current_month"],
         }
         current_year_stats = {
             "org": await get_usage_summary_by_organization("current_year"),
-            "model": get_model_summary_stats("current_year"),
+            "model": model_stats["current_year"],
         }
 
         # Send the statistics via Slack webhook
@@ -27,6 +27,10 @@ from api.config import (
     task_generation_jobs_table_name,
     org_api_keys_table_name,
     code_drafts_table_name,
+    user_daily_activity_table_name,
+    cohort_leaderboard_table_name,
+    websocket_messages_table_name,
+    leases_table_name,
 )
 
 
@@ -152,6 +156,7 @@ async def create_course_tasks_table(cursor):
                 ordering INTEGER NOT NULL,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 milestone_id INTEGER,
+                updated_at DATETIME,
                 UNIQUE(task_id, course_id),
                 FOREIGN KEY (task_id) REFERENCES {tasks_table_name}(id) ON DELETE CASCADE,
                 FOREIGN KEY (course_id) REFERENCES {courses_table_name}(id) ON DELETE CASCADE,
@@ -171,6 +176,16 @@ async def create_course_tasks_table(cursor):
         f"""CREATE INDEX idx_course_task_milestone_id ON {course_tasks_table_name} (milestone_id)"""
     )
 
+    await create_course_tasks_course_id_task_id_index(cursor)
+
+
+async def create_course_tasks_course_id_task_id_index(cursor):
+    # covers the lookup of the tasks of a course in the cohort metrics queries; the
+    # (user_id, question_id) lookups on task_completions are covered by its UNIQUE index
+    await cursor.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_course_task_course_id_task_id ON {course_tasks_table_name} (course_id, task_id)"""
+    )
+
 
 async def create_course_milestones_table(cursor):
     await cursor.execute(
@@ -202,6 +217,7 @@ async def create_milestones_table(cursor):
                 org_id INTEGER NOT NULL,
                 name TEXT NOT NULL,
                 color TEXT,
+                updated_at DATETIME,
                 FOREIGN KEY (org_id) REFERENCES {organizations_table_name}(id) ON DELETE CASCADE
             )"""
     )
@@ -265,6 +281,7 @@ async def create_tasks_table(cursor):
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     deleted_at DATETIME,
                     scheduled_publish_at DATETIME,
+                    updated_at DATETIME,
                     FOREIGN KEY (org_id) REFERENCES {organizations_table_name}(id) ON DELETE CASCADE
                 )"""
     )
@@ -273,6 +290,16 @@ async def create_tasks_table(cursor):
         f"""CREATE INDEX idx_task_org_id ON {tasks_table_name} (org_id)"""
     )
 
+    await create_tasks_scheduled_publish_at_index(cursor)
+
+
+async def create_tasks_scheduled_publish_at_index(cursor):
+    # only the few tasks waiting to be published have a scheduled time, so the
+    # publishing queries read a small index instead of scanning the tasks
+    await cursor.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_task_scheduled_publish_at ON {tasks_table_name} (scheduled_publish_at) WHERE scheduled_publish_at IS NOT NULL"""
+    )
+
 
 async def create_questions_table(cursor):
     await cursor.execute(
@@ -293,6 +320,7 @@ async def create_questions_table(cursor):
                 is_feedback_shown BOOLEAN NOT NULL,
                 context TEXT,
                 title TEXT NOT NULL,
+                updated_at DATETIME,
                 FOREIGN KEY (task_id) REFERENCES {tasks_table_name}(id) ON DELETE CASCADE
             )"""
     )
@@ -462,6 +490,164 @@ async def create_code_drafts_table(cursor):
     )
 
 
+async def create_user_daily_activity_table(cursor):
+    # rollup of chat_history and task_completions per user, cohort and IST day,
+    # maintained on write so that streaks and heatmaps are indexed range scans
+    await cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS {user_daily_activity_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                cohort_id INTEGER NOT NULL,
+                ist_date DATE NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                completion_count INTEGER NOT NULL DEFAULT 0,
+                UNIQUE(user_id, cohort_id, ist_date),
+                FOREIGN KEY (user_id) REFERENCES {users_table_name}(id) ON DELETE CASCADE
+            )"""
+    )
+
+    await cursor.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_user_daily_activity_cohort_id_ist_date ON {user_daily_activity_table_name} (cohort_id, ist_date)"""
+    )
+
+
+async def create_cohort_leaderboard_table(cursor):
+    # per cohort, leaderboard view and learner: the state of the learner's latest
+    # streak and the number of tasks they have completed, updated on every event
+    await cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS {cohort_leaderboard_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cohort_id INTEGER NOT NULL,
+                view_type TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                period_start DATE,
+                last_active_date DATE,
+                streak_count INTEGER NOT NULL DEFAULT 0,
+                tasks_completed INTEGER NOT NULL DEFAULT 0,
+                UNIQUE(cohort_id, view_type, user_id),
+                FOREIGN KEY (cohort_id) REFERENCES {cohorts_table_name}(id) ON DELETE CASCADE,
+                FOREIGN KEY (user_id) REFERENCES {users_table_name}(id) ON DELETE CASCADE
+            )"""
+    )
+
+    await cursor.execute(
+        f"""CREATE INDEX IF NOT EXISTS idx_cohort_leaderboard_user_id ON {cohort_leaderboard_table_name} (user_id)"""
+    )
+
+
+async def create_websocket_messages_table(cursor):
+    # the messages sent to websocket clients, for the workers that do not hold the
+    # connection of a client to pick up; they are only kept for a short while
+    await cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS {websocket_messages_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                message TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )"""
+    )
+
+
+async def create_leases_table(cursor):
+    # named leases held by one worker at a time until they expire, e.g. to pick
+    # the worker that runs the scheduled jobs
+    await cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS {leases_table_name} (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at DATETIME NOT NULL
+            )"""
+    )
+
+
+# millisecond precision so that a change feed cursor can tell apart writes made
+# within the same second
+CURRENT_TIMESTAMP_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+async def add_content_updated_at_columns(cursor):
+    # ALTER TABLE cannot add a column with a non-constant default, so existing rows
+    # are backfilled here and new writes are stamped by the triggers below
+    for table_name, backfill in [
+        (tasks_table_name, "created_at"),
+        (questions_table_name, "created_at"),
+        (milestones_table_name, "CURRENT_TIMESTAMP"),
+        (course_tasks_table_name, "created_at"),
+    ]:
+        await cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = [col[1] for col in await cursor.fetchall()]
+
+        if "updated_at" in columns:
+            continue
+
+        await cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN updated_at DATETIME")
+        await cursor.execute(f"UPDATE {table_name} SET updated_at = {backfill}")
+
+
+async def create_content_updated_at_triggers(cursor):
+    # stamps updated_at on every write to course content, whichever code path makes
+    # it; changes to questions and their scorecards also count as changes to the task
+    now = CURRENT_TIMESTAMP_MS
+    question_task_id = (
+        f"(SELECT task_id FROM {questions_table_name} WHERE id = NEW.question_id)"
+    )
+    old_question_task_id = (
+        f"(SELECT task_id FROM {questions_table_name} WHERE id = OLD.question_id)"
+    )
+
+    triggers = {}
+
+    for table_name in [
+        tasks_table_name,
+        milestones_table_name,
+        course_tasks_table_name,
+    ]:
+        triggers[f"trg_{table_name}_insert_updated_at"] = (
+            f"AFTER INSERT ON {table_name} BEGIN "
+            f"UPDATE {table_name} SET updated_at = {now} WHERE id = NEW.id; END"
+        )
+        triggers[f"trg_{table_name}_update_updated_at"] = (
+            f"AFTER UPDATE ON {table_name} WHEN NEW.updated_at IS OLD.updated_at BEGIN "
+            f"UPDATE {table_name} SET updated_at = {now} WHERE id = NEW.id; END"
+        )
+
+    triggers[f"trg_{questions_table_name}_insert_updated_at"] = (
+        f"AFTER INSERT ON {questions_table_name} BEGIN "
+        f"UPDATE {questions_table_name} SET updated_at = {now} WHERE id = NEW.id; "
+        f"UPDATE {tasks_table_name} SET updated_at = {now} WHERE id = NEW.task_id; END"
+    )
+    triggers[f"trg_{questions_table_name}_update_updated_at"] = (
+        f"AFTER UPDATE ON {questions_table_name} WHEN NEW.updated_at IS OLD.updated_at BEGIN "
+        f"UPDATE {questions_table_name} SET updated_at = {now} WHERE id = NEW.id; "
+        f"UPDATE {tasks_table_name} SET updated_at = {now} WHERE id = NEW.task_id; END"
+    )
+    triggers[f"trg_{questions_table_name}_delete_updated_at"] = (
+        f"AFTER DELETE ON {questions_table_name} BEGIN "
+        f"UPDATE {tasks_table_name} SET updated_at = {now} WHERE id = OLD.task_id; END"
+    )
+    triggers[f"trg_{question_scorecards_table_name}_insert_updated_at"] = (
+        f"AFTER INSERT ON {question_scorecards_table_name} BEGIN "
+        f"UPDATE {questions_table_name} SET updated_at = {now} WHERE id = NEW.question_id; "
+        f"UPDATE {tasks_table_name} SET updated_at = {now} WHERE id = {question_task_id}; END"
+    )
+    triggers[f"trg_{question_scorecards_table_name}_delete_updated_at"] = (
+        f"AFTER DELETE ON {question_scorecards_table_name} BEGIN "
+        f"UPDATE {questions_table_name} SET updated_at = {now} WHERE id = OLD.question_id; "
+        f"UPDATE {tasks_table_name} SET updated_at = {now} WHERE id = {old_question_task_id}; END"
+    )
+
+    # the ordering of a milestone in a course lives in course_milestones
+    for event in ["INSERT", "UPDATE"]:
+        triggers[f"trg_{course_milestones_table_name}_{event.lower()}_updated_at"] = (
+            f"AFTER {event} ON {course_milestones_table_name} BEGIN "
+            f"UPDATE {milestones_table_name} SET updated_at = {now} WHERE id = NEW.milestone_id; END"
+        )
+
+    for trigger_name, trigger in triggers.items():
+        await cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {trigger}")
+
+
 async def init_db():
     # Ensure the database folder exists
     db_folder = os.path.dirname(sqlite_db_path)
@@ -479,6 +665,31 @@ async def init_db():
             if not await check_table_exists(code_drafts_table_name, cursor):
                 await create_code_drafts_table(cursor)
 
+            if not await check_table_exists(user_daily_activity_table_name, cursor):
+                from api.db.user import rebuild_user_daily_activity
+
+                await create_user_daily_activity_table(cursor)
+                await rebuild_user_daily_activity(cursor)
+
+            if not await check_table_exists(cohort_leaderboard_table_name, cursor):
+                from api.db.leaderboard import rebuild_cohort_leaderboards
+
+                await create_cohort_leaderboard_table(cursor)
+                await rebuild_cohort_leaderboards(cursor)
+
+            if not await check_table_exists(websocket_messages_table_name, cursor):
+                await create_websocket_messages_table(cursor)
+
+            if not await check_table_exists(leases_table_name, cursor):
+                await create_leases_table(cursor)
+
+            await create_course_tasks_course_id_task_id_index(cursor)
+
+            await create_tasks_scheduled_publish_at_index(cursor)
+
+            await add_content_updated_at_columns(cursor)
+            await create_content_updated_at_triggers(cursor)
+
             await conn.commit()
             return
 
@@ -521,6 +732,16 @@ async def init_db():
 
             await create_code_drafts_table(cursor)
 
+            await create_user_daily_activity_table(cursor)
+
+            await create_cohort_leaderboard_table(cursor)
+
+            await create_websocket_messages_table(cursor)
+
+            await create_leases_table(cursor)
+
+            await create_content_updated_at_triggers(cursor)
+
             await conn.commit()
 
         except Exception as exception:
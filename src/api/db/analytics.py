@@ -1,5 +1,7 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
+from itertools import chain
+import numpy as np
 from api.utils.db import execute_db_operation
 from api.config import (
     chat_history_table_name,
@@ -11,6 +13,10 @@ from api.config import (
     course_cohorts_table_name,
     users_table_name,
     user_cohorts_table_name,
+    user_daily_activity_table_name,
+    courses_table_name,
+    cohorts_table_name,
+    course_milestones_table_name,
 )
 from api.models import LeaderboardViewType, TaskType, TaskStatus
 from api.db.user import get_user_streak_from_usage_dates
@@ -64,11 +70,45 @@ async def get_usage_summary_by_organization(
     ]
 
 
-async def get_cohort_completion(
+def _get_positions(ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # position of each value in ids, or -1 if the value is not in ids
+    if not len(ids) or not len(values):
+        return np.full(len(values), -1, dtype=np.int64)
+
+    sorter = np.argsort(ids, kind="stable")
+    positions = sorter[
+        np.clip(np.searchsorted(ids, values, sorter=sorter), 0, len(ids) - 1)
+    ]
+    return np.where(ids[positions] == values, positions, -1)
+
+
+def _get_completion_matrix(
+    ids: np.ndarray, user_ids: np.ndarray, completion_rows: List[Tuple]
+) -> np.ndarray:
+    # users x ids boolean matrix from (user_id, id) completion rows
+    matrix = np.zeros((len(user_ids), len(ids)), dtype=bool)
+
+    if not completion_rows:
+        return matrix
+
+    completion_rows = np.fromiter(
+        chain.from_iterable(completion_rows),
+        dtype=np.int64,
+        count=2 * len(completion_rows),
+    ).reshape(-1, 2)
+    rows = _get_positions(user_ids, completion_rows[:, 0])
+    columns = _get_positions(ids, completion_rows[:, 1])
+    is_valid = (rows >= 0) & (columns >= 0)
+    matrix[rows[is_valid], columns[is_valid]] = True
+
+    return matrix
+
+
+async def get_cohort_completion_matrix(
     cohort_id: int, user_ids: List[int], course_id: int = None
-):
+) -> Dict:
     """
-    Retrieves completion data for a user in a specific cohort.
+    Retrieves completion data for users in a specific cohort as dense matrices.
 
     Args:
         cohort_id: The ID of the cohort
@@ -76,21 +116,19 @@ async def get_cohort_completion(
         course_id: The ID of the course (optional, if not provided, all courses in the cohort will be considered)
 
     Returns:
-        A dictionary mapping task IDs to their completion status:
         {
-            task_id: {
-                "is_complete": bool,
-                "questions": [{"question_id": int, "is_complete": bool}]
-            }
+            "user_ids": users (rows of the matrices),
+            "task_ids": learning material tasks followed by quiz tasks,
+            "task_types": the type of every task,
+            "task_completion": users x tasks boolean matrix,
+            "question_ids": the questions of the quiz tasks, grouped by task in order of position,
+            "question_task_indices": the index in task_ids of the task of every question,
+            "question_completion": users x questions boolean matrix,
         }
-    """
-    results = defaultdict(dict)
-
-    # user_in_cohort = await is_user_in_cohort(user_id, cohort_id)
-    # if not user_in_cohort:
-    #     results[user_id] = {}
-    #     continue
 
+        A quiz is complete when all of its questions are complete, so quizzes without
+        any questions are never complete.
+    """
     # Get completed tasks for the users from task_completions_table
     completed_tasks = await execute_db_operation(
         f"""
@@ -100,9 +138,6 @@ async def get_cohort_completion(
         """,
         fetch_all=True,
     )
-    completed_task_ids_for_user = defaultdict(set)
-    for user_id, task_id in completed_tasks:
-        completed_task_ids_for_user[user_id].add(task_id)
 
     # Get completed questions for the users from task_completions_table
     completed_questions = await execute_db_operation(
@@ -113,9 +148,6 @@ async def get_cohort_completion(
         """,
         fetch_all=True,
     )
-    completed_question_ids_for_user = defaultdict(set)
-    for user_id, question_id in completed_questions:
-        completed_question_ids_for_user[user_id].add(question_id)
 
     # Get all tasks for the cohort
     # Get learning material tasks
@@ -138,13 +170,6 @@ async def get_cohort_completion(
         fetch_all=True,
     )
 
-    for user_id in user_ids:
-        for task in learning_material_tasks:
-            # For learning material, check if it's in the completed tasks list
-            results[user_id][task[0]] = {
-                "is_complete": task[0] in completed_task_ids_for_user[user_id]
-            }
-
     # Get quiz and exam task questions
     query = f"""
         SELECT DISTINCT t.id as task_id, q.id as question_id
@@ -168,42 +193,300 @@ async def get_cohort_completion(
         fetch_all=True,
     )
 
-    # Group questions by task_id
-    quiz_exam_tasks = defaultdict(list)
-    for row in quiz_exam_questions:
-        task_id = row[0]
-        question_id = row[1]
+    learning_material_task_ids = [row[0] for row in learning_material_tasks]
 
-        quiz_exam_tasks[task_id].append(question_id)
+    # dict.fromkeys keeps the quiz tasks in order and drops the duplicates
+    quiz_task_ids = list(dict.fromkeys(row[0] for row in quiz_exam_questions))
+    quiz_task_questions = [row for row in quiz_exam_questions if row[1] is not None]
 
-    for user_id in user_ids:
-        for task_id in quiz_exam_tasks:
-            is_task_complete = True
-            question_completions = []
+    users = np.array(user_ids, dtype=np.int64)
+    task_ids = np.array(learning_material_task_ids + quiz_task_ids, dtype=np.int64)
+    question_ids = np.array([row[1] for row in quiz_task_questions], dtype=np.int64)
+    question_task_indices = _get_positions(
+        task_ids, np.array([row[0] for row in quiz_task_questions], dtype=np.int64)
+    )
 
-            for question_id in quiz_exam_tasks[task_id]:
-                is_question_complete = (
-                    question_id in completed_question_ids_for_user[user_id]
-                )
+    # keep the questions of every task in contiguous columns (and in order of position)
+    # so that the questions can be reduced per task with reduceat
+    question_order = np.argsort(question_task_indices, kind="stable")
+    question_ids = question_ids[question_order]
+    question_task_indices = question_task_indices[question_order]
 
-                question_completions.append(
-                    {
-                        "question_id": question_id,
-                        "is_complete": is_question_complete,
-                    }
-                )
+    question_completion = _get_completion_matrix(
+        question_ids, users, completed_questions
+    )
+
+    # number of questions of every task and of those completed by every user
+    num_questions = np.bincount(question_task_indices, minlength=len(task_ids))
+    num_completed_questions = np.zeros((len(users), len(task_ids)), dtype=np.int64)
+
+    if len(question_ids):
+        task_starts = np.flatnonzero(np.diff(question_task_indices, prepend=-1) != 0)
+        num_completed_questions[
+            :, question_task_indices[task_starts]
+        ] = np.add.reduceat(question_completion, task_starts, axis=1, dtype=np.int64)
+
+    is_quiz = np.arange(len(task_ids)) >= len(learning_material_task_ids)
+    task_types = [str(TaskType.LEARNING_MATERIAL)] * len(learning_material_task_ids)
+    task_types += [str(TaskType.QUIZ)] * len(quiz_task_ids)
+
+    task_completion = _get_completion_matrix(task_ids, users, completed_tasks)
+    task_completion[:, is_quiz] = (
+        (num_completed_questions == num_questions) & (num_questions > 0)
+    )[:, is_quiz]
+
+    return {
+        "user_ids": users,
+        "task_ids": task_ids,
+        "task_types": task_types,
+        "task_completion": task_completion,
+        "question_ids": question_ids,
+        "question_task_indices": question_task_indices,
+        "question_completion": question_completion,
+    }
+
+
+async def get_cohort_completion(
+    cohort_id: int, user_ids: List[int], course_id: int = None
+):
+    """
+    Retrieves completion data for a user in a specific cohort.
 
-                if not is_question_complete:
-                    is_task_complete = False
+    Args:
+        cohort_id: The ID of the cohort
+        user_ids: The IDs of the users
+        course_id: The ID of the course (optional, if not provided, all courses in the cohort will be considered)
 
-            results[user_id][task_id] = {
+    Returns:
+        A dictionary mapping task IDs to their completion status:
+        {
+            task_id: {
+                "is_complete": bool,
+                "questions": [{"question_id": int, "is_complete": bool}]
+            }
+        }
+    """
+    results = defaultdict(dict)
+
+    completion = await get_cohort_completion_matrix(cohort_id, user_ids, course_id)
+
+    task_ids = completion["task_ids"].tolist()
+    if not task_ids:
+        return results
+
+    num_learning_material_tasks = completion["task_types"].count(
+        str(TaskType.LEARNING_MATERIAL)
+    )
+    learning_material_task_ids = task_ids[:num_learning_material_tasks]
+    quiz_task_ids = task_ids[num_learning_material_tasks:]
+
+    # the (index, id) of the questions of every quiz task
+    quiz_task_questions = [[] for _ in quiz_task_ids]
+    for question_index, (question_id, task_index) in enumerate(
+        zip(
+            completion["question_ids"].tolist(),
+            completion["question_task_indices"].tolist(),
+        )
+    ):
+        quiz_task_questions[task_index - num_learning_material_tasks].append(
+            (question_index, question_id)
+        )
+
+    for user_id, task_completion, question_completion in zip(
+        user_ids,
+        completion["task_completion"].tolist(),
+        completion["question_completion"].tolist(),
+    ):
+        user_results = results[user_id]
+
+        for task_id, is_task_complete in zip(
+            learning_material_task_ids, task_completion
+        ):
+            user_results[task_id] = {"is_complete": is_task_complete}
+
+        for task_id, is_task_complete, questions in zip(
+            quiz_task_ids,
+            task_completion[num_learning_material_tasks:],
+            quiz_task_questions,
+        ):
+            user_results[task_id] = {
                 "is_complete": is_task_complete,
-                "questions": question_completions,
+                # a quiz without questions has a single None question, as with the LEFT JOIN
+                "questions": [
+                    {
+                        "question_id": question_id,
+                        "is_complete": question_completion[question_index],
+                    }
+                    for question_index, question_id in questions
+                ]
+                or [{"question_id": None, "is_complete": False}],
             }
 
     return results
 
 
+async def get_cohort_course_metrics(cohort_id: int, course_id: int) -> Dict:
+    """
+    Aggregates the completion of the published tasks of a course by the learners of a
+    cohort in SQL.
+
+    Returns:
+        {
+            "course_exists": bool,
+            "cohort_exists": bool,
+            "num_tasks": number of published tasks of the course available to the cohort,
+            "task_type_counts": {task_type: number of tasks in the milestones of the course},
+            "learners": [
+                {
+                    "user_id": int,
+                    "completions": {task_type: number of tasks completed},
+                    "has_attempted": bool,
+                }
+            ],
+        }
+
+    Only the tasks in the milestones of the course count towards the completions, as in
+    the course tree returned by get_course. The task counts and learners are left empty
+    if the course or the cohort does not exist.
+    """
+    exists_row = await execute_db_operation(
+        f"""
+        SELECT
+            EXISTS (SELECT 1 FROM {courses_table_name} WHERE id = ?),
+            EXISTS (SELECT 1 FROM {cohorts_table_name} WHERE id = ?)
+        """,
+        (course_id, cohort_id),
+        fetch_one=True,
+    )
+
+    result = {
+        "course_exists": bool(exists_row[0]),
+        "cohort_exists": bool(exists_row[1]),
+        "num_tasks": 0,
+        "task_type_counts": {},
+        "learners": [],
+    }
+
+    if not result["course_exists"] or not result["cohort_exists"]:
+        return result
+
+    cohort_course_tasks_cte = f"""
+        cohort_course_tasks AS (
+            SELECT t.id, t.type,
+                MAX(EXISTS (
+                    SELECT 1 FROM {course_milestones_table_name} cm
+                    WHERE cm.course_id = ct.course_id AND cm.milestone_id = ct.milestone_id
+                )) AS in_course_tree
+            FROM {tasks_table_name} t
+            JOIN {course_tasks_table_name} ct ON ct.task_id = t.id
+            JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+            WHERE ct.course_id = ? AND cc.cohort_id = ? AND t.deleted_at IS NULL AND t.status = '{TaskStatus.PUBLISHED}' AND t.scheduled_publish_at IS NULL
+            GROUP BY t.id, t.type
+        )
+        """
+
+    task_counts = await execute_db_operation(
+        f"""
+        WITH {cohort_course_tasks_cte}
+        SELECT type, COUNT(*), SUM(in_course_tree)
+        FROM cohort_course_tasks
+        GROUP BY type
+        """,
+        (course_id, cohort_id),
+        fetch_all=True,
+    )
+
+    # only learning material and quiz tasks count towards the completion of a course
+    result["num_tasks"] = sum(
+        num_tasks
+        for task_type, num_tasks, _ in task_counts
+        if task_type in [str(TaskType.LEARNING_MATERIAL), str(TaskType.QUIZ)]
+    )
+    result["task_type_counts"] = {
+        task_type: num_course_tree_tasks
+        for task_type, _, num_course_tree_tasks in task_counts
+        if num_course_tree_tasks
+    }
+
+    completion_columns = ",\n            ".join(
+        f"COUNT(CASE WHEN t.type = '{task_type}' THEN 1 END)" for task_type in TaskType
+    )
+
+    learner_rows = await execute_db_operation(
+        f"""
+        WITH learners AS (
+            SELECT DISTINCT user_id
+            FROM {user_cohorts_table_name}
+            WHERE cohort_id = ? AND role = 'learner'
+        ),
+        {cohort_course_tasks_cte},
+        quiz_questions AS (
+            SELECT q.task_id, q.id, COUNT(*) OVER (PARTITION BY q.task_id) AS num_questions
+            FROM cohort_course_tasks t
+            JOIN {questions_table_name} q ON q.task_id = t.id AND q.deleted_at IS NULL
+            WHERE t.type = '{TaskType.QUIZ}' AND t.in_course_tree
+        ),
+        completed_tasks AS (
+            SELECT tc.user_id, t.id AS task_id
+            FROM learners l
+            JOIN {task_completions_table_name} tc ON tc.user_id = l.user_id
+            JOIN cohort_course_tasks t ON t.id = tc.task_id
+            WHERE t.type = '{TaskType.LEARNING_MATERIAL}' AND t.in_course_tree
+
+            UNION
+
+            SELECT tc.user_id, qq.task_id
+            FROM learners l
+            JOIN {task_completions_table_name} tc ON tc.user_id = l.user_id
+            JOIN quiz_questions qq ON qq.id = tc.question_id
+            GROUP BY tc.user_id, qq.task_id
+            HAVING COUNT(DISTINCT qq.id) = MAX(qq.num_questions)
+        ),
+        attempted_learners AS (
+            SELECT tc.user_id
+            FROM learners l
+            JOIN {task_completions_table_name} tc ON tc.user_id = l.user_id
+            JOIN {course_tasks_table_name} ct ON ct.task_id = tc.task_id
+            WHERE ct.course_id = ?
+
+            UNION
+
+            SELECT ch.user_id
+            FROM learners l
+            JOIN {chat_history_table_name} ch ON ch.user_id = l.user_id
+            JOIN {questions_table_name} q ON q.id = ch.question_id
+            JOIN {course_tasks_table_name} ct ON ct.task_id = q.task_id
+            WHERE ct.course_id = ?
+        )
+        SELECT
+            l.user_id,
+            {completion_columns},
+            l.user_id IN (SELECT user_id FROM attempted_learners)
+        FROM learners l
+        LEFT JOIN completed_tasks c ON c.user_id = l.user_id
+        LEFT JOIN cohort_course_tasks t ON t.id = c.task_id
+        GROUP BY l.user_id
+        ORDER BY l.user_id
+        """,
+        (cohort_id, course_id, cohort_id, course_id, course_id),
+        fetch_all=True,
+    )
+
+    result["learners"] = [
+        {
+            "user_id": row[0],
+            "completions": {
+                str(task_type): row[index + 1]
+                for index, task_type in enumerate(TaskType)
+            },
+            "has_attempted": bool(row[-1]),
+        }
+        for row in learner_rows
+    ]
+
+    return result
+
+
 async def get_cohort_course_attempt_data(cohort_learner_ids: List[int], course_id: int):
     """
     Retrieves attempt data for users in a specific cohort, focusing on whether each user
@@ -287,11 +570,11 @@ async def get_cohort_streaks(
     # Build date filter based on duration
     date_filter = ""
     if view == LeaderboardViewType.WEEKLY:
-        date_filter = "AND DATE(datetime(timestamp, '+5 hours', '+30 minutes')) > DATE('now', 'weekday 0', '-7 days')"
+        date_filter = "AND a.ist_date > DATE('now', 'weekday 0', '-7 days')"
     elif view == LeaderboardViewType.MONTHLY:
-        date_filter = "AND strftime('%Y-%m', datetime(timestamp, '+5 hours', '+30 minutes')) = strftime('%Y-%m', 'now')"
+        date_filter = "AND a.ist_date >= DATE(datetime('now', '+5 hours', '+30 minutes'), 'start of month')"
 
-    # Get all user interactions, ordered by user and timestamp
+    # Get the active days of every learner in the cohort
     usage_per_user = await execute_db_operation(
         f"""
     SELECT 
@@ -300,36 +583,14 @@ async def get_cohort_streaks(
         u.first_name,
         u.middle_name,
         u.last_name,
-        GROUP_CONCAT(t.created_at) as created_ats
-    FROM {users_table_name} u
-    LEFT JOIN (
-        -- Chat history interactions
-        SELECT user_id, MAX(datetime(created_at, '+5 hours', '+30 minutes')) as created_at
-        FROM {chat_history_table_name}
-        WHERE 1=1 {date_filter} AND question_id IN (SELECT id FROM {questions_table_name} WHERE task_id IN (SELECT task_id FROM {course_tasks_table_name} WHERE course_id IN (SELECT course_id FROM {course_cohorts_table_name} WHERE cohort_id = ?)))
-        GROUP BY user_id, DATE(datetime(created_at, '+5 hours', '+30 minutes'))
-        
-        UNION
-        
-        -- Task completions
-        SELECT user_id, MAX(datetime(created_at, '+5 hours', '+30 minutes')) as created_at
-        FROM {task_completions_table_name}
-        WHERE 1=1 {date_filter} AND task_id IN (
-            SELECT task_id FROM {course_tasks_table_name} 
-            WHERE course_id IN (SELECT course_id FROM {course_cohorts_table_name} WHERE cohort_id = ?)
-        )
-        GROUP BY user_id, DATE(datetime(created_at, '+5 hours', '+30 minutes'))
-        
-        ORDER BY created_at DESC, user_id
-    ) t ON u.id = t.user_id
-    WHERE u.id IN (
-        -- Users who are in the cohort as learners
-        SELECT user_id FROM {user_cohorts_table_name} WHERE cohort_id = ? and role = 'learner'
-       
-    )
+        GROUP_CONCAT(a.ist_date) as ist_dates
+    FROM {user_cohorts_table_name} uc
+    JOIN {users_table_name} u ON u.id = uc.user_id
+    LEFT JOIN {user_daily_activity_table_name} a ON a.user_id = uc.user_id AND a.cohort_id = uc.cohort_id {date_filter}
+    WHERE uc.cohort_id = ? AND uc.role = 'learner'
     GROUP BY u.id, u.email, u.first_name, u.middle_name, u.last_name
     """,
-        (cohort_id, cohort_id, cohort_id),
+        (cohort_id,),
         fetch_all=True,
     )
 
@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import AsyncIterator, Dict, List, Tuple
 from datetime import datetime
 from api.utils.db import get_new_db_connection, execute_db_operation
 from api.config import (
@@ -7,9 +7,18 @@ from api.config import (
     tasks_table_name,
     users_table_name,
     task_completions_table_name,
+    user_daily_activity_table_name,
 )
 from api.models import StoreMessageRequest, ChatMessage, TaskType
 from api.db.task import get_basic_task_details
+from api.db.user import (
+    record_user_message_activity,
+    delete_chat_history_with_activity,
+)
+from api.db.leaderboard import (
+    record_leaderboard_activity,
+    record_leaderboard_task_completion,
+)
 
 
 async def store_messages(
@@ -43,6 +52,19 @@ async def store_messages(
             new_row_id = cursor.lastrowid
             new_row_ids.append(new_row_id)
 
+        await record_user_message_activity(
+            cursor,
+            user_id,
+            question_id,
+            [(message.role, message.created_at) for message in messages],
+        )
+        await record_leaderboard_activity(
+            cursor,
+            user_id,
+            [message.created_at for message in messages],
+            question_id=question_id,
+        )
+
         if is_complete:
             await cursor.execute(
                 f"""
@@ -52,6 +74,13 @@ async def store_messages(
                 (user_id, question_id),
             )
 
+            # question completions do not count towards streaks, only towards the
+            # tasks completed
+            if cursor.rowcount > 0:
+                await record_leaderboard_task_completion(
+                    cursor, user_id, question_id=question_id
+                )
+
         await conn.commit()
 
     # Fetch the newly inserted row
@@ -78,35 +107,87 @@ async def store_messages(
     ]
 
 
-async def get_all_chat_history(org_id: int):
-    chat_history = await execute_db_operation(
-        f"""
+def _get_org_chat_history_query(
+    org_id: int,
+    since: datetime = None,
+    after_id: int = None,
+    limit: int = None,
+) -> Tuple[str, Tuple]:
+    # pages are keyed on the message id so that a page can be resumed from the last
+    # message seen without an OFFSET scan over everything before it
+    filters = ""
+    params = [org_id]
+
+    if since is not None:
+        filters += " AND datetime(message.created_at) >= datetime(?)"
+        params.append(since)
+
+    if after_id is not None:
+        filters += " AND message.id > ?"
+        params.append(after_id)
+
+    query = f"""
         SELECT message.id, message.created_at, user.id AS user_id, user.email AS user_email, message.question_id, task.id AS task_id, message.role, message.content, message.response_type
         FROM {chat_history_table_name} message
         INNER JOIN {questions_table_name} question ON message.question_id = question.id
         INNER JOIN {tasks_table_name} task ON question.task_id = task.id
         INNER JOIN {users_table_name} user ON message.user_id = user.id 
-        WHERE task.deleted_at IS NULL AND task.org_id = ?
-        ORDER BY message.created_at ASC
-        """,
-        (org_id,),
-        fetch_all=True,
-    )
+        WHERE task.deleted_at IS NULL AND task.org_id = ?{filters}
+        ORDER BY message.id ASC
+        """
 
-    return [
-        {
-            "id": row[0],
-            "created_at": row[1],
-            "user_id": row[2],
-            "user_email": row[3],
-            "question_id": row[4],
-            "task_id": row[5],
-            "role": row[6],
-            "content": row[7],
-            "response_type": row[8],
-        }
-        for row in chat_history
-    ]
+    if limit is not None:
+        query += "LIMIT ?"
+        params.append(limit)
+
+    return query, tuple(params)
+
+
+def convert_org_chat_message_to_dict(row: Tuple) -> Dict:
+    return {
+        "id": row[0],
+        "created_at": row[1],
+        "user_id": row[2],
+        "user_email": row[3],
+        "question_id": row[4],
+        "task_id": row[5],
+        "role": row[6],
+        "content": row[7],
+        "response_type": row[8],
+    }
+
+
+async def get_all_chat_history(
+    org_id: int,
+    since: datetime = None,
+    after_id: int = None,
+    limit: int = None,
+) -> List[Dict]:
+    query, params = _get_org_chat_history_query(org_id, since, after_id, limit)
+
+    chat_history = await execute_db_operation(query, params, fetch_all=True)
+
+    return [convert_org_chat_message_to_dict(row) for row in chat_history]
+
+
+async def get_all_chat_history_in_chunks(
+    org_id: int,
+    since: datetime = None,
+    after_id: int = None,
+    chunk_size: int = 1000,
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yield the chat history of an org chunk by chunk from a single cursor so that
+    exporting it does not hold every message in memory at once.
+    """
+    query, params = _get_org_chat_history_query(org_id, since, after_id)
+
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await cursor.execute(query, params)
+
+        while rows := await cursor.fetchmany(chunk_size):
+            yield [convert_org_chat_message_to_dict(row) for row in rows]
 
 
 def convert_chat_message_to_dict(message: Tuple) -> ChatMessage:
@@ -165,9 +246,10 @@ async def get_task_chat_history_for_user(
 
 
 async def delete_message(message_id: int):
-    await execute_db_operation(
-        f"DELETE FROM {chat_history_table_name} WHERE id = ?", (message_id,)
-    )
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await delete_chat_history_with_activity(cursor, "id = ?", (message_id,))
+        await conn.commit()
 
 
 async def update_message_timestamp(message_id: int, new_timestamp: datetime):
@@ -178,11 +260,23 @@ async def update_message_timestamp(message_id: int, new_timestamp: datetime):
 
 
 async def delete_user_chat_history_for_task(question_id: int, user_id: int):
-    await execute_db_operation(
-        f"DELETE FROM {chat_history_table_name} WHERE question_id = ? AND user_id = ?",
-        (question_id, user_id),
-    )
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await delete_chat_history_with_activity(
+            cursor, "question_id = ? AND user_id = ?", (question_id, user_id)
+        )
+        await conn.commit()
 
 
 async def delete_all_chat_history():
-    await execute_db_operation(f"DELETE FROM {chat_history_table_name}")
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await cursor.execute(f"DELETE FROM {chat_history_table_name}")
+        # no messages are left to count
+        await cursor.execute(
+            f"UPDATE {user_daily_activity_table_name} SET message_count = 0"
+        )
+        await cursor.execute(
+            f"DELETE FROM {user_daily_activity_table_name} WHERE completion_count = 0"
+        )
+        await conn.commit()
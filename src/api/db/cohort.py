@@ -13,6 +13,8 @@ from api.config import (
     organizations_table_name,
     user_organizations_table_name,
     users_table_name,
+    user_daily_activity_table_name,
+    cohort_leaderboard_table_name,
 )
 from api.utils.db import (
     execute_db_operation,
@@ -20,8 +22,10 @@ from api.utils.db import (
     execute_multiple_db_operations,
     get_new_db_connection,
 )
-from api.db.user import insert_or_return_user
+from api.db.user import insert_or_return_user, backfill_user_daily_activity
+from api.db.leaderboard import backfill_cohort_leaderboards
 from api.db.course import get_course
+from api.db.utils import clear_user_courses_cache
 from api.slack import send_slack_notification_for_learner_added_to_cohort
 
 
@@ -53,6 +57,13 @@ async def add_courses_to_cohort(
         values,
     )
 
+    # every member of the cohort now has the new courses
+    clear_user_courses_cache()
+
+    # activity on the newly added courses now counts towards the cohort
+    await backfill_user_daily_activity([cohort_id])
+    await backfill_cohort_leaderboards([cohort_id])
+
 
 async def add_course_to_cohorts(
     course_id: int,
@@ -82,6 +93,11 @@ async def add_course_to_cohorts(
         values,
     )
 
+    clear_user_courses_cache()
+
+    await backfill_user_daily_activity(cohort_ids)
+    await backfill_cohort_leaderboards(cohort_ids)
+
 
 async def remove_course_from_cohorts(course_id: int, cohort_ids: List[int]):
     await execute_many_db_operation(
@@ -89,6 +105,11 @@ async def remove_course_from_cohorts(course_id: int, cohort_ids: List[int]):
         [(course_id, cohort_id) for cohort_id in cohort_ids],
     )
 
+    clear_user_courses_cache()
+
+    await backfill_user_daily_activity(cohort_ids)
+    await backfill_cohort_leaderboards(cohort_ids)
+
 
 async def remove_courses_from_cohort(cohort_id: int, course_ids: List[int]):
     await execute_many_db_operation(
@@ -96,6 +117,11 @@ async def remove_courses_from_cohort(cohort_id: int, course_ids: List[int]):
         [(cohort_id, course_id) for course_id in course_ids],
     )
 
+    clear_user_courses_cache()
+
+    await backfill_user_daily_activity([cohort_id])
+    await backfill_cohort_leaderboards([cohort_id])
+
 
 async def update_cohort_name(cohort_id: int, name: str):
     await execute_db_operation(
@@ -123,6 +149,14 @@ async def delete_cohort(cohort_id: int):
                 f"DELETE FROM {course_cohorts_table_name} WHERE cohort_id = ?",
                 (cohort_id,),
             ),
+            (
+                f"DELETE FROM {user_daily_activity_table_name} WHERE cohort_id = ?",
+                (cohort_id,),
+            ),
+            (
+                f"DELETE FROM {cohort_leaderboard_table_name} WHERE cohort_id = ?",
+                (cohort_id,),
+            ),
             (
                 f"DELETE FROM {cohorts_table_name} WHERE id = ?",
                 (cohort_id,),
@@ -130,6 +164,8 @@ async def delete_cohort(cohort_id: int):
         ]
     )
 
+    clear_user_courses_cache()
+
 
 def drop_cohorts_table():
     execute_db_operation(f"DROP TABLE IF EXISTS {cohorts_table_name}")
@@ -244,6 +280,11 @@ async def add_members_to_cohort(
 
         await conn.commit()
 
+    clear_user_courses_cache([user["id"] for user in users_to_add])
+
+    # pick up the completions and activity of the new learners from before they joined
+    await backfill_cohort_leaderboards([cohort_id])
+
 
 async def remove_members_from_cohort(cohort_id: int, member_ids: List[int]):
     members_in_cohort = await execute_db_operation(
@@ -271,6 +312,8 @@ async def remove_members_from_cohort(cohort_id: int, member_ids: List[int]):
         ]
     )
 
+    clear_user_courses_cache(member_ids)
+
 
 async def get_cohorts_for_org(org_id: int) -> List[Dict]:
     """Get all cohorts that belong to an organization"""
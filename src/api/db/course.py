@@ -1,4 +1,5 @@
 from typing import Dict, List, Tuple, Optional
+import hashlib
 from datetime import datetime, timezone, timedelta
 from dateutil.relativedelta import relativedelta
 from uuid import uuid4
@@ -21,16 +22,19 @@ from api.config import (
     task_generation_jobs_table_name,
     organizations_table_name,
     group_role_learner,
+    group_role_mentor,
+    user_cohorts_table_name,
+    user_organizations_table_name,
+    ordering_gap,
 )
-from api.db.task import (
-    get_task,
-    create_draft_task_for_course,
-    update_learning_material_task,
-    update_draft_quiz,
-    get_scorecard,
-    create_scorecard,
+from api.db.task import get_tasks_content
+from api.db.utils import (
+    EnumEncoder,
+    get_ordering_for_insert,
+    get_cached_user_courses,
+    cache_user_courses,
+    clear_user_courses_cache,
 )
-from api.db.utils import EnumEncoder, get_org_id_for_course
 from api.utils.db import (
     execute_db_operation,
     get_new_db_connection,
@@ -38,7 +42,6 @@ from api.utils.db import (
     execute_many_db_operation,
     deserialise_list_from_str,
 )
-from api.db.user import get_user_cohorts, get_user_organizations
 from api.db.org import get_org_by_id
 from api.slack import send_slack_notification_for_new_course
 from api.models import (
@@ -50,6 +53,13 @@ from api.models import (
 )
 
 
+# how many compiled course skeletons are kept in memory at most
+COURSE_SKELETON_CACHE_SIZE = 512
+
+# course_id -> (version of the course the skeleton was built from, skeleton)
+_course_skeletons: Dict[int, Tuple[str, Dict]] = {}
+
+
 async def calculate_milestone_unlock_dates(
     course_details: Dict, drip_config: Dict, joined_at: datetime | None = None
 ):
@@ -157,16 +167,33 @@ async def get_courses_for_cohort(
     if not include_tree:
         return courses
 
+    course_skeletons = await get_course_skeletons([course["id"] for course in courses])
+
     for index, course in enumerate(courses):
-        course_details = await get_course(course["id"])
-        course_details = await calculate_milestone_unlock_dates(
-            course_details, course["drip_config"], joined_at
+        courses[index] = await overlay_milestone_unlock_dates(
+            course_skeletons[course["id"]], course["drip_config"], joined_at
         )
-        courses[index] = course_details
 
     return courses
 
 
+async def overlay_milestone_unlock_dates(
+    course_skeleton: Dict, drip_config: Dict, joined_at: datetime | None = None
+) -> Dict:
+    """
+    A learner's view of a shared course skeleton: only the course and its milestones
+    are copied to hold the learner's unlock dates, the tasks are shared as they are.
+    """
+    course_details = {
+        **course_skeleton,
+        "milestones": [dict(milestone) for milestone in course_skeleton["milestones"]],
+    }
+
+    return await calculate_milestone_unlock_dates(
+        course_details, drip_config, joined_at
+    )
+
+
 async def store_course_generation_request(course_id: int, job_details: Dict) -> str:
     job_uuid = str(uuid4())
 
@@ -205,75 +232,191 @@ async def get_course_generation_job_details(job_uuid: str) -> Dict:
         return json.loads(job[0])
 
 
-async def duplicate_course_to_org(course_id: int, org_id: int):
-    course = await get_course(course_id)
+def _get_next_id_base(table_name: str) -> str:
+    # ids handed out to explicitly-numbered rows must never reuse an AUTOINCREMENT id,
+    # so start after both the sequence and the current maximum
+    return f"""MAX(
+        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = '{table_name}'), 0),
+        COALESCE((SELECT MAX(id) FROM {table_name}), 0)
+    )"""
+
+
+async def duplicate_course_to_org(course_id: int, org_id: int) -> int:
+    org = await get_org_by_id(org_id)
+
+    if not org:
+        raise Exception(f"Organization with id '{org_id}' not found")
+
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+
+        await cursor.execute(
+            f"SELECT name FROM {courses_table_name} WHERE id = ?", (course_id,)
+        )
+        course = await cursor.fetchone()
+
+        if not course:
+            raise ValueError("Course not found")
 
-    new_course_id = await create_course(course["name"], org_id)
+        name = course[0]
 
-    for milestone in course["milestones"]:
-        new_milestone_id, _ = await add_milestone_to_course(
-            new_course_id, milestone["name"], milestone["color"]
+        # inserting the course first takes the write lock before any new ids are assigned
+        await cursor.execute(
+            f"INSERT INTO {courses_table_name} (name, org_id) VALUES (?, ?)",
+            (name, org_id),
         )
 
-        for task in milestone["tasks"]:
-            task_details = await get_task(task["id"])
+        new_course_id = cursor.lastrowid
 
-            new_task_id, _ = await create_draft_task_for_course(
-                task_details["title"],
-                task_details["type"],
-                new_course_id,
-                new_milestone_id,
+        # the temp tables map every copied row to the id it gets in the new course and
+        # go away with the connection
+        await cursor.execute(
+            "CREATE TEMP TABLE milestone_id_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL, ordering INTEGER NOT NULL)"
+        )
+        await cursor.execute(
+            "CREATE TEMP TABLE task_id_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL, type TEXT NOT NULL, milestone_id INTEGER NOT NULL, ordering INTEGER NOT NULL)"
+        )
+        await cursor.execute(
+            "CREATE TEMP TABLE scorecard_id_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)"
+        )
+        await cursor.execute(
+            "CREATE TEMP TABLE question_id_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL, task_id INTEGER NOT NULL, position INTEGER NOT NULL)"
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO milestone_id_map (old_id, new_id, ordering)
+            SELECT cm.milestone_id,
+                {_get_next_id_base(milestones_table_name)} + ROW_NUMBER() OVER (ORDER BY cm.ordering, cm.id),
+                (ROW_NUMBER() OVER (ORDER BY cm.ordering, cm.id) - 1) * {ordering_gap}
+            FROM {course_milestones_table_name} cm
+            INNER JOIN {milestones_table_name} m ON m.id = cm.milestone_id
+            WHERE cm.course_id = ?
+            """,
+            (course_id,),
+        )
+
+        # only the published tasks are copied, in their milestone order
+        await cursor.execute(
+            f"""
+            INSERT INTO task_id_map (old_id, new_id, type, milestone_id, ordering)
+            SELECT t.id,
+                {_get_next_id_base(tasks_table_name)} + ROW_NUMBER() OVER (ORDER BY mm.ordering, ct.ordering, ct.id),
+                t.type,
+                mm.new_id,
+                (ROW_NUMBER() OVER (PARTITION BY mm.old_id ORDER BY ct.ordering, ct.id) - 1) * {ordering_gap}
+            FROM {course_tasks_table_name} ct
+            INNER JOIN {tasks_table_name} t ON t.id = ct.task_id
+            INNER JOIN milestone_id_map mm ON mm.old_id = ct.milestone_id
+            WHERE ct.course_id = ? AND t.deleted_at IS NULL
+            AND t.status = '{TaskStatus.PUBLISHED}' AND t.scheduled_publish_at IS NULL
+            """,
+            (course_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO question_id_map (old_id, new_id, task_id, position)
+            SELECT q.id,
+                {_get_next_id_base(questions_table_name)} + ROW_NUMBER() OVER (ORDER BY tm.new_id, q.position, q.id),
+                tm.new_id,
+                ROW_NUMBER() OVER (PARTITION BY q.task_id ORDER BY q.position, q.id) - 1
+            FROM {questions_table_name} q
+            INNER JOIN task_id_map tm ON tm.old_id = q.task_id
+            WHERE tm.type = '{TaskType.QUIZ}'
+            """
+        )
+
+        # each scorecard used by the copied questions is copied once into the new org
+        await cursor.execute(
+            f"""
+            INSERT INTO scorecard_id_map (old_id, new_id)
+            SELECT s.id, {_get_next_id_base(scorecards_table_name)} + ROW_NUMBER() OVER (ORDER BY s.id)
+            FROM {scorecards_table_name} s
+            WHERE s.id IN (
+                SELECT qs.scorecard_id FROM {question_scorecards_table_name} qs
+                INNER JOIN question_id_map qm ON qm.old_id = qs.question_id
             )
+            """
+        )
 
-            if task_details["type"] == TaskType.LEARNING_MATERIAL:
-                await update_learning_material_task(
-                    new_task_id,
-                    task_details["title"],
-                    task_details["blocks"],
-                    None,
-                    TaskStatus.PUBLISHED,
-                )
-            else:
-                # Handle quiz tasks with scorecard duplication
-                scorecard_mapping = {}  # Map original scorecard_id to new scorecard_id
-
-                for question in task_details["questions"]:
-                    if question.get("scorecard_id") is not None:
-                        original_scorecard_id = question["scorecard_id"]
-
-                        # Check if we've already duplicated this scorecard
-                        if original_scorecard_id not in scorecard_mapping:
-                            # Get the original scorecard
-                            original_scorecard = await get_scorecard(
-                                original_scorecard_id
-                            )
-
-                            # Create new scorecard for the new org
-                            new_scorecard = await create_scorecard(
-                                {
-                                    "title": original_scorecard["title"],
-                                    "criteria": original_scorecard["criteria"],
-                                    "org_id": org_id,
-                                },
-                                ScorecardStatus.PUBLISHED,
-                            )
-
-                            scorecard_mapping[original_scorecard_id] = new_scorecard[
-                                "id"
-                            ]
-
-                        # Update question to use the new scorecard
-                        question["scorecard_id"] = scorecard_mapping[
-                            original_scorecard_id
-                        ]
-
-                await update_draft_quiz(
-                    new_task_id,
-                    task_details["title"],
-                    task_details["questions"],
-                    None,
-                    TaskStatus.PUBLISHED,
-                )
+        await cursor.execute(
+            f"""
+            INSERT INTO {milestones_table_name} (id, name, color, org_id)
+            SELECT mm.new_id, m.name, m.color, ?
+            FROM milestone_id_map mm
+            INNER JOIN {milestones_table_name} m ON m.id = mm.old_id
+            """,
+            (org_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {course_milestones_table_name} (course_id, milestone_id, ordering)
+            SELECT ?, new_id, ordering FROM milestone_id_map
+            """,
+            (new_course_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {tasks_table_name} (id, org_id, type, blocks, title, status)
+            SELECT tm.new_id, ?, t.type,
+                CASE WHEN t.type = '{TaskType.LEARNING_MATERIAL}' THEN COALESCE(t.blocks, '[]') END,
+                t.title, '{TaskStatus.PUBLISHED}'
+            FROM task_id_map tm
+            INNER JOIN {tasks_table_name} t ON t.id = tm.old_id
+            """,
+            (org_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {course_tasks_table_name} (course_id, task_id, milestone_id, ordering)
+            SELECT ?, new_id, milestone_id, ordering FROM task_id_map
+            """,
+            (new_course_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {scorecards_table_name} (id, org_id, title, criteria, status)
+            SELECT sm.new_id, ?, s.title, s.criteria, '{ScorecardStatus.PUBLISHED}'
+            FROM scorecard_id_map sm
+            INNER JOIN {scorecards_table_name} s ON s.id = sm.old_id
+            """,
+            (org_id,),
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {questions_table_name} (id, task_id, type, blocks, answer, input_type, response_type, coding_language, generation_model, context, position, max_attempts, is_feedback_shown, title)
+            SELECT qm.new_id, qm.task_id, q.type, COALESCE(q.blocks, '[]'), q.answer, q.input_type, q.response_type, q.coding_language, NULL, q.context, qm.position, q.max_attempts, q.is_feedback_shown, q.title
+            FROM question_id_map qm
+            INNER JOIN {questions_table_name} q ON q.id = qm.old_id
+            """
+        )
+
+        await cursor.execute(
+            f"""
+            INSERT INTO {question_scorecards_table_name} (question_id, scorecard_id)
+            SELECT qm.new_id, sm.new_id
+            FROM {question_scorecards_table_name} qs
+            INNER JOIN question_id_map qm ON qm.old_id = qs.question_id
+            INNER JOIN scorecard_id_map sm ON sm.old_id = qs.scorecard_id
+            """
+        )
+
+        await conn.commit()
+
+    # the admins of the org now have one more course
+    clear_user_courses_cache()
+
+    await send_slack_notification_for_new_course(
+        name, new_course_id, org["slug"], org_id
+    )
+
+    return new_course_id
 
 
 async def update_course_generation_job_status_and_details(
@@ -356,6 +499,8 @@ async def transfer_course_to_org(course_id: int, org_id: int):
         (org_id, course_id),
     )
 
+    clear_user_courses_cache()
+
     milestones = await execute_db_operation(
         f"SELECT cm.milestone_id FROM {course_milestones_table_name} cm INNER JOIN {courses_table_name} c ON cm.course_id = c.id WHERE c.id = ?",
         (course_id,),
@@ -541,6 +686,8 @@ async def delete_course(course_id: int):
         ]
     )
 
+    clear_user_courses_cache()
+
 
 def delete_all_courses_for_org(org_id: int):
     execute_multiple_db_operations(
@@ -553,6 +700,8 @@ def delete_all_courses_for_org(org_id: int):
         ]
     )
 
+    clear_user_courses_cache()
+
 
 async def swap_milestone_ordering_for_course(
     course_id: int, milestone_1_id: int, milestone_2_id: int
@@ -626,6 +775,8 @@ async def create_course(name: str, org_id: int) -> int:
         get_last_row_id=True,
     )
 
+    clear_user_courses_cache()
+
     await send_slack_notification_for_new_course(name, course_id, org["slug"], org_id)
 
     return course_id
@@ -742,12 +893,315 @@ async def get_course(course_id: int, only_published: bool = True) -> Dict:
     return course_dict
 
 
+async def get_course_trees(course_ids: List[int]) -> Dict[int, Dict]:
+    """
+    The same tree as `get_course` (with only the published tasks) for several courses
+    at once, keyed by course id. The milestones and tasks of all the courses are read
+    in a single query each, and the question counts of the quizzes come from one
+    grouped count instead of a subquery per task.
+    """
+    if not course_ids:
+        return {}
+
+    course_ids_placeholder = ", ".join(["?"] * len(course_ids))
+
+    courses = await execute_db_operation(
+        f"""SELECT c.id, c.name, cgj.status as course_generation_status
+            FROM {courses_table_name} c
+            LEFT JOIN {course_generation_jobs_table_name} cgj ON c.id = cgj.course_id
+            WHERE c.id IN ({course_ids_placeholder})""",
+        tuple(course_ids),
+        fetch_all=True,
+    )
+
+    milestones = await execute_db_operation(
+        f"""SELECT cm.course_id, m.id, m.name, m.color, cm.ordering
+            FROM {course_milestones_table_name} cm
+            JOIN {milestones_table_name} m ON cm.milestone_id = m.id
+            WHERE cm.course_id IN ({course_ids_placeholder})
+            ORDER BY cm.course_id, cm.ordering""",
+        tuple(course_ids),
+        fetch_all=True,
+    )
+
+    tasks = await execute_db_operation(
+        f"""SELECT ct.course_id, t.id, t.title, t.type, t.status, t.scheduled_publish_at, ct.milestone_id, ct.ordering,
+            (CASE WHEN t.type = '{TaskType.QUIZ}' THEN COALESCE(qc.num_questions, 0) ELSE NULL END) as num_questions,
+            tgj.status as task_generation_status
+            FROM {course_tasks_table_name} ct
+            JOIN {tasks_table_name} t ON ct.task_id = t.id
+            LEFT JOIN (
+                SELECT q.task_id, COUNT(*) as num_questions
+                FROM {questions_table_name} q
+                WHERE q.task_id IN (
+                    SELECT task_id FROM {course_tasks_table_name}
+                    WHERE course_id IN ({course_ids_placeholder})
+                )
+                GROUP BY q.task_id
+            ) qc ON qc.task_id = t.id
+            LEFT JOIN {task_generation_jobs_table_name} tgj ON t.id = tgj.task_id
+            WHERE ct.course_id IN ({course_ids_placeholder}) AND t.deleted_at IS NULL
+            AND t.status = '{TaskStatus.PUBLISHED}' AND t.scheduled_publish_at IS NULL
+            ORDER BY ct.course_id, ct.milestone_id, ct.ordering""",
+        tuple(course_ids) * 2,
+        fetch_all=True,
+    )
+
+    tasks_by_milestone = defaultdict(list)
+    for task in tasks:
+        tasks_by_milestone[(task[0], task[6])].append(
+            {
+                "id": task[1],
+                "title": task[2],
+                "type": task[3],
+                "status": task[4],
+                "scheduled_publish_at": task[5],
+                "ordering": task[7],
+                "num_questions": task[8],
+                "is_generating": task[9] is not None
+                and task[9] == GenerateTaskJobStatus.STARTED,
+            }
+        )
+
+    course_trees = {}
+    for course in courses:
+        # a course with more than one generation job only keeps the first one, as
+        # in get_course
+        course_trees.setdefault(
+            course[0],
+            {
+                "id": course[0],
+                "name": course[1],
+                "course_generation_status": course[2],
+                "milestones": [],
+            },
+        )
+
+    for milestone in milestones:
+        course_id, milestone_id = milestone[0], milestone[1]
+
+        course_trees[course_id]["milestones"].append(
+            {
+                "id": milestone_id,
+                "name": milestone[2],
+                "color": milestone[3],
+                "ordering": milestone[4],
+                "tasks": tasks_by_milestone.get((course_id, milestone_id), []),
+            }
+        )
+
+    return course_trees
+
+
+async def get_course_skeleton_versions(course_ids: List[int]) -> Dict[int, str]:
+    """
+    Fingerprints of the published trees of the given courses, like `get_course_version`,
+    that also change with the generation jobs of the course and its tasks.
+    """
+    if not course_ids:
+        return {}
+
+    versions = await execute_db_operation(
+        f"""
+        SELECT c.id, c.name,
+            (SELECT MAX(MAX(ct.updated_at), MAX(t.updated_at)) FROM {course_tasks_table_name} ct
+             INNER JOIN {tasks_table_name} t ON ct.task_id = t.id WHERE ct.course_id = c.id),
+            (SELECT COUNT(*) FROM {course_tasks_table_name} WHERE course_id = c.id),
+            (SELECT MAX(m.updated_at) FROM {course_milestones_table_name} cm
+             INNER JOIN {milestones_table_name} m ON cm.milestone_id = m.id WHERE cm.course_id = c.id),
+            (SELECT COUNT(*) FROM {course_milestones_table_name} WHERE course_id = c.id),
+            (SELECT GROUP_CONCAT(status) FROM {course_generation_jobs_table_name} WHERE course_id = c.id),
+            (SELECT GROUP_CONCAT(task_id || ':' || status) FROM {task_generation_jobs_table_name} WHERE course_id = c.id)
+        FROM {courses_table_name} c
+        WHERE c.id IN ({", ".join(["?"] * len(course_ids))})
+        """,
+        tuple(course_ids),
+        fetch_all=True,
+    )
+
+    return {
+        version[0]: hashlib.sha256(json.dumps(version[1:]).encode()).hexdigest()
+        for version in versions
+    }
+
+
+async def get_course_skeletons(course_ids: List[int]) -> Dict[int, Dict]:
+    """
+    The published trees of the given courses, as built by `get_course_trees`, keyed
+    by course id. A tree is built once per version of its course and then shared by
+    every learner of the course, so the returned trees must not be modified; use
+    `overlay_milestone_unlock_dates` for what differs between learners.
+    """
+    # the versions are read before the trees, so a change made in between can only
+    # make a cached tree be rebuilt once more, never be kept when it is stale
+    versions = await get_course_skeleton_versions(course_ids)
+
+    course_skeletons = {}
+    stale_course_ids = []
+    for course_id, version in versions.items():
+        cached = _course_skeletons.get(course_id)
+
+        if cached and cached[0] == version:
+            course_skeletons[course_id] = cached[1]
+        else:
+            stale_course_ids.append(course_id)
+
+    if not stale_course_ids:
+        return course_skeletons
+
+    course_trees = await get_course_trees(stale_course_ids)
+
+    for course_id, course_tree in course_trees.items():
+        _course_skeletons.pop(course_id, None)
+
+        if len(_course_skeletons) >= COURSE_SKELETON_CACHE_SIZE:
+            # forget the skeleton that was built the longest time ago
+            _course_skeletons.pop(next(iter(_course_skeletons)))
+
+        _course_skeletons[course_id] = (versions[course_id], course_tree)
+        course_skeletons[course_id] = course_tree
+
+    return course_skeletons
+
+
+async def get_course_version(course_id: int) -> Optional[str]:
+    """
+    A cheap fingerprint of everything that goes into a course and its task content,
+    which changes whenever any of it is created, updated, reordered or removed.
+    """
+    version = await execute_db_operation(
+        f"""
+        SELECT c.name,
+            (SELECT MAX(MAX(ct.updated_at), MAX(t.updated_at)) FROM {course_tasks_table_name} ct
+             INNER JOIN {tasks_table_name} t ON ct.task_id = t.id WHERE ct.course_id = c.id),
+            (SELECT COUNT(*) FROM {course_tasks_table_name} WHERE course_id = c.id),
+            (SELECT MAX(m.updated_at) FROM {course_milestones_table_name} cm
+             INNER JOIN {milestones_table_name} m ON cm.milestone_id = m.id WHERE cm.course_id = c.id),
+            (SELECT COUNT(*) FROM {course_milestones_table_name} WHERE course_id = c.id)
+        FROM {courses_table_name} c
+        WHERE c.id = ?
+        """,
+        (course_id,),
+        fetch_one=True,
+    )
+
+    if not version:
+        return None
+
+    return hashlib.sha256(json.dumps(version).encode()).hexdigest()
+
+
+async def get_course_changes(course_id: int, since: Optional[str] = None) -> Dict:
+    """
+    The milestones and published tasks of a course that changed after the `since`
+    cursor, with the content of the changed tasks, along with the ids of every
+    milestone and task currently in the course so that removals can be detected.
+    """
+    course = await execute_db_operation(
+        f"SELECT id, name FROM {courses_table_name} WHERE id = ?",
+        (course_id,),
+        fetch_one=True,
+    )
+
+    if not course:
+        return None
+
+    milestones = await execute_db_operation(
+        f"""SELECT m.id, m.name, m.color, cm.ordering, m.updated_at
+            FROM {course_milestones_table_name} cm
+            INNER JOIN {milestones_table_name} m ON cm.milestone_id = m.id
+            WHERE cm.course_id = ? ORDER BY cm.ordering""",
+        (course_id,),
+        fetch_all=True,
+    )
+
+    # every task of the course, published or not, so that the cursor also moves
+    # past tasks that were unpublished or deleted
+    tasks = await execute_db_operation(
+        f"""SELECT t.id, t.title, t.type, t.status, t.scheduled_publish_at, ct.milestone_id, ct.ordering,
+            (CASE WHEN t.type = '{TaskType.QUIZ}' THEN
+                (SELECT COUNT(*) FROM {questions_table_name} q
+                 WHERE q.task_id = t.id)
+             ELSE NULL END) as num_questions,
+            tgj.status as task_generation_status,
+            MAX(t.updated_at, ct.updated_at) as updated_at,
+            (t.deleted_at IS NULL AND t.status = '{TaskStatus.PUBLISHED}' AND t.scheduled_publish_at IS NULL) as is_visible
+            FROM {course_tasks_table_name} ct
+            INNER JOIN {tasks_table_name} t ON ct.task_id = t.id
+            LEFT JOIN {task_generation_jobs_table_name} tgj ON t.id = tgj.task_id
+            WHERE ct.course_id = ?
+            ORDER BY ct.milestone_id, ct.ordering""",
+        (course_id,),
+        fetch_all=True,
+    )
+
+    milestone_ids = set(milestone[0] for milestone in milestones)
+    visible_tasks = [task for task in tasks if task[10] and task[5] in milestone_ids]
+
+    def has_changed(updated_at: Optional[str]) -> bool:
+        return since is None or (updated_at is not None and updated_at > since)
+
+    visible_changed_tasks = [task for task in visible_tasks if has_changed(task[9])]
+
+    # the content of all the changed tasks is read at once
+    tasks_content = await get_tasks_content([task[0] for task in visible_changed_tasks])
+
+    changed_tasks = []
+    for task in visible_changed_tasks:
+        changed_task = {
+            "id": task[0],
+            "title": task[1],
+            "type": task[2],
+            "status": task[3],
+            "scheduled_publish_at": task[4],
+            "milestone_id": task[5],
+            "ordering": task[6],
+            "num_questions": task[7],
+            "is_generating": task[8] is not None
+            and task[8] == GenerateTaskJobStatus.STARTED,
+        }
+
+        task_content = tasks_content.get(task[0], {})
+
+        if task[2] == TaskType.LEARNING_MATERIAL:
+            changed_task["blocks"] = task_content.get("blocks", [])
+        else:
+            changed_task["questions"] = task_content.get("questions", [])
+
+        changed_tasks.append(changed_task)
+
+    timestamps = [row[4] for row in milestones if row[4]] + [
+        task[9] for task in tasks if task[9]
+    ]
+
+    return {
+        "id": course[0],
+        "name": course[1],
+        "cursor": max(timestamps + ([since] if since else []), default=None),
+        "milestones": [
+            {
+                "id": milestone[0],
+                "name": milestone[1],
+                "color": milestone[2],
+                "ordering": milestone[3],
+            }
+            for milestone in milestones
+            if has_changed(milestone[4])
+        ],
+        "tasks": changed_tasks,
+        "milestone_ids": [milestone[0] for milestone in milestones],
+        "task_ids": [task[0] for task in visible_tasks],
+    }
+
+
 async def update_course_name(course_id: int, name: str):
     await execute_db_operation(
         f"UPDATE {courses_table_name} SET name = ? WHERE id = ?",
         (name, course_id),
     )
 
+    clear_user_courses_cache()
+
 
 async def check_and_insert_missing_course_milestones(
     course_tasks_to_add: List[Tuple[int, int, int]],
@@ -779,7 +1233,7 @@ async def check_and_insert_missing_course_milestones(
                 # Get current max ordering for this course
                 max_ordering = (
                     await execute_db_operation(
-                        f"SELECT COALESCE(MAX(ordering), -1) FROM {course_milestones_table_name} WHERE course_id = ?",
+                        f"SELECT COALESCE(MAX(ordering), -{ordering_gap}) FROM {course_milestones_table_name} WHERE course_id = ?",
                         (course_id,),
                         fetch_one=True,
                     )
@@ -788,7 +1242,7 @@ async def check_and_insert_missing_course_milestones(
                 # Insert with incremented ordering
                 await execute_db_operation(
                     f"INSERT INTO {course_milestones_table_name} (course_id, milestone_id, ordering) VALUES (?, ?, ?)",
-                    (course_id, milestone_id, max_ordering + 1),
+                    (course_id, milestone_id, max_ordering + ordering_gap),
                 )
 
 
@@ -806,7 +1260,7 @@ async def add_tasks_to_courses(course_tasks_to_add: List[Tuple[int, int, int]]):
         # For each course, get max ordering and insert tasks with incremented order
         for course_id, task_details in course_to_tasks.items():
             await cursor.execute(
-                f"SELECT COALESCE(MAX(ordering), -1) FROM {course_tasks_table_name} WHERE course_id = ?",
+                f"SELECT COALESCE(MAX(ordering), -{ordering_gap}) FROM {course_tasks_table_name} WHERE course_id = ?",
                 (course_id,),
             )
             max_ordering = (await cursor.fetchone())[0]
@@ -815,7 +1269,7 @@ async def add_tasks_to_courses(course_tasks_to_add: List[Tuple[int, int, int]]):
             values_to_insert = []
             for i, (task_id, milestone_id) in enumerate(task_details, start=1):
                 values_to_insert.append(
-                    (task_id, course_id, max_ordering + i, milestone_id)
+                    (task_id, course_id, max_ordering + i * ordering_gap, milestone_id)
                 )
 
             await cursor.executemany(
@@ -843,28 +1297,27 @@ async def update_task_orders(task_orders: List[Tuple[int, int]]):
 async def add_milestone_to_course(
     course_id: int, milestone_name: str, milestone_color: str
 ) -> Tuple[int, int]:
-    org_id = await get_org_id_for_course(course_id)
-
     # Wrap the entire operation in a transaction
     async with get_new_db_connection() as conn:
         cursor = await conn.cursor()
 
-        # Get the max ordering value for this course
         await cursor.execute(
-            f"INSERT INTO {milestones_table_name} (name, color, org_id) VALUES (?, ?, ?)",
-            (milestone_name, milestone_color, org_id),
+            f"""
+            INSERT INTO {milestones_table_name} (name, color, org_id)
+            SELECT ?, ?, org_id FROM {courses_table_name} WHERE id = ?
+            """,
+            (milestone_name, milestone_color, course_id),
         )
 
+        if not cursor.rowcount:
+            raise ValueError("Course not found")
+
         milestone_id = cursor.lastrowid
 
-        await cursor.execute(
-            f"SELECT COALESCE(MAX(ordering), -1) FROM {course_milestones_table_name} WHERE course_id = ?",
-            (course_id,),
+        # Set the new milestone's order to come after all the others
+        next_order = await get_ordering_for_insert(
+            cursor, course_milestones_table_name, "course_id = ?", (course_id,)
         )
-        max_ordering = await cursor.fetchone()
-
-        # Set the new milestone's order to be the next value
-        next_order = max_ordering[0] + 1 if max_ordering else 0
 
         await cursor.execute(
             f"INSERT INTO {course_milestones_table_name} (course_id, milestone_id, ordering) VALUES (?, ?, ?)",
@@ -889,73 +1342,63 @@ async def get_user_courses(user_id: int) -> List[Dict]:
     1. Courses where the user is a learner or mentor through cohorts
     2. All courses from organizations where the user is an admin or owner
 
+    A course reached in more than one way takes the strongest role: admin, then
+    mentor, then learner. Learners also get the cohort they take the course in,
+    the one they joined last if there are several.
+
     Args:
         user_id: The ID of the user
 
     Returns:
         List of course dictionaries with their details and user's role
     """
-    async with get_new_db_connection() as conn:
-        cursor = await conn.cursor()
+    cached_courses = get_cached_user_courses(user_id)
+    if cached_courses is not None:
+        return cached_courses
 
-        # Get all courses where the user is a learner or mentor through cohorts
-        user_cohorts = await get_user_cohorts(user_id)
-
-        # Dictionary to track user's role in each course
-        course_roles = {}
-        course_to_cohort = {}
-
-        # Add courses from user's cohorts with their roles
-        for cohort in user_cohorts:
-            cohort_id = cohort["id"]
-            user_role_in_cohort = cohort.get("role")  # Get user's role in this cohort
-
-            cohort_courses = await get_courses_for_cohort(cohort_id)
-            for course in cohort_courses:
-                course_id = course["id"]
-                course_to_cohort[course_id] = cohort_id
-
-                # Only update role if not already an admin/owner
-                if course_id not in course_roles or course_roles[course_id] not in [
-                    "admin",
-                    "owner",
-                ]:
-                    course_roles[course_id] = user_role_in_cohort
-
-        # Get organizations where the user is an admin or owner
-        user_orgs = await get_user_organizations(user_id)
-        admin_owner_org_ids = [
-            org["id"] for org in user_orgs if org["role"] in ["admin", "owner"]
-        ]
+    rows = await execute_db_operation(
+        f"""
+        WITH user_course_roles AS (
+            SELECT cc.course_id, uc.role, cc.cohort_id,
+                (CASE WHEN uc.role = '{group_role_mentor}' THEN 1 ELSE 2 END) as precedence,
+                uc.id as membership_id
+            FROM {user_cohorts_table_name} uc
+            JOIN {course_cohorts_table_name} cc ON cc.cohort_id = uc.cohort_id
+            WHERE uc.user_id = ?
+            UNION ALL
+            SELECT c.id, 'admin', NULL, 0, uo.id
+            FROM {user_organizations_table_name} uo
+            JOIN {courses_table_name} c ON c.org_id = uo.org_id
+            WHERE uo.user_id = ? AND uo.role IN ('admin', 'owner')
+        ),
+        ranked_course_roles AS (
+            SELECT course_id, role, cohort_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY course_id ORDER BY precedence, membership_id DESC
+                ) as rank
+            FROM user_course_roles
+        )
+        SELECT c.id, c.name, o.id, o.name, o.slug, r.role, r.cohort_id
+        FROM ranked_course_roles r
+        JOIN {courses_table_name} c ON c.id = r.course_id
+        JOIN {organizations_table_name} o ON c.org_id = o.id
+        WHERE r.rank = 1
+        ORDER BY r.role = 'admin', c.id DESC
+        """,
+        (user_id, user_id),
+        fetch_all=True,
+    )
 
-        # Add all courses from organizations where user is admin or owner
-        for org_id in admin_owner_org_ids:
-            org_courses = await get_all_courses_for_org(org_id)
-            for course in org_courses:
-                course_id = course["id"]
-                # Admin/owner role takes precedence
-                course_roles[course_id] = "admin"
-
-        # If no courses found, return empty list
-        if not course_roles:
-            return []
-
-        # Fetch detailed information for all course IDs
-        courses = []
-        for course_id, role in course_roles.items():
-            # Fetch course from DB including org_id
-            await cursor.execute(
-                f"SELECT c.id, c.name, o.id, o.name, o.slug FROM {courses_table_name} c JOIN {organizations_table_name} o ON c.org_id = o.id WHERE c.id = ?",
-                (course_id,),
-            )
-            course_row = await cursor.fetchone()
-            if course_row:
-                course_dict = convert_course_db_to_dict(course_row)
-                course_dict["role"] = role  # Add user's role to the course dictionary
+    courses = []
+    for row in rows:
+        course_dict = convert_course_db_to_dict(row[:5])
+        course_dict["role"] = row[5]  # Add user's role to the course dictionary
 
-                if role == group_role_learner:
-                    course_dict["cohort_id"] = course_to_cohort[course_id]
+        if row[5] == group_role_learner:
+            course_dict["cohort_id"] = row[6]
 
-                courses.append(course_dict)
+        courses.append(course_dict)
 
-        return courses
+    cache_user_courses(user_id, courses)
+
+    return courses
@@ -0,0 +1,305 @@
+from typing import Dict, List, Optional
+from api.utils.db import execute_db_operation, get_new_db_connection
+from api.config import (
+    cohort_leaderboard_table_name,
+    course_cohorts_table_name,
+    course_tasks_table_name,
+    questions_table_name,
+    task_completions_table_name,
+    tasks_table_name,
+    user_cohorts_table_name,
+    user_daily_activity_table_name,
+    users_table_name,
+)
+from api.models import LeaderboardViewType, TaskType, TaskStatus
+
+IST_TODAY = "DATE(datetime('now', '+5 hours', '+30 minutes'))"
+
+# tasks that count towards a cohort's leaderboard, same as in get_cohort_completion
+LIVE_TASK_CONDITION = f"t.deleted_at IS NULL AND t.status = '{TaskStatus.PUBLISHED}' AND t.scheduled_publish_at IS NULL"
+
+
+def _get_period_start(view: LeaderboardViewType, date_expression: str) -> str:
+    # weeks start on monday
+    if view == LeaderboardViewType.WEEKLY:
+        return f"DATE({date_expression}, 'weekday 0', '-6 days')"
+    if view == LeaderboardViewType.MONTHLY:
+        return f"DATE({date_expression}, 'start of month')"
+
+    return "NULL"
+
+
+def _get_learner_task_cohorts_query() -> str:
+    # the cohorts of the user (as a learner) whose courses contain the task (or the task of the question)
+    return f"""
+        SELECT uc.cohort_id
+        FROM {user_cohorts_table_name} uc
+        JOIN {course_cohorts_table_name} cc ON cc.cohort_id = uc.cohort_id
+        JOIN {course_tasks_table_name} ct ON ct.course_id = cc.course_id
+        WHERE uc.user_id = ? AND uc.role = 'learner'
+        AND ct.task_id = COALESCE(?, (SELECT task_id FROM {questions_table_name} WHERE id = ?))
+        """
+
+
+async def record_leaderboard_activity(
+    cursor,
+    user_id: int,
+    activity_timestamps: List,
+    task_id: int = None,
+    question_id: int = None,
+):
+    """
+    Extends the user's streak in every leaderboard view of the cohorts the task (or the
+    task of the question) belongs to, in the transaction of the cursor that stored the
+    activity. A timestamp of None stands for the current time.
+
+    Only the latest streak is tracked per view: a day right after the last active day
+    extends it, a later day (or a day in a new week / month) starts a new one and an
+    earlier day is ignored.
+    """
+    if not activity_timestamps:
+        return
+
+    period_start = (
+        "CASE v.view_type "
+        + " ".join(
+            f"WHEN '{view}' THEN {_get_period_start(view, 'a.ist_date')}"
+            for view in LeaderboardViewType
+        )
+        + " END"
+    )
+    views = ", ".join(f"('{view}')" for view in LeaderboardViewType)
+
+    await cursor.executemany(
+        f"""
+        WITH a AS (
+            SELECT DATE(datetime(COALESCE(?, CURRENT_TIMESTAMP), '+5 hours', '+30 minutes')) AS ist_date
+        ),
+        v(view_type) AS (VALUES {views})
+        INSERT INTO {cohort_leaderboard_table_name} (cohort_id, view_type, user_id, period_start, last_active_date, streak_count)
+        SELECT DISTINCT c.cohort_id, v.view_type, ?, {period_start}, a.ist_date, 1
+        FROM ({_get_learner_task_cohorts_query()}) c, v, a
+        WHERE a.ist_date IS NOT NULL
+        ON CONFLICT(cohort_id, view_type, user_id) DO UPDATE SET
+            streak_count = CASE
+                WHEN period_start IS excluded.period_start AND last_active_date = DATE(excluded.last_active_date, '-1 day') THEN streak_count + 1
+                ELSE 1
+            END,
+            period_start = excluded.period_start,
+            last_active_date = excluded.last_active_date
+        WHERE last_active_date IS NULL OR excluded.last_active_date > last_active_date
+        """,
+        [
+            (timestamp, user_id, user_id, task_id, question_id)
+            for timestamp in activity_timestamps
+        ],
+    )
+
+
+async def record_leaderboard_task_completion(
+    cursor, user_id: int, task_id: int = None, question_id: int = None
+):
+    """
+    Counts a newly inserted task or question completion towards the tasks completed by
+    the user in the leaderboards of their cohorts. A question completion only counts
+    when it completes the last remaining question of its quiz.
+
+    Expects the user's leaderboard rows to exist, i.e. record_leaderboard_activity to have
+    been called for the task completion or for the messages stored with the question.
+    """
+    if task_id is not None:
+        completed_task_query = f"""
+        SELECT t.id
+        FROM {tasks_table_name} t
+        WHERE t.id = ? AND t.type = '{TaskType.LEARNING_MATERIAL}' AND {LIVE_TASK_CONDITION}
+        """
+        params = (task_id,)
+    else:
+        completed_task_query = f"""
+        SELECT t.id
+        FROM {questions_table_name} q
+        JOIN {tasks_table_name} t ON t.id = q.task_id
+        WHERE q.id = ? AND q.deleted_at IS NULL AND t.type = '{TaskType.QUIZ}' AND {LIVE_TASK_CONDITION}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM {questions_table_name} tq
+            LEFT JOIN {task_completions_table_name} tc ON tc.question_id = tq.id AND tc.user_id = ?
+            WHERE tq.task_id = t.id AND tq.deleted_at IS NULL AND tc.id IS NULL
+        )
+        """
+        params = (question_id, user_id)
+
+    await cursor.execute(
+        f"""
+        WITH completed_task AS ({completed_task_query})
+        UPDATE {cohort_leaderboard_table_name}
+        SET tasks_completed = tasks_completed + 1
+        WHERE user_id = ? AND cohort_id IN (
+            SELECT DISTINCT cc.cohort_id
+            FROM completed_task t
+            JOIN {course_tasks_table_name} ct ON ct.task_id = t.id
+            JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+        )
+        """,
+        (*params, user_id),
+    )
+
+
+async def rebuild_cohort_leaderboards(cursor, cohort_ids: List[int] = None):
+    """
+    Recomputes the leaderboards of the given cohorts (or of all cohorts if cohort_ids is
+    None) from user_daily_activity, task_completions and the tasks of the cohorts.
+
+    Reconciles whatever the incremental updates cannot see: changes to the courses,
+    tasks and questions of a cohort, new learners and streaks of past weeks / months.
+    """
+    if cohort_ids is not None and not cohort_ids:
+        return
+
+    if cohort_ids is None:
+        cohort_filter = ""
+        await cursor.execute(f"DELETE FROM {cohort_leaderboard_table_name}")
+    else:
+        cohort_filter = f"AND uc.cohort_id IN ({','.join(map(str, cohort_ids))})"
+        await cursor.execute(
+            f"DELETE FROM {cohort_leaderboard_table_name} WHERE cohort_id IN ({','.join(map(str, cohort_ids))})"
+        )
+
+    for view in LeaderboardViewType:
+        if view == LeaderboardViewType.ALL_TIME:
+            date_filter = ""
+        else:
+            date_filter = f"AND a.ist_date >= {_get_period_start(view, IST_TODAY)}"
+
+        await cursor.execute(
+            f"""
+            WITH learners AS (
+                SELECT DISTINCT uc.cohort_id, uc.user_id
+                FROM {user_cohorts_table_name} uc
+                WHERE uc.role = 'learner' {cohort_filter}
+            ),
+            cohort_tasks AS (
+                SELECT DISTINCT cc.cohort_id, t.id, t.type
+                FROM {tasks_table_name} t
+                JOIN {course_tasks_table_name} ct ON ct.task_id = t.id
+                JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+                WHERE cc.cohort_id IN (SELECT cohort_id FROM learners) AND {LIVE_TASK_CONDITION}
+            ),
+            quiz_questions AS (
+                SELECT ct.cohort_id, ct.id AS task_id, q.id AS question_id, COUNT(*) OVER (PARTITION BY ct.cohort_id, ct.id) AS num_questions
+                FROM cohort_tasks ct
+                JOIN {questions_table_name} q ON q.task_id = ct.id AND q.deleted_at IS NULL
+                WHERE ct.type = '{TaskType.QUIZ}'
+            ),
+            completed_tasks AS (
+                SELECT cohort_id, user_id, COUNT(*) AS tasks_completed
+                FROM (
+                    SELECT ct.cohort_id, tc.user_id, ct.id
+                    FROM cohort_tasks ct
+                    JOIN {task_completions_table_name} tc ON tc.task_id = ct.id
+                    WHERE ct.type = '{TaskType.LEARNING_MATERIAL}'
+                    GROUP BY ct.cohort_id, tc.user_id, ct.id
+
+                    UNION ALL
+
+                    SELECT qq.cohort_id, tc.user_id, qq.task_id
+                    FROM quiz_questions qq
+                    JOIN {task_completions_table_name} tc ON tc.question_id = qq.question_id
+                    GROUP BY qq.cohort_id, tc.user_id, qq.task_id
+                    HAVING COUNT(DISTINCT qq.question_id) = MAX(qq.num_questions)
+                )
+                GROUP BY cohort_id, user_id
+            ),
+            activity AS (
+                SELECT a.cohort_id, a.user_id, a.ist_date,
+                    julianday(a.ist_date) - ROW_NUMBER() OVER (PARTITION BY a.cohort_id, a.user_id ORDER BY a.ist_date) AS streak_group
+                FROM {user_daily_activity_table_name} a
+                JOIN learners l ON l.cohort_id = a.cohort_id AND l.user_id = a.user_id
+                WHERE true {date_filter}
+            ),
+            latest_streaks AS (
+                SELECT cohort_id, user_id, MAX(ist_date) AS last_active_date, COUNT(*) AS streak_count
+                FROM (
+                    SELECT *, MAX(streak_group) OVER (PARTITION BY cohort_id, user_id) AS latest_streak_group
+                    FROM activity
+                )
+                WHERE streak_group = latest_streak_group
+                GROUP BY cohort_id, user_id
+            )
+            INSERT INTO {cohort_leaderboard_table_name} (cohort_id, view_type, user_id, period_start, last_active_date, streak_count, tasks_completed)
+            SELECT l.cohort_id, '{view}', l.user_id, {_get_period_start(view, IST_TODAY)}, s.last_active_date, COALESCE(s.streak_count, 0), COALESCE(c.tasks_completed, 0)
+            FROM learners l
+            LEFT JOIN latest_streaks s ON s.cohort_id = l.cohort_id AND s.user_id = l.user_id
+            LEFT JOIN completed_tasks c ON c.cohort_id = l.cohort_id AND c.user_id = l.user_id
+            """
+        )
+
+
+async def backfill_cohort_leaderboards(cohort_ids: List[int] = None):
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await rebuild_cohort_leaderboards(cursor, cohort_ids)
+        await conn.commit()
+
+
+async def get_cohort_leaderboard(
+    cohort_id: int,
+    view: LeaderboardViewType = LeaderboardViewType.ALL_TIME,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns the learners of the cohort ordered by their current streak and then by the
+    number of tasks they have completed.
+    """
+    # a streak is only current if the learner was active today or yesterday in the
+    # ongoing week / month of the view
+    rows = await execute_db_operation(
+        f"""
+        SELECT u.id, u.email, u.first_name, u.middle_name, u.last_name,
+            CASE
+                WHEN lb.last_active_date >= DATE({IST_TODAY}, '-1 day') AND lb.period_start IS {_get_period_start(view, IST_TODAY)} THEN lb.streak_count
+                ELSE 0
+            END AS current_streak_count,
+            COALESCE(lb.tasks_completed, 0) AS tasks_completed
+        FROM {user_cohorts_table_name} uc
+        JOIN {users_table_name} u ON u.id = uc.user_id
+        LEFT JOIN {cohort_leaderboard_table_name} lb ON lb.cohort_id = uc.cohort_id AND lb.user_id = uc.user_id AND lb.view_type = ?
+        WHERE uc.cohort_id = ? AND uc.role = 'learner'
+        ORDER BY current_streak_count DESC, tasks_completed DESC, u.id
+        LIMIT ? OFFSET ?
+        """,
+        (str(view), cohort_id, -1 if limit is None else limit, offset),
+        fetch_all=True,
+    )
+
+    return [
+        {
+            "user": {
+                "id": row[0],
+                "email": row[1],
+                "first_name": row[2],
+                "middle_name": row[3],
+                "last_name": row[4],
+            },
+            "streak_count": row[5],
+            "tasks_completed": row[6],
+        }
+        for row in rows
+    ]
+
+
+async def get_cohort_num_tasks(cohort_id: int) -> int:
+    row = await execute_db_operation(
+        f"""
+        SELECT COUNT(DISTINCT t.id)
+        FROM {tasks_table_name} t
+        JOIN {course_tasks_table_name} ct ON ct.task_id = t.id
+        JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+        WHERE cc.cohort_id = ? AND t.type IN ('{TaskType.LEARNING_MATERIAL}', '{TaskType.QUIZ}') AND {LIVE_TASK_CONDITION}
+        """,
+        (cohort_id,),
+        fetch_one=True,
+    )
+
+    return row[0]
@@ -1,6 +1,8 @@
 from typing import Literal, List, Dict, Tuple
 import secrets
 import hashlib
+import hmac
+import time
 
 from api.utils.db import (
     get_new_db_connection,
@@ -13,11 +15,29 @@ from api.config import (
     org_api_keys_table_name,
 )
 from api.db.user import get_user_by_id, insert_or_return_user
+from api.db.utils import clear_user_courses_cache
 from api.slack import (
     send_slack_notification_for_new_org,
     send_slack_notification_for_member_added_to_org,
 )
 
+# how long a verified API key is trusted before it is checked against the db again
+API_KEY_CACHE_TTL = 60
+
+# hashed api key -> (org_id, time until which the key is trusted)
+_verified_api_keys: Dict[str, Tuple[int, float]] = {}
+
+
+def clear_api_key_cache(org_id: int = None):
+    """Forget the verified API keys of an org, or of every org if none is given."""
+    if org_id is None:
+        _verified_api_keys.clear()
+        return
+
+    for hashed_key, (key_org_id, _) in list(_verified_api_keys.items()):
+        if key_org_id == org_id:
+            _verified_api_keys.pop(hashed_key, None)
+
 
 async def get_all_orgs() -> List[Dict]:
     async with get_new_db_connection() as conn:
@@ -37,8 +57,9 @@ async def get_all_orgs() -> List[Dict]:
 
 def generate_api_key(org_id: int):
     """Generate a new API key"""
-    # Create a random API key
-    identifier = secrets.token_urlsafe(32)
+    # Create a random API key; hex keeps "__", which separates the parts of the key,
+    # out of the identifier
+    identifier = secrets.token_hex(32)
 
     api_key = f"org__{org_id}__{identifier}"
 
@@ -60,9 +81,20 @@ async def create_org_api_key(org_id: int) -> str:
 
         await conn.commit()
 
+        clear_api_key_cache(org_id)
+
         return api_key
 
 
+async def revoke_org_api_key(org_id: int, api_key_id: int):
+    await execute_db_operation(
+        f"DELETE FROM {org_api_keys_table_name} WHERE id = ? AND org_id = ?",
+        (api_key_id, org_id),
+    )
+
+    clear_api_key_cache(org_id)
+
+
 async def get_org_id_from_api_key(api_key: str) -> int:
     api_key_parts = api_key.split("__")
 
@@ -74,6 +106,12 @@ async def get_org_id_from_api_key(api_key: str) -> int:
     except ValueError:
         raise ValueError("Invalid API key")
 
+    hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+
+    cached = _verified_api_keys.get(hashed_key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
     rows = await execute_db_operation(
         f"SELECT hashed_key FROM {org_api_keys_table_name} WHERE org_id = ?",
         (org_id,),
@@ -83,10 +121,12 @@ async def get_org_id_from_api_key(api_key: str) -> int:
     if not rows:
         raise ValueError("Invalid API key")
 
-    hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
-
     for row in rows:
-        if hashed_key == row[0]:
+        if hmac.compare_digest(hashed_key, row[0]):
+            _verified_api_keys[hashed_key] = (
+                org_id,
+                time.monotonic() + API_KEY_CACHE_TTL,
+            )
             return org_id
 
     raise ValueError("Invalid API key")
@@ -121,6 +161,8 @@ async def create_organization_with_user(org_name: str, slug: str, user_id: int):
         await add_user_to_org_by_user_id(cursor, user_id, org_id, "owner")
         await conn.commit()
 
+    clear_user_courses_cache([user_id])
+
     await send_slack_notification_for_new_org(org_name, org_id, user)
 
     return org_id
@@ -253,11 +295,15 @@ async def add_users_to_org_by_email(
         )
         await conn.commit()
 
+    clear_user_courses_cache(user_ids)
+
 
 async def remove_members_from_org(org_id: int, user_ids: List[int]):
     query = f"DELETE FROM {user_organizations_table_name} WHERE org_id = ? AND user_id IN ({', '.join(map(str, user_ids))})"
     await execute_db_operation(query, (org_id,))
 
+    clear_user_courses_cache(user_ids)
+
 
 def convert_user_organization_db_to_dict(user_organization: Tuple):
     return {
@@ -314,6 +360,9 @@ async def update_org(org_id: int, org_name: str):
         (org_name, org_id),
     )
 
+    # the org name is shown with every course of the org
+    clear_user_courses_cache()
+
 
 async def update_org_openai_api_key(
     org_id: int, encrypted_openai_api_key: str, is_free_trial: bool
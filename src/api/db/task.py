@@ -2,7 +2,15 @@ from typing import Tuple, List, Dict
 import json
 from datetime import datetime, timedelta, timezone
 import uuid
-from api.db.utils import get_org_id_for_course
+from api.db.utils import get_ordering_for_insert
+from api.db.user import (
+    record_user_completion_activity,
+    delete_chat_history_with_activity,
+)
+from api.db.leaderboard import (
+    record_leaderboard_activity,
+    record_leaderboard_task_completion,
+)
 from api.config import (
     tasks_table_name,
     course_tasks_table_name,
@@ -21,7 +29,11 @@ from api.utils.db import (
     get_new_db_connection,
     execute_db_operation,
     serialise_list_to_str,
+    get_values_placeholder,
+    log_statement_count,
 )
+from api.utils.json_response import json_fragment
+from api.utils.timer import DeadlineTimer
 from api.models import (
     TaskType,
     TaskStatus,
@@ -42,61 +54,48 @@ async def create_draft_task_for_course(
     milestone_id: int,
     ordering: int = None,
 ) -> Tuple[int, int]:
-    org_id = await get_org_id_for_course(course_id)
-
     async with get_new_db_connection() as conn:
         cursor = await conn.cursor()
 
-        query = f"INSERT INTO {tasks_table_name} (org_id, type, title, status) VALUES (?, ?, ?, ?)"
-
         await cursor.execute(
-            query,
-            (org_id, str(type), title, "draft"),
+            f"""
+            INSERT INTO {tasks_table_name} (org_id, type, title, status)
+            SELECT org_id, ?, ?, ? FROM {courses_table_name} WHERE id = ?
+            """,
+            (str(type), title, "draft", course_id),
         )
 
+        if not cursor.rowcount:
+            raise ValueError("Course not found")
+
         task_id = cursor.lastrowid
 
-        if ordering is not None:
-            # Shift all tasks at or after the given ordering down by 1
-            await cursor.execute(
-                f"""
-                UPDATE {course_tasks_table_name}
-                SET ordering = ordering + 1
-                WHERE course_id = ? AND milestone_id = ? AND ordering >= ?
-                """,
-                (course_id, milestone_id, ordering),
-            )
-            insert_ordering = ordering
-        else:
-            # Get the maximum ordering value for this milestone
-            await cursor.execute(
-                f"SELECT COALESCE(MAX(ordering), -1) FROM {course_tasks_table_name} WHERE course_id = ? AND milestone_id = ?",
-                (course_id, milestone_id),
-            )
-            max_ordering = await cursor.fetchone()
-            insert_ordering = max_ordering[0] + 1 if max_ordering else 0
+        # the new task goes before the task at `ordering` if given, else at the end
+        insert_ordering = await get_ordering_for_insert(
+            cursor,
+            course_tasks_table_name,
+            "course_id = ? AND milestone_id = ?",
+            (course_id, milestone_id),
+            before=ordering,
+        )
 
         await cursor.execute(
             f"INSERT INTO {course_tasks_table_name} (course_id, task_id, milestone_id, ordering) VALUES (?, ?, ?, ?)",
             (course_id, task_id, milestone_id, insert_ordering),
         )
 
-        await conn.commit()
-
         # Compute the "visible" ordering (i.e., the index among non-deleted tasks)
-        visible_ordering_row = await execute_db_operation(
+        await cursor.execute(
             f"""
             SELECT COUNT(*) FROM {course_tasks_table_name} ct
             INNER JOIN {tasks_table_name} t ON ct.task_id = t.id
             WHERE ct.course_id = ? AND ct.milestone_id = ? AND ct.ordering < ? AND t.deleted_at IS NULL
             """,
             (course_id, milestone_id, insert_ordering),
-            fetch_one=True,
         )
+        visible_ordering = (await cursor.fetchone())[0]
 
-        visible_ordering = (
-            visible_ordering_row[0] if visible_ordering_row else insert_ordering
-        )
+        await conn.commit()
 
         return task_id, visible_ordering
 
@@ -126,22 +125,40 @@ async def get_all_learning_material_tasks_for_course(course_id: int):
     ]
 
 
-def convert_question_db_to_dict(question) -> Dict:
+def load_stored_json(value: str | None, default=None, raw_json: bool = False):
+    """
+    Decode a JSON column, or with `raw_json` wrap its text so that it is written into
+    the response as is (see `get_task`).
+    """
+    if not value:
+        return default
+
+    if raw_json:
+        return json_fragment(value)
+
+    return json.loads(value)
+
+
+def convert_question_db_to_dict(question, raw_json: bool = False) -> Dict:
     result = {
         "id": question[0],
         "type": question[1],
-        "blocks": json.loads(question[2]) if question[2] else [],
-        "answer": json.loads(question[3]) if question[3] else None,
+        "blocks": load_stored_json(question[2], [], raw_json),
+        "answer": load_stored_json(question[3], None, raw_json),
         "input_type": question[4],
         "response_type": question[5],
         "scorecard_id": question[6],
-        "context": json.loads(question[7]) if question[7] else None,
-        "coding_languages": json.loads(question[8]) if question[8] else None,
+        "context": load_stored_json(question[7], None, raw_json),
+        "coding_languages": load_stored_json(question[8], None, raw_json),
         "max_attempts": question[9],
         "is_feedback_shown": question[10],
         "title": question[11],
     }
 
+    if raw_json and result["is_feedback_shown"] is not None:
+        # stored as 0/1, which the response model would otherwise turn into a bool
+        result["is_feedback_shown"] = bool(result["is_feedback_shown"])
+
     return result
 
 
@@ -189,6 +206,17 @@ async def get_question(question_id: int) -> Dict:
     return question
 
 
+def convert_basic_task_db_to_dict(task: Tuple) -> Dict:
+    return {
+        "id": task[0],
+        "title": task[1],
+        "type": task[2],
+        "status": task[3],
+        "org_id": task[4],
+        "scheduled_publish_at": task[5],
+    }
+
+
 async def get_basic_task_details(task_id: int) -> Dict:
     task = await execute_db_operation(
         f"""
@@ -203,22 +231,29 @@ async def get_basic_task_details(task_id: int) -> Dict:
     if not task:
         return None
 
-    return {
-        "id": task[0],
-        "title": task[1],
-        "type": task[2],
-        "status": task[3],
-        "org_id": task[4],
-        "scheduled_publish_at": task[5],
-    }
+    return convert_basic_task_db_to_dict(task)
 
 
-async def get_task(task_id: int):
+async def get_task(task_id: int, raw_json: bool = False):
+    """
+    With `raw_json`, the stored blocks, answers, contexts and coding languages are
+    not decoded but returned as JSON fragments that `ORJSONResponse` splices into the
+    response body. The task is then already in the shape of its response model and
+    should be returned directly instead of going through FastAPI's validation.
+    """
     task_data = await get_basic_task_details(task_id)
 
     if not task_data:
         return None
 
+    if raw_json:
+        del task_data["org_id"]
+
+        if task_data["scheduled_publish_at"]:
+            task_data["scheduled_publish_at"] = datetime.fromisoformat(
+                task_data["scheduled_publish_at"]
+            )
+
     if task_data["type"] == TaskType.LEARNING_MATERIAL:
         result = await execute_db_operation(
             f"SELECT blocks FROM {tasks_table_name} WHERE id = ?",
@@ -226,7 +261,7 @@ async def get_task(task_id: int):
             fetch_one=True,
         )
 
-        task_data["blocks"] = json.loads(result[0]) if result[0] else []
+        task_data["blocks"] = load_stored_json(result[0], [], raw_json)
 
     elif task_data["type"] == TaskType.QUIZ:
         questions = await execute_db_operation(
@@ -241,12 +276,57 @@ async def get_task(task_id: int):
         )
 
         task_data["questions"] = [
-            convert_question_db_to_dict(question) for question in questions
+            convert_question_db_to_dict(question, raw_json) for question in questions
         ]
 
     return task_data
 
 
+async def get_tasks_content(task_ids: List[int]) -> Dict[int, Dict]:
+    """
+    The blocks of the learning materials and the questions of the quizzes among the
+    given tasks, as `get_task` returns them, keyed by task id. Read in one query for
+    the tasks and one for all their questions.
+    """
+    if not task_ids:
+        return {}
+
+    task_ids_placeholder = ", ".join(["?"] * len(task_ids))
+
+    tasks = await execute_db_operation(
+        f"""SELECT id, type, blocks FROM {tasks_table_name}
+            WHERE id IN ({task_ids_placeholder}) AND deleted_at IS NULL""",
+        tuple(task_ids),
+        fetch_all=True,
+    )
+
+    questions = await execute_db_operation(
+        f"""
+        SELECT q.task_id, q.id, q.type, q.blocks, q.answer, q.input_type, q.response_type, qs.scorecard_id, q.context, q.coding_language, q.max_attempts, q.is_feedback_shown, q.title
+        FROM {questions_table_name} q
+        LEFT JOIN {question_scorecards_table_name} qs ON q.id = qs.question_id
+        WHERE q.task_id IN ({task_ids_placeholder}) ORDER BY q.task_id, q.position ASC
+        """,
+        tuple(task_ids),
+        fetch_all=True,
+    )
+
+    tasks_content = {}
+    for task_id, task_type, blocks in tasks:
+        if task_type == TaskType.LEARNING_MATERIAL:
+            tasks_content[task_id] = {"blocks": load_stored_json(blocks, [])}
+        elif task_type == TaskType.QUIZ:
+            tasks_content[task_id] = {"questions": []}
+
+    for question in questions:
+        task_content = tasks_content.get(question[0])
+
+        if task_content is not None and "questions" in task_content:
+            task_content["questions"].append(convert_question_db_to_dict(question[1:]))
+
+    return tasks_content
+
+
 async def get_task_metadata(task_id: int) -> Dict:
     result = await execute_db_operation(
         f"""
@@ -332,7 +412,82 @@ async def update_learning_material_task(
 
         await conn.commit()
 
-        return await get_task(task_id)
+    scheduled_publish_timer.schedule(scheduled_publish_at)
+
+    return await get_task(task_id)
+
+
+def get_question_content_for_db(question: Dict) -> Tuple:
+    """The serialised values of the question columns that both quiz updates write."""
+    return (
+        str(question["type"]),
+        json.dumps(prepare_blocks_for_publish(question["blocks"])),
+        (
+            json.dumps(prepare_blocks_for_publish(question["answer"]))
+            if question["answer"]
+            else None
+        ),
+        str(question["input_type"]),
+        str(question["response_type"]),
+        (
+            json.dumps(question["coding_languages"])
+            if question["coding_languages"]
+            else None
+        ),
+        json.dumps(question["context"]) if question["context"] else None,
+        question["title"],
+    )
+
+
+async def update_quiz_task_details(
+    cursor, task_id: int, title: str, scheduled_publish_at: datetime, status=None
+) -> Tuple | None:
+    await cursor.execute(
+        f"""
+        UPDATE {tasks_table_name} SET title = ?, scheduled_publish_at = ?, status = COALESCE(?, status)
+        WHERE id = ? AND deleted_at IS NULL
+        RETURNING id, title, type, status, org_id, scheduled_publish_at
+        """,
+        (title, scheduled_publish_at, str(status) if status else None, task_id),
+    )
+
+    return await cursor.fetchone()
+
+
+async def link_question_scorecards(cursor, question_scorecard_ids: List[Tuple]):
+    """Link questions to their scorecards and publish the scorecards still in draft."""
+    if not question_scorecard_ids:
+        return
+
+    await cursor.execute(
+        f"""
+        INSERT INTO {question_scorecards_table_name} (question_id, scorecard_id)
+        VALUES {get_values_placeholder(2, len(question_scorecard_ids))}
+        """,
+        [value for pair in question_scorecard_ids for value in pair],
+    )
+
+    scorecard_ids = sorted({scorecard_id for _, scorecard_id in question_scorecard_ids})
+
+    await cursor.execute(
+        f"""
+        UPDATE {scorecards_table_name} SET status = ?
+        WHERE status = ? AND id IN ({', '.join(['?'] * len(scorecard_ids))})
+        """,
+        (str(ScorecardStatus.PUBLISHED), str(ScorecardStatus.DRAFT), *scorecard_ids),
+    )
+
+
+def convert_quiz_db_to_dict(task: Tuple, questions: List[Tuple]) -> Dict:
+    task_dict = convert_basic_task_db_to_dict(task)
+
+    # the last column of every question row is its position
+    task_dict["questions"] = [
+        convert_question_db_to_dict(question[:-1])
+        for question in sorted(questions, key=lambda question: question[-1])
+    ]
+
+    return task_dict
 
 
 async def update_draft_quiz(
@@ -342,193 +497,162 @@ async def update_draft_quiz(
     scheduled_publish_at: datetime,
     status: TaskStatus = TaskStatus.PUBLISHED,
 ):
-    if not await does_task_exist(task_id):
-        return False
-
-    task = await get_basic_task_details(task_id)
-
-    if not task:
-        return False
-
-    org_id = task["org_id"]
-
-    scorecard_uuid_to_id = {}
+    questions = [
+        question if isinstance(question, dict) else question.model_dump()
+        for question in questions
+    ]
 
     # Execute all operations in a single transaction
     async with get_new_db_connection() as conn:
-        cursor = await conn.cursor()
-
-        await cursor.execute(
-            f"DELETE FROM {question_scorecards_table_name} WHERE question_id IN (SELECT id FROM {questions_table_name} WHERE task_id = ?)",
-            (task_id,),
-        )
-
-        await cursor.execute(
-            f"DELETE FROM {questions_table_name} WHERE task_id = ?",
-            (task_id,),
-        )
+        async with log_statement_count(conn, f"update_draft_quiz({task_id})"):
+            cursor = await conn.cursor()
 
-        scorecards_to_publish = []
+            task = await update_quiz_task_details(
+                cursor, task_id, title, scheduled_publish_at, status
+            )
 
-        for index, question in enumerate(questions):
-            if not isinstance(question, dict):
-                question = question.model_dump()
+            if not task:
+                return False
 
             await cursor.execute(
-                f"""
-                INSERT INTO {questions_table_name} (task_id, type, blocks, answer, input_type, response_type, coding_language, generation_model, context, position, max_attempts, is_feedback_shown, title) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    task_id,
-                    str(question["type"]),
-                    json.dumps(prepare_blocks_for_publish(question["blocks"])),
-                    (
-                        json.dumps(prepare_blocks_for_publish(question["answer"]))
-                        if question["answer"]
-                        else None
-                    ),
-                    str(question["input_type"]),
-                    str(question["response_type"]),
-                    (
-                        json.dumps(question["coding_languages"])
-                        if question["coding_languages"]
-                        else None
-                    ),
-                    None,
-                    json.dumps(question["context"]) if question["context"] else None,
-                    index,
-                    question["max_attempts"],
-                    question["is_feedback_shown"],
-                    question["title"],
-                ),
+                f"DELETE FROM {question_scorecards_table_name} WHERE question_id IN (SELECT id FROM {questions_table_name} WHERE task_id = ?)",
+                (task_id,),
             )
 
-            question_id = cursor.lastrowid
+            await cursor.execute(
+                f"DELETE FROM {questions_table_name} WHERE task_id = ?",
+                (task_id,),
+            )
 
-            scorecard_id = None
-            if question.get("scorecard_id") is not None:
-                scorecard_id = question["scorecard_id"]
+            question_rows = []
 
+            if questions:
                 await cursor.execute(
                     f"""
-                    INSERT INTO {question_scorecards_table_name} (question_id, scorecard_id) VALUES (?, ?)
+                    INSERT INTO {questions_table_name} (task_id, type, blocks, answer, input_type, response_type, coding_language, context, title, generation_model, position, max_attempts, is_feedback_shown)
+                    VALUES {get_values_placeholder(13, len(questions))}
+                    RETURNING id, type, blocks, answer, input_type, response_type, NULL, context, coding_language, max_attempts, is_feedback_shown, title, position
                     """,
-                    (question_id, scorecard_id),
-                )
-
-                await cursor.execute(
-                    f"SELECT id FROM {scorecards_table_name} WHERE id = ? AND status = ?",
-                    (question["scorecard_id"], str(ScorecardStatus.DRAFT)),
+                    [
+                        value
+                        for index, question in enumerate(questions)
+                        for value in (
+                            task_id,
+                            *get_question_content_for_db(question),
+                            None,
+                            index,
+                            question["max_attempts"],
+                            question["is_feedback_shown"],
+                        )
+                    ],
                 )
 
-                result = await cursor.fetchone()
-
-                if result:
-                    scorecards_to_publish.append(question["scorecard_id"])
-
-        if scorecards_to_publish:
-            await cursor.execute(
-                f"UPDATE {scorecards_table_name} SET status = ? WHERE id IN ({','.join(map(str, scorecards_to_publish))})",
-                (str(ScorecardStatus.PUBLISHED),),
+                # the scorecards are linked below, so fill them in from the request
+                question_rows = [
+                    (*row[:6], questions[row[-1]].get("scorecard_id"), *row[7:])
+                    for row in await cursor.fetchall()
+                ]
+
+            await link_question_scorecards(
+                cursor,
+                [
+                    (row[0], row[6])
+                    for row in sorted(question_rows, key=lambda row: row[-1])
+                    if row[6] is not None
+                ],
             )
 
-        # Update task status to published
-        await cursor.execute(
-            f"UPDATE {tasks_table_name} SET status = ?, title = ?, scheduled_publish_at = ? WHERE id = ?",
-            (str(status), title, scheduled_publish_at, task_id),
-        )
+            await conn.commit()
 
-        await conn.commit()
+    scheduled_publish_timer.schedule(scheduled_publish_at)
 
-        return await get_task(task_id)
+    return convert_quiz_db_to_dict(task, question_rows)
 
 
 async def update_published_quiz(
     task_id: int, title: str, questions: List[Dict], scheduled_publish_at: datetime
 ):
-    if not await does_task_exist(task_id):
-        return False
+    questions = [question.model_dump() for question in questions]
 
     # Execute all operations in a single transaction
     async with get_new_db_connection() as conn:
-        cursor = await conn.cursor()
+        async with log_statement_count(conn, f"update_published_quiz({task_id})"):
+            cursor = await conn.cursor()
 
-        scorecards_to_publish = []
+            task = await update_quiz_task_details(
+                cursor, task_id, title, scheduled_publish_at
+            )
 
-        for question in questions:
-            question = question.model_dump()
+            if not task:
+                return False
 
-            await cursor.execute(
-                f"""
-                UPDATE {questions_table_name} SET blocks = ?, answer = ?, input_type = ?, coding_language = ?, context = ?, response_type = ?, type = ?, title = ? WHERE id = ?
-                """,
-                (
-                    json.dumps(prepare_blocks_for_publish(question["blocks"])),
-                    (
-                        json.dumps(prepare_blocks_for_publish(question["answer"]))
-                        if question["answer"]
-                        else None
-                    ),
-                    str(question["input_type"]),
-                    (
-                        json.dumps(question["coding_languages"])
-                        if question["coding_languages"]
-                        else None
-                    ),
-                    json.dumps(question["context"]) if question["context"] else None,
-                    str(question["response_type"]),
-                    str(question["type"]),
-                    question["title"],
-                    question["id"],
-                ),
-            )
+            question_scorecard_ids = [
+                (question["id"], question["scorecard_id"])
+                for question in questions
+                if question.get("scorecard_id") is not None
+            ]
 
-            if question.get("scorecard_id") is not None:
-                # First check if there's an existing scorecard mapping
+            if question_scorecard_ids:
+                # replace the existing scorecard of every question that is given one
                 await cursor.execute(
-                    f"SELECT scorecard_id FROM {question_scorecards_table_name} WHERE question_id = ?",
-                    (question["id"],),
+                    f"""
+                    DELETE FROM {question_scorecards_table_name}
+                    WHERE question_id IN ({', '.join(['?'] * len(question_scorecard_ids))})
+                    """,
+                    [question_id for question_id, _ in question_scorecard_ids],
                 )
-                existing_mapping = await cursor.fetchone()
 
-                if existing_mapping:
-                    # Update existing mapping
-                    await cursor.execute(
-                        f"UPDATE {question_scorecards_table_name} SET scorecard_id = ? WHERE question_id = ?",
-                        (question["scorecard_id"], question["id"]),
-                    )
-                else:
-                    # Insert new mapping
-                    await cursor.execute(
-                        f"INSERT INTO {question_scorecards_table_name} (question_id, scorecard_id) VALUES (?, ?)",
-                        (question["id"], question["scorecard_id"]),
-                    )
+                await link_question_scorecards(cursor, question_scorecard_ids)
 
+            question_rows = []
+
+            if questions:
                 await cursor.execute(
-                    f"SELECT id FROM {scorecards_table_name} WHERE id = ? AND status = ?",
-                    (question["scorecard_id"], str(ScorecardStatus.DRAFT)),
+                    f"""
+                    WITH updates (id, type, blocks, answer, input_type, response_type, coding_language, context, title) AS (
+                        VALUES {get_values_placeholder(9, len(questions))}
+                    )
+                    UPDATE {questions_table_name}
+                    SET type = updates.type, blocks = updates.blocks, answer = updates.answer,
+                        input_type = updates.input_type, response_type = updates.response_type,
+                        coding_language = updates.coding_language, context = updates.context,
+                        title = updates.title
+                    FROM updates
+                    WHERE {questions_table_name}.id = updates.id AND {questions_table_name}.task_id = ?
+                    RETURNING id, type, blocks, answer, input_type, response_type,
+                        (SELECT scorecard_id FROM {question_scorecards_table_name} qs WHERE qs.question_id = {questions_table_name}.id),
+                        context, coding_language, max_attempts, is_feedback_shown, title, position
+                    """,
+                    [
+                        value
+                        for question in questions
+                        for value in (
+                            question["id"],
+                            *get_question_content_for_db(question),
+                        )
+                    ]
+                    + [task_id],
                 )
 
-                result = await cursor.fetchone()
+                question_rows = await cursor.fetchall()
 
-                if result:
-                    scorecards_to_publish.append(question["scorecard_id"])
-
-        if scorecards_to_publish:
+            # questions left out of the request are unchanged but still part of the quiz
             await cursor.execute(
-                f"UPDATE {scorecards_table_name} SET status = ? WHERE id IN ({','.join(map(str, scorecards_to_publish))})",
-                (str(ScorecardStatus.PUBLISHED),),
+                f"""
+                SELECT q.id, q.type, q.blocks, q.answer, q.input_type, q.response_type, qs.scorecard_id, q.context, q.coding_language, q.max_attempts, q.is_feedback_shown, q.title, q.position
+                FROM {questions_table_name} q
+                LEFT JOIN {question_scorecards_table_name} qs ON q.id = qs.question_id
+                WHERE q.task_id = ? AND q.id NOT IN ({', '.join(['?'] * len(question_rows))})
+                """,
+                (task_id, *[row[0] for row in question_rows]),
             )
+            question_rows += await cursor.fetchall()
 
-        # Update task status to published
-        await cursor.execute(
-            f"UPDATE {tasks_table_name} SET title = ?, scheduled_publish_at = ? WHERE id = ?",
-            (title, scheduled_publish_at, task_id),
-        )
+            await conn.commit()
 
-        await conn.commit()
+    scheduled_publish_timer.schedule(scheduled_publish_at)
 
-        return await get_task(task_id)
+    return convert_quiz_db_to_dict(task, question_rows)
 
 
 async def duplicate_task(task_id: int, course_id: int, milestone_id: int) -> int:
@@ -661,54 +785,64 @@ async def get_solved_tasks_for_user(
 
 
 async def mark_task_completed(task_id: int, user_id: int):
-    # Update task completion table using INSERT OR IGNORE to handle duplicates gracefully
-    await execute_db_operation(
-        f"""
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+
+        # Update task completion table using INSERT OR IGNORE to handle duplicates gracefully
+        await cursor.execute(
+            f"""
         INSERT OR IGNORE INTO {task_completions_table_name} (user_id, task_id)
         VALUES (?, ?)
         """,
-        (user_id, task_id),
-    )
+            (user_id, task_id),
+        )
+
+        # only count the completion towards the user's activity the first time
+        if cursor.rowcount > 0:
+            await record_user_completion_activity(cursor, user_id, task_id)
+            await record_leaderboard_activity(cursor, user_id, [None], task_id=task_id)
+            await record_leaderboard_task_completion(cursor, user_id, task_id=task_id)
+
+        await conn.commit()
 
 
 async def delete_completion_history_for_task(
     task_id: int, question_id: int, user_id: int
 ):
-    if task_id is not None:
-        await execute_db_operation(
-            f"DELETE FROM {chat_history_table_name} WHERE task_id = ? AND user_id = ?",
-            (task_id, user_id),
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+
+        if task_id is not None:
+            # chat_history is keyed by question, so a task's messages are those of
+            # its questions
+            await delete_chat_history_with_activity(
+                cursor,
+                f"question_id IN (SELECT id FROM {questions_table_name} WHERE task_id = ?) AND user_id = ?",
+                (task_id, user_id),
+            )
+
+        await delete_chat_history_with_activity(
+            cursor, "question_id = ? AND user_id = ?", (question_id, user_id)
         )
 
-    await execute_db_operation(
-        f"DELETE FROM {chat_history_table_name} WHERE question_id = ? AND user_id = ?",
-        (question_id, user_id),
-    )
+        await conn.commit()
 
 
 async def schedule_module_tasks(
     course_id: int, module_id: int, scheduled_publish_at: datetime
 ):
-    async with get_new_db_connection() as conn:
-        cursor = await conn.cursor()
-
-        await cursor.execute(
-            f"SELECT t.id FROM {tasks_table_name} t INNER JOIN {course_tasks_table_name} ct ON t.id = ct.task_id WHERE ct.course_id = ? AND ct.milestone_id = ? AND t.status = '{TaskStatus.PUBLISHED}'",
-            (course_id, module_id),
+    await execute_db_operation(
+        f"""
+        UPDATE {tasks_table_name} SET scheduled_publish_at = ?
+        WHERE status = '{TaskStatus.PUBLISHED}' AND id IN (
+            SELECT task_id FROM {course_tasks_table_name}
+            WHERE course_id = ? AND milestone_id = ?
         )
+        """,
+        (scheduled_publish_at, course_id, module_id),
+    )
 
-        course_module_tasks = await cursor.fetchall()
-
-        if not course_module_tasks:
-            return
-
-        for task in course_module_tasks:
-            await cursor.execute(
-                f"UPDATE {tasks_table_name} SET scheduled_publish_at = ? WHERE id = ?",
-                (scheduled_publish_at, task[0]),
-            )
-
-        await conn.commit()
+    scheduled_publish_timer.schedule(scheduled_publish_at)
 
 
 async def drop_task_generation_jobs_table():
@@ -756,23 +890,42 @@ async def update_task_generation_job_status(
         await conn.commit()
 
 
-async def get_course_task_generation_jobs_status(course_id: int) -> List[str]:
+async def complete_task_generation_job(job_uuid: str) -> bool:
+    """Mark a started job as completed and return whether it was still started."""
     async with get_new_db_connection() as conn:
         cursor = await conn.cursor()
 
         await cursor.execute(
-            f"SELECT status FROM {task_generation_jobs_table_name} WHERE course_id = ?",
+            f"UPDATE {task_generation_jobs_table_name} SET status = ? WHERE uuid = ? AND status = ?",
+            (
+                str(GenerateTaskJobStatus.COMPLETED),
+                job_uuid,
+                str(GenerateTaskJobStatus.STARTED),
+            ),
+        )
+
+        await conn.commit()
+
+        return cursor.rowcount > 0
+
+
+async def get_course_task_generation_jobs_status(course_id: int) -> Dict[str, int]:
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+
+        await cursor.execute(
+            f"SELECT status, COUNT(*) FROM {task_generation_jobs_table_name} WHERE course_id = ? GROUP BY status",
             (course_id,),
         )
 
-        statuses = [row[0] for row in await cursor.fetchall()]
+        counts = dict(await cursor.fetchall())
 
         return {
-            str(GenerateTaskJobStatus.COMPLETED): statuses.count(
-                str(GenerateTaskJobStatus.COMPLETED)
+            str(GenerateTaskJobStatus.COMPLETED): counts.get(
+                str(GenerateTaskJobStatus.COMPLETED), 0
             ),
-            str(GenerateTaskJobStatus.STARTED): statuses.count(
-                str(GenerateTaskJobStatus.STARTED)
+            str(GenerateTaskJobStatus.STARTED): counts.get(
+                str(GenerateTaskJobStatus.STARTED), 0
             ),
         }
 
@@ -891,6 +1044,27 @@ async def publish_scheduled_tasks():
     return [task[0] for task in tasks] if tasks else []
 
 
+async def get_upcoming_scheduled_publish_times() -> List[datetime]:
+    rows = await execute_db_operation(
+        f"""
+        SELECT DISTINCT scheduled_publish_at FROM {tasks_table_name}
+        WHERE scheduled_publish_at IS NOT NULL
+        AND status = '{TaskStatus.PUBLISHED}' AND deleted_at IS NULL
+        """,
+        fetch_all=True,
+    )
+
+    return [datetime.fromisoformat(row[0]) for row in rows]
+
+
+# publishes the scheduled tasks when the earliest of them is due; it only runs on the
+# scheduler's leader, whose writes add their scheduled times to it right away while
+# the times set through the other workers are reloaded every minute
+scheduled_publish_timer = DeadlineTimer(
+    publish_scheduled_tasks, get_upcoming_scheduled_publish_times
+)
+
+
 async def add_generated_learning_material(task_id: int, task_details: Dict):
     await update_learning_material_task(
         task_id,
@@ -2,6 +2,7 @@ from typing import Dict, List, Tuple
 from datetime import datetime, timezone, timedelta
 from api.config import (
     users_table_name,
+    tasks_table_name,
     cohorts_table_name,
     user_cohorts_table_name,
     organizations_table_name,
@@ -13,6 +14,8 @@ from api.config import (
     course_cohorts_table_name,
     task_completions_table_name,
     user_organizations_table_name,
+    user_daily_activity_table_name,
+    all_cohorts_activity_cohort_id,
 )
 from api.slack import send_slack_notification_for_new_user
 from api.models import UserCohort
@@ -245,48 +248,13 @@ async def get_user_cohorts(user_id: int) -> List[Dict]:
 async def get_user_active_in_last_n_days(user_id: int, n: int, cohort_id: int):
     activity_per_day = await execute_db_operation(
         f"""
-    WITH chat_activity AS (
-        SELECT DATE(datetime(created_at, '+5 hours', '+30 minutes')) as activity_date, COUNT(*) as count
-        FROM {chat_history_table_name}
-        WHERE user_id = ? 
-        AND DATE(datetime(created_at, '+5 hours', '+30 minutes')) >= DATE(datetime('now', '+5 hours', '+30 minutes'), '-{n} days') 
-        AND question_id IN (
-            SELECT question_id 
-            FROM {questions_table_name} 
-            WHERE task_id IN (
-                SELECT task_id 
-                FROM {course_tasks_table_name} 
-                WHERE course_id IN (
-                    SELECT course_id 
-                    FROM {course_cohorts_table_name} 
-                    WHERE cohort_id = ?
-                )
-            )
-        )
-        GROUP BY activity_date
-    ),
-    task_activity AS (
-        SELECT DATE(datetime(created_at, '+5 hours', '+30 minutes')) as activity_date, COUNT(*) as count
-        FROM {task_completions_table_name}
-        WHERE user_id = ? 
-        AND DATE(datetime(created_at, '+5 hours', '+30 minutes')) >= DATE(datetime('now', '+5 hours', '+30 minutes'), '-{n} days')
-        AND task_id IN (
-            SELECT task_id 
-            FROM {course_tasks_table_name} 
-            WHERE course_id IN (
-                SELECT course_id 
-                FROM {course_cohorts_table_name} 
-                WHERE cohort_id = ?
-            )
-        )
-        GROUP BY activity_date
-    )
-    SELECT activity_date, count FROM chat_activity
-    UNION
-    SELECT activity_date, count FROM task_activity
-    ORDER BY activity_date
+    SELECT ist_date, message_count + completion_count
+    FROM {user_daily_activity_table_name}
+    WHERE user_id = ? AND cohort_id = ?
+    AND ist_date >= DATE(datetime('now', '+5 hours', '+30 minutes'), '-{n} days')
+    ORDER BY ist_date
     """,
-        (user_id, cohort_id, user_id, cohort_id),
+        (user_id, cohort_id),
         fetch_all=True,
     )
 
@@ -300,20 +268,22 @@ async def get_user_active_in_last_n_days(user_id: int, n: int, cohort_id: int):
 
 
 async def get_user_activity_for_year(user_id: int, year: int):
-    # Get all chat messages for the user in the given year, grouped by day
+    # Get the number of messages sent by the user on each day of the given year
     activity_per_day = await execute_db_operation(
         f"""
-        SELECT 
-            strftime('%j', datetime(timestamp, '+5 hours', '+30 minutes')) as day_of_year,
-            COUNT(*) as message_count
-        FROM {chat_history_table_name}
-        WHERE user_id = ? 
-        AND strftime('%Y', datetime(timestamp, '+5 hours', '+30 minutes')) = ?
-        AND role = 'user'
-        GROUP BY day_of_year
-        ORDER BY day_of_year
+        SELECT strftime('%j', ist_date) as day_of_year, message_count
+        FROM {user_daily_activity_table_name}
+        WHERE user_id = ? AND cohort_id = ?
+        AND ist_date BETWEEN ? AND ?
+        AND message_count > 0
+        ORDER BY ist_date
         """,
-        (user_id, str(year)),
+        (
+            user_id,
+            all_cohorts_activity_cohort_id,
+            f"{year}-01-01",
+            f"{year}-12-31",
+        ),
         fetch_all=True,
     )
 
@@ -327,6 +297,191 @@ async def get_user_activity_for_year(user_id: int, year: int):
     return data
 
 
+def _get_activity_task_cohorts_cte(cohort_ids: List[int] = None) -> str:
+    # maps every task to the cohorts whose courses contain it, plus the catch-all
+    # cohort under which activity across all cohorts is recorded
+    if cohort_ids is None:
+        return f"""
+        SELECT DISTINCT ct.task_id, cc.cohort_id
+        FROM {course_tasks_table_name} ct
+        JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+        UNION
+        SELECT id, {all_cohorts_activity_cohort_id} FROM {tasks_table_name}
+        """
+
+    return f"""
+        SELECT DISTINCT ct.task_id, cc.cohort_id
+        FROM {course_tasks_table_name} ct
+        JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+        WHERE cc.cohort_id IN ({','.join(map(str, cohort_ids))})
+        """
+
+
+async def rebuild_user_daily_activity(cursor, cohort_ids: List[int] = None):
+    """
+    Recomputes the user_daily_activity rollup from chat_history and task_completions.
+
+    The rows of a cohort count every message on the questions of its tasks and the
+    completions of its tasks (not of single questions), like the streak queries they
+    replace. The cross-cohort rows count learner messages only, as plotted by the
+    heatmap.
+
+    Rebuilds the rows for the given cohorts only, or the whole table (including the
+    cross-cohort rows) if cohort_ids is None. Used as the backfill for the table and
+    whenever the courses of a cohort change.
+    """
+    if cohort_ids is not None and not cohort_ids:
+        return
+
+    if cohort_ids is None:
+        await cursor.execute(f"DELETE FROM {user_daily_activity_table_name}")
+    else:
+        await cursor.execute(
+            f"DELETE FROM {user_daily_activity_table_name} WHERE cohort_id IN ({','.join(map(str, cohort_ids))})"
+        )
+
+    await cursor.execute(
+        f"""
+        WITH task_cohorts AS ({_get_activity_task_cohorts_cte(cohort_ids)})
+        INSERT INTO {user_daily_activity_table_name} (user_id, cohort_id, ist_date, message_count, completion_count)
+        SELECT user_id, cohort_id, ist_date, SUM(message_count), SUM(completion_count)
+        FROM (
+            SELECT ch.user_id, tcs.cohort_id, DATE(datetime(ch.created_at, '+5 hours', '+30 minutes')) AS ist_date, COUNT(*) AS message_count, 0 AS completion_count
+            FROM {chat_history_table_name} ch
+            JOIN {questions_table_name} q ON q.id = ch.question_id
+            JOIN task_cohorts tcs ON tcs.task_id = q.task_id
+            WHERE ch.role = 'user' OR tcs.cohort_id != {all_cohorts_activity_cohort_id}
+            GROUP BY ch.user_id, tcs.cohort_id, ist_date
+
+            UNION ALL
+
+            SELECT tc.user_id, tcs.cohort_id, DATE(datetime(tc.created_at, '+5 hours', '+30 minutes')) AS ist_date, 0 AS message_count, COUNT(*) AS completion_count
+            FROM {task_completions_table_name} tc
+            JOIN task_cohorts tcs ON tcs.task_id = tc.task_id
+            GROUP BY tc.user_id, tcs.cohort_id, ist_date
+        )
+        WHERE ist_date IS NOT NULL
+        GROUP BY user_id, cohort_id, ist_date
+        """
+    )
+
+
+async def backfill_user_daily_activity(cohort_ids: List[int] = None):
+    async with get_new_db_connection() as conn:
+        cursor = await conn.cursor()
+        await rebuild_user_daily_activity(cursor, cohort_ids)
+        await conn.commit()
+
+
+async def record_user_message_activity(
+    cursor, user_id: int, question_id: int, messages: List[Tuple]
+):
+    """
+    Adds the given messages (role, created_at) for a question to the user_daily_activity
+    rollup, in the transaction of the cursor that stored them.
+    """
+    if not messages:
+        return
+
+    await cursor.executemany(
+        f"""
+        INSERT INTO {user_daily_activity_table_name} (user_id, cohort_id, ist_date, message_count)
+        SELECT ?, cohort_id, DATE(datetime(COALESCE(?, CURRENT_TIMESTAMP), '+5 hours', '+30 minutes')), 1
+        FROM (
+            SELECT {all_cohorts_activity_cohort_id} AS cohort_id WHERE ? = 'user'
+            UNION
+            SELECT cc.cohort_id
+            FROM {questions_table_name} q
+            JOIN {course_tasks_table_name} ct ON ct.task_id = q.task_id
+            JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+            WHERE q.id = ?
+        )
+        WHERE true
+        ON CONFLICT(user_id, cohort_id, ist_date) DO UPDATE SET message_count = message_count + excluded.message_count
+        """,
+        [(user_id, created_at, role, question_id) for role, created_at in messages],
+    )
+
+
+async def remove_user_message_activity(cursor, messages: List[Tuple]):
+    """
+    Removes the given messages (user_id, question_id, role, created_at) from the
+    user_daily_activity rollup, in the transaction of the cursor that deletes them.
+    Days left without any activity are dropped, as streaks count every stored day.
+    """
+    if not messages:
+        return
+
+    await cursor.executemany(
+        f"""
+        UPDATE {user_daily_activity_table_name} SET message_count = MAX(message_count - 1, 0)
+        WHERE user_id = ? AND ist_date = DATE(datetime(?, '+5 hours', '+30 minutes'))
+        AND cohort_id IN (
+            SELECT {all_cohorts_activity_cohort_id} WHERE ? = 'user'
+            UNION
+            SELECT cc.cohort_id
+            FROM {questions_table_name} q
+            JOIN {course_tasks_table_name} ct ON ct.task_id = q.task_id
+            JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+            WHERE q.id = ?
+        )
+        """,
+        [
+            (user_id, created_at, role, question_id)
+            for user_id, question_id, role, created_at in messages
+        ],
+    )
+
+    user_ids = set(user_id for user_id, _, _, _ in messages)
+
+    await cursor.execute(
+        f"""
+        DELETE FROM {user_daily_activity_table_name}
+        WHERE user_id IN ({','.join(map(str, user_ids))}) AND message_count = 0 AND completion_count = 0
+        """
+    )
+
+
+async def delete_chat_history_with_activity(cursor, condition: str, params: Tuple):
+    """
+    Deletes the chat_history rows matching the condition and removes them from the
+    user_daily_activity rollup, in the transaction of the cursor.
+    """
+    await cursor.execute(
+        f"SELECT user_id, question_id, role, created_at FROM {chat_history_table_name} WHERE {condition}",
+        params,
+    )
+    await remove_user_message_activity(cursor, await cursor.fetchall())
+
+    await cursor.execute(
+        f"DELETE FROM {chat_history_table_name} WHERE {condition}", params
+    )
+
+
+async def record_user_completion_activity(cursor, user_id: int, task_id: int):
+    """
+    Adds a newly inserted task completion to the user_daily_activity rollup, in the
+    transaction of the cursor that stored it. Question completions are not counted.
+    """
+    await cursor.execute(
+        f"""
+        INSERT INTO {user_daily_activity_table_name} (user_id, cohort_id, ist_date, completion_count)
+        SELECT ?, cohort_id, DATE(datetime('now', '+5 hours', '+30 minutes')), 1
+        FROM (
+            SELECT {all_cohorts_activity_cohort_id} AS cohort_id
+            UNION
+            SELECT cc.cohort_id
+            FROM {course_tasks_table_name} ct
+            JOIN {course_cohorts_table_name} cc ON cc.course_id = ct.course_id
+            WHERE ct.task_id = ?
+        )
+        WHERE true
+        ON CONFLICT(user_id, cohort_id, ist_date) DO UPDATE SET completion_count = completion_count + excluded.completion_count
+        """,
+        (user_id, task_id),
+    )
+
+
 def get_user_streak_from_usage_dates(user_usage_dates: List[str]) -> int:
     if not user_usage_dates:
         return []
@@ -362,24 +517,12 @@ def get_user_streak_from_usage_dates(user_usage_dates: List[str]) -> int:
 async def get_user_streak(user_id: int, cohort_id: int):
     user_usage_dates = await execute_db_operation(
         f"""
-    SELECT MAX(datetime(created_at, '+5 hours', '+30 minutes')) as created_at
-    FROM {chat_history_table_name}
-    WHERE user_id = ? AND question_id IN (SELECT id FROM {questions_table_name} WHERE task_id IN (SELECT task_id FROM {course_tasks_table_name} WHERE course_id IN (SELECT course_id FROM {course_cohorts_table_name} WHERE cohort_id = ?)))
-    GROUP BY DATE(datetime(created_at, '+5 hours', '+30 minutes'))
-    
-    UNION
-    
-    SELECT MAX(datetime(created_at, '+5 hours', '+30 minutes')) as created_at
-    FROM {task_completions_table_name}
-    WHERE user_id = ? AND task_id IN (
-        SELECT task_id FROM {course_tasks_table_name} 
-        WHERE course_id IN (SELECT course_id FROM {course_cohorts_table_name} WHERE cohort_id = ?)
-    )
-    GROUP BY DATE(datetime(created_at, '+5 hours', '+30 minutes'))
-    
-    ORDER BY created_at DESC
+    SELECT ist_date
+    FROM {user_daily_activity_table_name}
+    WHERE user_id = ? AND cohort_id = ?
+    ORDER BY ist_date DESC
     """,
-        (user_id, cohort_id, user_id, cohort_id),
+        (user_id, cohort_id),
         fetch_all=True,
     )
 
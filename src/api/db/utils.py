@@ -1,9 +1,39 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional
 import json
+import time
 from enum import Enum
-from api.config import courses_table_name
+from api.config import courses_table_name, ordering_gap
 from api.utils.db import execute_db_operation
 
+# how long the courses of a user are served from memory before being read again; the
+# cache is also cleared whenever a cohort or org membership changes
+USER_COURSES_CACHE_TTL = 30
+
+# user_id -> (courses of the user, time until which they are served from the cache)
+_user_courses_cache: Dict[int, Tuple[List[Dict], float]] = {}
+
+
+def get_cached_user_courses(user_id: int) -> Optional[List[Dict]]:
+    cached = _user_courses_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    return None
+
+
+def cache_user_courses(user_id: int, courses: List[Dict]):
+    _user_courses_cache[user_id] = (courses, time.monotonic() + USER_COURSES_CACHE_TTL)
+
+
+def clear_user_courses_cache(user_ids: List[int] = None):
+    """Forget the courses of the given users, or of every user if none are given."""
+    if user_ids is None:
+        _user_courses_cache.clear()
+        return
+
+    for user_id in user_ids:
+        _user_courses_cache.pop(user_id, None)
+
 
 class EnumEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -25,6 +55,60 @@ async def get_org_id_for_course(course_id: int):
     return course[0]
 
 
+async def get_ordering_for_insert(
+    cursor, table_name: str, scope: str, params: Tuple, before: int = None
+) -> int:
+    """
+    Returns the ordering for a new row among the rows of `table_name` matching the
+    `scope` condition: after all of them, or right before the first row whose
+    ordering is at least `before`. Orderings are spaced `ordering_gap` apart, so the
+    new row normally takes the midpoint between its neighbours; only when there is
+    no space left between them are the rows in the scope spaced out again.
+    """
+    if before is None:
+        await cursor.execute(
+            f"SELECT MAX(ordering) FROM {table_name} WHERE {scope}", params
+        )
+        last_ordering = (await cursor.fetchone())[0]
+
+        return 0 if last_ordering is None else last_ordering + ordering_gap
+
+    await cursor.execute(
+        f"""
+        SELECT
+            (SELECT MAX(ordering) FROM {table_name} WHERE {scope} AND ordering < ?),
+            (SELECT MIN(ordering) FROM {table_name} WHERE {scope} AND ordering >= ?),
+            (SELECT COUNT(*) FROM {table_name} WHERE {scope} AND ordering < ?)
+        """,
+        (*params, before, *params, before, *params, before),
+    )
+    previous_ordering, next_ordering, num_previous = await cursor.fetchone()
+
+    if next_ordering is None:
+        return before if previous_ordering is None else previous_ordering + ordering_gap
+
+    if previous_ordering is None:
+        return next_ordering - ordering_gap
+
+    if next_ordering - previous_ordering > 1:
+        return (previous_ordering + next_ordering) // 2
+
+    await cursor.execute(
+        f"""
+        UPDATE {table_name} SET ordering = ranked.position * {ordering_gap}
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY ordering, id) - 1 AS position
+            FROM {table_name} WHERE {scope}
+        ) AS ranked
+        WHERE {table_name}.id = ranked.id
+        """,
+        params,
+    )
+
+    # the rows before the new one now take the first `num_previous` positions
+    return num_previous * ordering_gap - ordering_gap // 2
+
+
 def convert_blocks_to_right_format(blocks: List[Dict]) -> List[Dict]:
     for block in blocks:
         for content in block["content"]:
@@ -2,7 +2,6 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 import os
 from os.path import exists
@@ -26,8 +25,12 @@ from api.routes.ai import (
     resume_pending_task_generation_jobs,
     resume_pending_course_structure_generation_jobs,
 )
-from api.websockets import router as websocket_router
-from api.scheduler import scheduler
+from api.websockets import router as websocket_router, get_manager
+from api.scheduler import scheduler, scheduler_lease
+from api.db.task import scheduled_publish_timer
+from api.utils.file_response import CachedStaticFiles
+from api.utils.json_response import ORJSONResponse
+from api.utils.compression import CompressionMiddleware
 from api.settings import settings
 import bugsnag
 from bugsnag.asgi import BugsnagMiddleware
@@ -48,6 +51,7 @@ class PlagiarismEvent(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     scheduler.start()
+    await get_manager().start()
 
     # Create the uploads directory if it doesn't exist
     os.makedirs(settings.local_upload_folder, exist_ok=True)
@@ -57,8 +61,15 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(resume_pending_course_structure_generation_jobs())
 
     yield
+    # started by the scheduler on the worker holding its lease
+    await scheduled_publish_timer.stop()
+    await get_manager().stop()
     scheduler.shutdown()
 
+    if scheduler_lease.is_held:
+        # another worker takes over at its next renewal instead of after the ttl
+        await scheduler_lease.release()
+
 
 if settings.bugsnag_api_key:
     bugsnag.configure(
@@ -70,7 +81,7 @@ if settings.bugsnag_api_key:
     )
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Add Bugsnag middleware if configured
 if settings.bugsnag_api_key:
@@ -147,11 +158,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.compression_minimum_size
+)
+
 # Mount the uploads folder as a static directory
 if exists(settings.local_upload_folder):
     app.mount(
         f"/{UPLOAD_FOLDER_NAME}",
-        StaticFiles(directory=settings.local_upload_folder),
+        CachedStaticFiles(directory=settings.local_upload_folder),
         name="uploads",
     )
 
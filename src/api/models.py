@@ -392,6 +392,18 @@ class CourseWithMilestonesAndTaskDetails(CourseWithMilestonesAndTasks):
     course_generation_status: GenerateCourseJobStatus | None
 
 
+class CourseChangedTask(MilestoneTaskWithDetails):
+    milestone_id: int
+
+
+class CourseChanges(Course):
+    cursor: str | None
+    milestones: List[Milestone]
+    tasks: List[CourseChangedTask]
+    milestone_ids: List[int]
+    task_ids: List[int]
+
+
 class UserCourseRole(str, Enum):
     ADMIN = "admin"
     LEARNER = "learner"
@@ -494,7 +506,8 @@ class LeaderboardViewType(Enum):
             return self.value == other
         elif isinstance(other, LeaderboardViewType):
             return self.value == other.value
-        raise NotImplementedError
+
+        return False
 
 
 class CreateDraftTaskRequest(BaseModel):
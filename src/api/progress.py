@@ -0,0 +1,109 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List
+from api.models import GenerateCourseJobStatus, GenerateTaskJobStatus
+from api.db.task import (
+    complete_task_generation_job,
+    get_course_task_generation_jobs_status,
+)
+from api.db.course import update_course_generation_job_status
+from api.websockets import get_manager
+
+# seconds over which the task completions of a course are coalesced into one update
+PROGRESS_FLUSH_INTERVAL = 0.25
+
+
+class CourseGenerationProgress:
+    """
+    Keeps the task generation counts of every course being generated in memory, so
+    that a completion updates them instead of counting the jobs of the course again.
+    The counts are loaded from the jobs table on the first completion of a course,
+    after which only the status of the completed job is written. Completions are
+    sent to the clients of a course at most once every `flush_interval` seconds.
+    """
+
+    def __init__(self, flush_interval: float = PROGRESS_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.counts: Dict[int, Dict[str, int]] = {}
+        self.completed_task_ids: Dict[int, List[int]] = defaultdict(list)
+        self._locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+
+    def reset(self, course_id: int):
+        """Forget the counts of a course, e.g. when new jobs are added for it."""
+        self.counts.pop(course_id, None)
+
+    async def task_completed(
+        self, course_id: int, task_id: int, task_job_uuid: str, course_job_uuid: str
+    ):
+        async with self._locks[course_id]:
+            is_newly_completed = await complete_task_generation_job(task_job_uuid)
+
+            if course_id not in self.counts:
+                # already includes the job completed above
+                self.counts[course_id] = await get_course_task_generation_jobs_status(
+                    course_id
+                )
+            elif is_newly_completed:
+                self.counts[course_id][str(GenerateTaskJobStatus.COMPLETED)] += 1
+                self.counts[course_id][str(GenerateTaskJobStatus.STARTED)] -= 1
+
+            counts = self.counts[course_id]
+            self.completed_task_ids[course_id].append(task_id)
+
+            if counts[str(GenerateTaskJobStatus.STARTED)]:
+                if course_id not in self._flush_tasks:
+                    self._flush_tasks[course_id] = asyncio.create_task(
+                        self._flush_later(course_id)
+                    )
+                return
+
+            await update_course_generation_job_status(
+                course_job_uuid, GenerateCourseJobStatus.COMPLETED
+            )
+            self.counts.pop(course_id)
+
+            flush_task = self._flush_tasks.pop(course_id, None)
+            if flush_task is not None:
+                flush_task.cancel()
+
+        # the last completion is sent right away
+        await self.flush(course_id, counts[str(GenerateTaskJobStatus.COMPLETED)])
+
+    async def _flush_later(self, course_id: int):
+        await asyncio.sleep(self.flush_interval)
+
+        async with self._locks[course_id]:
+            self._flush_tasks.pop(course_id, None)
+            counts = self.counts.get(course_id)
+
+            if counts is None:
+                return
+
+            total_completed = counts[str(GenerateTaskJobStatus.COMPLETED)]
+
+        await self.flush(course_id, total_completed)
+
+    async def flush(self, course_id: int, total_completed: int):
+        task_ids = self.completed_task_ids.pop(course_id, None)
+
+        if not task_ids:
+            return
+
+        await get_manager().send_item_update(
+            course_id,
+            {
+                "event": "task_completed",
+                # the latest completion, as sent when every completion had its own update
+                "task": {"id": task_ids[-1]},
+                "tasks": [{"id": task_id} for task_id in task_ids],
+                "total_completed": total_completed,
+            },
+        )
+
+
+progress = CourseGenerationProgress()
+
+
+def get_progress() -> CourseGenerationProgress:
+    return progress
@@ -1,70 +1,142 @@
-from typing import Annotated, Dict, List, Optional, Tuple
-from fastapi import FastAPI, Body, Header, HTTPException, Depends
+from typing import Annotated, AsyncIterator, Dict, List, Literal, Optional, Tuple
+from datetime import datetime
+import csv
+import io
+from fastapi import FastAPI, Body, Header, HTTPException, Depends, Query
+from fastapi.responses import Response, StreamingResponse
 from api.models import (
     PublicAPIChatMessage,
     CourseWithMilestonesAndTaskDetails,
+    CourseChanges,
     TaskType,
 )
 from api.db.chat import (
     get_all_chat_history as get_all_chat_history_from_db,
+    get_all_chat_history_in_chunks,
 )
 from api.db.course import (
     get_course as get_course_from_db,
     get_course_org_id,
+    get_course_version,
+    get_course_changes as get_course_changes_from_db,
 )
 from api.db.task import get_task as get_task_from_db
 from api.db.org import get_org_id_from_api_key
+from api.utils.json_response import ORJSONResponse, dumps
+from api.utils.compression import CompressionMiddleware
+from api.settings import settings
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.compression_minimum_size
+)
 
 
-async def validate_api_key(api_key: str, org_id: int) -> None:
+async def get_api_key_org_id(api_key: str = Header(...)) -> int:
     """
-    Validates if the provided API key is authorized to access data for the given organization ID.
-    Raises an HTTP 403 exception if the API key is invalid or unauthorized.
+    Returns the organization ID that the provided API key belongs to.
+    Raises an HTTP 403 exception if the API key is invalid.
     """
     try:
-        # Get the org_id associated with the API key from the database
-        key_org_id = await get_org_id_from_api_key(api_key)
-
-        # If org_id is provided, check if it matches the org_id from the API key
-        if not key_org_id or key_org_id != org_id:
-            raise HTTPException(
-                status_code=403,
-                detail="Invalid API key",
-            )
+        return await get_org_id_from_api_key(api_key)
     except ValueError:
         raise HTTPException(status_code=403, detail="Invalid API key")
 
 
+async def validate_api_key(api_key: str, org_id: int) -> None:
+    """
+    Validates if the provided API key is authorized to access data for the given organization ID.
+    Raises an HTTP 403 exception if the API key is invalid or unauthorized.
+    """
+    key_org_id = await get_api_key_org_id(api_key)
+
+    # If org_id is provided, check if it matches the org_id from the API key
+    if not key_org_id or key_org_id != org_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid API key",
+        )
+
+
 @app.get(
     "/chat_history",
     response_model=List[PublicAPIChatMessage],
 )
 async def get_all_chat_history(
     org_id: int,
+    since: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
     api_key: str = Header(...),
 ) -> List[PublicAPIChatMessage]:
     # Validate the API key for the given org_id
     await validate_api_key(api_key=api_key, org_id=org_id)
-    return await get_all_chat_history_from_db(org_id)
+
+    # the rows already have the shape of the response model, so skip re-validating
+    # what can be a very long list
+    return ORJSONResponse(
+        await get_all_chat_history_from_db(
+            org_id, since=since, after_id=after_id, limit=limit
+        )
+    )
 
 
-@app.get(
-    "/course/{course_id}",
-    response_model=CourseWithMilestonesAndTaskDetails,
-)
-async def get_tasks_for_course(
-    course_id: int,
+CHAT_HISTORY_EXPORT_FIELDS = list(PublicAPIChatMessage.model_fields.keys())
+
+
+async def stream_chat_history_as_ndjson(
+    chunks: AsyncIterator[List[Dict]],
+) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        yield b"".join(dumps(message) + b"\n" for message in chunk)
+
+
+async def stream_chat_history_as_csv(
+    chunks: AsyncIterator[List[Dict]],
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CHAT_HISTORY_EXPORT_FIELDS)
+    writer.writeheader()
+
+    async for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.get("/chat_history/export")
+async def export_all_chat_history(
+    org_id: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    after_id: Optional[int] = None,
     api_key: str = Header(...),
-) -> CourseWithMilestonesAndTaskDetails:
-    try:
-        # Get the org_id from the API key
-        org_id = await get_org_id_from_api_key(api_key)
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Invalid API key")
+) -> StreamingResponse:
+    # Validate the API key for the given org_id
+    await validate_api_key(api_key=api_key, org_id=org_id)
+
+    chunks = get_all_chat_history_in_chunks(org_id, since=since, after_id=after_id)
+
+    if format == "csv":
+        return StreamingResponse(
+            stream_chat_history_as_csv(chunks),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f'attachment; filename="chat_history_{org_id}.csv"'
+            },
+        )
+
+    return StreamingResponse(
+        stream_chat_history_as_ndjson(chunks), media_type="application/x-ndjson"
+    )
 
+
+async def validate_course_access(course_id: int, org_id: int) -> None:
     try:
         course_org_id = await get_course_org_id(course_id)
     except ValueError:
@@ -76,18 +148,66 @@ async def get_tasks_for_course(
             detail="Invalid API key",
         )
 
-    # Validate the API key for the given org_id
-    await validate_api_key(api_key=api_key, org_id=org_id)
+
+def is_etag_match(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in etags or etag in etags
+
+
+@app.get(
+    "/course/{course_id}",
+    response_model=CourseWithMilestonesAndTaskDetails,
+)
+async def get_tasks_for_course(
+    course_id: int,
+    org_id: int = Depends(get_api_key_org_id),
+    if_none_match: Optional[str] = Header(None),
+) -> CourseWithMilestonesAndTaskDetails:
+    await validate_course_access(course_id, org_id)
+
+    # the version is read before the course itself, so a change made in between
+    # can only make the ETag stale, never let a client keep stale content
+    etag = f'"{await get_course_version(course_id)}"'
+
+    if is_etag_match(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
     course = await get_course_from_db(course_id=course_id)
 
+    # the task contents are spliced in as stored JSON, so the course is built in the
+    # shape of the response model here instead of being validated against it
     for milestone in course["milestones"]:
+        milestone.setdefault("unlock_at", None)
+
         for task in milestone["tasks"]:
-            task_details = await get_task_from_db(task["id"])
+            task_details = await get_task_from_db(task["id"], raw_json=True)
 
             if task["type"] == TaskType.LEARNING_MATERIAL:
                 task["blocks"] = task_details["blocks"]
+                task["questions"] = None
             else:
+                task["blocks"] = None
                 task["questions"] = task_details["questions"]
 
-    return course
+    return ORJSONResponse(course, headers={"ETag": etag})
+
+
+@app.get(
+    "/course/{course_id}/changes",
+    response_model=CourseChanges,
+)
+async def get_course_changes(
+    course_id: int,
+    since: Optional[str] = None,
+    org_id: int = Depends(get_api_key_org_id),
+) -> CourseChanges:
+    """
+    Returns the milestones and tasks changed after the `since` cursor along with the
+    cursor to pass in the next call. Without a cursor, everything is returned.
+    """
+    await validate_course_access(course_id, org_id)
+
+    return await get_course_changes_from_db(course_id, since)
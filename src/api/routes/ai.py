@@ -20,7 +20,6 @@ from api.models import (
     TaskType,
     GenerateCourseStructureRequest,
     GenerateCourseJobStatus,
-    GenerateTaskJobStatus,
     QuestionType,
 )
 from api.llm import run_llm_with_instructor, stream_llm_with_instructor
@@ -28,6 +27,7 @@ from api.settings import settings
 from api.utils.logging import logger
 from api.utils.concurrency import async_batch_gather
 from api.websockets import get_manager
+from api.progress import get_progress
 from api.db.task import (
     get_task_metadata,
     get_question,
@@ -35,8 +35,6 @@ from api.db.task import (
     get_scorecard,
     create_draft_task_for_course,
     store_task_generation_request,
-    update_task_generation_job_status,
-    get_course_task_generation_jobs_status,
     add_generated_learning_material,
     add_generated_quiz,
     get_all_pending_task_generation_jobs,
@@ -45,7 +43,6 @@ from api.db.course import (
     store_course_generation_request,
     get_course_generation_job_details,
     update_course_generation_job_status_and_details,
-    update_course_generation_job_status,
     get_all_pending_course_structure_generation_jobs,
     add_milestone_to_course,
 )
@@ -1030,30 +1027,10 @@ Task to generate:
     else:
         await add_generated_quiz(task["id"], task)
 
-    await update_task_generation_job_status(
-        task_job_uuid, GenerateTaskJobStatus.COMPLETED
+    await get_progress().task_completed(
+        course_id, task["id"], task_job_uuid, course_job_uuid
     )
 
-    course_jobs_status = await get_course_task_generation_jobs_status(course_id)
-
-    websocket_manager = get_manager()
-
-    await websocket_manager.send_item_update(
-        course_id,
-        {
-            "event": "task_completed",
-            "task": {
-                "id": task["id"],
-            },
-            "total_completed": course_jobs_status[str(GenerateTaskJobStatus.COMPLETED)],
-        },
-    )
-
-    if not course_jobs_status[str(GenerateTaskJobStatus.STARTED)]:
-        await update_course_generation_job_status(
-            course_job_uuid, GenerateCourseJobStatus.COMPLETED
-        )
-
 
 @router.post("/generate/course/{course_id}/tasks")
 async def generate_course_tasks(
@@ -1106,6 +1083,9 @@ async def generate_course_tasks(
         except Exception as e:
             logger.error(f"Error in parallel task execution: {e}")
 
+    # the counts of an earlier generation of the course do not include the new jobs
+    get_progress().reset(course_id)
+
     # Start the parallel execution in the background without awaiting it
     asyncio.create_task(run_tasks_in_parallel())
 
@@ -3,8 +3,7 @@ from typing import List, Dict
 from api.db.user import insert_or_return_user
 from api.utils.db import get_new_db_connection
 from api.models import UserLoginData
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from api.utils.google_auth import verify_google_id_token
 from api.settings import settings
 import os
 
@@ -21,9 +20,9 @@ async def login_or_signup_user(user_data: UserLoginData) -> Dict:
                 status_code=500, detail="Google Client ID not configured"
             )
 
-        # Verify the token with Google
-        id_info = id_token.verify_oauth2_token(
-            user_data.id_token, requests.Request(), settings.google_client_id
+        # Verify the token against Google's cached signing keys
+        id_info = await verify_google_id_token(
+            user_data.id_token, settings.google_client_id
         )
 
         # Check that the email in the token matches the provided email
@@ -1,7 +1,6 @@
-from collections import defaultdict
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import numpy as np
 from api.db.cohort import (
@@ -20,10 +19,14 @@ from api.db.cohort import (
 from api.db.course import get_courses_for_cohort as get_courses_for_cohort_from_db
 from api.db.analytics import (
     get_cohort_completion as get_cohort_completion_from_db,
-    get_cohort_course_attempt_data as get_cohort_course_attempt_data_from_db,
+    get_cohort_course_metrics as get_cohort_course_metrics_from_db,
     get_cohort_streaks as get_cohort_streaks_from_db,
 )
-from api.db.course import get_course as get_course_from_db
+from api.db.leaderboard import (
+    get_cohort_leaderboard as get_cohort_leaderboard_from_db,
+    get_cohort_num_tasks as get_cohort_num_tasks_from_db,
+)
+from api.utils.json_response import ORJSONResponse
 from api.models import (
     CreateCohortRequest,
     CreateCohortGroupRequest,
@@ -41,7 +44,6 @@ from api.models import (
     LeaderboardViewType,
     CohortCourse,
     CourseWithMilestonesAndTasks,
-    UserCourseRole,
 )
 from api.utils.db import get_new_db_connection
 
@@ -142,147 +144,76 @@ async def get_courses_for_cohort(
 )
 async def get_cohort_completion(cohort_id: int, user_id: int) -> Dict:
     results = await get_cohort_completion_from_db(cohort_id, [user_id])
-    return results[user_id]
+    return ORJSONResponse(results[user_id])
 
 
 @router.get("/{cohort_id}/leaderboard")
-async def get_leaderboard_data(cohort_id: int):
-    leaderboard_data = await get_cohort_streaks_from_db(cohort_id=cohort_id)
-
-    user_ids = [streak["user"]["id"] for streak in leaderboard_data]
+async def get_leaderboard_data(
+    cohort_id: int,
+    view: LeaderboardViewType = LeaderboardViewType.ALL_TIME,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    leaderboard_data = await get_cohort_leaderboard_from_db(
+        cohort_id, view=view, offset=offset, limit=limit
+    )
 
-    if not user_ids:
+    # a cohort without learners has no leaderboard, while a page past the end of one
+    # is just empty
+    if not leaderboard_data and not offset:
         return {}
 
-    task_completions = await get_cohort_completion_from_db(cohort_id, user_ids)
-
-    num_tasks = len(task_completions[user_ids[0]])
-
-    for user_data in leaderboard_data:
-        user_id = user_data["user"]["id"]
-        num_tasks_completed = 0
-
-        for task_completion_data in task_completions[user_id].values():
-            if task_completion_data["is_complete"]:
-                num_tasks_completed += 1
-
-        user_data["tasks_completed"] = num_tasks_completed
+    num_tasks = await get_cohort_num_tasks_from_db(cohort_id)
 
-    leaderboard_data = sorted(
-        leaderboard_data,
-        key=lambda x: (x["streak_count"], x["tasks_completed"]),
-        reverse=True,
+    return ORJSONResponse(
+        {
+            "stats": leaderboard_data,
+            "metadata": {
+                "num_tasks": num_tasks,
+            },
+        }
     )
 
-    return {
-        "stats": leaderboard_data,
-        "metadata": {
-            "num_tasks": num_tasks,
-        },
-    }
-
 
 @router.get("/{cohort_id}/courses/{course_id}/metrics")
 async def get_cohort_metrics_for_course(cohort_id: int, course_id: int):
-    course_data = await get_course_from_db(course_id, only_published=True)
-    cohort_data = await get_cohort_by_id_from_db(cohort_id)
+    metrics = await get_cohort_course_metrics_from_db(cohort_id, course_id)
 
-    if not course_data:
+    if not metrics["course_exists"]:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    if not cohort_data:
+    if not metrics["cohort_exists"]:
         raise HTTPException(status_code=404, detail="Cohort not found")
 
-    task_id_to_metadata = {}
-    task_type_counts = defaultdict(int)
-
-    for milestone in course_data["milestones"]:
-        for task in milestone["tasks"]:
-            task_id_to_metadata[task["id"]] = {
-                "milestone_id": milestone["id"],
-                "milestone_name": milestone["name"],
-                "type": task["type"],
-            }
-            task_type_counts[task["type"]] += 1
+    learners = metrics["learners"]
+    num_tasks = metrics["num_tasks"]
+    task_type_counts = metrics["task_type_counts"]
 
-    learner_ids = [
-        member["id"]
-        for member in cohort_data["members"]
-        if member["role"] == UserCourseRole.LEARNER
-    ]
-
-    if not learner_ids:
-        return {}
-
-    task_completions = await get_cohort_completion_from_db(
-        cohort_id, learner_ids, course_id
-    )
-
-    course_attempt_data = await get_cohort_course_attempt_data_from_db(
-        learner_ids, course_id
-    )
-
-    num_tasks = len(task_completions[learner_ids[0]])
-
-    if not num_tasks:
+    if not learners or not num_tasks:
         return {}
 
-    task_type_completions = defaultdict(lambda: defaultdict(int))
-    task_type_completion_rates = defaultdict(list)
+    learner_ids = [learner["user_id"] for learner in learners]
 
-    user_data = defaultdict(lambda: defaultdict(int))
-
-    for learner_id in learner_ids:
-        num_tasks_completed = 0
-
-        for task_id, task_completion_data in task_completions[learner_id].items():
-            if task_completion_data["is_complete"]:
-                if task_id not in task_id_to_metadata:
-                    continue
-
-                num_tasks_completed += 1
-                task_type_completions[task_id_to_metadata[task_id]["type"]][
-                    learner_id
-                ] += 1
-
-        user_data[learner_id]["completed"] = num_tasks_completed
-        user_data[learner_id]["completion_percentage"] = num_tasks_completed / num_tasks
-
-        for task_type in task_type_counts.keys():
-            task_type_completion_rates[task_type].append(
-                task_type_completions[task_type][learner_id]
-                / task_type_counts[task_type]
-            )
-
-    is_learner_active = {
-        learner_id: course_attempt_data[learner_id][course_id]["has_attempted"]
-        for learner_id in learner_ids
-    }
+    # learners x task types
+    completions = np.array(
+        [
+            [learner["completions"].get(task_type, 0) for task_type in task_type_counts]
+            for learner in learners
+        ],
+        dtype=np.int64,
+    ).reshape(len(learners), len(task_type_counts))
 
     return {
-        "average_completion": np.mean(
-            [
-                user_data[learner_id]["completion_percentage"]
-                for learner_id in learner_ids
-            ]
-        ),
+        "average_completion": float(np.mean(completions.sum(axis=1) / num_tasks)),
         "num_tasks": num_tasks,
-        "num_active_learners": sum(is_learner_active.values()),
+        "num_active_learners": sum(learner["has_attempted"] for learner in learners),
         "task_type_metrics": {
             task_type: {
-                "completion_rate": (
-                    np.mean(task_type_completion_rates[task_type])
-                    if task_type in task_type_completion_rates
-                    else 0
-                ),
-                "count": task_type_counts[task_type],
-                "completions": (
-                    task_type_completions[task_type]
-                    if task_type in task_type_completions
-                    else {learner_id: 0 for learner_id in learner_ids}
-                ),
+                "completion_rate": float(np.mean(completions[:, index] / count)),
+                "count": count,
+                "completions": dict(zip(learner_ids, completions[:, index].tolist())),
             }
-            for task_type in task_type_counts.keys()
+            for index, (task_type, count) in enumerate(task_type_counts.items())
         },
     }
 
@@ -1,13 +1,13 @@
 import os
 import traceback
 import uuid
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Request
 from pydantic import BaseModel
 import boto3
 from botocore.exceptions import ClientError
 from api.settings import settings
 from api.utils.logging import logger
+from api.utils.file_response import build_file_response
 from api.utils.s3 import (
     generate_s3_uuid,
     get_media_upload_s3_key_from_uuid,
@@ -141,6 +141,7 @@ async def upload_file_locally(
 
 @router.get("/download-local/")
 async def download_file_locally(
+    request: Request,
     uuid: str,
     file_extension: str,
 ):
@@ -153,11 +154,11 @@ async def download_file_locally(
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Return the file as a response
-        return FileResponse(
-            path=file_path,
+        # Return the file honouring Range and conditional GET headers
+        return await build_file_response(
+            request.headers,
+            file_path,
             filename=f"{uuid}.{file_extension}",
-            media_type="application/octet-stream",
         )
 
     except HTTPException:
@@ -12,6 +12,7 @@ from api.db.org import (
     get_org_members as get_org_members_from_db,
     get_org_by_slug as get_org_by_slug_from_db,
     get_all_orgs as get_all_orgs_from_db,
+    revoke_org_api_key as revoke_org_api_key_from_db,
 )
 from api.utils.db import get_new_db_connection
 from api.models import (
@@ -76,6 +77,12 @@ async def update_org_openai_api_key(org_id: int, request: UpdateOrgOpenaiApiKeyR
     return {"success": True}
 
 
+@router.delete("/{org_id}/api_keys/{api_key_id}")
+async def revoke_org_api_key(org_id: int, api_key_id: int):
+    await revoke_org_api_key_from_db(org_id, api_key_id)
+    return {"success": True}
+
+
 @router.post("/{org_id}/members")
 async def add_users_to_org_by_email(org_id: int, request: AddUsersToOrgRequest):
     try:
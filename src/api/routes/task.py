@@ -29,6 +29,7 @@ from api.models import (
     DuplicateTaskResponse,
     MarkTaskCompletedRequest,
 )
+from api.utils.json_response import ORJSONResponse
 
 router = APIRouter()
 
@@ -145,10 +146,10 @@ async def get_tasks_completed_for_user(
 
 @router.get("/{task_id}")
 async def get_task(task_id: int) -> LearningMaterialTask | QuizTask:
-    task = await get_task_from_db(task_id)
+    task = await get_task_from_db(task_id, raw_json=True)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return ORJSONResponse(task)
 
 
 @router.post("/{task_id}/complete")
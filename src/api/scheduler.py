@@ -1,7 +1,11 @@
+from functools import wraps
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from api.db.task import publish_scheduled_tasks
+from api.db.task import publish_scheduled_tasks, scheduled_publish_timer
+from api.db.leaderboard import backfill_cohort_leaderboards
 from api.cron import send_usage_summary_stats, save_daily_traces
 from api.settings import settings
+from api.utils.lease import Lease
+from api.utils.concurrency import run_in_process
 from datetime import timezone, timedelta
 
 # Create IST timezone
@@ -9,15 +13,64 @@ ist_timezone = timezone(timedelta(hours=5, minutes=30))
 
 scheduler = AsyncIOScheduler(timezone=ist_timezone)
 
+# every worker starts the scheduler, but only the worker holding this lease runs the
+# jobs; another worker takes over within the ttl if the holder goes away
+SCHEDULER_LEASE_TTL = 30
+SCHEDULER_LEASE_RENEW_INTERVAL = 10
 
-# Check for tasks to publish every minute
+scheduler_lease = Lease("scheduler", ttl_seconds=SCHEDULER_LEASE_TTL)
+
+# seconds the daily export of the traces may take before it is stopped
+DAILY_TRACES_TIMEOUT = 60 * 60
+
+
+def run_on_leader(job):
+    @wraps(job)
+    async def wrapper():
+        # checked when the job is due so that it is skipped by the other workers
+        if not await scheduler_lease.acquire():
+            return
+
+        await job()
+
+    return wrapper
+
+
+# Keep the lease with the worker that holds it, and elect another when it expires
+@scheduler.scheduled_job("interval", seconds=SCHEDULER_LEASE_RENEW_INTERVAL)
+async def renew_scheduler_lease():
+    # the scheduled tasks are published by the timer of the leader alone
+    if await scheduler_lease.acquire():
+        await scheduled_publish_timer.start()
+    else:
+        await scheduled_publish_timer.stop()
+
+
+# Load the publish times set through the other workers into the timer of the leader
 @scheduler.scheduled_job("interval", minutes=1)
+@run_on_leader
+async def reload_scheduled_publish_times():
+    await scheduled_publish_timer.reload()
+
+
+# The scheduled tasks are published by scheduled_publish_timer when they are due; this
+# catches up on the ones missed while the leader changed
+@scheduler.scheduled_job("interval", minutes=10)
+@run_on_leader
 async def check_scheduled_tasks():
     await publish_scheduled_tasks()
 
 
+# Reconcile the incrementally updated leaderboards with the source tables every 30 minutes
+@scheduler.scheduled_job("interval", minutes=30)
+@run_on_leader
+async def reconcile_cohort_leaderboards():
+    await backfill_cohort_leaderboards()
+
+
 # Send usage summary stats every day at 9 AM IST
 @scheduler.scheduled_job("cron", hour=9, minute=0, timezone=ist_timezone)
+@run_on_leader
 async def daily_usage_stats():
     if not settings.slack_usage_stats_webhook_url:
         return
@@ -26,5 +79,8 @@ async def daily_usage_stats():
 
 
 @scheduler.scheduled_job("cron", hour=10, minute=0, timezone=ist_timezone)
+@run_on_leader
 async def daily_traces():
-    save_daily_traces()
+    # pulls and processes a whole day of spans, so it runs in another process to
+    # keep the event loop of this worker free for the API
+    await run_in_process(save_daily_traces, timeout=DAILY_TRACES_TIMEOUT)
@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     local_upload_folder: str = (
         UPLOAD_FOLDER_NAME  # hardcoded variable for local file storage
     )
+    local_traces_folder: str = "traces"  # where the traces are exported without S3
     bugsnag_api_key: str | None = None
     env: str | None = None
     slack_user_signup_webhook_url: str | None = None
@@ -27,6 +28,11 @@ class Settings(BaseSettings):
     slack_usage_stats_webhook_url: str | None = None
     phoenix_endpoint: str | None = None
     phoenix_api_key: str | None = None
+    compression_minimum_size: int = 1024  # smaller responses are sent uncompressed
+    # "memory" only reaches the websockets connected to the same worker, "sqlite"
+    # relays the updates through the db to every worker sharing it
+    websocket_broker: str = "memory"
+    websocket_broker_poll_interval: float = 0.2  # seconds
 
     model_config = SettingsConfigDict(env_file=join(root_dir, ".env"))
 
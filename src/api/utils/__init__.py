@@ -21,8 +21,8 @@ def generate_random_color() -> str:
 def get_date_from_str(date_str: str, source_timezone: str) -> datetime.date:
     """source_timezone: which timezone the date_str is in. Can be IST or UTC"""
     if source_timezone == "IST":
-        # return the date as is
-        return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S").date()
+        # return the date as is (the time part is optional)
+        return datetime.strptime(date_str[:10], "%Y-%m-%d").date()
 
     return (
         datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,230 @@
+import zlib
+from typing import Dict, Optional, Tuple
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from api.config import UPLOAD_FOLDER_NAME
+
+DEFAULT_MINIMUM_SIZE = 1024
+
+COMPRESSIBLE_MEDIA_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+# uploads are mostly images, audio and pdfs that are already compressed and are
+# served with byte ranges, which compressing the body would break
+DEFAULT_EXCLUDED_PATHS = (f"/{UPLOAD_FOLDER_NAME}/",)
+
+# supported encodings in the order they are preferred when the client accepts both
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Map every coding listed in an Accept-Encoding header to its quality value."""
+    qualities = {}
+
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding] = quality
+
+    return qualities
+
+
+def select_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    qualities = parse_accept_encoding(accept_encoding)
+
+    candidates = [
+        (qualities.get(encoding, qualities.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    quality, _, encoding = max(candidates)
+
+    return encoding if quality > 0 else None
+
+
+def is_compressible(headers: Headers) -> bool:
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+
+    return media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+class GzipEncoder:
+    def __init__(self, level: int = 6):
+        # wbits=31 writes the gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def get_encoder(encoding: str, gzip_level: int, brotli_quality: int):
+    if encoding == "br":
+        return BrotliEncoder(brotli_quality)
+
+    return GzipEncoder(gzip_level)
+
+
+class CompressionMiddleware:
+    """
+    Compresses compressible responses with brotli or gzip, whichever the client
+    prefers. Whole responses are only compressed from `minimum_size` bytes onwards,
+    while streaming responses are always compressed and flushed after every chunk,
+    so that clients reading an NDJSON stream still get each line as it is sent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_paths: Tuple[str, ...] = DEFAULT_EXCLUDED_PATHS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding"))
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(
+            self.app,
+            encoding,
+            self.minimum_size,
+            get_encoder(encoding, self.gzip_level, self.brotli_quality),
+        )
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int, encoder):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.encoder = encoder
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        # None until the first body message decides whether to compress
+        self.is_compressing: Optional[bool] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+
+        if self.start_message["status"] in (204, 206, 304):
+            return False
+
+        if "content-encoding" in headers or not is_compressible(headers):
+            return False
+
+        return more_body or len(body) >= self.minimum_size
+
+    def _set_compression_headers(self, body: Optional[bytes] = None):
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if body is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(body))
+
+        # the compressed body is not byte-for-byte the one the ETag was computed for
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # wait for the first chunk of the body to decide on compression
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.is_compressing is None:
+            self.is_compressing = self._should_compress(body, more_body)
+
+            if not self.is_compressing:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            if not more_body:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                self._set_compression_headers(body)
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            self._set_compression_headers()
+            await self.send(self.start_message)
+
+        elif not self.is_compressing:
+            await self.send(message)
+            return
+
+        if more_body:
+            body = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            body = self.encoder.compress(body) + self.encoder.finish()
+
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
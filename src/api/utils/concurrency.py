@@ -1,5 +1,6 @@
-from typing import List, Coroutine
+from typing import Any, Callable, List, Coroutine
 import asyncio
+import multiprocessing
 from tqdm.asyncio import tqdm_asyncio
 
 
@@ -36,3 +37,39 @@ async def async_batch_gather(
 async def async_index_wrapper(func, index, *args, **kwargs):
     output = await func(*args, **kwargs)
     return index, output
+
+
+async def run_in_process(func: Callable, *args, timeout: float) -> Any:
+    """
+    Run a blocking function in a separate process, so that neither its I/O nor the
+    pandas work it does holds up the event loop, and kill it if it runs longer than
+    `timeout` seconds. `func` and its arguments must be picklable, i.e. defined at
+    the top level of a module.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(set_value, value):
+        if not future.done():
+            set_value(value)
+
+    # spawned instead of forked so that the threads of this process (e.g. the db and
+    # tracing ones) are not copied into it in whatever state they are in
+    pool = multiprocessing.get_context("spawn").Pool(processes=1)
+
+    try:
+        pool.apply_async(
+            func,
+            args,
+            callback=lambda result: loop.call_soon_threadsafe(
+                resolve, future.set_result, result
+            ),
+            error_callback=lambda exception: loop.call_soon_threadsafe(
+                resolve, future.set_exception, exception
+            ),
+        )
+
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        # also stops the function if it timed out or the caller was cancelled
+        await asyncio.to_thread(pool.terminate)
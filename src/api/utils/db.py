@@ -28,6 +28,34 @@ async def get_new_db_connection():
             await conn.close()
 
 
+@asynccontextmanager
+async def log_statement_count(conn, operation: str):
+    """
+    Count the SQL statements run on the connection inside the block (the implicit
+    BEGIN and COMMIT included) and log the total for `operation` once it is done.
+    """
+    statement_count = 0
+
+    def count_statement(sql):
+        nonlocal statement_count
+        statement_count += 1
+        trace_callback(sql)
+
+    await conn.set_trace_callback(count_statement)
+
+    try:
+        yield
+    finally:
+        await conn.set_trace_callback(trace_callback)
+        logger.info(f"{operation} executed {statement_count} statements")
+
+
+def get_values_placeholder(num_columns: int, num_rows: int) -> str:
+    """Placeholders for a multi-row VALUES clause, e.g. (?, ?), (?, ?)."""
+    row = f"({', '.join(['?'] * num_columns)})"
+    return ", ".join([row] * num_rows)
+
+
 def set_db_defaults():
     conn = sqlite3.connect(sqlite_db_path)
 
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+# uploaded files are stored under a fresh uuid and never overwritten, so their
+# contents can be cached by browsers and the nginx front for as long as they like
+UPLOADS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+DEFAULT_MEDIA_TYPE = "application/octet-stream"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def guess_media_type(filename: str) -> str:
+    media_type, _ = mimetypes.guess_type(filename)
+    return media_type or DEFAULT_MEDIA_TYPE
+
+
+@lru_cache(maxsize=4096)
+def _hash_file_contents(path: str, mtime_ns: int, size: int) -> str:
+    # mtime_ns and size are part of the cache key so that a file that is
+    # replaced on disk gets hashed again
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+async def get_file_etag(path: str, stat_result: os.stat_result) -> str:
+    """
+    Strong ETag derived from the sha256 of the file contents. The hash is
+    computed in a worker thread the first time a file is seen and cached
+    afterwards.
+    """
+    digest = await asyncio.to_thread(
+        _hash_file_contents, str(path), stat_result.st_mtime_ns, stat_result.st_size
+    )
+    return f'"{digest}"'
+
+
+def _etag_matches(etag: str, header_value: str) -> bool:
+    candidates = [candidate.strip() for candidate in header_value.split(",")]
+    if "*" in candidates:
+        return True
+
+    # If-None-Match uses the weak comparison function, so a W/ prefix is ignored
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def is_not_modified(
+    request_headers: Headers, etag: str, stat_result: os.stat_result
+) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(etag, if_none_match)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+    return int(stat_result.st_mtime) <= since
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a `Range: bytes=...` header into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored and the full file served
+    (unknown unit, malformed value or multiple ranges). Raises
+    RangeNotSatisfiable when the range lies outside the file.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not ranges or "," in ranges:
+        return None
+
+    start_str, sep, end_str = ranges.strip().partition("-")
+    if not sep:
+        return None
+
+    start_str, end_str = start_str.strip(), end_str.strip()
+
+    try:
+        if not start_str:
+            # suffix range: the last N bytes of the file
+            suffix_length = int(end_str)
+            if suffix_length <= 0 or file_size == 0:
+                raise RangeNotSatisfiable()
+            return max(file_size - suffix_length, 0), file_size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise RangeNotSatisfiable()
+
+    if start > end:
+        return None
+
+    return start, min(end, file_size - 1)
+
+
+class PartialFileResponse(FileResponse):
+    """Streams a single inclusive byte range of a file with status 206."""
+
+    def __init__(
+        self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs
+    ) -> None:
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        headers["content-length"] = str(end - start + 1)
+
+        super().__init__(
+            path, status_code=206, headers=headers, stat_result=stat_result, **kwargs
+        )
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            remaining = self.end - self.start + 1
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": remaining > 0,
+                        }
+                    )
+
+            if remaining > 0:
+                # the file shrank while we were reading it
+                await send(
+                    {"type": "http.response.body", "body": b"", "more_body": False}
+                )
+
+        if self.background is not None:
+            await self.background()
+
+
+async def build_file_response(
+    request_headers: Headers,
+    path: str,
+    filename: Optional[str] = None,
+    stat_result: Optional[os.stat_result] = None,
+    cache_control: str = UPLOADS_CACHE_CONTROL,
+    content_disposition_type: str = "attachment",
+) -> Response:
+    """
+    Returns a response for `path` that honours conditional (If-None-Match /
+    If-Modified-Since) and byte-range (Range / If-Range) requests.
+    """
+    if stat_result is None:
+        stat_result = await asyncio.to_thread(os.stat, path)
+
+    etag = await get_file_etag(path, stat_result)
+    media_type = guess_media_type(filename or str(path))
+
+    headers = {
+        "etag": etag,
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+
+    if is_not_modified(request_headers, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+
+    # a stale If-Range validator means the client must get the whole file again
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range_header(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={
+                    **headers,
+                    "content-range": f"bytes */{stat_result.st_size}",
+                },
+            )
+
+        if byte_range is not None:
+            start, end = byte_range
+            return PartialFileResponse(
+                path,
+                start,
+                end,
+                stat_result,
+                headers=headers,
+                media_type=media_type,
+                filename=filename,
+                content_disposition_type=content_disposition_type,
+            )
+
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+        content_disposition_type=content_disposition_type,
+    )
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves strong content-hash ETags, long-lived
+    Cache-Control headers and byte ranges.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        # conditional handling is done in get_response against the strong ETag
+        return FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+
+        if isinstance(response, FileResponse) and response.status_code == 200:
+            return await build_file_response(
+                Headers(scope=scope),
+                response.path,
+                stat_result=response.stat_result,
+                content_disposition_type="inline",
+            )
+
+        return response
@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import re
+import time
+from typing import Dict, Optional
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+from google.auth import jwt
+
+GOOGLE_OAUTH2_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+# used when Google does not send a usable max-age
+DEFAULT_CERTS_MAX_AGE = 60 * 60
+# a token signed with an unknown key forces a refetch at most this often
+MIN_CERTS_REFRESH_INTERVAL = 60
+
+
+def _decode_base64url_int(value: str) -> int:
+    padded = value + "=" * (-len(value) % 4)
+    return int.from_bytes(base64.urlsafe_b64decode(padded), "big")
+
+
+def convert_jwks_to_pem(jwks: Dict) -> Dict[str, str]:
+    """Map the key id of every RSA key in a JWKS document to its PEM public key."""
+    certs = {}
+
+    for key in jwks.get("keys", []):
+        if key.get("kty") != "RSA":
+            continue
+
+        public_key = RSAPublicNumbers(
+            _decode_base64url_int(key["e"]), _decode_base64url_int(key["n"])
+        ).public_key()
+
+        certs[key["kid"]] = public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+
+    return certs
+
+
+def get_max_age(cache_control: Optional[str]) -> int:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+
+    if not match:
+        return DEFAULT_CERTS_MAX_AGE
+
+    return int(match.group(1))
+
+
+class GoogleCertsCache:
+    """
+    Keeps Google's signing keys in memory for as long as their Cache-Control max-age
+    allows, so that ID tokens can be verified without a network call per login.
+    """
+
+    def __init__(self, certs_url: str = GOOGLE_OAUTH2_CERTS_URL):
+        self.certs_url = certs_url
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def set_certs(self, certs: Dict[str, str], max_age: int = DEFAULT_CERTS_MAX_AGE):
+        """Replace the cached keys, e.g. with a local stand-in key set in tests."""
+        self._certs = certs
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+
+    def _has_certs(self, key_id: Optional[str]) -> bool:
+        if time.monotonic() >= self._expires_at:
+            return False
+
+        return key_id is None or key_id in self._certs
+
+    def _can_refresh(self) -> bool:
+        if time.monotonic() >= self._expires_at:
+            return True
+
+        # the keys are still fresh but do not contain the token's key: Google may have
+        # rotated them early, but do not let bad tokens trigger a fetch every time
+        return time.monotonic() - self._fetched_at >= MIN_CERTS_REFRESH_INTERVAL
+
+    async def _fetch_certs(self):
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        self.set_certs(
+            convert_jwks_to_pem(response.json()),
+            get_max_age(response.headers.get("cache-control")),
+        )
+
+    async def get_certs(self, key_id: Optional[str] = None) -> Dict[str, str]:
+        if self._has_certs(key_id):
+            return self._certs
+
+        # concurrent logins wait for a single fetch instead of each making their own
+        async with self._lock:
+            if not self._has_certs(key_id) and self._can_refresh():
+                await self._fetch_certs()
+
+        return self._certs
+
+
+google_certs_cache = GoogleCertsCache()
+
+
+async def verify_google_id_token(
+    token: str, client_id: str, certs_cache: GoogleCertsCache = google_certs_cache
+) -> Dict:
+    """
+    Verify a Google ID token against the cached signing keys and return its claims.
+    Raises ValueError if the token is malformed, expired, wrongly signed or not
+    issued for this client.
+    """
+    header = jwt.decode_header(token)
+
+    certs = await certs_cache.get_certs(header.get("kid"))
+
+    id_info = jwt.decode(token, certs=certs, audience=client_id)
+
+    if id_info.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(
+            f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}"
+        )
+
+    return id_info
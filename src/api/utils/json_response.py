@@ -0,0 +1,43 @@
+from typing import Any, Optional
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_fragment(text: Optional[str]) -> Optional[orjson.Fragment]:
+    """
+    Wrap JSON text that is already stored serialized (e.g. the blocks of a task) so
+    that it is written into the response as is instead of being parsed and encoded
+    again. The text is not validated, so it must only come from our own writes.
+    """
+    if text is None:
+        return None
+
+    return orjson.Fragment(text)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Routes that return it directly skip the
+    response_model validation and encoding that FastAPI otherwise does, so it should
+    only be returned for content that already has the shape of the response model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,56 @@
+from uuid import uuid4
+from api.config import leases_table_name
+from api.utils.db import get_new_db_connection
+
+
+class Lease:
+    """
+    A named lease that at most one process holds at a time. The holder keeps it by
+    renewing it before it expires, and any other process takes it over once the
+    holder stops renewing it, e.g. because it crashed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int = 30,
+        table_name: str = leases_table_name,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.table_name = table_name
+        self.holder = uuid4().hex
+        self.is_held = False
+
+    async def acquire(self) -> bool:
+        """Take the lease or renew it if already held, returning whether it is held."""
+        async with get_new_db_connection() as conn:
+            cursor = await conn.cursor()
+
+            # the lease only changes hands when it has expired
+            await cursor.execute(
+                f"""INSERT INTO {self.table_name} (name, holder, expires_at)
+                VALUES (?, ?, datetime('now', ?))
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE {self.table_name}.holder = excluded.holder OR {self.table_name}.expires_at <= datetime('now')""",
+                (self.name, self.holder, f"+{self.ttl_seconds} seconds"),
+            )
+
+            await conn.commit()
+
+            self.is_held = cursor.rowcount > 0
+
+        return self.is_held
+
+    async def release(self):
+        async with get_new_db_connection() as conn:
+            cursor = await conn.cursor()
+
+            await cursor.execute(
+                f"DELETE FROM {self.table_name} WHERE name = ? AND holder = ?",
+                (self.name, self.holder),
+            )
+
+            await conn.commit()
+
+        self.is_held = False
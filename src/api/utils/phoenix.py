@@ -1,7 +1,7 @@
 import os
-from datetime import datetime, timedelta
-from typing import Optional
-from datetime import datetime, timedelta
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 import tempfile
 import json
 import math
@@ -9,9 +9,26 @@ import pandas as pd
 from api.settings import settings
 from api.utils.s3 import upload_file_to_s3, download_file_from_s3_as_bytes
 
+FILTER_PERIODS = ("last_day", "current_month", "current_year")
 
-def get_raw_traces(
-    filter_period: Optional[str] = None, timeout: int = 120
+
+def get_filter_period_start_time(filter_period: str, end_time: datetime) -> datetime:
+    if filter_period not in FILTER_PERIODS:
+        raise ValueError("Invalid filter period")
+
+    if filter_period == "last_day":
+        return end_time - timedelta(days=1)
+
+    if filter_period == "current_month":
+        return end_time.replace(day=1)
+
+    return end_time.replace(month=1, day=1)
+
+
+def get_raw_traces_between(
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    timeout: int = 120,
 ) -> pd.DataFrame:
     from phoenix import Client
 
@@ -19,34 +36,9 @@ def get_raw_traces(
     os.environ["PHOENIX_API_KEY"] = settings.phoenix_api_key
     project_name = f"sensai-{settings.env}"
 
-    if not filter_period:
+    if start_time is None:
         return Client().get_spans_dataframe(project_name=project_name, timeout=timeout)
 
-    if filter_period not in ["last_day", "current_month", "current_year"]:
-        raise ValueError("Invalid filter period")
-
-    if filter_period == "last_day":
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=1)
-        return Client().get_spans_dataframe(
-            project_name=project_name,
-            start_time=start_time,
-            end_time=end_time,
-            timeout=timeout,
-        )
-
-    if filter_period == "current_month":
-        end_time = datetime.now()
-        start_time = end_time.replace(day=1)
-        return Client().get_spans_dataframe(
-            project_name=project_name,
-            start_time=start_time,
-            end_time=end_time,
-            timeout=timeout,
-        )
-
-    end_time = datetime.now()
-    start_time = end_time.replace(month=1, day=1)
     return Client().get_spans_dataframe(
         project_name=project_name,
         start_time=start_time,
@@ -55,188 +47,185 @@ def get_raw_traces(
     )
 
 
-def prepare_feedback_traces_for_annotation(df: pd.DataFrame) -> pd.DataFrame:
-    # Filter out feedback stage entries
-    df_non_root = df[~df["attributes.metadata"].isna()].reset_index(drop=True)
-    df_feedback = df_non_root[
-        df_non_root["attributes.metadata"].apply(lambda x: x["stage"] == "feedback")
-    ].reset_index(drop=True)
-
-    # Function to get the last entry for each group and build chat history
-    def get_last_entries_with_chat_history(df):
-        # Separate learning_material and quiz types
-        df_lm = df[
-            df["attributes.metadata"].apply(
-                lambda x: x.get("type") == "learning_material"
-            )
+def get_raw_traces(
+    filter_period: Optional[str] = None, timeout: int = 120
+) -> pd.DataFrame:
+    if not filter_period:
+        return get_raw_traces_between(timeout=timeout)
+
+    end_time = datetime.now()
+    start_time = get_filter_period_start_time(filter_period, end_time)
+
+    return get_raw_traces_between(start_time, end_time, timeout)
+
+
+def is_nan(value) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def get_user_messages(input_messages: List[Dict]) -> List[Dict]:
+    return [msg for msg in input_messages if msg.get("message.role") == "user"]
+
+
+def get_ai_message(output_messages: List[Dict]) -> Dict:
+    return json.loads(
+        output_messages[0]["message.tool_calls"][0]["tool_call.function.arguments"]
+    )
+
+
+def get_learning_material_turn(
+    input_messages: List[Dict], output_messages: List[Dict]
+) -> Tuple[Optional[str], Optional[List[Dict]]]:
+    """
+    The reference material and the user and AI messages of a learning material span.
+    Either is None when the span does not have it.
+    """
+    context = None
+
+    try:
+        user_messages = get_user_messages(input_messages)
+
+        if "Reference Material" not in user_messages[-1]["message.content"]:
+            return None, None
+
+        context = user_messages[-1]["message.content"]
+
+        if len(user_messages) < 2 or not output_messages:
+            return context, None
+
+        return context, [
+            {"role": "user", "content": user_messages[-2]["message.content"]},
+            {"role": "assistant", "content": get_ai_message(output_messages)},
         ]
-        df_quiz = df[df["attributes.metadata"].apply(lambda x: x.get("type") == "quiz")]
+    except:
+        return context, None
 
-        result_dfs = []
 
-        # For learning_material: group by task_id and user_id
-        if not df_lm.empty:
-            df_lm_copy = df_lm.copy()
-            df_lm_copy["task_id"] = df_lm_copy["attributes.metadata"].apply(
-                lambda x: x.get("task_id")
-            )
+def get_quiz_turn(
+    input_messages: List[Dict], output_messages: List[Dict]
+) -> Tuple[Optional[str], Optional[List[Dict]]]:
+    """
+    The question context and the user and AI messages of a quiz span. Either is None
+    when the span does not have it.
+    """
+    if is_nan(output_messages):
+        return None, None
+
+    user_messages = get_user_messages(input_messages)
+    context = user_messages[-1].get("message.content") if user_messages else None
+
+    if len(user_messages) < 2 or not output_messages:
+        return context, None
+
+    if "message.contents" in user_messages[-2]:
+        user_message = user_messages[-2]["message.contents"][0]["message_content.text"]
+    else:
+        user_message = user_messages[-2]["message.content"]
 
-            # Group and process each group
-            grouped_lm = df_lm_copy.groupby(["task_id", "attributes.user.id"])
-
-            processed_rows = []
-            for (task_id, user_id), group in grouped_lm:
-                # Sort by start_time to ensure chronological order
-                group_sorted = group.sort_values("start_time")
-
-                # Build chat history from all entries in the group
-                chat_history = []
-                context = None
-                for _, row in group_sorted.iterrows():
-                    try:
-                        input_messages = row["attributes.llm.input_messages"]
-                        output_messages = row["attributes.llm.output_messages"]
-
-                        # Find the second last user message (the actual user query)
-                        user_messages = [
-                            msg
-                            for msg in input_messages
-                            if msg.get("message.role") == "user"
-                        ]
-                        if (
-                            "Reference Material"
-                            not in user_messages[-1]["message.content"]
-                        ):
-                            continue
-
-                        if context is None:
-                            context = user_messages[-1]["message.content"]
-
-                        if len(user_messages) >= 2:
-                            user_message = user_messages[-2]["message.content"]
-
-                            # Get AI response
-                            if output_messages:
-                                ai_message = json.loads(
-                                    output_messages[0]["message.tool_calls"][0][
-                                        "tool_call.function.arguments"
-                                    ]
-                                )
-
-                                chat_history.append(
-                                    {"role": "user", "content": user_message}
-                                )
-                                chat_history.append(
-                                    {"role": "assistant", "content": ai_message}
-                                )
-                    except:
-                        continue
-
-                if not chat_history:
-                    continue
-
-                # Take the last entry and add chat history
-                last_entry = group_sorted.iloc[-1].copy()
-                last_entry["chat_history"] = chat_history
-                last_entry["context"] = context
-                processed_rows.append(last_entry)
-
-            if processed_rows:
-                df_lm_result = pd.DataFrame(processed_rows).drop(["task_id"], axis=1)
-                result_dfs.append(df_lm_result)
-
-        # For quiz: group by question_id and user_id
-        if not df_quiz.empty:
-            df_quiz_copy = df_quiz.copy()
-            df_quiz_copy["question_id"] = df_quiz_copy["attributes.metadata"].apply(
-                lambda x: x.get("question_id")
+    if "message.tool_calls" not in output_messages[0]:
+        return context, None
+
+    try:
+        ai_message = get_ai_message(output_messages)
+    except:
+        return context, None
+
+    return context, [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": ai_message},
+    ]
+
+
+def build_conversations(
+    df: pd.DataFrame, key_column: str, get_turn: Callable
+) -> pd.DataFrame:
+    """
+    Collapse the spans of every (key, user) pair into the last of them, with the
+    chat history of all of them in chronological order and the first context found.
+    The pairs without any chat turn are left out.
+    """
+    group_columns = [key_column, "attributes.user.id"]
+
+    df = df.assign(
+        **{
+            key_column: [
+                metadata.get(key_column) for metadata in df["attributes.metadata"]
+            ]
+        }
+    )
+    df = df[df[key_column].notna() & df["attributes.user.id"].notna()]
+
+    if df.empty:
+        return pd.DataFrame()
+
+    # chronological within every pair, with the pairs in the order of their keys
+    df = df.sort_values(group_columns + ["start_time"], kind="stable")
+
+    contexts, turns = zip(
+        *[
+            get_turn(input_messages, output_messages)
+            for input_messages, output_messages in zip(
+                df["attributes.llm.input_messages"],
+                df["attributes.llm.output_messages"],
             )
-            # Group and process each group
-            grouped_quiz = df_quiz_copy.groupby(["question_id", "attributes.user.id"])
-
-            processed_rows = []
-            for (question_id, user_id), group in grouped_quiz:
-                # Sort by start_time to ensure chronological order
-                group_sorted = group.sort_values("start_time")
-
-                # Build chat history from all entries in the group
-                chat_history = []
-                context = None
-                for _, row in group_sorted.iterrows():
-                    try:
-                        input_messages = row["attributes.llm.input_messages"]
-
-                        if isinstance(
-                            row["attributes.llm.output_messages"], float
-                        ) and math.isnan(row["attributes.llm.output_messages"]):
-                            continue
-
-                        output_messages = row["attributes.llm.output_messages"]
-
-                        # Find the second last user message (the actual user query)
-                        user_messages = [
-                            msg
-                            for msg in input_messages
-                            if msg.get("message.role") == "user"
-                        ]
-
-                        if context is None:
-                            context = user_messages[-1]["message.content"]
-
-                        if len(user_messages) >= 2:
-                            if "message.contents" in user_messages[-2]:
-                                user_message = user_messages[-2]["message.contents"][0][
-                                    "message_content.text"
-                                ]
-                            else:
-                                user_message = user_messages[-2]["message.content"]
-
-                            # Get AI response
-                            if output_messages:
-                                if "message.tool_calls" not in output_messages[0]:
-                                    continue
-
-                                try:
-                                    ai_message = json.loads(
-                                        output_messages[0]["message.tool_calls"][0][
-                                            "tool_call.function.arguments"
-                                        ]
-                                    )
-                                except:
-                                    continue
-
-                                chat_history.append(
-                                    {"role": "user", "content": user_message}
-                                )
-                                chat_history.append(
-                                    {"role": "assistant", "content": ai_message}
-                                )
-                    except Exception as e:
-                        raise e
-
-                if not chat_history:
-                    print("no - Quiz 3")
-                    continue
-
-                # Take the last entry and add chat history
-                last_entry = group_sorted.iloc[-1].copy()
-                last_entry["chat_history"] = chat_history
-                last_entry["context"] = context
-                processed_rows.append(last_entry)
-
-            if processed_rows:
-                df_quiz_result = pd.DataFrame(processed_rows).drop(
-                    ["question_id"], axis=1
-                )
-                result_dfs.append(df_quiz_result)
-
-        # Combine all results
-        if result_dfs:
-            return pd.concat(result_dfs, ignore_index=True)
-        else:
-            return pd.DataFrame()
-
-    return get_last_entries_with_chat_history(df_feedback)
+        ]
+    )
+
+    grouped = pd.DataFrame(
+        {"context": contexts, "turns": turns}, index=df.index
+    ).groupby([df[column] for column in group_columns], sort=False)
+
+    chat_histories = grouped["turns"].agg(
+        lambda turns: [message for turn in turns if turn for message in turn]
+    )
+    # the first context that is not None
+    first_contexts = grouped["context"].first()
+
+    last_entries = df.drop_duplicates(group_columns, keep="last")
+    group_keys = pd.MultiIndex.from_frame(last_entries[group_columns])
+
+    last_entries = last_entries.assign(
+        chat_history=chat_histories.reindex(group_keys).values,
+        context=first_contexts.reindex(group_keys).values,
+    ).drop(columns=[key_column])
+
+    return last_entries[last_entries["chat_history"].map(len) > 0]
+
+
+def prepare_feedback_traces_for_annotation(df: pd.DataFrame) -> pd.DataFrame:
+    # Filter out feedback stage entries
+    df_non_root = df[~df["attributes.metadata"].isna()]
+    df_feedback = df_non_root[
+        df_non_root["attributes.metadata"]
+        .map(lambda metadata: metadata["stage"] == "feedback")
+        .astype(bool)
+    ]
+
+    task_types = df_feedback["attributes.metadata"].map(
+        lambda metadata: metadata.get("type")
+    )
+
+    result_dfs = [
+        # learning material conversations are per task and user
+        build_conversations(
+            df_feedback[task_types == "learning_material"],
+            "task_id",
+            get_learning_material_turn,
+        ),
+        # quiz conversations are per question and user
+        build_conversations(
+            df_feedback[task_types == "quiz"],
+            "question_id",
+            get_quiz_turn,
+        ),
+    ]
+    result_dfs = [result_df for result_df in result_dfs if not result_df.empty]
+
+    # Combine all results
+    if result_dfs:
+        return pd.concat(result_dfs, ignore_index=True)
+    else:
+        return pd.DataFrame()
 
 
 def convert_feedback_span_to_conversations(row):
@@ -265,58 +254,251 @@ def convert_feedback_span_to_conversations(row):
     return conversation
 
 
-def save_daily_traces():
-    from phoenix.client import Client
+# spans are pulled and written one window at a time, which bounds the memory of a pull
+TRACES_EXPORT_WINDOW = timedelta(hours=1)
+# a window with as many spans as the limit is split until its spans fit under it
+TRACES_EXPORT_SPANS_LIMIT = 100000
+TRACES_EXPORT_MIN_WINDOW = timedelta(minutes=1)
+# the watermark is moved after every batch of windows has been exported and its
+# conversations saved, so an interrupted export only redoes the batch it was in
+TRACES_EXPORT_BATCH = timedelta(days=1)
+# spans are only exported once they are this old, as a span is only recorded when it
+# ends and a window pulled earlier would miss the spans still running at the time
+TRACES_EXPORT_LAG = timedelta(minutes=15)
+TRACES_EXPORT_WATERMARK_KEY = "_watermark.json"
+TRACES_EXPORT_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-    if settings.env != "production":
-        # only run in production
-        return
 
-    # Process previous day from 00:00:00 to 23:59:59
-    previous_day = datetime.now() - timedelta(days=1)
-    start_date = previous_day.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_date = previous_day.replace(hour=23, minute=59, second=59, microsecond=0)
+class LocalTraceStore:
+    """Keeps the exported traces in a folder on this machine."""
 
-    print(
-        f"Processing data for {start_date.strftime('%Y-%m-%d %H:%M')} to {end_date.strftime('%Y-%m-%d %H:%M')}",
-        flush=True,
+    def __init__(self, root: str):
+        self.root = root
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = os.path.join(self.root, key)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as file:
+            return file.read()
+
+    def write(self, file_path: str, key: str):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(file_path, path)
+
+
+class S3TraceStore:
+    """Keeps the exported traces under a prefix of the app's S3 bucket."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def read(self, key: str) -> Optional[bytes]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return download_file_from_s3_as_bytes(f"{self.prefix}/{key}")
+        except ClientError as exception:
+            if exception.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise
+
+    def write(self, file_path: str, key: str):
+        upload_file_to_s3(file_path, f"{self.prefix}/{key}")
+
+
+def get_trace_store():
+    if settings.s3_folder_name:
+        return S3TraceStore(f"{settings.s3_folder_name}/phoenix/spans")
+
+    return LocalTraceStore(os.path.join(settings.local_traces_folder, "spans"))
+
+
+def get_traces_export_watermark(store) -> Optional[datetime]:
+    """The time up to which the spans have been exported, if they ever were."""
+    content = store.read(TRACES_EXPORT_WATERMARK_KEY)
+
+    if content is None:
+        return None
+
+    return datetime.fromisoformat(json.loads(content)["exported_until"])
+
+
+def set_traces_export_watermark(store, exported_until: datetime):
+    with tempfile.NamedTemporaryFile(
+        mode="w", suffix=".json", delete=False
+    ) as temp_file:
+        json.dump({"exported_until": exported_until.isoformat()}, temp_file)
+        temp_filepath = temp_file.name
+
+    store.write(temp_filepath, TRACES_EXPORT_WATERMARK_KEY)
+    os.remove(temp_filepath)
+
+
+def get_spans_partition_key(start_time: datetime, end_time: datetime) -> str:
+    # windows never cross an hour, so all the spans of a file are from the same day
+    return (
+        f"date={start_time.strftime('%Y-%m-%d')}/"
+        f"{start_time.strftime('%H%M%S')}-{end_time.strftime('%H%M%S')}.parquet"
     )
 
-    os.environ["PHOENIX_COLLECTOR_ENDPOINT"] = settings.phoenix_endpoint
-    os.environ["PHOENIX_API_KEY"] = settings.phoenix_api_key
 
-    phoenix_client = Client()
+def prepare_spans_for_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Serialize the nested values of the spans (e.g. the messages and the metadata) as
+    JSON, as their shape varies from span to span and parquet needs one per column.
+    """
+    # phoenix indexes the spans by their id while also keeping it as a column
+    df = df.reset_index(drop=df.index.name in df.columns)
+
+    for column in df.columns[df.dtypes == object]:
+        df[column] = [
+            (
+                value
+                if value is None or isinstance(value, str) or is_nan(value)
+                else json.dumps(value, default=str)
+            )
+            for value in df[column]
+        ]
+
+    return df
+
+
+def get_traces_export_windows(
+    start_time: datetime, end_time: datetime, window: timedelta
+):
+    """Split the time range into windows aligned to multiples of `window`."""
+    while start_time < end_time:
+        window_end_time = min(
+            start_time - (start_time - TRACES_EXPORT_EPOCH) % window + window,
+            end_time,
+        )
+
+        yield start_time, window_end_time
+
+        start_time = window_end_time
+
 
+def get_traces_export_range(
+    store, now: Optional[datetime] = None
+) -> Tuple[datetime, datetime]:
+    """
+    The time range of the spans not exported yet. The first export starts from the
+    beginning of the previous day.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    start_time = get_traces_export_watermark(store)
+    if start_time is None:
+        start_time = (now - timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    return start_time, now - TRACES_EXPORT_LAG
+
+
+def get_spans_in_windows(
+    phoenix_client, start_time: datetime, end_time: datetime
+) -> List[Tuple[datetime, datetime, pd.DataFrame]]:
+    """
+    The spans of the window, split into halves for as long as a window has as many
+    spans as the limit, as the spans past the limit would be left out otherwise.
+    """
     df = phoenix_client.spans.get_spans_dataframe(
         project_name=f"sensai-{settings.env}",
-        start_time=start_date,
-        end_time=end_date,
+        start_time=start_time,
+        end_time=end_time,
         timeout=1200,
-        limit=100000,
+        limit=TRACES_EXPORT_SPANS_LIMIT,
     )
 
-    print(f"Got {len(df)} spans", flush=True)
+    if len(df) < TRACES_EXPORT_SPANS_LIMIT:
+        return [(start_time, end_time, df)]
 
-    # Save dataframe to temporary local file
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".csv", delete=False
-    ) as temp_file:
-        df.to_csv(temp_file.name, index=False)
-        temp_filepath = temp_file.name
+    if end_time - start_time <= TRACES_EXPORT_MIN_WINDOW:
+        raise RuntimeError(
+            f"Spans from {start_time} to {end_time} reached the limit of {TRACES_EXPORT_SPANS_LIMIT}"
+        )
 
-    # Upload to S3
-    temp_filename = f"{start_date.strftime('%Y-%m-%d')}"
-    s3_key = f"{settings.s3_folder_name}/phoenix/spans/{temp_filename}.csv"
+    middle_time = start_time + (end_time - start_time) / 2
 
-    print(f"Saved to {temp_filepath}", flush=True)
+    return get_spans_in_windows(
+        phoenix_client, start_time, middle_time
+    ) + get_spans_in_windows(phoenix_client, middle_time, end_time)
 
-    upload_file_to_s3(temp_filepath, s3_key)
 
-    # Clean up temporary file
-    os.remove(temp_filepath)
+def export_traces(store, start_time: datetime, end_time: datetime) -> pd.DataFrame:
+    """
+    Export the spans of the time range as parquet files partitioned by date, and
+    return them. Exporting the same range again overwrites the same files.
+    """
+    from phoenix.client import Client
+
+    os.environ["PHOENIX_COLLECTOR_ENDPOINT"] = settings.phoenix_endpoint
+    os.environ["PHOENIX_API_KEY"] = settings.phoenix_api_key
+
+    phoenix_client = Client()
+
+    spans = []
+
+    for window_start_time, window_end_time in get_traces_export_windows(
+        start_time, end_time, TRACES_EXPORT_WINDOW
+    ):
+        for window_start_time, window_end_time, df in get_spans_in_windows(
+            phoenix_client, window_start_time, window_end_time
+        ):
+            if df.empty:
+                continue
+
+            with tempfile.NamedTemporaryFile(
+                suffix=".parquet", delete=False
+            ) as temp_file:
+                temp_filepath = temp_file.name
+
+            prepare_spans_for_parquet(df).to_parquet(temp_filepath, index=False)
+            store.write(
+                temp_filepath,
+                get_spans_partition_key(window_start_time, window_end_time),
+            )
+            os.remove(temp_filepath)
+
+            spans.append(df)
+
+    print(
+        f"Exported {sum(len(df) for df in spans)} spans from {start_time} to {end_time}",
+        flush=True,
+    )
+
+    if not spans:
+        return pd.DataFrame()
+
+    return pd.concat(spans)
+
+
+def save_daily_traces(now: Optional[datetime] = None):
+    if settings.env != "production":
+        # only run in production
+        return
+
+    store = get_trace_store()
+    start_time, end_time = get_traces_export_range(store, now)
+
+    for batch_start_time, batch_end_time in get_traces_export_windows(
+        start_time, end_time, TRACES_EXPORT_BATCH
+    ):
+        df = export_traces(store, batch_start_time, batch_end_time)
+
+        if not df.empty:
+            save_feedback_conversations(df)
+
+        # only moved past the batch once its spans and conversations are saved
+        set_traces_export_watermark(store, batch_end_time)
 
-    print(f"Uploaded {len(df)} spans to S3 at key: {s3_key}", flush=True)
 
+def save_feedback_conversations(df: pd.DataFrame):
     feedback_traces_for_annotation_df = prepare_feedback_traces_for_annotation(df)
 
     feedback_conversations = feedback_traces_for_annotation_df.apply(
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+from api.config import websocket_messages_table_name
+from api.utils.db import get_new_db_connection
+from api.utils.logging import logger
+
+MessageHandler = Callable[[str, Dict], Awaitable[None]]
+
+
+class Broker(ABC):
+    """
+    Fans messages published on a channel out to the handler of every process that
+    subscribed to the broker. Subclasses decide how far the messages travel.
+    """
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+
+    def subscribe(self, handler: MessageHandler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict):
+        pass
+
+    async def _deliver(self, channel: str, message: Dict):
+        if self.handler is not None:
+            await self.handler(channel, message)
+
+
+class InProcessBroker(Broker):
+    """Only reaches the subscribers in the same process, e.g. a single worker."""
+
+    async def publish(self, channel: str, message: Dict):
+        await self._deliver(channel, message)
+
+
+class SQLiteBroker(Broker):
+    """
+    Relays messages through a table of the app's db, so that they reach every worker
+    that uses the same db file. The message is handed to this process' handler right
+    away, while the other workers poll the table for messages they have not seen yet.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 0.2,
+        retention_seconds: int = 60,
+        table_name: str = websocket_messages_table_name,
+    ):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.table_name = table_name
+        # tells apart the messages published by this process from the others'
+        self.origin = uuid4().hex
+        self.last_message_id = 0
+        self.last_pruned_at = 0.0
+        self._poll_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        async with get_new_db_connection() as conn:
+            cursor = await conn.cursor()
+
+            # only the messages published from now on are relayed
+            await cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table_name}")
+            self.last_message_id = (await cursor.fetchone())[0]
+
+        self._poll_task = asyncio.create_task(self._poll_forever())
+
+    async def stop(self):
+        if self._poll_task is None:
+            return
+
+        self._poll_task.cancel()
+        try:
+            await self._poll_task
+        except asyncio.CancelledError:
+            pass
+
+        self._poll_task = None
+
+    async def publish(self, channel: str, message: Dict):
+        async with get_new_db_connection() as conn:
+            cursor = await conn.cursor()
+
+            await cursor.execute(
+                f"INSERT INTO {self.table_name} (channel, message, origin) VALUES (?, ?, ?)",
+                (channel, json.dumps(message), self.origin),
+            )
+
+            await conn.commit()
+
+        await self._deliver(channel, message)
+
+    async def poll(self):
+        """Hand the messages published by the other processes to the handler."""
+        async with get_new_db_connection() as conn:
+            cursor = await conn.cursor()
+
+            await cursor.execute(
+                f"SELECT id, channel, message, origin FROM {self.table_name} WHERE id > ? ORDER BY id",
+                (self.last_message_id,),
+            )
+            rows = await cursor.fetchall()
+
+            if time.monotonic() - self.last_pruned_at > self.retention_seconds:
+                await cursor.execute(
+                    f"DELETE FROM {self.table_name} WHERE created_at < datetime('now', ?)",
+                    (f"-{self.retention_seconds} seconds",),
+                )
+                await conn.commit()
+                self.last_pruned_at = time.monotonic()
+
+        for message_id, channel, message, origin in rows:
+            self.last_message_id = message_id
+
+            if origin != self.origin:
+                await self._deliver(channel, json.loads(message))
+
+    async def _poll_forever(self):
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exception:
+                # a failed poll is retried with the same cursor on the next tick
+                logger.error(f"Error polling websocket messages: {exception}")
+
+            await asyncio.sleep(self.poll_interval)
+
+
+def get_broker(name: str, poll_interval: float = 0.2) -> Broker:
+    if name == "memory":
+        return InProcessBroker()
+
+    if name == "sqlite":
+        return SQLiteBroker(poll_interval=poll_interval)
+
+    raise ValueError(f"Unknown websocket broker: {name}")
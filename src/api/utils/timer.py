@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+from api.utils.logging import logger
+
+
+def as_utc(value: datetime) -> datetime:
+    # naive times are stored and compared as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc)
+
+
+class DeadlineTimer:
+    """
+    Calls `callback` as soon as the earliest of its deadlines passes, instead of
+    polling for them. The deadlines are kept in a min-heap that is loaded with
+    `load_deadlines` on start and added to with `schedule` whenever a new one is set.
+    A deadline that is moved or cleared afterwards still wakes the timer, so the
+    callback must only act on what is actually due at the time it is called.
+    Deadlines are only kept while the timer runs, e.g. on the one worker that should
+    act on them.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[], Awaitable],
+        load_deadlines: Callable[[], Awaitable[List[datetime]]],
+        max_sleep_seconds: float = 300,
+    ):
+        self.callback = callback
+        self.load_deadlines = load_deadlines
+        # bounds how long a change of the system clock can delay a deadline
+        self.max_sleep_seconds = max_sleep_seconds
+        self.deadlines: List[datetime] = []
+        self.is_running = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+        # deadlines scheduled while a reload is loading the upcoming ones
+        self._scheduled_during_reload: Optional[List[datetime]] = None
+
+    def schedule(self, deadline: Optional[datetime]):
+        if deadline is None or not self.is_running:
+            return
+
+        deadline = as_utc(deadline)
+        heapq.heappush(self.deadlines, deadline)
+
+        if self._scheduled_during_reload is not None:
+            self._scheduled_during_reload.append(deadline)
+
+        self._wake.set()
+
+    async def reload(self):
+        """Replace the deadlines with the upcoming ones, e.g. set by other processes."""
+        if not self.is_running:
+            return
+
+        async with self._reload_lock:
+            self._scheduled_during_reload = []
+
+            try:
+                deadlines = [as_utc(value) for value in await self.load_deadlines()]
+            finally:
+                scheduled = self._scheduled_during_reload
+                self._scheduled_during_reload = None
+
+            # the deadlines scheduled while loading may have been written too late to
+            # be loaded, so they are kept along with the loaded ones
+            self.deadlines = sorted(deadlines + scheduled)
+            self._wake.set()
+
+    async def start(self):
+        if self.is_running:
+            return
+
+        self.is_running = True
+
+        try:
+            await self.reload()
+        except Exception:
+            self.is_running = False
+            raise
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.is_running = False
+        self.deadlines = []
+
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    def _seconds_until_next_deadline(self) -> float:
+        if not self.deadlines:
+            return self.max_sleep_seconds
+
+        delay = (self.deadlines[0] - datetime.now(timezone.utc)).total_seconds()
+
+        return min(max(delay, 0), self.max_sleep_seconds)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), self._seconds_until_next_deadline()
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            now = datetime.now(timezone.utc)
+
+            if not self.deadlines or self.deadlines[0] > now:
+                continue
+
+            while self.deadlines and self.deadlines[0] <= now:
+                heapq.heappop(self.deadlines)
+
+            try:
+                await self.callback()
+            except Exception as exception:
+                logger.error(f"Error running deadline callback: {exception}")
@@ -1,47 +1,216 @@
-from typing import Dict, Set
+import asyncio
+import json
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.routing import APIRouter
+from api.settings import settings
+from api.utils.logging import logger
+from api.utils.pubsub import Broker, InProcessBroker, get_broker
 
 router = APIRouter()
 
+# updates queued for a connection beyond this are coalesced or the connection closed
+SEND_QUEUE_SIZE = 100
+# seconds a single send may take before the client is considered dead
+SEND_TIMEOUT = 10
+# seconds without updates after which a heartbeat is sent to detect dead clients
+HEARTBEAT_INTERVAL = 30
+
+HEARTBEAT_MESSAGE = json.dumps({"event": "heartbeat"}, separators=(",", ":"))
+
+# only the latest queued event of these types matters, as each one carries the
+# running total (e.g. `total_completed`) that supersedes the earlier ones
+COALESCED_EVENTS = ("task_completed",)
+
+# close code asking the client to reconnect, as it fell too far behind
+TRY_AGAIN_LATER = 1013
+# close code for a connection that updates could not be sent to
+INTERNAL_ERROR = 1011
+
+
+class WebSocketConnection:
+    """
+    Sends the updates queued for a websocket from its own writer task, so that a
+    slow client only delays itself and never the code publishing the updates.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_close: Callable[[], None],
+        max_queue_size: int = SEND_QUEUE_SIZE,
+        send_timeout: float = SEND_TIMEOUT,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    ):
+        self.websocket = websocket
+        self.on_close = on_close
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+
+        # (event, serialized message) pairs waiting to be sent
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.is_overflowing = False
+        self.is_stopped = False
+        self._has_messages = asyncio.Event()
+        self._writer = asyncio.create_task(self._write())
+
+    def send(self, message: str, event: Optional[str] = None):
+        if self.is_overflowing:
+            return
+
+        if len(self.queue) >= self.max_queue_size:
+            self._coalesce(event)
+
+        if len(self.queue) >= self.max_queue_size:
+            # the client cannot keep up even with coalesced updates, so it is
+            # closed to reconnect and load the current state afresh
+            self.is_overflowing = True
+            self.queue.clear()
+        else:
+            self.queue.append((event, message))
+
+        self._has_messages.set()
+
+    def _coalesce(self, event: Optional[str]):
+        # keep only the latest queued coalesced event, or none at all if the new
+        # message supersedes it
+        latest = None
+        if event not in COALESCED_EVENTS:
+            latest = next(
+                (
+                    entry
+                    for entry in reversed(self.queue)
+                    if entry[0] in COALESCED_EVENTS
+                ),
+                None,
+            )
+
+        self.queue = deque(
+            entry
+            for entry in self.queue
+            if entry[0] not in COALESCED_EVENTS or entry is latest
+        )
+
+    def stop(self):
+        self.is_stopped = True
+        self._writer.cancel()
+
+    async def close(self):
+        """Stop the writer and wait for it to finish."""
+        self.stop()
+
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+
+    async def _send(self, message: str):
+        await asyncio.wait_for(self.websocket.send_text(message), self.send_timeout)
+
+    async def _close(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self.send_timeout)
+        except Exception:
+            # the client is already gone
+            pass
+
+    async def _write(self):
+        try:
+            while not self.is_overflowing:
+                # wait_for swallows a cancellation that arrives just as the send it
+                # waits on completes, so the writer also checks whether it was stopped
+                if self.is_stopped:
+                    return
+
+                if not self.queue:
+                    self._has_messages.clear()
+
+                    try:
+                        await asyncio.wait_for(
+                            self._has_messages.wait(), self.heartbeat_interval
+                        )
+                    except asyncio.TimeoutError:
+                        await self._send(HEARTBEAT_MESSAGE)
+
+                    continue
+
+                _, message = self.queue.popleft()
+                await self._send(message)
+
+            await self._close(TRY_AGAIN_LATER)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exception:
+            logger.error(f"Error sending websocket update: {exception}")
+            # closed so that the client reconnects instead of waiting for updates
+            # that will never come
+            await self._close(INTERNAL_ERROR)
+
+        self.on_close()
+
 
 # WebSocket connection manager to handle multiple client connections
 class ConnectionManager:
-    def __init__(self):
-        # Dictionary to store WebSocket connections by course_id
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+    def __init__(self, broker: Broker = None):
+        # Dictionary to store the connection of every WebSocket by course_id
+        self.active_connections: Dict[int, Dict[WebSocket, WebSocketConnection]] = {}
+
+        # updates are published through the broker, which hands them back to the
+        # manager of every worker to send to the websockets connected to it
+        self.broker = broker or InProcessBroker()
+        self.broker.subscribe(self._send_to_connections)
+
+    async def start(self):
+        await self.broker.start()
+
+    async def stop(self):
+        await self.broker.stop()
+
+        active_connections = self.active_connections
+        self.active_connections = {}
+
+        for connections in active_connections.values():
+            for connection in connections.values():
+                await connection.close()
 
     async def connect(self, websocket: WebSocket, course_id: int):
         await websocket.accept()
         if course_id not in self.active_connections:
-            self.active_connections[course_id] = set()
-        self.active_connections[course_id].add(websocket)
+            self.active_connections[course_id] = {}
+        self.active_connections[course_id][websocket] = WebSocketConnection(
+            websocket, lambda: self.disconnect(websocket, course_id)
+        )
 
     def disconnect(self, websocket: WebSocket, course_id: int):
         if course_id in self.active_connections:
-            self.active_connections[course_id].discard(websocket)
+            connection = self.active_connections[course_id].pop(websocket, None)
+            if connection is not None:
+                connection.stop()
             if not self.active_connections[course_id]:
                 del self.active_connections[course_id]
 
     async def send_item_update(self, course_id: int, item_data: Dict):
-        if course_id in self.active_connections:
-            disconnected_websockets = set()
-            for websocket in self.active_connections[course_id]:
-                try:
-                    await websocket.send_json(item_data)
-                except Exception as exception:
-                    print(exception)
+        await self.broker.publish(str(course_id), item_data)
+
+    async def _send_to_connections(self, channel: str, item_data: Dict):
+        course_id = int(channel)
+
+        if course_id not in self.active_connections:
+            return
 
-                    # Mark for removal if sending fails
-                    disconnected_websockets.add(websocket)
+        # serialized once for all the connections, the same way send_json does
+        message = json.dumps(item_data, separators=(",", ":"), ensure_ascii=False)
 
-            # Remove disconnected websockets
-            for websocket in disconnected_websockets:
-                self.disconnect(websocket, course_id)
+        for connection in list(self.active_connections[course_id].values()):
+            connection.send(message, item_data.get("event"))
 
 
 # Create a connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(
+    get_broker(settings.websocket_broker, settings.websocket_broker_poll_interval)
+)
 
 
 # WebSocket endpoint for course generation updates
@@ -4,6 +4,8 @@ from collections import defaultdict
 from api.db.analytics import (
     get_usage_summary_by_organization,
     get_cohort_completion,
+    get_cohort_completion_matrix,
+    get_cohort_course_metrics,
     get_cohort_course_attempt_data,
     get_cohort_streaks,
 )
@@ -283,6 +285,115 @@ class TestGetCohortCompletion:
         assert result[1][102]["is_complete"] is False
 
 
+class TestGetCohortCompletionMatrix:
+    """Test suite for get_cohort_completion_matrix function."""
+
+    @pytest.mark.asyncio
+    @patch("api.db.analytics.execute_db_operation")
+    async def test_get_cohort_completion_matrix(self, mock_db):
+        """Test the completion matrices of learning material and quiz tasks."""
+        mock_db.side_effect = [
+            [(1, 101), (2, 999)],  # completed tasks, 999 is not a cohort task
+            [(1, 301), (1, 302), (2, 302), (2, 303)],  # completed questions
+            [(101,)],  # learning material tasks
+            [(104, 301), (104, 302), (105, 303), (106, None)],  # quiz questions
+        ]
+
+        result = await get_cohort_completion_matrix(cohort_id=1, user_ids=[1, 2])
+
+        assert result["user_ids"].tolist() == [1, 2]
+        assert result["task_ids"].tolist() == [101, 104, 105, 106]
+        assert result["task_types"] == [
+            "learning_material",
+            "quiz",
+            "quiz",
+            "quiz",
+        ]
+        # the quiz without questions is never complete
+        assert result["task_completion"].tolist() == [
+            [True, True, False, False],
+            [False, False, True, False],
+        ]
+        assert result["question_ids"].tolist() == [301, 302, 303]
+        assert result["question_task_indices"].tolist() == [1, 1, 2]
+        assert result["question_completion"].tolist() == [
+            [True, True, False],
+            [False, True, True],
+        ]
+
+    @pytest.mark.asyncio
+    @patch("api.db.analytics.execute_db_operation")
+    async def test_get_cohort_completion_quiz_without_questions(self, mock_db):
+        """Test that a quiz without questions keeps a single None question."""
+        mock_db.side_effect = [[], [], [], [(106, None)]]
+
+        result = await get_cohort_completion(cohort_id=1, user_ids=[1])
+
+        assert result[1][106] == {
+            "is_complete": False,
+            "questions": [{"question_id": None, "is_complete": False}],
+        }
+
+
+class TestGetCohortCourseMetrics:
+    """Test suite for get_cohort_course_metrics function."""
+
+    @pytest.mark.asyncio
+    @patch("api.db.analytics.execute_db_operation")
+    async def test_get_cohort_course_metrics_course_not_found(self, mock_db):
+        """Test that nothing is aggregated when the course does not exist."""
+        mock_db.return_value = (0, 1)
+
+        result = await get_cohort_course_metrics(cohort_id=1, course_id=999)
+
+        assert result == {
+            "course_exists": False,
+            "cohort_exists": True,
+            "num_tasks": 0,
+            "task_type_counts": {},
+            "learners": [],
+        }
+        mock_db.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("api.db.analytics.execute_db_operation")
+    async def test_get_cohort_course_metrics(self, mock_db):
+        """Test aggregating the completions of the learners of a cohort."""
+        mock_db.side_effect = [
+            (1, 1),  # course and cohort exist
+            # task counts: type, tasks available to the cohort, tasks in the course milestones
+            [("learning_material", 2, 2), ("quiz", 2, 1)],
+            # learners: user_id, quiz completions, learning material completions, has_attempted
+            [(1, 1, 2, 1), (2, 0, 0, 0)],
+        ]
+
+        result = await get_cohort_course_metrics(cohort_id=1, course_id=5)
+
+        assert result == {
+            "course_exists": True,
+            "cohort_exists": True,
+            "num_tasks": 4,
+            "task_type_counts": {"learning_material": 2, "quiz": 1},
+            "learners": [
+                {
+                    "user_id": 1,
+                    "completions": {"quiz": 1, "learning_material": 2},
+                    "has_attempted": True,
+                },
+                {
+                    "user_id": 2,
+                    "completions": {"quiz": 0, "learning_material": 0},
+                    "has_attempted": False,
+                },
+            ],
+        }
+
+        # a single aggregated query for all the learners
+        learners_query, learners_params = mock_db.call_args_list[2][0]
+        assert "GROUP BY l.user_id" in learners_query
+        assert learners_params == (1, 5, 1, 5, 5)
+
+
 class TestGetCohortCourseAttemptData:
     """Test suite for get_cohort_course_attempt_data function."""
 
@@ -431,7 +542,8 @@ class TestGetCohortStreaks:
 
         # Verify no date filter was applied for ALL_TIME
         call_args = mock_db.call_args[0][0]
-        assert "AND DATE(datetime(timestamp" not in call_args
+        assert "AND a.ist_date" not in call_args
+        assert "user_daily_activity" in call_args
 
     @pytest.mark.asyncio
     @patch("api.db.analytics.get_user_streak_from_usage_dates")
@@ -451,10 +563,7 @@ class TestGetCohortStreaks:
 
         # Verify weekly date filter was applied
         call_args = mock_db.call_args[0][0]
-        assert (
-            "AND DATE(datetime(timestamp, '+5 hours', '+30 minutes')) > DATE('now', 'weekday 0', '-7 days')"
-            in call_args
-        )
+        assert "AND a.ist_date > DATE('now', 'weekday 0', '-7 days')" in call_args
 
     @pytest.mark.asyncio
     @patch("api.db.analytics.get_user_streak_from_usage_dates")
@@ -475,7 +584,7 @@ class TestGetCohortStreaks:
         # Verify monthly date filter was applied
         call_args = mock_db.call_args[0][0]
         assert (
-            "AND strftime('%Y-%m', datetime(timestamp, '+5 hours', '+30 minutes')) = strftime('%Y-%m', 'now')"
+            "AND a.ist_date >= DATE(datetime('now', '+5 hours', '+30 minutes'), 'start of month')"
             in call_args
         )
 
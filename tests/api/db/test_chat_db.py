@@ -4,6 +4,7 @@ from unittest.mock import patch, AsyncMock, MagicMock
 from src.api.db.chat import (
     store_messages,
     get_all_chat_history,
+    get_all_chat_history_in_chunks,
     convert_chat_message_to_dict,
     get_question_chat_history_for_user,
     get_task_chat_history_for_user,
@@ -15,6 +16,14 @@ from src.api.db.chat import (
 from src.api.models import StoreMessageRequest, TaskType
 
 
+def _mock_connection(mock_db_conn):
+    mock_cursor = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_db_conn.return_value.__aenter__.return_value = mock_conn
+    return mock_cursor, mock_conn
+
+
 @pytest.mark.asyncio
 class TestStoreMessages:
     """Test message storage functionality."""
@@ -76,14 +85,64 @@ class TestStoreMessages:
             )
         ]
 
+        mock_cursor.rowcount = 1
+
         result = await store_messages(messages, 1, 1, True)
 
         # Should insert completion record
         assert (
-            mock_cursor.execute.call_count == 2
-        )  # One for message, one for completion
+            mock_cursor.execute.call_count == 3
+        )  # One for message, one for completion, one for the leaderboard tasks completed
         calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
         assert any("task_completions" in call for call in calls)
+        assert "UPDATE cohort_leaderboard" in calls[2]
+
+        # The message is added to the daily activity rollup and the leaderboard, while
+        # the question completion does not count as activity
+        assert mock_cursor.executemany.call_count == 2
+        executemany_calls = mock_cursor.executemany.call_args_list
+        assert executemany_calls[0][0][1] == [(1, messages[0].created_at, "user", 1)]
+        assert "cohort_leaderboard" in executemany_calls[1][0][0]
+        assert executemany_calls[1][0][1] == [(messages[0].created_at, 1, 1, None, 1)]
+
+    @patch("src.api.db.chat.get_new_db_connection")
+    @patch("src.api.db.chat.execute_db_operation")
+    async def test_store_messages_existing_completion_not_counted(
+        self, mock_execute, mock_get_conn
+    ):
+        """Test that an already completed question is not counted again."""
+        mock_cursor = AsyncMock()
+        mock_cursor.lastrowid = 123
+        mock_cursor.rowcount = 0
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_conn.__aenter__.return_value = mock_conn
+        mock_get_conn.return_value = mock_conn
+
+        mock_execute.return_value = [
+            (123, "2024-01-01 12:00:00", 1, 1, "assistant", "Hi", "text")
+        ]
+
+        messages = [
+            StoreMessageRequest(
+                role="assistant",
+                content="Hi",
+                response_type="text",
+                created_at=datetime.now(),
+            )
+        ]
+
+        await store_messages(messages, 1, 1, True)
+
+        # One for message, one for completion
+        assert mock_cursor.execute.call_count == 2
+
+        # the assistant message still counts towards the streaks of the cohorts
+        executemany_calls = mock_cursor.executemany.call_args_list
+        assert executemany_calls[0][0][1] == [
+            (1, messages[0].created_at, "assistant", 1)
+        ]
+        assert executemany_calls[1][0][1] == [(messages[0].created_at, 1, 1, None, 1)]
 
     @patch("src.api.db.chat.get_new_db_connection")
     @patch("src.api.db.chat.execute_db_operation")
@@ -164,6 +223,57 @@ class TestGetChatHistory:
 
         mock_execute.assert_called_once()
 
+    @patch("src.api.db.chat.execute_db_operation")
+    async def test_get_all_chat_history_page(self, mock_execute):
+        """Test retrieving a page of the chat history of an organization."""
+        mock_execute.return_value = []
+
+        result = await get_all_chat_history(
+            1, since="2024-01-01 00:00:00", after_id=10, limit=100
+        )
+
+        assert result == []
+        query, params = mock_execute.call_args[0]
+        assert "datetime(message.created_at) >= datetime(?)" in query
+        assert "message.id > ?" in query
+        assert "ORDER BY message.id ASC" in query
+        assert query.endswith("LIMIT ?")
+        assert params == (1, "2024-01-01 00:00:00", 10, 100)
+
+    @patch("src.api.db.chat.get_new_db_connection")
+    async def test_get_all_chat_history_in_chunks(self, mock_get_conn):
+        """Test reading the chat history of an organization chunk by chunk."""
+        row = (
+            1,
+            "2024-01-01 12:00:00",
+            1,
+            "user@example.com",
+            1,
+            1,
+            "user",
+            "Hi",
+            "text",
+        )
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchmany.side_effect = [[row, row], [row], []]
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value.__aenter__.return_value = mock_conn
+
+        chunks = [
+            chunk
+            async for chunk in get_all_chat_history_in_chunks(
+                1, after_id=5, chunk_size=2
+            )
+        ]
+
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert chunks[0][0]["user_email"] == "user@example.com"
+        query, params = mock_cursor.execute.call_args[0]
+        assert "LIMIT" not in query
+        assert params == (1, 5)
+        mock_cursor.fetchmany.assert_called_with(2)
+
     @patch("src.api.db.chat.execute_db_operation")
     async def test_get_question_chat_history_for_user_success(self, mock_execute):
         """Test successful retrieval of question chat history for user."""
@@ -257,14 +367,16 @@ class TestChatMessageConversion:
 class TestChatMessageOperations:
     """Test chat message CRUD operations."""
 
-    @patch("src.api.db.chat.execute_db_operation")
-    async def test_delete_message_success(self, mock_execute):
+    @patch("src.api.db.chat.get_new_db_connection")
+    @patch("src.api.db.chat.delete_chat_history_with_activity")
+    async def test_delete_message_success(self, mock_delete, mock_db_conn):
         """Test successful message deletion."""
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+
         await delete_message(1)
 
-        mock_execute.assert_called_once_with(
-            "DELETE FROM chat_history WHERE id = ?", (1,)
-        )
+        mock_delete.assert_called_once_with(mock_cursor, "id = ?", (1,))
+        mock_conn.commit.assert_called_once()
 
     @patch("src.api.db.chat.execute_db_operation")
     async def test_update_message_timestamp_success(self, mock_execute):
@@ -277,18 +389,32 @@ class TestChatMessageOperations:
             "UPDATE chat_history SET timestamp = ? WHERE id = ?", (new_timestamp, 1)
         )
 
-    @patch("src.api.db.chat.execute_db_operation")
-    async def test_delete_user_chat_history_for_task_success(self, mock_execute):
+    @patch("src.api.db.chat.get_new_db_connection")
+    @patch("src.api.db.chat.delete_chat_history_with_activity")
+    async def test_delete_user_chat_history_for_task_success(
+        self, mock_delete, mock_db_conn
+    ):
         """Test successful deletion of user chat history for a task."""
-        await delete_user_chat_history_for_task(1, 1)
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
 
-        mock_execute.assert_called_once_with(
-            "DELETE FROM chat_history WHERE question_id = ? AND user_id = ?", (1, 1)
+        await delete_user_chat_history_for_task(1, 2)
+
+        mock_delete.assert_called_once_with(
+            mock_cursor, "question_id = ? AND user_id = ?", (1, 2)
         )
+        mock_conn.commit.assert_called_once()
 
-    @patch("src.api.db.chat.execute_db_operation")
-    async def test_delete_all_chat_history_success(self, mock_execute):
+    @patch("src.api.db.chat.get_new_db_connection")
+    async def test_delete_all_chat_history_success(self, mock_db_conn):
         """Test successful deletion of all chat history."""
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+
         await delete_all_chat_history()
 
-        mock_execute.assert_called_once_with("DELETE FROM chat_history")
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert calls == [
+            "DELETE FROM chat_history",
+            "UPDATE user_daily_activity SET message_count = 0",
+            "DELETE FROM user_daily_activity WHERE completion_count = 0",
+        ]
+        mock_conn.commit.assert_called_once()
@@ -132,15 +132,19 @@ class TestCohortBasicOperations:
 
         mock_execute_multiple.assert_called_once()
         operations = mock_execute_multiple.call_args[0][0]
-        assert len(operations) == 3  # Should have 3 delete operations
+        assert len(operations) == 5  # Should have 5 delete operations
 
 
 @pytest.mark.asyncio
 class TestCohortCourseOperations:
     """Test cohort-course relationship operations."""
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_add_courses_to_cohort(self, mock_execute_many):
+    async def test_add_courses_to_cohort(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test adding courses to cohort."""
         course_ids = [1, 2, 3]
         publish_at = datetime.now(timezone.utc)
@@ -161,9 +165,15 @@ class TestCohortCourseOperations:
         ]
 
         mock_execute_many.assert_called_once_with(ANY, expected_values)
+        mock_backfill.assert_called_once_with([1])
+        mock_backfill_leaderboard.assert_called_once_with([1])
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_add_courses_to_cohort_no_drip(self, mock_execute_many):
+    async def test_add_courses_to_cohort_no_drip(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test adding courses to cohort without drip configuration."""
         course_ids = [1, 2]
 
@@ -176,8 +186,12 @@ class TestCohortCourseOperations:
 
         mock_execute_many.assert_called_once_with(ANY, expected_values)
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_add_course_to_cohorts(self, mock_execute_many):
+    async def test_add_course_to_cohorts(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test adding course to multiple cohorts."""
         cohort_ids = [1, 2, 3]
 
@@ -197,8 +211,12 @@ class TestCohortCourseOperations:
 
         mock_execute_many.assert_called_once_with(ANY, expected_values)
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_remove_course_from_cohorts(self, mock_execute_many):
+    async def test_remove_course_from_cohorts(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test removing course from multiple cohorts."""
         cohort_ids = [1, 2, 3]
 
@@ -207,8 +225,12 @@ class TestCohortCourseOperations:
         expected_params = [(1, 1), (1, 2), (1, 3)]
         mock_execute_many.assert_called_once_with(ANY, expected_params)
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_remove_courses_from_cohort(self, mock_execute_many):
+    async def test_remove_courses_from_cohort(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test removing multiple courses from cohort."""
         course_ids = [1, 2, 3]
 
@@ -216,18 +238,25 @@ class TestCohortCourseOperations:
 
         expected_params = [(1, 1), (1, 2), (1, 3)]
         mock_execute_many.assert_called_once_with(ANY, expected_params)
+        mock_backfill.assert_called_once()
 
 
 @pytest.mark.asyncio
 class TestCohortMemberOperations:
     """Test cohort member management operations."""
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
     @patch("src.api.db.cohort.execute_db_operation")
     @patch("src.api.db.cohort.get_new_db_connection")
     @patch("src.api.db.cohort.insert_or_return_user")
     @patch("src.api.db.cohort.send_slack_notification_for_learner_added_to_cohort")
     async def test_add_members_to_cohort_success(
-        self, mock_slack, mock_insert_user, mock_connection, mock_execute
+        self,
+        mock_slack,
+        mock_insert_user,
+        mock_connection,
+        mock_execute,
+        mock_backfill_leaderboard,
     ):
         """Test successfully adding members to cohort."""
         # Mock database setup
@@ -260,6 +289,8 @@ class TestCohortMemberOperations:
         assert mock_insert_user.call_count == 2
         # Verify Slack notifications
         assert mock_slack.call_count == 2
+        # The leaderboard picks up the new learners
+        mock_backfill_leaderboard.assert_called_once_with([1])
 
     @patch("src.api.db.cohort.execute_db_operation")
     async def test_add_members_to_cohort_org_not_found_by_slug(self, mock_execute):
@@ -652,15 +683,23 @@ class TestCohortEdgeCases:
 
         assert result == expected
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_add_courses_to_cohort_empty_list(self, mock_execute_many):
+    async def test_add_courses_to_cohort_empty_list(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test adding empty list of courses to cohort."""
         await add_courses_to_cohort(1, [])
 
         mock_execute_many.assert_called_once_with(ANY, [])
 
+    @patch("src.api.db.cohort.backfill_cohort_leaderboards")
+    @patch("src.api.db.cohort.backfill_user_daily_activity")
     @patch("src.api.db.cohort.execute_many_db_operation")
-    async def test_remove_courses_from_cohort_empty_list(self, mock_execute_many):
+    async def test_remove_courses_from_cohort_empty_list(
+        self, mock_execute_many, mock_backfill, mock_backfill_leaderboard
+    ):
         """Test removing empty list of courses from cohort."""
         await remove_courses_from_cohort(1, [])
 
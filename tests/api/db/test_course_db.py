@@ -8,7 +8,13 @@ from src.api.db.course import (
     get_all_courses_for_org,
     convert_course_db_to_dict,
     get_course,
+    get_course_trees,
+    get_course_skeleton_versions,
+    get_course_skeletons,
+    overlay_milestone_unlock_dates,
     get_course_org_id,
+    get_course_version,
+    get_course_changes,
     update_course_name,
     delete_course,
     get_tasks_for_course,
@@ -36,7 +42,9 @@ from src.api.db.course import (
     drop_course_cohorts_table,
     drop_courses_table,
     delete_all_courses_for_org,
+    clear_user_courses_cache,
 )
+from src.api.db.utils import USER_COURSES_CACHE_TTL
 from src.api.models import (
     GenerateCourseJobStatus,
     TaskType,
@@ -279,6 +287,110 @@ class TestCourseDetails:
 
         assert result["course_generation_status"] == GenerateCourseJobStatus.STARTED
 
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_trees(self, mock_execute):
+        """Test getting the trees of several courses at once."""
+        courses_data = [
+            (1, "Course 1", None),
+            (2, "Course 2", GenerateCourseJobStatus.STARTED),
+            (2, "Course 2", GenerateCourseJobStatus.COMPLETED),
+        ]
+        milestones_data = [
+            (1, 10, "Module 1", "#123456", 0),
+            (1, 11, "Module 2", "#654321", 1024),
+            (2, 20, "Module 1", "#123456", 0),
+        ]
+        tasks_data = [
+            (1, 1, "Task 1", TaskType.QUIZ, TaskStatus.PUBLISHED, None, 10, 0, 3, None),
+            (
+                2,
+                2,
+                "Task 2",
+                TaskType.LEARNING_MATERIAL,
+                TaskStatus.PUBLISHED,
+                None,
+                20,
+                0,
+                None,
+                GenerateTaskJobStatus.STARTED,
+            ),
+        ]
+
+        mock_execute.side_effect = [courses_data, milestones_data, tasks_data]
+
+        result = await get_course_trees([1, 2])
+
+        # one query each for the courses, milestones and tasks of all the courses
+        assert mock_execute.call_count == 3
+        for query_call in mock_execute.call_args_list:
+            assert "IN (?, ?)" in query_call[0][0]
+
+        assert result == {
+            1: {
+                "id": 1,
+                "name": "Course 1",
+                "course_generation_status": None,
+                "milestones": [
+                    {
+                        "id": 10,
+                        "name": "Module 1",
+                        "color": "#123456",
+                        "ordering": 0,
+                        "tasks": [
+                            {
+                                "id": 1,
+                                "title": "Task 1",
+                                "type": TaskType.QUIZ,
+                                "status": TaskStatus.PUBLISHED,
+                                "scheduled_publish_at": None,
+                                "ordering": 0,
+                                "num_questions": 3,
+                                "is_generating": False,
+                            }
+                        ],
+                    },
+                    {
+                        "id": 11,
+                        "name": "Module 2",
+                        "color": "#654321",
+                        "ordering": 1024,
+                        "tasks": [],
+                    },
+                ],
+            },
+            2: {
+                "id": 2,
+                "name": "Course 2",
+                "course_generation_status": GenerateCourseJobStatus.STARTED,
+                "milestones": [
+                    {
+                        "id": 20,
+                        "name": "Module 1",
+                        "color": "#123456",
+                        "ordering": 0,
+                        "tasks": [
+                            {
+                                "id": 2,
+                                "title": "Task 2",
+                                "type": TaskType.LEARNING_MATERIAL,
+                                "status": TaskStatus.PUBLISHED,
+                                "scheduled_publish_at": None,
+                                "ordering": 0,
+                                "num_questions": None,
+                                "is_generating": True,
+                            }
+                        ],
+                    }
+                ],
+            },
+        }
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_trees_empty(self, mock_execute):
+        """Test that no queries are made without course ids."""
+        assert await get_course_trees([]) == {}
+        mock_execute.assert_not_called()
+
     @patch("src.api.db.course.execute_db_operation")
     async def test_get_tasks_for_course_with_milestone(self, mock_execute):
         """Test getting tasks for course filtered by milestone."""
@@ -365,17 +477,151 @@ class TestCourseDetails:
         assert result == expected
 
 
+@pytest.mark.asyncio
+class TestCourseChanges:
+    """Test change tracking of course content."""
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_version(self, mock_execute):
+        """Test that the course version changes along with its content."""
+        mock_execute.return_value = ("Course", "2024-01-01 00:00:00.000", 2, None, 1)
+        version = await get_course_version(1)
+
+        mock_execute.return_value = ("Course", "2024-01-01 00:00:00.001", 2, None, 1)
+        assert await get_course_version(1) != version
+
+        mock_execute.return_value = ("Course", "2024-01-01 00:00:00.000", 2, None, 1)
+        assert await get_course_version(1) == version
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_version_not_found(self, mock_execute):
+        """Test the version of a course that does not exist."""
+        mock_execute.return_value = None
+
+        assert await get_course_version(1) is None
+
+    @patch("src.api.db.course.get_tasks_content")
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_changes(self, mock_execute, mock_get_tasks_content):
+        """Test getting only what changed after a cursor."""
+        mock_execute.side_effect = [
+            (1, "Course"),
+            [
+                (1, "Module 1", "#123456", 0, "2024-01-01 00:00:00.000"),
+                (2, "Module 2", "#654321", 1, "2024-01-03 00:00:00.000"),
+            ],
+            [
+                # unchanged published task
+                (
+                    10,
+                    "Task 1",
+                    "learning_material",
+                    "published",
+                    None,
+                    1,
+                    0,
+                    None,
+                    None,
+                    "2024-01-01 00:00:00.000",
+                    1,
+                ),
+                # changed published quiz
+                (
+                    11,
+                    "Task 2",
+                    "quiz",
+                    "published",
+                    None,
+                    2,
+                    0,
+                    1,
+                    None,
+                    "2024-01-04 00:00:00.000",
+                    1,
+                ),
+                # task that was deleted after the cursor
+                (
+                    12,
+                    "Task 3",
+                    "quiz",
+                    "published",
+                    None,
+                    2,
+                    1,
+                    0,
+                    None,
+                    "2024-01-05 00:00:00.000",
+                    0,
+                ),
+            ],
+        ]
+        mock_get_tasks_content.return_value = {11: {"questions": [{"id": 100}]}}
+
+        result = await get_course_changes(1, "2024-01-02 00:00:00.000")
+
+        assert result["cursor"] == "2024-01-05 00:00:00.000"
+        assert result["milestones"] == [
+            {"id": 2, "name": "Module 2", "color": "#654321", "ordering": 1}
+        ]
+        assert [task["id"] for task in result["tasks"]] == [11]
+        assert result["tasks"][0]["milestone_id"] == 2
+        assert result["tasks"][0]["questions"] == [{"id": 100}]
+        assert result["milestone_ids"] == [1, 2]
+        assert result["task_ids"] == [10, 11]
+        # only the content of the changed tasks is read, in one call
+        mock_get_tasks_content.assert_called_once_with([11])
+
+    @patch("src.api.db.course.get_tasks_content")
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_changes_without_cursor(
+        self, mock_execute, mock_get_tasks_content
+    ):
+        """Test that everything is returned without a cursor."""
+        mock_execute.side_effect = [
+            (1, "Course"),
+            [(1, "Module 1", "#123456", 0, "2024-01-01 00:00:00.000")],
+            [
+                (
+                    10,
+                    "Task 1",
+                    "learning_material",
+                    "published",
+                    None,
+                    1,
+                    0,
+                    None,
+                    None,
+                    "2024-01-02 00:00:00.000",
+                    1,
+                ),
+            ],
+        ]
+        mock_get_tasks_content.return_value = {10: {"blocks": [{"type": "text"}]}}
+
+        result = await get_course_changes(1)
+
+        assert result["cursor"] == "2024-01-02 00:00:00.000"
+        assert len(result["milestones"]) == 1
+        assert result["tasks"][0]["blocks"] == [{"type": "text"}]
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_changes_not_found(self, mock_execute):
+        """Test the changes of a course that does not exist."""
+        mock_execute.return_value = None
+
+        assert await get_course_changes(1) is None
+
+
 @pytest.mark.asyncio
 class TestMilestoneOperations:
     """Test milestone-related operations."""
 
-    @patch("src.api.db.course.get_org_id_for_course")
     @patch("src.api.db.course.get_new_db_connection")
-    async def test_add_milestone_to_course(self, mock_connection, mock_get_org):
+    async def test_add_milestone_to_course(self, mock_connection):
         """Test adding milestone to course."""
-        mock_get_org.return_value = 1
         mock_cursor = AsyncMock()
         mock_cursor.lastrowid = 123
+        mock_cursor.rowcount = 1
         mock_cursor.fetchone.return_value = (5,)  # max ordering
         mock_conn = AsyncMock()
         mock_conn.cursor.return_value = mock_cursor
@@ -386,7 +632,26 @@ class TestMilestoneOperations:
         )
 
         assert milestone_id == 123
-        assert ordering == 6
+        assert ordering == 1029
+        mock_cursor.execute.assert_any_call(
+            "INSERT INTO course_milestones (course_id, milestone_id, ordering) VALUES (?, ?, ?)",
+            (1, 123, 1029),
+        )
+        mock_conn.commit.assert_called_once()
+
+    @patch("src.api.db.course.get_new_db_connection")
+    async def test_add_milestone_to_course_not_found(self, mock_connection):
+        """Test adding milestone to a course that does not exist."""
+        mock_cursor = AsyncMock()
+        mock_cursor.rowcount = 0
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_connection.return_value.__aenter__.return_value = mock_conn
+
+        with pytest.raises(ValueError, match="Course not found"):
+            await add_milestone_to_course(999, "New Module", "#123456")
+
+        mock_conn.commit.assert_not_called()
 
     @patch("src.api.db.course.execute_many_db_operation")
     async def test_update_milestone_orders(self, mock_execute_many):
@@ -475,6 +740,9 @@ class TestTaskOperations:
         await add_tasks_to_courses(course_tasks)
 
         mock_check_milestones.assert_called_once_with(course_tasks)
+        mock_cursor.executemany.assert_called_once_with(
+            ANY, [(1, 1, 1026, 1), (2, 1, 2050, 1)]
+        )
 
     @patch("src.api.db.course.execute_many_db_operation")
     async def test_remove_tasks_from_courses(self, mock_execute_many):
@@ -677,119 +945,66 @@ class TestCourseTransfer:
         # Should call execute_db_operation multiple times
         assert mock_execute.call_count == 9
 
-    @patch("src.api.db.course.get_course")
-    @patch("src.api.db.course.create_course")
-    @patch("src.api.db.course.add_milestone_to_course")
-    @patch("src.api.db.course.create_draft_task_for_course")
-    @patch("src.api.db.course.get_task")
-    @patch("src.api.db.course.update_learning_material_task")
-    @patch("src.api.db.course.update_draft_quiz")
-    @patch("src.api.db.course.get_scorecard")
-    @patch("src.api.db.course.create_scorecard")
-    @patch("src.api.db.utils.execute_db_operation")
+    @patch("src.api.db.course.get_org_by_id")
+    @patch("src.api.db.course.get_new_db_connection")
+    @patch("src.api.db.course.send_slack_notification_for_new_course")
     async def test_duplicate_course_to_org(
-        self,
-        mock_execute_db_operation,
-        mock_create_scorecard,
-        mock_get_scorecard,
-        mock_update_quiz,
-        mock_update_learning,
-        mock_get_task,
-        mock_create_task,
-        mock_add_milestone,
-        mock_create_course,
-        mock_get_course,
+        self, mock_slack, mock_connection, mock_get_org
     ):
         """Test duplicating course to organization."""
-        # Mock course structure
-        course_data = {
-            "name": "Test Course",
-            "milestones": [
-                {
-                    "name": "Module 1",
-                    "color": "#123456",
-                    "tasks": [
-                        {"id": 1, "type": "learning_material"},
-                        {"id": 2, "type": "quiz"},
-                    ],
-                }
-            ],
-        }
+        mock_get_org.return_value = {"id": 999, "slug": "test-org"}
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = ("Test Course",)
+        mock_cursor.lastrowid = 456
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_connection.return_value.__aenter__.return_value = mock_conn
 
-        learning_task = {
-            "id": 1,
-            "title": "Learning Task",
-            "type": "learning_material",
-            "status": "published",
-            "org_id": 999,
-            "scheduled_publish_at": None,
-            "blocks": [],
-        }
+        result = await duplicate_course_to_org(1, 999)
 
-        quiz_task = {
-            "id": 2,
-            "title": "Quiz Task",
-            "type": "quiz",
-            "status": "published",
-            "org_id": 999,
-            "scheduled_publish_at": None,
-            "questions": [
-                {
-                    "id": 1,
-                    "type": "multiple_choice",
-                    "blocks": [],
-                    "answer": None,
-                    "input_type": "multiple_choice",
-                    "response_type": "single",
-                    "scorecard_id": 1,
-                    "context": None,
-                    "coding_languages": None,
-                    "max_attempts": 3,
-                    "is_feedback_shown": True,
-                    "text": "Question 1",
-                },
-                {
-                    "id": 2,
-                    "type": "multiple_choice",
-                    "blocks": [],
-                    "answer": None,
-                    "input_type": "multiple_choice",
-                    "response_type": "single",
-                    "scorecard_id": 1,
-                    "context": None,
-                    "coding_languages": None,
-                    "max_attempts": 3,
-                    "is_feedback_shown": True,
-                    "text": "Question 2",
-                },
-            ],
-        }
+        assert result == 456
 
-        original_scorecard = {
-            "title": "Original Scorecard",
-            "criteria": [],
-        }
+        # Everything is copied in a single transaction on one connection
+        mock_connection.assert_called_once()
+        mock_conn.commit.assert_called_once()
 
-        new_scorecard = {"id": 123}
+        calls = [call[0] for call in mock_cursor.execute.call_args_list]
+        assert calls[1] == (
+            "INSERT INTO courses (name, org_id) VALUES (?, ?)",
+            ("Test Course", 999),
+        )
+        queries = [call[0] for call in calls]
+        for table in ["milestones", "tasks", "questions", "scorecards"]:
+            assert any(f"INSERT INTO {table} (id," in query for query in queries), table
+        assert calls[-1][0].strip().startswith("INSERT INTO question_scorecards")
 
-        # Mock the database call for getting org_id for the new course (ID 456)
-        # The get_org_id_for_course function expects a tuple with the org_id value
-        mock_execute_db_operation.return_value = (999,)
+        mock_slack.assert_called_once_with("Test Course", 456, "test-org", 999)
 
-        mock_get_course.return_value = course_data
-        mock_create_course.return_value = 456
-        mock_add_milestone.return_value = (789, 0)
-        mock_create_task.side_effect = [(10, None), (11, None)]
-        mock_get_task.side_effect = [learning_task, quiz_task]
-        mock_get_scorecard.return_value = original_scorecard
-        mock_create_scorecard.return_value = new_scorecard
+    @patch("src.api.db.course.get_org_by_id")
+    @patch("src.api.db.course.get_new_db_connection")
+    async def test_duplicate_course_to_org_course_not_found(
+        self, mock_connection, mock_get_org
+    ):
+        """Test duplicating a course that does not exist."""
+        mock_get_org.return_value = {"id": 999, "slug": "test-org"}
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = None
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_connection.return_value.__aenter__.return_value = mock_conn
 
-        await duplicate_course_to_org(1, 999)
+        with pytest.raises(ValueError, match="Course not found"):
+            await duplicate_course_to_org(1, 999)
 
-        mock_get_course.assert_called_once_with(1)
-        mock_create_course.assert_called_once_with("Test Course", 999)
-        mock_update_learning.assert_called_once()
-        mock_update_quiz.assert_called_once()
+        mock_conn.commit.assert_not_called()
+
+    @patch("src.api.db.course.get_org_by_id")
+    async def test_duplicate_course_to_org_invalid_org(self, mock_get_org):
+        """Test duplicating a course to an organization that does not exist."""
+        mock_get_org.return_value = None
+
+        with pytest.raises(Exception, match="Organization with id '999' not found"):
+            await duplicate_course_to_org(1, 999)
 
 
 @pytest.mark.asyncio
@@ -868,29 +1083,134 @@ class TestCohortCourseRelations:
 
         assert result == expected
 
-    @patch("src.api.db.course.get_course")
+    @patch("src.api.db.course.get_course_skeletons")
     @patch("src.api.db.course.calculate_milestone_unlock_dates")
     @patch("src.api.db.course.execute_db_operation")
     async def test_get_courses_for_cohort_with_tree(
-        self, mock_execute, mock_calculate_unlock, mock_get_course
+        self, mock_execute, mock_calculate_unlock, mock_get_course_skeletons
     ):
         """Test getting courses for cohort with tree structure."""
         courses_data = [
             (1, "Course 1", True, 7, "days", "2024-01-01"),
+            (2, "Course 2", False, None, None, None),
         ]
-        course_details = {"id": 1, "name": "Course 1", "milestones": []}
-        calculated_course = {"id": 1, "name": "Course 1", "milestones": []}
+        course_trees = {
+            1: {"id": 1, "name": "Course 1", "milestones": []},
+            2: {"id": 2, "name": "Course 2", "milestones": []},
+        }
 
         mock_execute.return_value = courses_data
-        mock_get_course.return_value = course_details
-        mock_calculate_unlock.return_value = calculated_course
+        mock_get_course_skeletons.return_value = course_trees
+        mock_calculate_unlock.side_effect = lambda course, *args: course
 
         joined_at = datetime.now(timezone.utc)
         result = await get_courses_for_cohort(1, include_tree=True, joined_at=joined_at)
 
-        assert len(result) == 1
-        mock_get_course.assert_called_once_with(1)
-        mock_calculate_unlock.assert_called_once()
+        assert result == [course_trees[1], course_trees[2]]
+        # the trees of all the courses are loaded together
+        mock_get_course_skeletons.assert_called_once_with([1, 2])
+        mock_calculate_unlock.assert_any_call(
+            course_trees[1],
+            {
+                "is_drip_enabled": True,
+                "frequency_value": 7,
+                "frequency_unit": "days",
+                "publish_at": "2024-01-01",
+            },
+            joined_at,
+        )
+        assert mock_calculate_unlock.call_count == 2
+
+
+@pytest.mark.asyncio
+class TestCourseSkeletons:
+    """Test the course skeletons shared between the learners of a course."""
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_skeleton_versions(self, mock_execute):
+        """Test that every course gets a version that changes with its content."""
+        mock_execute.return_value = [
+            (1, "Course 1", "2024-01-01 00:00:00.000", 2, None, 1, None, None),
+            (2, "Course 2", "2024-01-01 00:00:00.000", 2, None, 1, "started", None),
+        ]
+        versions = await get_course_skeleton_versions([1, 2])
+
+        assert set(versions) == {1, 2}
+        assert "IN (?, ?)" in mock_execute.call_args[0][0]
+
+        mock_execute.return_value = [
+            (1, "Course 1", "2024-01-01 00:00:00.000", 2, None, 1, None, None),
+            (2, "Course 2", "2024-01-01 00:00:00.000", 2, None, 1, "completed", None),
+        ]
+        new_versions = await get_course_skeleton_versions([1, 2])
+
+        assert new_versions[1] == versions[1]
+        assert new_versions[2] != versions[2]
+
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_course_skeleton_versions_empty(self, mock_execute):
+        """Test that no query is made without course ids."""
+        assert await get_course_skeleton_versions([]) == {}
+        mock_execute.assert_not_called()
+
+    @patch("src.api.db.course.get_course_trees")
+    @patch("src.api.db.course.get_course_skeleton_versions")
+    async def test_get_course_skeletons_cached_per_version(
+        self, mock_get_versions, mock_get_course_trees
+    ):
+        """Test that a skeleton is only rebuilt when its course version changes."""
+        skeleton_1 = {"id": 1001, "name": "Course 1", "milestones": []}
+        skeleton_2 = {"id": 1002, "name": "Course 2", "milestones": []}
+
+        mock_get_versions.return_value = {1001: "a", 1002: "b"}
+        mock_get_course_trees.return_value = {1001: skeleton_1, 1002: skeleton_2}
+
+        assert await get_course_skeletons([1001, 1002]) == {
+            1001: skeleton_1,
+            1002: skeleton_2,
+        }
+        mock_get_course_trees.assert_called_once_with([1001, 1002])
+
+        # nothing changed, so the same skeletons are shared
+        result = await get_course_skeletons([1001, 1002])
+        assert result[1001] is skeleton_1
+        assert mock_get_course_trees.call_count == 1
+
+        # only the course that changed is rebuilt
+        new_skeleton_2 = {"id": 1002, "name": "Course 2 renamed", "milestones": []}
+        mock_get_versions.return_value = {1001: "a", 1002: "c"}
+        mock_get_course_trees.return_value = {1002: new_skeleton_2}
+
+        result = await get_course_skeletons([1001, 1002])
+        assert result == {1001: skeleton_1, 1002: new_skeleton_2}
+        mock_get_course_trees.assert_called_with([1002])
+
+    async def test_overlay_milestone_unlock_dates(self):
+        """Test that a learner's unlock dates leave the shared skeleton untouched."""
+        tasks = [{"id": 1}]
+        skeleton = {
+            "id": 1,
+            "name": "Course",
+            "milestones": [
+                {"id": 1, "tasks": tasks},
+                {"id": 2, "tasks": [{"id": 2}]},
+            ],
+        }
+        drip_config = {
+            "is_drip_enabled": True,
+            "frequency_value": 1,
+            "frequency_unit": "day",
+            "publish_at": None,
+        }
+
+        result = await overlay_milestone_unlock_dates(
+            skeleton, drip_config, datetime.now(timezone.utc)
+        )
+
+        assert result["milestones"][0]["unlock_at"] is None
+        assert result["milestones"][1]["unlock_at"] is not None
+        assert result["milestones"][0]["tasks"] is tasks
+        assert all("unlock_at" not in milestone for milestone in skeleton["milestones"])
 
 
 class TestMilestoneUnlockDates:
@@ -1067,79 +1387,96 @@ class TestMilestoneUnlockDates:
 class TestUserCourses:
     """Test user course operations."""
 
-    @patch("src.api.db.course.get_new_db_connection")
-    @patch("src.api.db.course.get_user_cohorts")
-    @patch("src.api.db.course.get_courses_for_cohort")
-    @patch("src.api.db.course.get_user_organizations")
-    @patch("src.api.db.course.get_all_courses_for_org")
-    async def test_get_user_courses_comprehensive(
-        self,
-        mock_get_org_courses,
-        mock_get_user_orgs,
-        mock_get_cohort_courses,
-        mock_get_user_cohorts,
-        mock_connection,
-    ):
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_user_courses_comprehensive(self, mock_execute):
         """Test getting user courses with multiple roles."""
-        # Mock database connection
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchone.side_effect = [
-            (1, "Course 1", 1, "Org 1", "org-1"),
-            (2, "Course 2", 1, "Org 1", "org-1"),
-            (3, "Course 3", 2, "Org 2", "org-2"),
-        ]
-        mock_conn = AsyncMock()
-        mock_conn.cursor.return_value = mock_cursor
-        mock_connection.return_value.__aenter__.return_value = mock_conn
+        clear_user_courses_cache()
 
-        # Mock user cohorts
-        mock_get_user_cohorts.return_value = [
-            {"id": 1, "role": "learner"},
-            {"id": 2, "role": "mentor"},
+        mock_execute.return_value = [
+            (1, "Course 1", 1, "Org 1", "org-1", "learner", 10),
+            (2, "Course 2", 1, "Org 1", "org-1", "mentor", 11),
+            (3, "Course 3", 2, "Org 2", "org-2", "admin", None),
         ]
 
-        # Mock cohort courses
-        mock_get_cohort_courses.side_effect = [
-            [{"id": 1, "name": "Course 1"}],
-            [{"id": 2, "name": "Course 2"}],
-        ]
-
-        # Mock user organizations
-        mock_get_user_orgs.return_value = [
-            {"id": 2, "role": "admin"},
-        ]
+        result = await get_user_courses(123)
 
-        # Mock organization courses
-        mock_get_org_courses.return_value = [
-            {"id": 3, "name": "Course 3"},
+        assert result == [
+            {
+                "id": 1,
+                "name": "Course 1",
+                "org": {"id": 1, "name": "Org 1", "slug": "org-1"},
+                "role": "learner",
+                "cohort_id": 10,
+            },
+            {
+                "id": 2,
+                "name": "Course 2",
+                "org": {"id": 1, "name": "Org 1", "slug": "org-1"},
+                "role": "mentor",
+            },
+            {
+                "id": 3,
+                "name": "Course 3",
+                "org": {"id": 2, "name": "Org 2", "slug": "org-2"},
+                "role": "admin",
+            },
         ]
 
-        result = await get_user_courses(123)
-
-        assert len(result) == 3
-        assert result[0]["role"] == "learner"
-        assert result[1]["role"] == "mentor"
-        assert result[2]["role"] == "admin"
+        # cohort and org courses come from a single query
+        mock_execute.assert_called_once()
+        query, params = mock_execute.call_args[0]
+        assert "UNION ALL" in query
+        assert params == (123, 123)
 
-    @patch("src.api.db.course.get_new_db_connection")
-    @patch("src.api.db.course.get_user_cohorts")
-    @patch("src.api.db.course.get_user_organizations")
-    async def test_get_user_courses_no_courses(
-        self, mock_get_user_orgs, mock_get_user_cohorts, mock_connection
-    ):
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_user_courses_no_courses(self, mock_execute):
         """Test getting user courses when user has no courses."""
-        mock_cursor = AsyncMock()
-        mock_conn = AsyncMock()
-        mock_conn.cursor.return_value = mock_cursor
-        mock_connection.return_value.__aenter__.return_value = mock_conn
+        clear_user_courses_cache()
 
-        mock_get_user_cohorts.return_value = []
-        mock_get_user_orgs.return_value = []
+        mock_execute.return_value = []
 
         result = await get_user_courses(123)
 
         assert result == []
 
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_user_courses_cached(self, mock_execute):
+        """Test that the courses of a user are cached until the cache is cleared."""
+        clear_user_courses_cache()
+
+        mock_execute.return_value = [
+            (1, "Course 1", 1, "Org 1", "org-1", "admin", None),
+        ]
+
+        first_result = await get_user_courses(123)
+        assert await get_user_courses(123) == first_result
+        mock_execute.assert_called_once()
+
+        # other users are not affected by the cache of this user
+        await get_user_courses(456)
+        assert mock_execute.call_count == 2
+
+        clear_user_courses_cache([123])
+        await get_user_courses(123)
+        assert mock_execute.call_count == 3
+
+    @patch("src.api.db.utils.time.monotonic")
+    @patch("src.api.db.course.execute_db_operation")
+    async def test_get_user_courses_cache_expires(self, mock_execute, mock_monotonic):
+        """Test that the cached courses are read again once they expire."""
+        clear_user_courses_cache()
+
+        mock_execute.return_value = []
+        mock_monotonic.return_value = 1000
+
+        await get_user_courses(123)
+        await get_user_courses(123)
+        assert mock_execute.call_count == 1
+
+        mock_monotonic.return_value = 1000 + USER_COURSES_CACHE_TTL + 1
+        await get_user_courses(123)
+        assert mock_execute.call_count == 2
+
 
 class TestCourseUtilityFunctions:
     """Test course utility and conversion functions."""
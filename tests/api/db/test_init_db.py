@@ -20,6 +20,9 @@ from src.api.db import (
     create_course_generation_jobs_table,
     create_task_generation_jobs_table,
     create_code_drafts_table,
+    create_cohort_leaderboard_table,
+    add_content_updated_at_columns,
+    create_content_updated_at_triggers,
     init_db,
     delete_useless_tables,
 )
@@ -102,11 +105,12 @@ class TestTableCreationFunctions:
 
         await create_course_tasks_table(mock_cursor)
 
-        # Should execute CREATE TABLE and 3 CREATE INDEX statements
-        assert mock_cursor.execute.call_count == 4
+        # Should execute CREATE TABLE and 4 CREATE INDEX statements
+        assert mock_cursor.execute.call_count == 5
         calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
 
         assert any("CREATE TABLE IF NOT EXISTS course_tasks" in call for call in calls)
+        assert any("ON course_tasks (course_id, task_id)" in call for call in calls)
 
     async def test_create_course_milestones_table(self):
         """Test creating course milestones table."""
@@ -163,11 +167,12 @@ class TestTableCreationFunctions:
 
         await create_tasks_table(mock_cursor)
 
-        # Should execute CREATE TABLE and CREATE INDEX
-        assert mock_cursor.execute.call_count == 2
+        # Should execute CREATE TABLE and 2 CREATE INDEX statements
+        assert mock_cursor.execute.call_count == 3
         calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
 
         assert any("CREATE TABLE IF NOT EXISTS tasks" in call for call in calls)
+        assert "WHERE scheduled_publish_at IS NOT NULL" in calls[-1]
 
     async def test_create_questions_table(self):
         """Test creating questions table."""
@@ -260,6 +265,52 @@ class TestTableCreationFunctions:
 
         assert any("CREATE TABLE IF NOT EXISTS code_drafts" in call for call in calls)
 
+    async def test_create_cohort_leaderboard_table(self):
+        """Test creating cohort leaderboard table."""
+        mock_cursor = AsyncMock()
+
+        await create_cohort_leaderboard_table(mock_cursor)
+
+        # Should execute CREATE TABLE and 1 CREATE INDEX statement
+        assert mock_cursor.execute.call_count == 2
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+
+        assert any(
+            "CREATE TABLE IF NOT EXISTS cohort_leaderboard" in call for call in calls
+        )
+
+    async def test_add_content_updated_at_columns(self):
+        """Test adding and backfilling updated_at on tables that do not have it."""
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchall.side_effect = [
+            [(0, "id"), (1, "updated_at")],  # tasks already migrated
+            [(0, "id")],
+            [(0, "id")],
+            [(0, "id")],
+        ]
+
+        await add_content_updated_at_columns(mock_cursor)
+
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert not any("ALTER TABLE tasks " in call for call in calls)
+        assert "ALTER TABLE questions ADD COLUMN updated_at DATETIME" in calls
+        assert "UPDATE milestones SET updated_at = CURRENT_TIMESTAMP" in calls
+        assert "UPDATE course_tasks SET updated_at = created_at" in calls
+
+    async def test_create_content_updated_at_triggers(self):
+        """Test creating the triggers that keep updated_at current."""
+        mock_cursor = AsyncMock()
+
+        await create_content_updated_at_triggers(mock_cursor)
+
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert len(calls) == 13
+        assert all(call.startswith("CREATE TRIGGER IF NOT EXISTS") for call in calls)
+        assert any(
+            "AFTER DELETE ON questions" in call and "UPDATE tasks" in call
+            for call in calls
+        )
+
 
 @pytest.mark.asyncio
 class TestDatabaseInitialization:
@@ -397,7 +448,7 @@ class TestDatabaseInitialization:
         mock_path_exists,
         mock_exists,
     ):
-        """Test that init_db creates code_drafts table if database exists but table is missing."""
+        """Test that init_db creates missing tables if database exists but tables are missing."""
         mock_exists.return_value = True  # Database exists
         mock_path_exists.return_value = True  # Directory exists
         mock_check_table.return_value = False  # code_drafts table doesn't exist
@@ -410,7 +461,26 @@ class TestDatabaseInitialization:
         await init_db()
 
         # Should create code_drafts table (CREATE TABLE + 2 CREATE INDEX statements)
-        assert mock_cursor.execute.call_count == 3
+        # and user_daily_activity table (CREATE TABLE + CREATE INDEX) + its backfill (DELETE + INSERT)
+        # and cohort_leaderboard table (CREATE TABLE + CREATE INDEX) + its backfill (DELETE + 3 INSERTs)
+        # and the websocket_messages table (CREATE TABLE)
+        # and the leases table (CREATE TABLE)
+        # and the course_tasks (course_id, task_id) index
+        # and the tasks scheduled_publish_at index
+        # and the updated_at columns of the 4 course content tables (PRAGMA + ALTER + UPDATE each)
+        # and the 13 updated_at triggers
+        assert mock_cursor.execute.call_count == 42
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert any(
+            "CREATE TABLE IF NOT EXISTS user_daily_activity" in call for call in calls
+        )
+        assert any(
+            "CREATE TABLE IF NOT EXISTS cohort_leaderboard" in call for call in calls
+        )
+        assert any(
+            "CREATE TABLE IF NOT EXISTS websocket_messages" in call for call in calls
+        )
+        assert any("CREATE TABLE IF NOT EXISTS leases" in call for call in calls)
         mock_conn.commit.assert_called_once()
         # Should not set defaults when database already exists
         mock_set_defaults.assert_not_called()
@@ -438,11 +508,23 @@ class TestDatabaseInitialization:
         mock_conn.cursor.return_value = mock_cursor
         mock_conn.__aenter__.return_value = mock_conn
         mock_get_conn.return_value = mock_conn
+        mock_cursor.fetchall.return_value = [(0, "id"), (1, "updated_at")]
 
         await init_db()
 
-        # Should only commit, no table creation
-        mock_cursor.execute.assert_not_called()
+        # Should only create the missing indexes and triggers and commit, no table creation
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert (
+            "CREATE INDEX IF NOT EXISTS idx_course_task_course_id_task_id" in calls[0]
+        )
+        assert "CREATE INDEX IF NOT EXISTS idx_task_scheduled_publish_at" in calls[1]
+        assert not any("CREATE TABLE" in call for call in calls)
+        assert not any("ALTER TABLE" in call for call in calls)
+        assert all(
+            call.startswith("PRAGMA table_info")
+            or call.startswith("CREATE TRIGGER IF NOT EXISTS")
+            for call in calls[2:]
+        )
         mock_conn.commit.assert_called_once()
         # Should not set defaults when database already exists
         mock_set_defaults.assert_not_called()
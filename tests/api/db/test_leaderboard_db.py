@@ -0,0 +1,176 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from api.db.leaderboard import (
+    record_leaderboard_activity,
+    record_leaderboard_task_completion,
+    rebuild_cohort_leaderboards,
+    backfill_cohort_leaderboards,
+    get_cohort_leaderboard,
+    get_cohort_num_tasks,
+)
+from api.models import LeaderboardViewType
+
+
+@pytest.mark.asyncio
+class TestLeaderboardUpdates:
+    """Test incremental updates of the cohort leaderboards."""
+
+    async def test_record_leaderboard_activity_no_timestamps(self):
+        """Test that nothing is recorded without any activity."""
+        mock_cursor = AsyncMock()
+
+        await record_leaderboard_activity(mock_cursor, 1, [], question_id=2)
+
+        mock_cursor.executemany.assert_not_called()
+
+    async def test_record_leaderboard_activity(self):
+        """Test recording activity for every view of the cohorts of a question."""
+        mock_cursor = AsyncMock()
+
+        await record_leaderboard_activity(
+            mock_cursor, 1, ["2024-01-01 10:00:00", None], question_id=2
+        )
+
+        mock_cursor.executemany.assert_called_once()
+        query, params = mock_cursor.executemany.call_args[0]
+        assert "INSERT INTO cohort_leaderboard" in query
+        for view in LeaderboardViewType:
+            assert f"'{view}'" in query
+        assert params == [
+            ("2024-01-01 10:00:00", 1, 1, None, 2),
+            (None, 1, 1, None, 2),
+        ]
+
+    async def test_record_leaderboard_task_completion_for_task(self):
+        """Test counting a completed learning material task."""
+        mock_cursor = AsyncMock()
+
+        await record_leaderboard_task_completion(mock_cursor, 1, task_id=3)
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "UPDATE cohort_leaderboard" in query
+        assert "learning_material" in query
+        assert params == (3, 1)
+
+    async def test_record_leaderboard_task_completion_for_question(self):
+        """Test counting a quiz only once all of its questions are completed."""
+        mock_cursor = AsyncMock()
+
+        await record_leaderboard_task_completion(mock_cursor, 1, question_id=4)
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "UPDATE cohort_leaderboard" in query
+        assert "NOT EXISTS" in query
+        assert params == (4, 1, 1)
+
+
+@pytest.mark.asyncio
+class TestLeaderboardRebuild:
+    """Test reconciliation of the cohort leaderboards."""
+
+    async def test_rebuild_cohort_leaderboards_empty_list(self):
+        """Test that rebuilding no cohorts does nothing."""
+        mock_cursor = AsyncMock()
+
+        await rebuild_cohort_leaderboards(mock_cursor, [])
+
+        mock_cursor.execute.assert_not_called()
+
+    async def test_rebuild_cohort_leaderboards_for_cohorts(self):
+        """Test rebuilding the leaderboards of specific cohorts."""
+        mock_cursor = AsyncMock()
+
+        await rebuild_cohort_leaderboards(mock_cursor, [1, 2])
+
+        # One DELETE and one INSERT per view
+        assert mock_cursor.execute.call_count == 4
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert calls[0] == "DELETE FROM cohort_leaderboard WHERE cohort_id IN (1,2)"
+        assert all("uc.cohort_id IN (1,2)" in call for call in calls[1:])
+
+    async def test_rebuild_all_cohort_leaderboards(self):
+        """Test rebuilding the leaderboards of all cohorts."""
+        mock_cursor = AsyncMock()
+
+        await rebuild_cohort_leaderboards(mock_cursor)
+
+        calls = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert calls[0] == "DELETE FROM cohort_leaderboard"
+        assert len(calls) == 4
+
+    @patch("api.db.leaderboard.get_new_db_connection")
+    async def test_backfill_cohort_leaderboards(self, mock_get_conn):
+        """Test that the backfill rebuilds and commits in its own connection."""
+        mock_cursor = AsyncMock()
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value.__aenter__.return_value = mock_conn
+
+        await backfill_cohort_leaderboards([1])
+
+        assert mock_cursor.execute.call_count == 4
+        mock_conn.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestLeaderboardReads:
+    """Test reading the cohort leaderboards."""
+
+    @patch("api.db.leaderboard.execute_db_operation")
+    async def test_get_cohort_leaderboard(self, mock_execute):
+        """Test getting a page of a cohort leaderboard."""
+        mock_execute.return_value = [
+            (1, "user1@example.com", "John", None, "Doe", 5, 3),
+            (2, "user2@example.com", "Jane", None, "Smith", 0, 1),
+        ]
+
+        result = await get_cohort_leaderboard(
+            1, LeaderboardViewType.MONTHLY, offset=20, limit=10
+        )
+
+        assert result == [
+            {
+                "user": {
+                    "id": 1,
+                    "email": "user1@example.com",
+                    "first_name": "John",
+                    "middle_name": None,
+                    "last_name": "Doe",
+                },
+                "streak_count": 5,
+                "tasks_completed": 3,
+            },
+            {
+                "user": {
+                    "id": 2,
+                    "email": "user2@example.com",
+                    "first_name": "Jane",
+                    "middle_name": None,
+                    "last_name": "Smith",
+                },
+                "streak_count": 0,
+                "tasks_completed": 1,
+            },
+        ]
+        query, params = mock_execute.call_args[0]
+        assert "ORDER BY current_streak_count DESC, tasks_completed DESC" in query
+        assert "start of month" in query
+        assert params == ("This month", 1, 10, 20)
+
+    @patch("api.db.leaderboard.execute_db_operation")
+    async def test_get_cohort_leaderboard_without_limit(self, mock_execute):
+        """Test that the whole leaderboard is returned without a limit."""
+        mock_execute.return_value = []
+
+        result = await get_cohort_leaderboard(1)
+
+        assert result == []
+        assert mock_execute.call_args[0][1] == ("All time", 1, -1, 0)
+
+    @patch("api.db.leaderboard.execute_db_operation")
+    async def test_get_cohort_num_tasks(self, mock_execute):
+        """Test counting the tasks of a cohort."""
+        mock_execute.return_value = (7,)
+
+        assert await get_cohort_num_tasks(1) == 7
+        mock_execute.assert_called_once()
@@ -1,3 +1,4 @@
+import hashlib
 import pytest
 import json
 from unittest.mock import patch, AsyncMock, MagicMock, ANY, call
@@ -12,6 +13,8 @@ from src.api.db.org import (
     get_all_orgs,
     create_org_api_key,
     get_org_id_from_api_key,
+    revoke_org_api_key,
+    clear_api_key_cache,
     get_hva_org_id,
     get_hva_cohort_ids,
     is_user_hva_learner,
@@ -260,6 +263,65 @@ class TestOrganizationOperations:
             with pytest.raises(ValueError, match="Invalid API key"):
                 await get_org_id_from_api_key("org__123__invalidkey")
 
+    @patch("src.api.db.org.execute_db_operation")
+    async def test_get_org_id_from_api_key_cached(self, mock_execute):
+        """Test that a verified API key is not looked up again until it expires."""
+        clear_api_key_cache()
+        api_key = "org__123__abcdef"
+        hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+        mock_execute.return_value = [("other_hash",), (hashed_key,)]
+
+        assert await get_org_id_from_api_key(api_key) == 123
+        assert await get_org_id_from_api_key(api_key) == 123
+        mock_execute.assert_called_once()
+
+        with patch("src.api.db.org.time.monotonic", return_value=float("inf")):
+            assert await get_org_id_from_api_key(api_key) == 123
+
+        assert mock_execute.call_count == 2
+        clear_api_key_cache()
+
+    @patch("src.api.db.org.get_new_db_connection")
+    @patch("src.api.db.org.execute_db_operation")
+    async def test_create_org_api_key_clears_cache(self, mock_execute, mock_db_conn):
+        """Test that creating an API key forgets the verified keys of the org."""
+        clear_api_key_cache()
+        api_key = "org__123__abcdef"
+        hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+        mock_execute.return_value = [(hashed_key,)]
+
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
+
+        await get_org_id_from_api_key(api_key)
+        await create_org_api_key(123)
+        await get_org_id_from_api_key(api_key)
+
+        assert mock_execute.call_count == 2
+        clear_api_key_cache()
+
+    @patch("src.api.db.org.execute_db_operation")
+    async def test_revoke_org_api_key(self, mock_execute):
+        """Test that a revoked API key stops working immediately."""
+        clear_api_key_cache()
+        api_key = "org__123__abcdef"
+        hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+        mock_execute.return_value = [(hashed_key,)]
+
+        assert await get_org_id_from_api_key(api_key) == 123
+
+        await revoke_org_api_key(123, 7)
+
+        mock_execute.assert_called_with(
+            "DELETE FROM org_api_keys WHERE id = ? AND org_id = ?", (7, 123)
+        )
+
+        mock_execute.return_value = []
+
+        with pytest.raises(ValueError, match="Invalid API key"):
+            await get_org_id_from_api_key(api_key)
+
     @patch("src.api.db.org.execute_db_operation")
     async def test_get_hva_org_id_success(self, mock_execute):
         """Test successful HVA org ID retrieval."""
@@ -574,6 +636,9 @@ class TestOrganizationUtilityFunctions:
         assert len(hashed_key) > 0
         # API key should contain org ID
         assert str(org_id) in api_key
+        # and split into exactly its prefix, org ID and identifier
+        assert api_key.split("__")[:2] == ["org", str(org_id)]
+        assert len(api_key.split("__")) == 3
 
     def test_generate_api_key_different_orgs(self):
         """Test API key generation for different organizations."""
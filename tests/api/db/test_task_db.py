@@ -2,6 +2,7 @@ import pytest
 import json
 from unittest.mock import patch, AsyncMock, MagicMock, ANY, call
 from datetime import datetime, timezone, timedelta
+from src.api.utils.json_response import dumps
 from src.api.db.task import (
     create_draft_task_for_course,
     get_all_learning_material_tasks_for_course,
@@ -11,6 +12,7 @@ from src.api.db.task import (
     get_basic_task_details,
     get_task,
     get_task_metadata,
+    get_tasks_content,
     does_task_exist,
     prepare_blocks_for_publish,
     update_learning_material_task,
@@ -26,6 +28,7 @@ from src.api.db.task import (
     drop_task_generation_jobs_table,
     store_task_generation_request,
     update_task_generation_job_status,
+    complete_task_generation_job,
     get_course_task_generation_jobs_status,
     get_all_pending_task_generation_jobs,
     drop_task_completions_table,
@@ -34,6 +37,7 @@ from src.api.db.task import (
     update_scorecard,
     undo_task_delete,
     publish_scheduled_tasks,
+    get_upcoming_scheduled_publish_times,
     add_generated_learning_material,
     add_generated_quiz,
 )
@@ -52,56 +56,73 @@ from src.api.models import (
 class TestTaskOperations:
     """Test task-related database operations."""
 
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.execute_db_operation")
-    async def test_create_draft_task_for_course_success(
-        self, mock_execute, mock_db_conn, mock_get_org
-    ):
+    async def test_create_draft_task_for_course_success(self, mock_db_conn):
         """Test successful task creation."""
-        mock_get_org.return_value = 123
-
         mock_cursor = AsyncMock()
         mock_cursor.lastrowid = 456
-        mock_cursor.fetchone.return_value = (5,)  # max ordering
+        mock_cursor.rowcount = 1
+        # max ordering in the milestone, then the visible ordering
+        mock_cursor.fetchone.side_effect = [(5,), (2,)]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
         mock_db_conn.return_value = mock_conn_instance
 
-        # Mock visible ordering calculation
-        mock_execute.return_value = (2,)
-
         result = await create_draft_task_for_course(
             "Test Task", TaskType.LEARNING_MATERIAL, 1, 10
         )
 
         assert result == (456, 2)
-        mock_get_org.assert_called_once_with(1)
+        mock_cursor.execute.assert_any_call(
+            "INSERT INTO course_tasks (course_id, task_id, milestone_id, ordering) VALUES (?, ?, ?, ?)",
+            (1, 456, 10, 1029),
+        )
+        # everything happens in one transaction on the same connection
+        mock_db_conn.assert_called_once()
+        mock_conn_instance.commit.assert_called_once()
 
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.execute_db_operation")
-    async def test_create_draft_task_for_course_with_ordering(
-        self, mock_execute, mock_db_conn, mock_get_org
-    ):
+    async def test_create_draft_task_for_course_with_ordering(self, mock_db_conn):
         """Test task creation with specific ordering."""
-        mock_get_org.return_value = 123
-
         mock_cursor = AsyncMock()
         mock_cursor.lastrowid = 456
+        mock_cursor.rowcount = 1
+        # the orderings around the new task, then the visible ordering
+        mock_cursor.fetchone.side_effect = [(2048, 3072, 3), (1,)]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
         mock_db_conn.return_value = mock_conn_instance
 
-        mock_execute.return_value = (1,)
-
         result = await create_draft_task_for_course(
-            "Test Task", TaskType.QUIZ, 1, 10, ordering=3
+            "Test Task", TaskType.QUIZ, 1, 10, ordering=2049
         )
 
         assert result == (456, 1)
+        mock_cursor.execute.assert_any_call(
+            "INSERT INTO course_tasks (course_id, task_id, milestone_id, ordering) VALUES (?, ?, ?, ?)",
+            (1, 456, 10, 2560),
+        )
+        # the tasks after the new one keep their ordering
+        assert not any(
+            "UPDATE" in call.args[0] for call in mock_cursor.execute.call_args_list
+        )
+
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_create_draft_task_for_course_not_found(self, mock_db_conn):
+        """Test task creation for a course that does not exist."""
+        mock_cursor = AsyncMock()
+        mock_cursor.rowcount = 0
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.cursor.return_value = mock_cursor
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
+
+        with pytest.raises(ValueError, match="Course not found"):
+            await create_draft_task_for_course("Test Task", TaskType.QUIZ, 999, 10)
+
+        mock_conn_instance.commit.assert_not_called()
 
     @patch("src.api.db.task.execute_db_operation")
     async def test_get_all_learning_material_tasks_for_course(self, mock_execute):
@@ -293,6 +314,37 @@ class TestTaskOperations:
 
         assert result == expected
 
+    @patch("src.api.db.task.get_basic_task_details")
+    @patch("src.api.db.task.execute_db_operation")
+    async def test_get_task_learning_material_raw_json(
+        self, mock_execute, mock_get_basic
+    ):
+        """Test that raw reads return the stored blocks without decoding them."""
+        mock_get_basic.return_value = {
+            "id": 1,
+            "title": "Test Task",
+            "type": "learning_material",
+            "status": TaskStatus.PUBLISHED,
+            "org_id": 123,
+            "scheduled_publish_at": "2024-01-01 10:00:00+00:00",
+        }
+
+        mock_execute.return_value = ('[{"type": "text", "content": "Hello World"}]',)
+
+        result = await get_task(1, raw_json=True)
+
+        assert "org_id" not in result
+        assert json.loads(dumps(result)) == {
+            "id": 1,
+            "title": "Test Task",
+            "type": "learning_material",
+            "status": "published",
+            "scheduled_publish_at": "2024-01-01T10:00:00Z",
+            "blocks": [{"type": "text", "content": "Hello World"}],
+        }
+        # the stored text is spliced in as is
+        assert b'[{"type": "text", "content": "Hello World"}]' in dumps(result)
+
     @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.execute_db_operation")
     @patch("src.api.db.task.convert_question_db_to_dict")
@@ -356,6 +408,45 @@ class TestTaskOperations:
 
         assert result is None
 
+    @patch("src.api.db.task.execute_db_operation")
+    async def test_get_tasks_content(self, mock_execute):
+        """Test reading the content of several tasks in two queries."""
+        question_row = (
+            "objective",
+            '[{"type": "text"}]',
+            None,
+            "text",
+            "chat",
+            None,
+            None,
+            None,
+            1,
+            1,
+            "Question",
+        )
+        mock_execute.side_effect = [
+            [
+                (1, "learning_material", '[{"type": "text"}]'),
+                (2, "quiz", None),
+            ],
+            [(2, 20) + question_row, (2, 21) + question_row],
+        ]
+
+        result = await get_tasks_content([1, 2])
+
+        assert mock_execute.call_count == 2
+        assert mock_execute.call_args_list[0][0][1] == (1, 2)
+        assert result[1] == {"blocks": [{"type": "text"}]}
+        assert [question["id"] for question in result[2]["questions"]] == [20, 21]
+        assert result[2]["questions"][0]["blocks"] == [{"type": "text"}]
+
+    @patch("src.api.db.task.execute_db_operation")
+    async def test_get_tasks_content_without_tasks(self, mock_execute):
+        """Test that no query is made without tasks."""
+        assert await get_tasks_content([]) == {}
+
+        mock_execute.assert_not_called()
+
     @patch("src.api.db.task.execute_db_operation")
     async def test_get_task_metadata_success(self, mock_execute):
         """Test successful task metadata retrieval."""
@@ -443,19 +534,25 @@ class TestTaskOperations:
 
         assert result is False
 
-    @patch("src.api.db.task.does_task_exist")
-    @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_draft_quiz_success(
-        self, mock_get_task, mock_db_conn, mock_get_basic, mock_task_exists
-    ):
-        """Test successful draft quiz update."""
-        mock_task_exists.return_value = True
-        mock_get_basic.return_value = {"org_id": 123}
-
+    async def test_update_draft_quiz_success(self, mock_db_conn):
+        """Test that a draft quiz is written with one statement per table."""
         mock_cursor = AsyncMock()
-        mock_cursor.lastrowid = 456
+        mock_cursor.fetchone.return_value = (
+            1,
+            "Updated Quiz",
+            "quiz",
+            "published",
+            123,
+            None,
+        )
+        mock_cursor.fetchall.return_value = [
+            # returned out of order, with NULL in place of the scorecard id
+            (457, "open_ended", "[]", None, "text", "chat", None)
+            + (None, None, 2, False, "question 2", 1),
+            (456, "multiple_choice", "[]", None, "text", "chat", None)
+            + (None, None, 1, True, "question", 0),
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
@@ -472,54 +569,97 @@ class TestTaskOperations:
                 "context": None,
                 "max_attempts": 1,
                 "is_feedback_shown": True,
-                "scorecard_id": None,
+                "scorecard_id": 7,
                 "title": "question",
-            }
+            },
+            {
+                "type": "open_ended",
+                "blocks": [],
+                "answer": None,
+                "input_type": "text",
+                "response_type": "chat",
+                "coding_languages": None,
+                "context": None,
+                "max_attempts": 2,
+                "is_feedback_shown": False,
+                "scorecard_id": None,
+                "title": "question 2",
+            },
         ]
 
-        mock_task = {"id": 1, "title": "Updated Quiz", "questions": questions}
-        mock_get_task.return_value = mock_task
+        result = await update_draft_quiz(
+            1, "Updated Quiz", questions, None, TaskStatus.PUBLISHED
+        )
 
-        result = await update_draft_quiz(1, "Updated Quiz", questions, None)
+        assert result["id"] == 1
+        assert result["org_id"] == 123
+        assert [question["id"] for question in result["questions"]] == [456, 457]
+        assert [question["scorecard_id"] for question in result["questions"]] == [
+            7,
+            None,
+        ]
 
-        assert result == mock_task
+        calls = mock_cursor.execute.call_args_list
+        # task, 2 deletes, questions, scorecard links and scorecard publishing
+        assert len(calls) == 6
+        mock_cursor.executemany.assert_not_called()
 
-    @patch("src.api.db.task.does_task_exist")
-    async def test_update_draft_quiz_not_found(self, mock_task_exists):
-        """Test draft quiz update when task doesn't exist."""
-        mock_task_exists.return_value = False
+        query, params = calls[3][0]
+        assert "INSERT INTO questions" in query and "RETURNING" in query
+        assert len(params) == 26
 
-        result = await update_draft_quiz(999, "Title", [], None)
+        query, params = calls[4][0]
+        assert "INSERT INTO question_scorecards" in query
+        assert params == [456, 7]
 
-        assert result is False
+        query, params = calls[5][0]
+        assert "UPDATE scorecards" in query
+        assert params == ("published", "draft", 7)
 
-    @patch("src.api.db.task.does_task_exist")
-    @patch("src.api.db.task.get_basic_task_details")
-    async def test_update_draft_quiz_task_exists_but_basic_details_none(
-        self, mock_get_basic, mock_task_exists
-    ):
-        """Test update_draft_quiz when task exists but get_basic_task_details returns None - covers line 348."""
-        mock_task_exists.return_value = True  # Task exists according to first check
-        mock_get_basic.return_value = None  # But basic details returns None
+        mock_conn_instance.commit.assert_called_once()
+
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_update_draft_quiz_not_found(self, mock_db_conn):
+        """Test draft quiz update when task doesn't exist."""
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = None
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.cursor.return_value = mock_cursor
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
 
         result = await update_draft_quiz(
-            1, "Test Title", [], datetime.now(), TaskStatus.DRAFT
+            999, "Title", [], datetime.now(), TaskStatus.DRAFT
         )
 
         assert result is False
-        mock_task_exists.assert_called_once_with(1)
-        mock_get_basic.assert_called_once_with(1)
+        mock_cursor.execute.assert_called_once()
+        mock_conn_instance.commit.assert_not_called()
 
-    @patch("src.api.db.task.does_task_exist")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_published_quiz_success(
-        self, mock_get_task, mock_db_conn, mock_task_exists
-    ):
-        """Test successful published quiz update."""
-        mock_task_exists.return_value = True
-
+    async def test_update_published_quiz_success(self, mock_db_conn):
+        """Test that a published quiz is updated in a single statement."""
         mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = (
+            1,
+            "Updated Quiz",
+            "quiz",
+            "published",
+            123,
+            None,
+        )
+        mock_cursor.fetchall.side_effect = [
+            # the updated questions
+            [
+                (1, "multiple_choice", "[]", None, "text", "chat", 5)
+                + (None, None, 1, True, "question", 1),
+            ],
+            # the questions that were not part of the request
+            [
+                (2, "open_ended", "[]", None, "text", "chat", None)
+                + (None, None, 1, True, "untouched", 0),
+            ],
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
@@ -535,7 +675,7 @@ class TestTaskOperations:
                 "response_type": "chat",
                 "coding_languages": None,
                 "context": None,
-                "scorecard_id": None,
+                "scorecard_id": 5,
                 "title": "question",
             }
         ]
@@ -545,23 +685,38 @@ class TestTaskOperations:
             def model_dump(self):
                 return questions[0]
 
-        mock_questions = [MockQuestion()]
-
-        mock_task = {"id": 1, "title": "Updated Quiz", "questions": questions}
-        mock_get_task.return_value = mock_task
-
-        result = await update_published_quiz(1, "Updated Quiz", mock_questions, None)
+        result = await update_published_quiz(1, "Updated Quiz", [MockQuestion()], None)
 
-        assert result == mock_task
+        assert result["title"] == "Updated Quiz"
+        assert [question["title"] for question in result["questions"]] == [
+            "untouched",
+            "question",
+        ]
+        assert result["questions"][1]["scorecard_id"] == 5
+
+        queries = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert "DELETE FROM question_scorecards" in queries[1]
+        assert "INSERT INTO question_scorecards" in queries[2]
+        assert "UPDATE scorecards" in queries[3]
+        assert "UPDATE questions" in queries[4] and "RETURNING" in queries[4]
+        assert "NOT IN (?)" in queries[5]
+        assert len(queries) == 6
+        mock_conn_instance.commit.assert_called_once()
 
-    @patch("src.api.db.task.does_task_exist")
-    async def test_update_published_quiz_not_found(self, mock_task_exists):
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_update_published_quiz_not_found(self, mock_db_conn):
         """Test published quiz update when task doesn't exist."""
-        mock_task_exists.return_value = False
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = None
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.cursor.return_value = mock_cursor
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
 
         result = await update_published_quiz(999, "Title", [], None)
 
         assert result is False
+        mock_conn_instance.commit.assert_not_called()
 
     @patch("src.api.db.task.execute_db_operation")
     async def test_delete_task(self, mock_execute):
@@ -583,50 +738,105 @@ class TestTaskOperations:
         assert "UPDATE tasks" in args[0]
         assert "deleted_at" in args[0]
 
-    @patch("src.api.db.task.execute_db_operation")
-    async def test_mark_task_completed(self, mock_execute):
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_mark_task_completed(self, mock_db_conn):
         """Test marking task as completed."""
+        mock_cursor = AsyncMock()
+        mock_cursor.rowcount = 1
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_db_conn.return_value.__aenter__.return_value = mock_conn
+
         await mark_task_completed(1, 123)
 
-        mock_execute.assert_called_once_with(
+        assert mock_cursor.execute.call_count == 3
+        mock_cursor.execute.assert_any_call(
             """
         INSERT OR IGNORE INTO task_completions (user_id, task_id)
         VALUES (?, ?)
         """,
             (123, 1),
         )
+        # The completion is added to the user's daily activity
+        activity_query, activity_params = mock_cursor.execute.call_args_list[1][0]
+        assert "user_daily_activity" in activity_query
+        assert activity_params == (123, 1)
+        # and to the leaderboards of the user's cohorts
+        mock_cursor.executemany.assert_called_once()
+        assert mock_cursor.executemany.call_args[0][1] == [(None, 123, 123, 1, None)]
+        leaderboard_query, leaderboard_params = mock_cursor.execute.call_args_list[2][0]
+        assert "UPDATE cohort_leaderboard" in leaderboard_query
+        assert leaderboard_params == (1, 123)
+        mock_conn.commit.assert_called_once()
 
-    @patch("src.api.db.task.execute_db_operation")
-    async def test_delete_completion_history_for_task_with_task_id(self, mock_execute):
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_mark_task_completed_already_completed(self, mock_db_conn):
+        """Test that marking an already completed task does not add activity again."""
+        mock_cursor = AsyncMock()
+        mock_cursor.rowcount = 0
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_db_conn.return_value.__aenter__.return_value = mock_conn
+
+        await mark_task_completed(1, 123)
+
+        assert mock_cursor.execute.call_count == 1
+        mock_cursor.executemany.assert_not_called()
+
+    @patch("src.api.db.task.get_new_db_connection")
+    @patch("src.api.db.task.delete_chat_history_with_activity")
+    async def test_delete_completion_history_for_task_with_task_id(
+        self, mock_delete, mock_db_conn
+    ):
         """Test deleting completion history with task ID."""
+        mock_cursor = AsyncMock()
+        mock_conn = AsyncMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_db_conn.return_value.__aenter__.return_value = mock_conn
+
         await delete_completion_history_for_task(1, 123, 456)
 
-        assert mock_execute.call_count == 2
+        assert mock_delete.call_args_list == [
+            (
+                (
+                    mock_cursor,
+                    "question_id IN (SELECT id FROM questions WHERE task_id = ?) AND user_id = ?",
+                    (1, 456),
+                ),
+            ),
+            ((mock_cursor, "question_id = ? AND user_id = ?", (123, 456)),),
+        ]
+        mock_conn.commit.assert_called_once()
 
-    @patch("src.api.db.task.execute_db_operation")
+    @patch("src.api.db.task.get_new_db_connection")
+    @patch("src.api.db.task.delete_chat_history_with_activity")
     async def test_delete_completion_history_for_task_without_task_id(
-        self, mock_execute
+        self, mock_delete, mock_db_conn
     ):
         """Test deleting completion history without task ID."""
+        mock_conn = AsyncMock()
+        mock_db_conn.return_value.__aenter__.return_value = mock_conn
+
         await delete_completion_history_for_task(None, 123, 456)
 
-        assert mock_execute.call_count == 1
+        assert mock_delete.call_count == 1
 
-    @patch("src.api.db.task.get_new_db_connection")
-    async def test_schedule_module_tasks(self, mock_db_conn):
+    @patch("src.api.db.task.execute_db_operation")
+    @patch("src.api.db.task.scheduled_publish_timer")
+    async def test_schedule_module_tasks(self, mock_publish_timer, mock_execute):
         """Test scheduling module tasks."""
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = [(1,), (2,)]
-        mock_conn_instance = AsyncMock()
-        mock_conn_instance.cursor.return_value = mock_cursor
-        mock_conn_instance.__aenter__.return_value = mock_conn_instance
-        mock_db_conn.return_value = mock_conn_instance
-
         scheduled_at = datetime.now()
         await schedule_module_tasks(1, 2, scheduled_at)
 
-        assert mock_cursor.execute.call_count >= 2  # At least select and update calls
-        mock_conn_instance.commit.assert_called_once()
+        # the tasks are published by the timer when their time comes
+        mock_publish_timer.schedule.assert_called_once_with(scheduled_at)
+
+        # all the published tasks of the module are updated in a single statement
+        mock_execute.assert_called_once()
+        query, params = mock_execute.call_args[0]
+        assert query.strip().startswith("UPDATE tasks SET scheduled_publish_at = ?")
+        assert "status = 'published'" in query
+        assert params == (scheduled_at, 1, 2)
 
     @patch("src.api.db.task.get_new_db_connection")
     async def test_drop_task_generation_jobs_table(self, mock_db_conn):
@@ -673,14 +883,39 @@ class TestTaskOperations:
         mock_cursor.execute.assert_called_once()
         mock_conn_instance.commit.assert_called_once()
 
+    @patch("src.api.db.task.get_new_db_connection")
+    async def test_complete_task_generation_job(self, mock_db_conn):
+        """Test completing a task generation job only once."""
+        mock_cursor = AsyncMock()
+        mock_cursor.rowcount = 1
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.cursor.return_value = mock_cursor
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
+
+        assert await complete_task_generation_job("test-uuid") is True
+
+        mock_cursor.execute.assert_called_once_with(
+            "UPDATE task_generation_jobs SET status = ? WHERE uuid = ? AND status = ?",
+            (
+                str(GenerateTaskJobStatus.COMPLETED),
+                "test-uuid",
+                str(GenerateTaskJobStatus.STARTED),
+            ),
+        )
+        mock_conn_instance.commit.assert_called_once()
+
+        # the job had already been completed
+        mock_cursor.rowcount = 0
+        assert await complete_task_generation_job("test-uuid") is False
+
     @patch("src.api.db.task.get_new_db_connection")
     async def test_get_course_task_generation_jobs_status(self, mock_db_conn):
         """Test getting course task generation jobs status."""
         mock_cursor = AsyncMock()
         mock_cursor.fetchall.return_value = [
-            (str(GenerateTaskJobStatus.COMPLETED),),
-            (str(GenerateTaskJobStatus.STARTED),),
-            (str(GenerateTaskJobStatus.COMPLETED),),
+            (str(GenerateTaskJobStatus.COMPLETED), 2),
+            (str(GenerateTaskJobStatus.STARTED), 1),
         ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
@@ -755,6 +990,23 @@ class TestTaskOperations:
 
         assert result == [1, 2]
 
+    @patch("src.api.db.task.execute_db_operation")
+    async def test_get_upcoming_scheduled_publish_times(self, mock_execute):
+        """Test loading the times the scheduled tasks are due at."""
+        mock_execute.return_value = [
+            ("2030-01-01 10:00:00+00:00",),
+            ("2030-01-02T10:00:00",),
+        ]
+
+        result = await get_upcoming_scheduled_publish_times()
+
+        assert result == [
+            datetime(2030, 1, 1, 10, tzinfo=timezone.utc),
+            datetime(2030, 1, 2, 10),
+        ]
+        query = mock_execute.call_args[0][0]
+        assert "scheduled_publish_at IS NOT NULL" in query
+
     @patch("src.api.db.task.update_learning_material_task")
     @patch("src.api.db.task.convert_blocks_to_right_format")
     async def test_add_generated_learning_material(self, mock_convert, mock_update):
@@ -895,17 +1147,40 @@ class TestTaskOperations:
         # Question should have scorecard set to None
         assert questions[0]["scorecard"] is None
 
-    @patch("src.api.db.task.does_task_exist")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
     async def test_update_published_quiz_insert_new_scorecard_mapping(
-        self, mock_get_task, mock_db_conn, mock_task_exists
+        self, mock_db_conn
     ):
-        """Test update_published_quiz when inserting new scorecard mapping - covers lines 497-500."""
-        mock_task_exists.return_value = True
-
+        """Test update_published_quiz when inserting new scorecard mapping."""
         mock_cursor = AsyncMock()
-        mock_cursor.fetchone.return_value = None  # No existing mapping
+        mock_cursor.fetchone.return_value = (
+            1,
+            "Test Quiz",
+            "quiz",
+            "published",
+            123,
+            None,
+        )
+        mock_cursor.fetchall.side_effect = [
+            [
+                (
+                    1,
+                    "MULTIPLE_CHOICE",
+                    "[]",
+                    None,
+                    "MULTIPLE_CHOICE",
+                    "MULTIPLE_CHOICE",
+                    456,
+                    None,
+                    None,
+                    None,
+                    None,
+                    "question",
+                    0,
+                )
+            ],
+            [],
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
@@ -945,12 +1220,9 @@ class TestTaskOperations:
         question_with_new_scorecard = MockQuestion(id=1, scorecard_id=456)
         questions = [question_with_new_scorecard]
 
-        mock_task = {"id": 1, "title": "Test Quiz", "questions": [question_with_new_scorecard.model_dump()]}
-        mock_get_task.return_value = mock_task
-
         result = await update_published_quiz(1, "Test Quiz", questions, datetime.now())
 
-        assert result == mock_task
+        assert result["questions"][0]["scorecard_id"] == 456
 
         # Verify that the INSERT query was called (the "else" branch)
         insert_calls = [
@@ -1103,6 +1375,33 @@ class TestTaskUtilities:
 
         assert result == expected
 
+    def test_convert_question_db_to_dict_raw_json(self):
+        """Test converting a question tuple without decoding its JSON columns."""
+        question_tuple = (
+            1,  # id
+            "objective",  # type
+            '[{"type": "text", "content": "Question?"}]',  # blocks
+            "",  # answer
+            "text",  # input_type
+            "chat",  # response_type
+            None,  # scorecard_id
+            '{"hint": "Hint"}',  # context
+            None,  # coding_languages
+            3,  # max_attempts
+            1,  # is_feedback_shown
+            "question",  # title
+        )
+
+        result = convert_question_db_to_dict(question_tuple, raw_json=True)
+
+        assert result["answer"] is None
+        assert result["coding_languages"] is None
+        assert result["is_feedback_shown"] is True
+        assert json.loads(dumps(result)) == {
+            **convert_question_db_to_dict(question_tuple),
+            "is_feedback_shown": True,
+        }
+
     def test_prepare_blocks_for_publish_without_ids(self):
         """Test preparing blocks without IDs."""
         blocks = [
@@ -1243,7 +1542,6 @@ class TestTaskDuplication:
 
     @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.execute_db_operation")
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_task")
     @patch("src.api.db.task.create_draft_task_for_course")
     @patch("src.api.db.task.update_learning_material_task")
@@ -1252,7 +1550,6 @@ class TestTaskDuplication:
         mock_update_task,
         mock_create_draft,
         mock_get_task,
-        mock_get_org,
         mock_execute,
         mock_get_basic,
     ):
@@ -1300,7 +1597,6 @@ class TestTaskDuplication:
 
     @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.execute_db_operation")
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_task")
     @patch("src.api.db.task.create_draft_task_for_course")
     @patch("src.api.db.task.update_draft_quiz")
@@ -1311,7 +1607,6 @@ class TestTaskDuplication:
         mock_update_quiz,
         mock_create_draft,
         mock_get_task,
-        mock_get_org,
         mock_execute,
         mock_get_basic,
     ):
@@ -1377,14 +1672,12 @@ class TestTaskDuplication:
 
     @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.execute_db_operation")
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_task")
     async def test_duplicate_task_not_in_module(
-        self, mock_get_task, mock_get_org, mock_execute, mock_get_basic
+        self, mock_get_task, mock_execute, mock_get_basic
     ):
         """Test duplicating task not in specified module."""
         mock_get_basic.return_value = {"id": 1, "title": "Task"}
-        mock_get_org.return_value = 123
         mock_execute.return_value = None  # This simulates task not being in module
         mock_get_task.return_value = None
 
@@ -1393,7 +1686,6 @@ class TestTaskDuplication:
 
     @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.execute_db_operation")
-    @patch("src.api.db.task.get_org_id_for_course")
     @patch("src.api.db.task.get_task")
     @patch("src.api.db.task.create_draft_task_for_course")
     @patch("src.api.db.task.update_draft_quiz")
@@ -1402,7 +1694,6 @@ class TestTaskDuplication:
         mock_update_quiz,
         mock_create_draft,
         mock_get_task,
-        mock_get_org,
         mock_execute,
         mock_get_basic,
     ):
@@ -1430,35 +1721,34 @@ class TestTaskDuplication:
             await duplicate_task(1, 1, 10)
 
     @patch("src.api.db.task.get_new_db_connection")
-    async def test_schedule_module_tasks_no_tasks(self, mock_db_conn):
-        """Test scheduling module tasks when no tasks exist."""
-        mock_cursor = AsyncMock()
-        mock_cursor.fetchall.return_value = []  # No tasks
-        mock_conn_instance = AsyncMock()
-        mock_conn_instance.cursor.return_value = mock_cursor
-        mock_conn_instance.__aenter__.return_value = mock_conn_instance
-        mock_db_conn.return_value = mock_conn_instance
-
-        scheduled_at = datetime.now()
-        await schedule_module_tasks(1, 2, scheduled_at)
-
-        # Should return early without committing
-        mock_conn_instance.commit.assert_not_called()
-
-    @patch("src.api.db.task.does_task_exist")
-    @patch("src.api.db.task.get_basic_task_details")
-    @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_draft_quiz_with_scorecard_publishing(
-        self, mock_get_task, mock_db_conn, mock_get_basic, mock_task_exists
-    ):
+    async def test_update_draft_quiz_with_scorecard_publishing(self, mock_db_conn):
         """Test draft quiz update that triggers scorecard publishing."""
-        mock_task_exists.return_value = True
-        mock_get_basic.return_value = {"org_id": 123}
-
         mock_cursor = AsyncMock()
-        mock_cursor.lastrowid = 456
-        mock_cursor.fetchone.return_value = (789,)  # Draft scorecard to be published
+        mock_cursor.fetchone.return_value = (
+            1,
+            "Updated Quiz",
+            "quiz",
+            "published",
+            123,
+            None,
+        )
+        mock_cursor.fetchall.return_value = [
+            (
+                456,
+                "multiple_choice",
+                "[]",
+                None,
+                "text",
+                "chat",
+                None,
+                None,
+                None,
+                1,
+                True,
+                "question",
+                0,
+            )
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
@@ -1480,13 +1770,14 @@ class TestTaskDuplication:
             }
         ]
 
-        mock_task = {"id": 1, "title": "Updated Quiz", "questions": questions}
-        mock_get_task.return_value = mock_task
-
         result = await update_draft_quiz(1, "Updated Quiz", questions, None)
 
-        assert result == mock_task
+        assert result["questions"][0]["scorecard_id"] == 789
 
+        # Draft scorecards are published along with the quiz
+        query, params = mock_cursor.execute.call_args_list[-1][0]
+        assert "UPDATE scorecards SET status = ?" in query
+        assert params == ("published", "draft", 789)
 
     @patch("src.api.db.task.execute_db_operation")
     async def test_publish_scheduled_tasks_empty(self, mock_execute):
@@ -1536,15 +1827,15 @@ class TestTaskDuplication:
 
         assert result == [7, 8, 9]
 
-    @patch("src.api.db.task.does_task_exist")
-    @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_draft_quiz_task_not_found(
-        self, mock_get_task, mock_db_conn, mock_get_basic, mock_task_exists
-    ):
-        """Test update_draft_quiz when task doesn't exist - covers line 343."""
-        mock_task_exists.return_value = False
+    async def test_update_draft_quiz_task_not_found(self, mock_db_conn):
+        """Test update_draft_quiz when task doesn't exist."""
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = None
+        mock_conn_instance = AsyncMock()
+        mock_conn_instance.cursor.return_value = mock_cursor
+        mock_conn_instance.__aenter__.return_value = mock_conn_instance
+        mock_db_conn.return_value = mock_conn_instance
 
         result = await update_draft_quiz(
             99999, "Test Title", [], datetime.now(), TaskStatus.DRAFT
@@ -1552,37 +1843,33 @@ class TestTaskDuplication:
 
         assert result is False
 
-    @patch("src.api.db.task.does_task_exist")
-    @patch("src.api.db.task.get_basic_task_details")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_draft_quiz_with_pydantic_question(
-        self, mock_get_task, mock_db_conn, mock_get_basic, mock_task_exists
-    ):
-        """Test update_draft_quiz when question is not a dict - covers line 372."""
-        mock_task_exists.return_value = True
-        mock_get_basic.return_value = {
-            "id": 1,
-            "title": "Test Quiz",
-            "type": TaskType.QUIZ,
-            "milestone_id": 10,
-            "org_id": 123,  # Added missing org_id field
-        }
-
+    async def test_update_draft_quiz_with_pydantic_question(self, mock_db_conn):
+        """Test update_draft_quiz when question is not a dict."""
         mock_cursor = AsyncMock()
-        mock_cursor.lastrowid = 1
+        mock_cursor.fetchone.return_value = (1, "Test Quiz", "quiz", "draft", 123, None)
+        mock_cursor.fetchall.return_value = [
+            (
+                1,
+                "MULTIPLE_CHOICE",
+                "[]",
+                None,
+                "MULTIPLE_CHOICE",
+                "MULTIPLE_CHOICE",
+                None,
+                None,
+                None,
+                3,
+                True,
+                "question",
+                0,
+            )
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
         mock_db_conn.return_value = mock_conn_instance
 
-        mock_get_task.return_value = {
-            "id": 1,
-            "title": "Test Quiz",
-            "type": TaskType.QUIZ,
-            "questions": [],
-        }
-
         # Create a Pydantic model for the question that will trigger model_dump()
         from pydantic import BaseModel
         from typing import List, Optional
@@ -1617,9 +1904,6 @@ class TestTaskDuplication:
 
         pydantic_question = MockQuestion()
         questions = [pydantic_question]  # This will trigger the model_dump() call
-        
-        mock_task = {"id": 1, "title": "Test Quiz", "questions": [pydantic_question.model_dump()]}
-        mock_get_task.return_value = mock_task
 
         result = await update_draft_quiz(
             1, "Test Quiz", questions, datetime.now(), TaskStatus.DRAFT
@@ -1627,43 +1911,43 @@ class TestTaskDuplication:
 
         assert result["questions"][0]["title"] == "question"
 
-    @patch("src.api.db.task.does_task_exist")
     @patch("src.api.db.task.get_new_db_connection")
-    @patch("src.api.db.task.get_task")
-    async def test_update_published_quiz_with_scorecard_mapping(
-        self, mock_get_task, mock_db_conn, mock_task_exists
-    ):
-        """Test update_published_quiz with scorecard mapping - covers lines 483-513."""
-        mock_task_exists.return_value = True
-
+    async def test_update_published_quiz_with_scorecard_mapping(self, mock_db_conn):
+        """Test update_published_quiz replacing the scorecard of a question."""
         mock_cursor = AsyncMock()
-        mock_cursor.lastrowid = 1
+        mock_cursor.fetchone.return_value = (
+            1,
+            "Test Quiz",
+            "quiz",
+            "published",
+            123,
+            None,
+        )
+        mock_cursor.fetchall.side_effect = [
+            [
+                (
+                    1,
+                    "MULTIPLE_CHOICE",
+                    "[]",
+                    None,
+                    "MULTIPLE_CHOICE",
+                    "MULTIPLE_CHOICE",
+                    456,
+                    None,
+                    None,
+                    None,
+                    None,
+                    "question",
+                    0,
+                )
+            ],
+            [],
+        ]
         mock_conn_instance = AsyncMock()
         mock_conn_instance.cursor.return_value = mock_cursor
         mock_conn_instance.__aenter__.return_value = mock_conn_instance
         mock_db_conn.return_value = mock_conn_instance
 
-        # Mock existing task with questions that have scorecard mappings
-        mock_get_task.return_value = {
-            "id": 1,
-            "title": "Test Quiz",
-            "type": TaskType.QUIZ,
-            "questions": [
-                {
-                    "id": 1,
-                    "type": "MULTIPLE_CHOICE",
-                    "blocks": [],
-                    "answer": None,
-                    "input_type": "MULTIPLE_CHOICE",
-                    "response_type": "MULTIPLE_CHOICE",
-                    "coding_languages": None,
-                    "context": None,
-                    "scorecard_id": 123,  # Existing scorecard mapping
-                    "title": "question",
-                }
-            ],
-        }
-
         # Questions with different scorecard mapping
         from pydantic import BaseModel
         from typing import List, Optional
@@ -1708,3 +1992,7 @@ class TestTaskDuplication:
         assert result is not None
         assert result["questions"][0]["title"] == "question"
 
+        # The old mapping is replaced by the new one
+        queries = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert "DELETE FROM question_scorecards" in queries[1]
+        assert "INSERT INTO question_scorecards" in queries[2]
@@ -18,6 +18,8 @@ from src.api.db.user import (
     get_user_active_in_last_n_days,
     get_user_activity_for_year,
     get_user_streak,
+    remove_user_message_activity,
+    delete_chat_history_with_activity,
 )
 
 
@@ -617,3 +619,67 @@ class TestUserStreakFunctions:
         # Should only include today and yesterday, then break due to gap
         assert isinstance(result, list)
         assert len(result) <= 2  # Should stop at the gap
+
+
+@pytest.mark.asyncio
+class TestUserDailyActivityRemoval:
+    """Test removing deleted messages from the user_daily_activity rollup."""
+
+    async def test_remove_user_message_activity(self):
+        """Test that every message decrements its day and empty days are dropped."""
+        mock_cursor = AsyncMock()
+
+        await remove_user_message_activity(
+            mock_cursor,
+            [
+                (1, 10, "user", "2024-01-01 12:00:00"),
+                (1, 10, "assistant", "2024-01-01 13:00:00"),
+                (2, 11, "user", "2024-01-02 12:00:00"),
+            ],
+        )
+
+        update_sql, update_params = mock_cursor.executemany.call_args[0]
+        assert "message_count = MAX(message_count - 1, 0)" in update_sql
+        assert update_params == [
+            (1, "2024-01-01 12:00:00", "user", 10),
+            (1, "2024-01-01 13:00:00", "assistant", 10),
+            (2, "2024-01-02 12:00:00", "user", 11),
+        ]
+
+        delete_sql = mock_cursor.execute.call_args[0][0]
+        assert "DELETE FROM user_daily_activity" in delete_sql
+        assert "user_id IN (1,2)" in delete_sql
+        assert "message_count = 0 AND completion_count = 0" in delete_sql
+
+    async def test_remove_user_message_activity_without_messages(self):
+        """Test that nothing is written when no messages were deleted."""
+        mock_cursor = AsyncMock()
+
+        await remove_user_message_activity(mock_cursor, [])
+
+        mock_cursor.executemany.assert_not_called()
+        mock_cursor.execute.assert_not_called()
+
+    @patch("src.api.db.user.remove_user_message_activity")
+    async def test_delete_chat_history_with_activity(self, mock_remove):
+        """Test that the messages are removed from the rollup before deletion."""
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchall.return_value = [(1, 10, "user", "2024-01-01 12:00:00")]
+
+        await delete_chat_history_with_activity(
+            mock_cursor, "question_id = ? AND user_id = ?", (10, 1)
+        )
+
+        assert mock_cursor.execute.call_args_list == [
+            call(
+                "SELECT user_id, question_id, role, created_at FROM chat_history WHERE question_id = ? AND user_id = ?",
+                (10, 1),
+            ),
+            call(
+                "DELETE FROM chat_history WHERE question_id = ? AND user_id = ?",
+                (10, 1),
+            ),
+        ]
+        mock_remove.assert_called_once_with(
+            mock_cursor, [(1, 10, "user", "2024-01-01 12:00:00")]
+        )
@@ -1,8 +1,9 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
 from enum import Enum
 from src.api.db.utils import (
     get_org_id_for_course,
+    get_ordering_for_insert,
     convert_blocks_to_right_format,
     construct_description_from_blocks,
     EnumEncoder,
@@ -57,6 +58,71 @@ class TestOrgIdForCourse:
             await get_org_id_for_course(999)
 
 
+@pytest.mark.asyncio
+class TestOrderingForInsert:
+    """Test picking the ordering of a new course task or milestone."""
+
+    async def _get_ordering(self, row, before=None):
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone.return_value = row
+
+        ordering = await get_ordering_for_insert(
+            mock_cursor,
+            "course_tasks",
+            "course_id = ? AND milestone_id = ?",
+            (1, 2),
+            before=before,
+        )
+
+        return ordering, mock_cursor
+
+    async def test_append(self):
+        """Test that appended rows leave a gap after the last row."""
+        ordering, mock_cursor = await self._get_ordering((2048,))
+
+        assert ordering == 3072
+        mock_cursor.execute.assert_called_once_with(
+            "SELECT MAX(ordering) FROM course_tasks WHERE course_id = ? AND milestone_id = ?",
+            (1, 2),
+        )
+
+    async def test_append_to_empty_scope(self):
+        """Test that the first row starts at 0."""
+        ordering, _ = await self._get_ordering((None,))
+
+        assert ordering == 0
+
+    async def test_insert_between_rows(self):
+        """Test that a row inserted between two others takes the midpoint."""
+        ordering, mock_cursor = await self._get_ordering((1024, 2048, 2), before=2048)
+
+        assert ordering == 1536
+        # nothing after the new row is rewritten
+        assert mock_cursor.execute.call_count == 1
+        assert mock_cursor.execute.call_args[0][1] == (1, 2, 2048) * 3
+
+    async def test_insert_before_first_and_after_last(self):
+        """Test inserting at either end of the rows."""
+        ordering, _ = await self._get_ordering((None, 0, 0), before=0)
+        assert ordering == -1024
+
+        ordering, _ = await self._get_ordering((2048, None, 3), before=2049)
+        assert ordering == 3072
+
+        ordering, _ = await self._get_ordering((None, None, 0), before=5)
+        assert ordering == 5
+
+    async def test_insert_without_gap_spaces_out_rows(self):
+        """Test that the rows are spaced out again once neighbours are adjacent."""
+        ordering, mock_cursor = await self._get_ordering((1, 2, 2), before=2)
+
+        # the two rows before the new one move to 0 and 1024, the next one to 2048
+        assert ordering == 1536
+        assert mock_cursor.execute.call_count == 2
+        assert "ROW_NUMBER()" in mock_cursor.execute.call_args[0][0]
+        assert mock_cursor.execute.call_args[0][1] == (1, 2)
+
+
 class TestBlocksConversion:
     """Test blocks conversion functions."""
 
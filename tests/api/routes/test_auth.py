@@ -9,7 +9,7 @@ async def test_login_or_signup_user_success(client, mock_db):
     Test successful login or signup
     """
     # Mock Google token verification
-    with patch("api.routes.auth.id_token.verify_oauth2_token") as mock_verify, patch(
+    with patch("api.routes.auth.verify_google_id_token") as mock_verify, patch(
         "api.routes.auth.insert_or_return_user"
     ) as mock_insert_user, patch(
         "api.routes.auth.get_new_db_connection"
@@ -68,7 +68,7 @@ async def test_login_or_signup_invalid_token(client, mock_db):
     """
     Test login with invalid token
     """
-    with patch("api.routes.auth.id_token.verify_oauth2_token") as mock_verify, patch(
+    with patch("api.routes.auth.verify_google_id_token") as mock_verify, patch(
         "api.routes.auth.settings.google_client_id", "mock-google-client-id"
     ):
 
@@ -99,7 +99,7 @@ async def test_login_or_signup_email_mismatch(client, mock_db):
     """
     Test login with email mismatch
     """
-    with patch("api.routes.auth.id_token.verify_oauth2_token") as mock_verify, patch(
+    with patch("api.routes.auth.verify_google_id_token") as mock_verify, patch(
         "api.routes.auth.settings.google_client_id", "mock-google-client-id"
     ):
 
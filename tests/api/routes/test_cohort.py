@@ -342,15 +342,15 @@ async def test_get_leaderboard_data(client, mock_db):
     Test getting leaderboard data for a cohort
     """
     with patch(
-        "api.routes.cohort.get_cohort_streaks_from_db"
-    ) as mock_get_streaks, patch(
-        "api.routes.cohort.get_cohort_completion_from_db"
-    ) as mock_get_completion:
+        "api.routes.cohort.get_cohort_leaderboard_from_db"
+    ) as mock_get_leaderboard, patch(
+        "api.routes.cohort.get_cohort_num_tasks_from_db"
+    ) as mock_get_num_tasks:
 
         cohort_id = 1
 
-        # Mock streak data - correct format with user object having all required fields
-        streak_data = [
+        # Mock leaderboard data, already sorted by the store
+        leaderboard_data = [
             {
                 "user": {
                     "id": 1,
@@ -360,6 +360,7 @@ async def test_get_leaderboard_data(client, mock_db):
                     "last_name": "Doe",
                 },
                 "streak_count": 5,
+                "tasks_completed": 1,
             },
             {
                 "user": {
@@ -370,26 +371,75 @@ async def test_get_leaderboard_data(client, mock_db):
                     "last_name": "Smith",
                 },
                 "streak_count": 3,
+                "tasks_completed": 2,
             },
         ]
-        mock_get_streaks.return_value = streak_data
+        mock_get_leaderboard.return_value = leaderboard_data
+        mock_get_num_tasks.return_value = 2
+
+        response = client.get(f"/cohorts/{cohort_id}/leaderboard")
 
-        # Mock completion data
-        completion_data = {
-            1: {"task_1": {"is_complete": True}, "task_2": {"is_complete": False}},
-            2: {"task_1": {"is_complete": True}, "task_2": {"is_complete": True}},
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "stats": leaderboard_data,
+            "metadata": {"num_tasks": 2},
         }
-        mock_get_completion.return_value = completion_data
+        mock_get_leaderboard.assert_called_with(
+            cohort_id, view="All time", offset=0, limit=None
+        )
+        mock_get_num_tasks.assert_called_with(cohort_id)
 
-        response = client.get(f"/cohorts/{cohort_id}/leaderboard")
+
+@pytest.mark.asyncio
+async def test_get_leaderboard_data_page(client, mock_db):
+    """
+    Test getting a page of the weekly leaderboard of a cohort
+    """
+    with patch(
+        "api.routes.cohort.get_cohort_leaderboard_from_db"
+    ) as mock_get_leaderboard, patch(
+        "api.routes.cohort.get_cohort_num_tasks_from_db"
+    ) as mock_get_num_tasks:
+        mock_get_leaderboard.return_value = [
+            {
+                "user": {
+                    "id": 3,
+                    "email": "user3@example.com",
+                    "first_name": None,
+                    "middle_name": None,
+                    "last_name": None,
+                },
+                "streak_count": 0,
+                "tasks_completed": 0,
+            }
+        ]
+        mock_get_num_tasks.return_value = 4
+
+        response = client.get(
+            "/cohorts/1/leaderboard",
+            params={"view": "This week", "offset": 10, "limit": 10},
+        )
 
         assert response.status_code == status.HTTP_200_OK
-        result = response.json()
-        assert "stats" in result
-        assert "metadata" in result
-        assert "num_tasks" in result["metadata"]
-        mock_get_streaks.assert_called_with(cohort_id=cohort_id)
-        mock_get_completion.assert_called_with(cohort_id, [1, 2])
+        assert len(response.json()["stats"]) == 1
+        mock_get_leaderboard.assert_called_with(
+            1, view="This week", offset=10, limit=10
+        )
+
+        response = client.get("/cohorts/1/leaderboard", params={"limit": 0})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def _course_metrics(**kwargs):
+    metrics = {
+        "course_exists": True,
+        "cohort_exists": True,
+        "num_tasks": 0,
+        "task_type_counts": {},
+        "learners": [],
+    }
+    metrics.update(kwargs)
+    return metrics
 
 
 @pytest.mark.asyncio
@@ -397,51 +447,30 @@ async def test_get_cohort_metrics_for_course(client, mock_db):
     """
     Test getting cohort metrics for a specific course
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort, patch(
-        "api.routes.cohort.get_cohort_completion_from_db"
-    ) as mock_get_completion, patch(
-        "api.routes.cohort.get_cohort_course_attempt_data_from_db"
-    ) as mock_get_attempt_data:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
 
         cohort_id = 1
         course_id = 1
 
-        # Mock course data with integer task IDs
-        course_data = {
-            "milestones": [
+        # One quiz and one learning material task, each learner completed one of them
+        mock_get_metrics.return_value = _course_metrics(
+            num_tasks=2,
+            task_type_counts={"quiz": 1, "learning_material": 1},
+            learners=[
                 {
-                    "id": 1,
-                    "name": "Milestone 1",
-                    "tasks": [
-                        {"id": 1, "type": "quiz"},
-                        {"id": 2, "type": "learning_material"},
-                    ],
-                }
-            ]
-        }
-        mock_get_course.return_value = course_data
-
-        # Mock cohort data
-        cohort_data = {
-            "members": [{"id": 1, "role": "learner"}, {"id": 2, "role": "learner"}]
-        }
-        mock_get_cohort.return_value = cohort_data
-
-        # Mock completion data with integer task IDs to match course data
-        completion_data = {
-            1: {1: {"is_complete": True}, 2: {"is_complete": False}},
-            2: {1: {"is_complete": False}, 2: {"is_complete": True}},
-        }
-        mock_get_completion.return_value = completion_data
-
-        # Mock attempt data
-        attempt_data = {
-            1: {1: {"has_attempted": True}},
-            2: {1: {"has_attempted": False}},
-        }
-        mock_get_attempt_data.return_value = attempt_data
+                    "user_id": 1,
+                    "completions": {"quiz": 1, "learning_material": 0},
+                    "has_attempted": True,
+                },
+                {
+                    "user_id": 2,
+                    "completions": {"quiz": 0, "learning_material": 1},
+                    "has_attempted": False,
+                },
+            ],
+        )
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -457,6 +486,19 @@ async def test_get_cohort_metrics_for_course(client, mock_db):
         assert result["num_active_learners"] == 1
         # Each learner completed 1 out of 2 tasks, so average completion is 0.5
         assert result["average_completion"] == 0.5
+        assert result["task_type_metrics"] == {
+            "quiz": {
+                "completion_rate": 0.5,
+                "count": 1,
+                "completions": {"1": 1, "2": 0},
+            },
+            "learning_material": {
+                "completion_rate": 0.5,
+                "count": 1,
+                "completions": {"1": 0, "2": 1},
+            },
+        }
+        mock_get_metrics.assert_called_with(cohort_id, course_id)
 
 
 @pytest.mark.asyncio
@@ -571,16 +613,12 @@ async def test_get_cohort_metrics_for_course_not_found(client, mock_db):
     """
     Test getting cohort metrics when course doesn't exist
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
         cohort_id = 1
         course_id = 999
-        mock_get_course.return_value = None
-        mock_get_cohort.return_value = {
-            "id": 1,
-            "name": "Test Cohort",
-        }  # Mock valid cohort
+        mock_get_metrics.return_value = _course_metrics(course_exists=False)
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -593,16 +631,15 @@ async def test_get_cohort_metrics_for_course_cohort_not_found(client, mock_db):
     """
     Test getting cohort metrics when cohort doesn't exist
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
 
         cohort_id = 999
         course_id = 1
 
         # Course exists but cohort doesn't
-        mock_get_course.return_value = {"milestones": []}
-        mock_get_cohort.return_value = None
+        mock_get_metrics.return_value = _course_metrics(cohort_exists=False)
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -613,19 +650,42 @@ async def test_get_cohort_metrics_for_course_cohort_not_found(client, mock_db):
 @pytest.mark.asyncio
 async def test_get_leaderboard_data_empty_users(client, mock_db):
     """
-    Test getting leaderboard data when there are no users with streaks
+    Test getting leaderboard data when the cohort has no learners
     """
-    with patch("api.routes.cohort.get_cohort_streaks_from_db") as mock_get_streaks:
+    with patch(
+        "api.routes.cohort.get_cohort_leaderboard_from_db"
+    ) as mock_get_leaderboard, patch(
+        "api.routes.cohort.get_cohort_num_tasks_from_db"
+    ) as mock_get_num_tasks:
 
         cohort_id = 1
-        # Mock empty streaks data (no users)
-        mock_get_streaks.return_value = []
+        # Mock empty leaderboard (no learners)
+        mock_get_leaderboard.return_value = []
 
         response = client.get(f"/cohorts/{cohort_id}/leaderboard")
 
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {}
-        mock_get_streaks.assert_called_with(cohort_id=cohort_id)
+        mock_get_num_tasks.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_leaderboard_data_page_past_the_end(client, mock_db):
+    """
+    Test getting a page past the end of the leaderboard of a cohort
+    """
+    with patch(
+        "api.routes.cohort.get_cohort_leaderboard_from_db"
+    ) as mock_get_leaderboard, patch(
+        "api.routes.cohort.get_cohort_num_tasks_from_db"
+    ) as mock_get_num_tasks:
+        mock_get_leaderboard.return_value = []
+        mock_get_num_tasks.return_value = 2
+
+        response = client.get("/cohorts/1/leaderboard", params={"offset": 20})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"stats": [], "metadata": {"num_tasks": 2}}
 
 
 @pytest.mark.asyncio
@@ -633,30 +693,17 @@ async def test_get_cohort_metrics_for_course_no_learners(client, mock_db):
     """
     Test getting cohort metrics when cohort has no learners
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
 
         cohort_id = 1
         course_id = 1
 
-        # Mock course data
-        course_data = {
-            "milestones": [
-                {
-                    "id": 1,
-                    "name": "Milestone 1",
-                    "tasks": [{"id": 1, "type": "quiz"}],
-                }
-            ]
-        }
-        mock_get_course.return_value = course_data
-
-        # Mock cohort data with no learners (only mentors/admins)
-        cohort_data = {
-            "members": [{"id": 1, "role": "mentor"}, {"id": 2, "role": "admin"}]
-        }
-        mock_get_cohort.return_value = cohort_data
+        # Only mentors/admins in the cohort
+        mock_get_metrics.return_value = _course_metrics(
+            num_tasks=1, task_type_counts={"quiz": 1}
+        )
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -669,37 +716,19 @@ async def test_get_cohort_metrics_for_course_no_tasks(client, mock_db):
     """
     Test getting cohort metrics when course has no tasks
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort, patch(
-        "api.routes.cohort.get_cohort_completion_from_db"
-    ) as mock_get_completion, patch(
-        "api.routes.cohort.get_cohort_course_attempt_data_from_db"
-    ) as mock_get_attempt_data:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
 
         cohort_id = 1
         course_id = 1
 
-        # Mock course data with no tasks
-        course_data = {"milestones": []}
-        mock_get_course.return_value = course_data
-
-        # Mock cohort data with learners
-        cohort_data = {
-            "members": [{"id": 1, "role": "learner"}, {"id": 2, "role": "learner"}]
-        }
-        mock_get_cohort.return_value = cohort_data
-
-        # Mock completion data with no tasks (empty for the first learner)
-        completion_data = {1: {}, 2: {}}
-        mock_get_completion.return_value = completion_data
-
-        # Mock attempt data
-        attempt_data = {
-            1: {1: {"has_attempted": False}},
-            2: {1: {"has_attempted": False}},
-        }
-        mock_get_attempt_data.return_value = attempt_data
+        mock_get_metrics.return_value = _course_metrics(
+            learners=[
+                {"user_id": 1, "completions": {}, "has_attempted": False},
+                {"user_id": 2, "completions": {}, "has_attempted": False},
+            ]
+        )
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -712,57 +741,27 @@ async def test_get_cohort_metrics_for_course_completed_task_not_in_metadata(
     client, mock_db
 ):
     """
-    Test getting cohort metrics when a learner has completed a task that doesn't exist in the course metadata
-    This covers the continue statement on line 241 of cohort.py
+    Test getting cohort metrics when the cohort has a task that is not part of the
+    milestones of the course, which counts towards num_tasks but not the completions
     """
-    with patch("api.routes.cohort.get_course_from_db") as mock_get_course, patch(
-        "api.routes.cohort.get_cohort_by_id_from_db"
-    ) as mock_get_cohort, patch(
-        "api.routes.cohort.get_cohort_completion_from_db"
-    ) as mock_get_completion, patch(
-        "api.routes.cohort.get_cohort_course_attempt_data_from_db"
-    ) as mock_get_attempt_data:
+    with patch(
+        "api.routes.cohort.get_cohort_course_metrics_from_db"
+    ) as mock_get_metrics:
 
         cohort_id = 1
         course_id = 1
 
-        # Mock course data with only tasks 1 and 2
-        course_data = {
-            "milestones": [
+        mock_get_metrics.return_value = _course_metrics(
+            num_tasks=3,
+            task_type_counts={"quiz": 1, "learning_material": 1},
+            learners=[
                 {
-                    "id": 1,
-                    "name": "Milestone 1",
-                    "tasks": [
-                        {"id": 1, "type": "quiz"},
-                        {"id": 2, "type": "learning_material"},
-                    ],
+                    "user_id": 1,
+                    "completions": {"quiz": 1, "learning_material": 0},
+                    "has_attempted": True,
                 }
-            ]
-        }
-        mock_get_course.return_value = course_data
-
-        # Mock cohort data
-        cohort_data = {"members": [{"id": 1, "role": "learner"}]}
-        mock_get_cohort.return_value = cohort_data
-
-        # Mock completion data where learner completed task 3 (which doesn't exist in course metadata)
-        # and task 1 (which does exist)
-        completion_data = {
-            1: {
-                1: {"is_complete": True},  # Task 1 exists in course metadata
-                2: {"is_complete": False},  # Task 2 exists in course metadata
-                3: {
-                    "is_complete": True
-                },  # Task 3 does NOT exist in course metadata - triggers continue
-            }
-        }
-        mock_get_completion.return_value = completion_data
-
-        # Mock attempt data
-        attempt_data = {
-            1: {1: {"has_attempted": True}},
-        }
-        mock_get_attempt_data.return_value = attempt_data
+            ],
+        )
 
         response = client.get(f"/cohorts/{cohort_id}/courses/{course_id}/metrics")
 
@@ -770,8 +769,7 @@ async def test_get_cohort_metrics_for_course_completed_task_not_in_metadata(
         result = response.json()
 
         # Verify the metrics are calculated correctly
-        # Only task 1 should be counted (task 3 is skipped due to continue statement)
-        assert result["num_tasks"] == 3  # Total tasks in completion data
+        assert result["num_tasks"] == 3  # Total tasks available to the cohort
         assert result["average_completion"] == 1 / 3  # 1 completed task out of 3 total
         assert result["num_active_learners"] == 1
         assert "task_type_metrics" in result
@@ -314,14 +314,14 @@ async def test_download_file_locally_success(client, mock_db):
     Test downloading a file locally successfully
     """
     with patch("api.routes.file.os.path.exists") as mock_exists, patch(
-        "api.routes.file.FileResponse"
-    ) as mock_file_response, patch(
+        "api.routes.file.build_file_response"
+    ) as mock_build_file_response, patch(
         "api.routes.file.settings.local_upload_folder", "/tmp/uploads"
     ):
 
         # Setup mocks
         mock_exists.return_value = True
-        mock_file_response.return_value = "file_response"  # Simplified for testing
+        mock_build_file_response.return_value = {}  # Simplified for testing
 
         uuid = "test-uuid"
         file_extension = "jpeg"
@@ -333,13 +333,46 @@ async def test_download_file_locally_success(client, mock_db):
 
         # Assert mocks called correctly
         mock_exists.assert_called_with(f"/tmp/uploads/{uuid}.{file_extension}")
-        mock_file_response.assert_called_with(
-            path=f"/tmp/uploads/{uuid}.{file_extension}",
+        mock_build_file_response.assert_called_with(
+            ANY,
+            f"/tmp/uploads/{uuid}.{file_extension}",
             filename=f"{uuid}.{file_extension}",
-            media_type="application/octet-stream",
         )
 
 
+@pytest.mark.asyncio
+async def test_download_file_locally_range_and_conditional(client, mock_db, tmp_path):
+    """
+    Test that local downloads support byte ranges, ETags and 304 responses
+    """
+    (tmp_path / "test-uuid.wav").write_bytes(b"0123456789")
+
+    with patch("api.routes.file.settings.local_upload_folder", str(tmp_path)):
+        url = "/file/download-local/?uuid=test-uuid&file_extension=wav"
+
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"0123456789"
+        assert response.headers["content-type"].startswith("audio/")
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "max-age" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+        assert not etag.startswith("W/")
+
+        response = client.get(url, headers={"Range": "bytes=2-5"})
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == b"2345"
+        assert response.headers["content-range"] == "bytes 2-5/10"
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+        response = client.get(url, headers={"Range": "bytes=20-"})
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["content-range"] == "bytes */10"
+
+
 @pytest.mark.asyncio
 async def test_download_file_locally_file_not_found(client, mock_db):
     """
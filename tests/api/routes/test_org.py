@@ -336,6 +336,22 @@ async def test_add_users_to_org_by_email_error(client, mock_db):
         mock_add_users.assert_called_with(123, request_data["emails"])
 
 
+@pytest.mark.asyncio
+async def test_revoke_org_api_key_success(client, mock_db):
+    """
+    Test revoking an organization API key successfully
+    """
+    with patch("api.routes.org.revoke_org_api_key_from_db") as mock_revoke_key:
+        mock_revoke_key.return_value = None
+
+        response = client.delete("/organizations/123/api_keys/7")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"success": True}
+
+        mock_revoke_key.assert_called_once_with(123, 7)
+
+
 @pytest.mark.asyncio
 async def test_remove_members_from_org_success(client, mock_db):
     """
@@ -515,7 +515,7 @@ async def test_get_task(client, mock_db):
         assert result["type"] == expected_response["type"]
         assert "blocks" in result
 
-        mock_get_task.assert_called_with(task_id)
+        mock_get_task.assert_called_with(task_id, raw_json=True)
 
         # Test task not found
         mock_get_task.reset_mock()
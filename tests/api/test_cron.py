@@ -1,7 +1,13 @@
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 import pandas as pd
-from src.api.cron import get_model_summary_stats, send_usage_summary_stats
+from datetime import datetime, timedelta
+from src.api.cron import (
+    get_model_summary_stats,
+    get_model_summary_stats_for_periods,
+    send_usage_summary_stats,
+    MODEL_SUMMARY_STATS_TIMEOUT,
+)
 
 
 class TestGetModelSummaryStats:
@@ -66,12 +72,60 @@ class TestGetModelSummaryStats:
             mock_get_raw_traces.assert_called_with(period)
 
 
+class TestGetModelSummaryStatsForPeriods:
+    """Test the get_model_summary_stats_for_periods function."""
+
+    @patch("src.api.cron.datetime")
+    @patch("src.api.cron.get_raw_traces_between")
+    def test_counts_every_period_from_one_pull(
+        self, mock_get_raw_traces_between, mock_datetime
+    ):
+        """Test that the spans are pulled once and counted for every period."""
+        now = datetime(2025, 6, 15, 12)
+        mock_datetime.now.return_value = now
+        mock_get_raw_traces_between.return_value = pd.DataFrame(
+            {
+                "attributes.llm.model_name": ["gpt-4", "gpt-4", "gpt-4o", "gpt-4"],
+                "start_time": [
+                    now - timedelta(hours=1),
+                    now - timedelta(days=2),
+                    now - timedelta(days=20),
+                    now - timedelta(days=100),
+                ],
+            }
+        )
+
+        result = get_model_summary_stats_for_periods()
+
+        # pulled once from the start of the longest period
+        mock_get_raw_traces_between.assert_called_once_with(
+            datetime(2025, 1, 1, 12), now
+        )
+
+        assert result == {
+            "last_day": {"gpt-4": 1},
+            "current_month": {"gpt-4": 2},
+            "current_year": {"gpt-4": 3, "gpt-4o": 1},
+        }
+
+    @patch("src.api.cron.get_raw_traces_between")
+    def test_without_spans(self, mock_get_raw_traces_between):
+        """Test model summary statistics when there are no spans."""
+        mock_get_raw_traces_between.return_value = pd.DataFrame()
+
+        assert get_model_summary_stats_for_periods() == {
+            "last_day": {},
+            "current_month": {},
+            "current_year": {},
+        }
+
+
 @pytest.mark.asyncio
 class TestSendUsageSummaryStats:
     """Test the send_usage_summary_stats function."""
 
     @patch("src.api.cron.send_slack_notification_for_usage_stats")
-    @patch("src.api.cron.get_model_summary_stats")
+    @patch("src.api.cron.run_in_process", new_callable=AsyncMock)
     @patch("src.api.cron.get_usage_summary_by_organization")
     async def test_send_usage_summary_stats_success(
         self, mock_get_org_stats, mock_get_model_stats, mock_send_slack
@@ -82,7 +136,10 @@ class TestSendUsageSummaryStats:
         mock_model_data = {"gpt-4": 50, "gpt-3.5-turbo": 25}
 
         mock_get_org_stats.return_value = mock_org_data
-        mock_get_model_stats.return_value = mock_model_data
+        mock_get_model_stats.return_value = {
+            period: mock_model_data
+            for period in ["last_day", "current_month", "current_year"]
+        }
         mock_send_slack.return_value = None
 
         # Call the function
@@ -94,11 +151,12 @@ class TestSendUsageSummaryStats:
         mock_get_org_stats.assert_any_call("current_month")
         mock_get_org_stats.assert_any_call("current_year")
 
-        # Verify model stats calls for different periods
-        assert mock_get_model_stats.call_count == 3
-        mock_get_model_stats.assert_any_call("last_day")
-        mock_get_model_stats.assert_any_call("current_month")
-        mock_get_model_stats.assert_any_call("current_year")
+        # Verify the model stats of all the periods are computed at once in another process
+        mock_get_model_stats.assert_called_once_with(
+            get_model_summary_stats_for_periods,
+            ("last_day", "current_month", "current_year"),
+            timeout=MODEL_SUMMARY_STATS_TIMEOUT,
+        )
 
         # Verify Slack notification was sent with correct data structure
         mock_send_slack.assert_called_once()
@@ -115,7 +173,7 @@ class TestSendUsageSummaryStats:
             assert period_data["model"] == mock_model_data
 
     @patch("src.api.cron.send_slack_notification_for_usage_stats")
-    @patch("src.api.cron.get_model_summary_stats")
+    @patch("src.api.cron.run_in_process", new_callable=AsyncMock)
     @patch("src.api.cron.get_usage_summary_by_organization")
     async def test_send_usage_summary_stats_org_db_error(
         self, mock_get_org_stats, mock_get_model_stats, mock_send_slack
@@ -123,7 +181,10 @@ class TestSendUsageSummaryStats:
         """Test usage summary statistics when org database call fails."""
         # Setup mocks - org stats fails
         mock_get_org_stats.side_effect = Exception("Database error")
-        mock_get_model_stats.return_value = {"gpt-4": 50}
+        mock_get_model_stats.return_value = {
+            period: {"gpt-4": 50}
+            for period in ["last_day", "current_month", "current_year"]
+        }
 
         # Call the function and expect exception
         with pytest.raises(Exception) as exc_info:
@@ -133,7 +194,7 @@ class TestSendUsageSummaryStats:
         mock_send_slack.assert_not_called()
 
     @patch("src.api.cron.send_slack_notification_for_usage_stats")
-    @patch("src.api.cron.get_model_summary_stats")
+    @patch("src.api.cron.run_in_process", new_callable=AsyncMock)
     @patch("src.api.cron.get_usage_summary_by_organization")
     async def test_send_usage_summary_stats_model_error(
         self, mock_get_org_stats, mock_get_model_stats, mock_send_slack
@@ -151,7 +212,7 @@ class TestSendUsageSummaryStats:
         mock_send_slack.assert_not_called()
 
     @patch("src.api.cron.send_slack_notification_for_usage_stats")
-    @patch("src.api.cron.get_model_summary_stats")
+    @patch("src.api.cron.run_in_process", new_callable=AsyncMock)
     @patch("src.api.cron.get_usage_summary_by_organization")
     async def test_send_usage_summary_stats_slack_error(
         self, mock_get_org_stats, mock_get_model_stats, mock_send_slack
@@ -159,7 +220,10 @@ class TestSendUsageSummaryStats:
         """Test usage summary statistics when Slack notification fails."""
         # Setup mocks - Slack fails
         mock_get_org_stats.return_value = {"org1": 100}
-        mock_get_model_stats.return_value = {"gpt-4": 50}
+        mock_get_model_stats.return_value = {
+            period: {"gpt-4": 50}
+            for period in ["last_day", "current_month", "current_year"]
+        }
         mock_send_slack.side_effect = Exception("Slack API error")
 
         # Call the function and expect exception
@@ -169,7 +233,7 @@ class TestSendUsageSummaryStats:
         assert "Slack API error" in str(exc_info.value)
 
     @patch("src.api.cron.send_slack_notification_for_usage_stats")
-    @patch("src.api.cron.get_model_summary_stats")
+    @patch("src.api.cron.run_in_process", new_callable=AsyncMock)
     @patch("src.api.cron.get_usage_summary_by_organization")
     async def test_send_usage_summary_stats_empty_data(
         self, mock_get_org_stats, mock_get_model_stats, mock_send_slack
@@ -177,7 +241,9 @@ class TestSendUsageSummaryStats:
         """Test usage summary statistics with empty data."""
         # Setup mocks with empty data
         mock_get_org_stats.return_value = {}
-        mock_get_model_stats.return_value = {}
+        mock_get_model_stats.return_value = {
+            period: {} for period in ["last_day", "current_month", "current_year"]
+        }
         mock_send_slack.return_value = None
 
         # Call the function
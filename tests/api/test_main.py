@@ -8,12 +8,20 @@ import os
 class TestLifespan:
     """Test the lifespan context manager."""
 
+    @patch("src.api.main.scheduler_lease", new_callable=AsyncMock)
+    @patch("src.api.main.scheduled_publish_timer", new_callable=AsyncMock)
     @patch("src.api.main.scheduler")
     @patch("src.api.main.os.makedirs")
     @patch("src.api.main.asyncio.create_task")
     @patch("src.api.main.settings")
     async def test_lifespan_startup_and_shutdown(
-        self, mock_settings, mock_create_task, mock_makedirs, mock_scheduler
+        self,
+        mock_settings,
+        mock_create_task,
+        mock_makedirs,
+        mock_scheduler,
+        mock_publish_timer,
+        mock_scheduler_lease,
     ):
         """Test the lifespan context manager startup and shutdown."""
         from src.api.main import lifespan
@@ -26,11 +34,16 @@ class TestLifespan:
         async with lifespan(mock_app):
             # Verify startup actions
             mock_scheduler.start.assert_called_once()
+            # only started on the worker that the scheduler elects
+            mock_publish_timer.start.assert_not_called()
             mock_makedirs.assert_called_once_with("/test/uploads", exist_ok=True)
             assert mock_create_task.call_count == 2  # Two async tasks created
 
         # Verify shutdown actions
         mock_scheduler.shutdown.assert_called_once()
+        mock_publish_timer.stop.assert_awaited_once()
+        # handed over right away instead of expiring
+        mock_scheduler_lease.release.assert_awaited_once()
 
 
 class TestAppConfiguration:
@@ -251,14 +251,11 @@ class TestEnumEquality:
         assert (GenerateTaskJobStatus.STARTED == []) is False
         assert (GenerateTaskJobStatus.STARTED == {}) is False
 
-    def test_leaderboard_view_type_equality_raises_not_implemented(self):
-        """Test LeaderboardViewType equality raises NotImplementedError for non-string/enum types."""
-        with pytest.raises(NotImplementedError):
-            LeaderboardViewType.ALL_TIME == 123
-        with pytest.raises(NotImplementedError):
-            LeaderboardViewType.ALL_TIME == None
-        with pytest.raises(NotImplementedError):
-            LeaderboardViewType.ALL_TIME == []
+    def test_leaderboard_view_type_inequality_return_false(self):
+        """Test LeaderboardViewType equality returns False for non-string/enum types."""
+        assert (LeaderboardViewType.ALL_TIME == 123) is False
+        assert (LeaderboardViewType.ALL_TIME == None) is False
+        assert (LeaderboardViewType.ALL_TIME == []) is False
 
 
 class TestEnumStringMethods:
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from src.api.models import GenerateCourseJobStatus, GenerateTaskJobStatus
+from src.api.progress import CourseGenerationProgress
+
+COMPLETED = str(GenerateTaskJobStatus.COMPLETED)
+STARTED = str(GenerateTaskJobStatus.STARTED)
+
+
+def _mock_manager(mock_get_manager):
+    manager = MagicMock()
+    manager.send_item_update = AsyncMock()
+    mock_get_manager.return_value = manager
+    return manager
+
+
+@pytest.mark.asyncio
+class TestCourseGenerationProgress:
+    @patch("src.api.progress.get_manager")
+    @patch("src.api.progress.update_course_generation_job_status")
+    @patch("src.api.progress.get_course_task_generation_jobs_status")
+    @patch("src.api.progress.complete_task_generation_job")
+    async def test_completions_are_counted_in_memory_and_coalesced(
+        self, mock_complete, mock_get_status, mock_update_course, mock_get_manager
+    ):
+        manager = _mock_manager(mock_get_manager)
+        mock_complete.return_value = True
+        mock_get_status.return_value = {COMPLETED: 1, STARTED: 3}
+        progress = CourseGenerationProgress(flush_interval=0.05)
+
+        await progress.task_completed(1, 10, "job-1", "course-job")
+        await progress.task_completed(1, 11, "job-2", "course-job")
+        await progress.task_completed(1, 12, "job-3", "course-job")
+
+        # the jobs are only counted on the first completion
+        mock_get_status.assert_called_once_with(1)
+        assert mock_complete.call_count == 3
+        assert progress.counts[1] == {COMPLETED: 3, STARTED: 1}
+        manager.send_item_update.assert_not_called()
+
+        await asyncio.sleep(0.1)
+
+        manager.send_item_update.assert_called_once_with(
+            1,
+            {
+                "event": "task_completed",
+                "task": {"id": 12},
+                "tasks": [{"id": 10}, {"id": 11}, {"id": 12}],
+                "total_completed": 3,
+            },
+        )
+        mock_update_course.assert_not_called()
+
+    @patch("src.api.progress.get_manager")
+    @patch("src.api.progress.update_course_generation_job_status")
+    @patch("src.api.progress.get_course_task_generation_jobs_status")
+    @patch("src.api.progress.complete_task_generation_job")
+    async def test_last_completion_completes_the_course(
+        self, mock_complete, mock_get_status, mock_update_course, mock_get_manager
+    ):
+        manager = _mock_manager(mock_get_manager)
+        mock_complete.return_value = True
+        mock_get_status.return_value = {COMPLETED: 1, STARTED: 1}
+        progress = CourseGenerationProgress(flush_interval=60)
+
+        await progress.task_completed(1, 10, "job-1", "course-job")
+        await progress.task_completed(1, 11, "job-2", "course-job")
+
+        mock_update_course.assert_called_once_with(
+            "course-job", GenerateCourseJobStatus.COMPLETED
+        )
+        # sent right away instead of waiting for the flush interval
+        manager.send_item_update.assert_called_once_with(
+            1,
+            {
+                "event": "task_completed",
+                "task": {"id": 11},
+                "tasks": [{"id": 10}, {"id": 11}],
+                "total_completed": 2,
+            },
+        )
+        assert progress.counts == {}
+        assert progress._flush_tasks == {}
+
+    @patch("src.api.progress.get_manager")
+    @patch("src.api.progress.update_course_generation_job_status")
+    @patch("src.api.progress.get_course_task_generation_jobs_status")
+    @patch("src.api.progress.complete_task_generation_job")
+    async def test_job_completed_twice_is_counted_once(
+        self, mock_complete, mock_get_status, mock_update_course, mock_get_manager
+    ):
+        _mock_manager(mock_get_manager)
+        mock_get_status.return_value = {COMPLETED: 1, STARTED: 2}
+        progress = CourseGenerationProgress(flush_interval=60)
+
+        mock_complete.return_value = True
+        await progress.task_completed(1, 10, "job-1", "course-job")
+
+        mock_complete.return_value = False
+        await progress.task_completed(1, 10, "job-1", "course-job")
+
+        assert progress.counts[1] == {COMPLETED: 1, STARTED: 2}
+
+        progress._flush_tasks[1].cancel()
+
+    @patch("src.api.progress.get_manager")
+    @patch("src.api.progress.update_course_generation_job_status")
+    @patch("src.api.progress.get_course_task_generation_jobs_status")
+    @patch("src.api.progress.complete_task_generation_job")
+    async def test_reset_reloads_the_counts(
+        self, mock_complete, mock_get_status, mock_update_course, mock_get_manager
+    ):
+        _mock_manager(mock_get_manager)
+        mock_complete.return_value = True
+        mock_get_status.return_value = {COMPLETED: 1, STARTED: 2}
+        progress = CourseGenerationProgress(flush_interval=60)
+
+        await progress.task_completed(1, 10, "job-1", "course-job")
+        progress.reset(1)
+        await progress.task_completed(1, 11, "job-2", "course-job")
+
+        assert mock_get_status.call_count == 2
+
+        progress._flush_tasks[1].cancel()
@@ -1,4 +1,8 @@
+import csv
+import io
+import json
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import patch, AsyncMock
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
@@ -87,6 +91,28 @@ class TestGetAllChatHistory:
         # Assertions
         assert response.status_code == 200
         assert response.json() == mock_chat_data
+        mock_get_chat_history.assert_called_once_with(
+            123, since=None, after_id=None, limit=None
+        )
+
+    @patch("src.api.public.validate_api_key")
+    @patch("src.api.public.get_all_chat_history_from_db")
+    def test_get_all_chat_history_page(self, mock_get_chat_history, mock_validate):
+        """Test retrieving a page of chat history."""
+        mock_get_chat_history.return_value = []
+
+        response = client.get(
+            "/chat_history?org_id=123&after_id=10&limit=50&since=2024-01-01T00:00:00Z",
+            headers={"api-key": "valid_key"},
+        )
+
+        assert response.status_code == 200
+        mock_get_chat_history.assert_called_once_with(
+            123,
+            since=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            after_id=10,
+            limit=50,
+        )
 
     @patch("src.api.public.validate_api_key")
     def test_get_all_chat_history_invalid_api_key(self, mock_validate):
@@ -106,24 +132,114 @@ class TestGetAllChatHistory:
         assert response.json() == {"detail": "Invalid API key"}
 
 
+class TestExportAllChatHistory:
+    """Test the export_all_chat_history endpoint."""
+
+    chat_message = {
+        "id": 1,
+        "created_at": "2023-01-01 00:00:00",
+        "user_id": 123,
+        "question_id": 456,
+        "role": "user",
+        "content": 'Hello, "world"',
+        "response_type": "text",
+        "task_id": 789,
+        "user_email": "test@example.com",
+    }
+
+    @staticmethod
+    async def _chunks(*chunks):
+        for chunk in chunks:
+            yield chunk
+
+    @patch("src.api.public.validate_api_key")
+    @patch("src.api.public.get_all_chat_history_in_chunks")
+    def test_export_all_chat_history_ndjson(self, mock_get_chunks, mock_validate):
+        """Test exporting chat history as newline-delimited JSON."""
+        mock_get_chunks.return_value = self._chunks(
+            [self.chat_message], [{**self.chat_message, "id": 2}]
+        )
+
+        response = client.get(
+            "/chat_history/export?org_id=123&after_id=5",
+            headers={"api-key": "valid_key"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+        mock_get_chunks.assert_called_once_with(123, since=None, after_id=5)
+
+    @patch("src.api.public.validate_api_key")
+    @patch("src.api.public.get_all_chat_history_in_chunks")
+    def test_export_all_chat_history_csv(self, mock_get_chunks, mock_validate):
+        """Test exporting chat history as CSV."""
+        mock_get_chunks.return_value = self._chunks([self.chat_message])
+
+        response = client.get(
+            "/chat_history/export?org_id=123&format=csv",
+            headers={"api-key": "valid_key"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 1
+        assert rows[0]["content"] == 'Hello, "world"'
+        assert rows[0]["user_email"] == "test@example.com"
+
+    @patch("src.api.public.validate_api_key")
+    @patch("src.api.public.get_all_chat_history_in_chunks")
+    def test_export_all_chat_history_csv_empty(self, mock_get_chunks, mock_validate):
+        """Test that an empty CSV export still has its header."""
+        mock_get_chunks.return_value = self._chunks()
+
+        response = client.get(
+            "/chat_history/export?org_id=123&format=csv",
+            headers={"api-key": "valid_key"},
+        )
+
+        assert response.status_code == 200
+        assert response.text.strip() == (
+            "id,created_at,user_id,question_id,role,content,response_type,task_id,user_email"
+        )
+
+    @patch("src.api.public.validate_api_key")
+    def test_export_all_chat_history_invalid_api_key(self, mock_validate):
+        """Test chat history export with invalid API key."""
+        mock_validate.side_effect = HTTPException(
+            status_code=403, detail="Invalid API key"
+        )
+
+        response = client.get(
+            "/chat_history/export?org_id=123", headers={"api-key": "invalid_key"}
+        )
+
+        assert response.status_code == 403
+
+
 class TestGetTasksForCourse:
     """Test the get_tasks_for_course endpoint."""
 
     @patch("src.api.public.get_org_id_from_api_key")
     @patch("src.api.public.get_course_org_id")
     @patch("src.api.public.validate_api_key")
+    @patch("src.api.public.get_course_version")
     @patch("src.api.public.get_course_from_db")
     @patch("src.api.public.get_task_from_db")
     def test_get_tasks_for_course_success_learning_material(
         self,
         mock_get_task,
         mock_get_course,
+        mock_get_version,
         mock_validate,
         mock_get_course_org_id,
         mock_get_org_id,
     ):
         """Test successful course retrieval with learning material tasks."""
         # Setup mocks
+        mock_get_version.return_value = "abc"
         mock_get_org_id.return_value = 123
         mock_get_course_org_id.return_value = 123
         mock_validate.return_value = None
@@ -209,6 +325,15 @@ class TestGetTasksForCourse:
         assert "blocks" in result["milestones"][0]["tasks"][0]
         assert "questions" in result["milestones"][0]["tasks"][1]
         assert result["milestones"][0]["tasks"][1]["questions"][0]["title"] == "question"
+        assert result["milestones"][0]["tasks"][1]["blocks"] is None
+        assert result["milestones"][0]["unlock_at"] is None
+        mock_get_task.assert_any_call(1, raw_json=True)
+
+        assert response.headers["etag"] == '"abc"'
+
+        # The API key is only looked up once per request
+        mock_get_org_id.assert_called_once_with("valid_key")
+        mock_validate.assert_not_called()
 
     @patch("src.api.public.get_org_id_from_api_key")
     def test_get_tasks_for_course_invalid_api_key(self, mock_get_org_id):
@@ -253,3 +378,88 @@ class TestGetTasksForCourse:
         # Assertions
         assert response.status_code == 403
         assert response.json() == {"detail": "Invalid API key"}
+
+
+class TestCourseChangeTracking:
+    """Test conditional and incremental course sync."""
+
+    @patch("src.api.public.get_org_id_from_api_key")
+    @patch("src.api.public.get_course_org_id")
+    @patch("src.api.public.get_course_version")
+    @patch("src.api.public.get_course_from_db")
+    def test_get_tasks_for_course_not_modified(
+        self,
+        mock_get_course,
+        mock_get_version,
+        mock_get_course_org_id,
+        mock_get_org_id,
+    ):
+        """Test that an unchanged course is not rendered again."""
+        mock_get_org_id.return_value = 123
+        mock_get_course_org_id.return_value = 123
+        mock_get_version.return_value = "abc"
+
+        response = client.get(
+            "/course/1",
+            headers={"api-key": "valid_key", "if-none-match": 'W/"xyz", "abc"'},
+        )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"abc"'
+        mock_get_course.assert_not_called()
+
+    @patch("src.api.public.get_org_id_from_api_key")
+    @patch("src.api.public.get_course_org_id")
+    @patch("src.api.public.get_course_changes_from_db")
+    def test_get_course_changes(
+        self, mock_get_changes, mock_get_course_org_id, mock_get_org_id
+    ):
+        """Test getting the changes of a course after a cursor."""
+        mock_get_org_id.return_value = 123
+        mock_get_course_org_id.return_value = 123
+        mock_get_changes.return_value = {
+            "id": 1,
+            "name": "Test Course",
+            "cursor": "2024-01-02 00:00:00.000",
+            "milestones": [],
+            "tasks": [
+                {
+                    "id": 2,
+                    "type": "learning_material",
+                    "title": "LM Task",
+                    "status": "published",
+                    "scheduled_publish_at": None,
+                    "milestone_id": 1,
+                    "ordering": 0,
+                    "num_questions": None,
+                    "is_generating": False,
+                    "blocks": [],
+                }
+            ],
+            "milestone_ids": [1],
+            "task_ids": [2],
+        }
+
+        response = client.get(
+            "/course/1/changes?since=2024-01-01 00:00:00.000",
+            headers={"api-key": "valid_key"},
+        )
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["cursor"] == "2024-01-02 00:00:00.000"
+        assert result["tasks"][0]["milestone_id"] == 1
+        mock_get_changes.assert_called_once_with(1, "2024-01-01 00:00:00.000")
+
+    @patch("src.api.public.get_org_id_from_api_key")
+    @patch("src.api.public.get_course_org_id")
+    def test_get_course_changes_wrong_org(
+        self, mock_get_course_org_id, mock_get_org_id
+    ):
+        """Test getting the changes of a course of another org."""
+        mock_get_org_id.return_value = 123
+        mock_get_course_org_id.return_value = 456
+
+        response = client.get("/course/1/changes", headers={"api-key": "valid_key"})
+
+        assert response.status_code == 403
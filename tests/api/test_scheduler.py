@@ -6,7 +6,10 @@ from src.api.scheduler import (
     check_scheduled_tasks,
     daily_usage_stats,
     daily_traces,
+    renew_scheduler_lease,
+    reload_scheduled_publish_times,
     ist_timezone,
+    DAILY_TRACES_TIMEOUT,
 )
 
 
@@ -31,6 +34,54 @@ class TestSchedulerConfiguration:
 class TestScheduledTasks:
     """Test scheduled task functions."""
 
+    @pytest.fixture(autouse=True)
+    def mock_scheduler_lease(self):
+        # the jobs only run on the worker holding the lease
+        with patch("src.api.scheduler.scheduler_lease") as mock_lease:
+            mock_lease.acquire = AsyncMock(return_value=True)
+            yield mock_lease
+
+    @patch("src.api.scheduler.publish_scheduled_tasks")
+    async def test_jobs_skipped_without_lease(
+        self, mock_publish_tasks, mock_scheduler_lease
+    ):
+        """Test that the jobs do not run on workers not holding the lease."""
+        mock_scheduler_lease.acquire.return_value = False
+
+        await check_scheduled_tasks()
+
+        mock_publish_tasks.assert_not_called()
+
+    @patch("src.api.scheduler.scheduled_publish_timer", new_callable=AsyncMock)
+    async def test_renew_scheduler_lease(
+        self, mock_publish_timer, mock_scheduler_lease
+    ):
+        """Test that the lease is renewed and the leader runs the publish timer."""
+        await renew_scheduler_lease()
+
+        mock_scheduler_lease.acquire.assert_called_once()
+        mock_publish_timer.start.assert_awaited_once()
+        mock_publish_timer.stop.assert_not_called()
+
+    @patch("src.api.scheduler.scheduled_publish_timer", new_callable=AsyncMock)
+    async def test_renew_scheduler_lease_without_lease(
+        self, mock_publish_timer, mock_scheduler_lease
+    ):
+        """Test that the other workers do not run the publish timer."""
+        mock_scheduler_lease.acquire.return_value = False
+
+        await renew_scheduler_lease()
+
+        mock_publish_timer.start.assert_not_called()
+        mock_publish_timer.stop.assert_awaited_once()
+
+    @patch("src.api.scheduler.scheduled_publish_timer", new_callable=AsyncMock)
+    async def test_reload_scheduled_publish_times(self, mock_publish_timer):
+        """Test that the times set through the other workers are loaded."""
+        await reload_scheduled_publish_times()
+
+        mock_publish_timer.reload.assert_awaited_once()
+
     @patch("src.api.scheduler.publish_scheduled_tasks")
     async def test_check_scheduled_tasks(self, mock_publish_tasks):
         """Test the check_scheduled_tasks function."""
@@ -83,17 +134,17 @@ class TestScheduledTasks:
         # Verify the stats function was NOT called
         mock_send_stats.assert_not_called()
 
+    @patch("src.api.scheduler.run_in_process", new_callable=AsyncMock)
     @patch("src.api.scheduler.save_daily_traces")
-    async def test_daily_traces(self, mock_save_traces):
+    async def test_daily_traces(self, mock_save_traces, mock_run_in_process):
         """Test the daily_traces function."""
-        # save_daily_traces is not async, just a regular function
-        mock_save_traces.return_value = None
-
         # Call the function
         await daily_traces()
 
-        # Verify the traces function was called
-        mock_save_traces.assert_called_once()
+        # Verify the traces are saved in another process with a timeout
+        mock_run_in_process.assert_called_once_with(
+            mock_save_traces, timeout=DAILY_TRACES_TIMEOUT
+        )
 
 
 class TestSchedulerJobs:
@@ -113,6 +164,7 @@ class TestSchedulerJobs:
         assert "check_scheduled_tasks" in job_names
         assert "daily_usage_stats" in job_names
         assert "daily_traces" in job_names
+        assert "renew_scheduler_lease" in job_names
 
     def test_check_scheduled_tasks_job_config(self):
         """Test check_scheduled_tasks job configuration."""
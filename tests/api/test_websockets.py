@@ -0,0 +1,218 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.api.utils.pubsub import InProcessBroker
+from src.api.websockets import (
+    HEARTBEAT_MESSAGE,
+    INTERNAL_ERROR,
+    TRY_AGAIN_LATER,
+    ConnectionManager,
+    WebSocketConnection,
+)
+
+
+def _mock_websocket():
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    websocket.close = AsyncMock()
+    return websocket
+
+
+async def _hang(message):
+    await asyncio.sleep(60)
+
+
+def _sent_messages(websocket):
+    return [call.args[0] for call in websocket.send_text.call_args_list]
+
+
+async def _wait_until(condition, timeout=1):
+    # the writers run as their own tasks, so give them time to catch up instead of
+    # relying on how long a fixed sleep happens to take
+    async def _poll():
+        while not condition():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+@pytest.mark.asyncio
+class TestWebSocketConnection:
+    async def test_sends_queued_messages_in_order(self):
+        websocket = _mock_websocket()
+        connection = WebSocketConnection(websocket, MagicMock())
+
+        connection.send("first", "task_created")
+        connection.send("second", "task_created")
+        await _wait_until(lambda: websocket.send_text.call_count == 2)
+
+        assert _sent_messages(websocket) == ["first", "second"]
+
+        await connection.close()
+
+    async def test_full_queue_coalesces_to_latest_task_completed(self):
+        websocket = _mock_websocket()
+        connection = WebSocketConnection(websocket, MagicMock(), max_queue_size=3)
+
+        # queued before the writer gets to run
+        connection.send("created", "task_created")
+        connection.send("completed-1", "task_completed")
+        connection.send("completed-2", "task_completed")
+        connection.send("completed-3", "task_completed")
+
+        assert [message for _, message in connection.queue] == [
+            "created",
+            "completed-3",
+        ]
+
+        await _wait_until(lambda: websocket.send_text.call_count == 2)
+
+        assert _sent_messages(websocket) == ["created", "completed-3"]
+
+        await connection.close()
+
+    async def test_overflow_closes_with_try_again_later(self):
+        websocket = _mock_websocket()
+        on_close = MagicMock()
+        connection = WebSocketConnection(websocket, on_close, max_queue_size=2)
+
+        connection.send("created-1", "task_created")
+        connection.send("created-2", "task_created")
+        connection.send("created-3", "task_created")
+
+        assert connection.is_overflowing
+
+        # ignored once the connection is being closed
+        connection.send("created-4", "task_created")
+
+        await _wait_until(lambda: on_close.called)
+
+        websocket.send_text.assert_not_called()
+        websocket.close.assert_called_once_with(code=TRY_AGAIN_LATER)
+        on_close.assert_called_once()
+
+    async def test_heartbeat_when_idle(self):
+        websocket = _mock_websocket()
+        connection = WebSocketConnection(
+            websocket, MagicMock(), heartbeat_interval=0.01
+        )
+
+        await _wait_until(lambda: HEARTBEAT_MESSAGE in _sent_messages(websocket))
+        assert json.loads(HEARTBEAT_MESSAGE) == {"event": "heartbeat"}
+
+        await connection.close()
+
+    async def test_send_timeout_closes_the_connection(self):
+        websocket = _mock_websocket()
+        websocket.send_text.side_effect = _hang
+        on_close = MagicMock()
+        connection = WebSocketConnection(websocket, on_close, send_timeout=0.01)
+
+        connection.send("created", "task_created")
+        await _wait_until(lambda: on_close.called)
+
+        websocket.close.assert_called_once_with(code=INTERNAL_ERROR)
+        on_close.assert_called_once()
+
+    async def test_close_while_a_send_completes(self):
+        websocket = _mock_websocket()
+        connection = WebSocketConnection(websocket, MagicMock())
+
+        connection.send("created", "task_created")
+        # closed from another task while the writer is still on its first send
+        close = asyncio.create_task(connection.close())
+
+        done, _ = await asyncio.wait({close}, timeout=1)
+
+        assert close in done
+        assert connection._writer.done()
+
+    async def test_close_of_a_gone_client_is_ignored(self):
+        websocket = _mock_websocket()
+        websocket.send_text.side_effect = Exception("connection reset")
+        websocket.close.side_effect = Exception("connection reset")
+        on_close = MagicMock()
+        connection = WebSocketConnection(websocket, on_close)
+
+        connection.send("created", "task_created")
+        await _wait_until(lambda: on_close.called)
+
+        on_close.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestConnectionManager:
+    async def test_update_is_serialized_once_for_every_connection(self):
+        manager = ConnectionManager(InProcessBroker())
+        websockets = [_mock_websocket(), _mock_websocket()]
+        for websocket in websockets:
+            await manager.connect(websocket, 1)
+
+        await manager.send_item_update(1, {"event": "task_created", "task": {"id": 1}})
+        await _wait_until(
+            lambda: all(websocket.send_text.called for websocket in websockets)
+        )
+
+        for websocket in websockets:
+            websocket.accept.assert_called_once()
+            assert _sent_messages(websocket) == [
+                '{"event":"task_created","task":{"id":1}}'
+            ]
+
+        await manager.stop()
+
+    async def test_failed_send_closes_and_removes_the_connection(self):
+        manager = ConnectionManager(InProcessBroker())
+        websocket = _mock_websocket()
+        websocket.send_text.side_effect = Exception("connection reset")
+        await manager.connect(websocket, 1)
+
+        await manager.send_item_update(1, {"event": "task_created"})
+        await _wait_until(lambda: not manager.active_connections)
+
+        websocket.close.assert_called_once_with(code=INTERNAL_ERROR)
+        assert manager.active_connections == {}
+
+    async def test_slow_connection_does_not_delay_the_others(self):
+        manager = ConnectionManager(InProcessBroker())
+        slow_websocket = _mock_websocket()
+        slow_websocket.send_text.side_effect = _hang
+        fast_websocket = _mock_websocket()
+        await manager.connect(slow_websocket, 1)
+        await manager.connect(fast_websocket, 1)
+
+        await manager.send_item_update(1, {"event": "task_created"})
+        await manager.send_item_update(1, {"event": "module_created"})
+        await _wait_until(
+            lambda: fast_websocket.send_text.call_count == 2
+            and slow_websocket.send_text.called
+        )
+
+        assert _sent_messages(fast_websocket) == [
+            '{"event":"task_created"}',
+            '{"event":"module_created"}',
+        ]
+        # still waiting on its first message
+        assert _sent_messages(slow_websocket) == ['{"event":"task_created"}']
+
+        await manager.stop()
+        assert manager.active_connections == {}
+
+    async def test_update_without_connections(self):
+        manager = ConnectionManager(InProcessBroker())
+
+        await manager.send_item_update(1, {"event": "task_created"})
+
+    async def test_disconnect(self):
+        manager = ConnectionManager(InProcessBroker())
+        websocket = _mock_websocket()
+        await manager.connect(websocket, 1)
+
+        manager.disconnect(websocket, 1)
+
+        assert manager.active_connections == {}
+
+        # disconnecting twice is harmless
+        manager.disconnect(websocket, 1)
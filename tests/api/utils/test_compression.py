@@ -0,0 +1,163 @@
+import asyncio
+import gzip
+import json
+import zlib
+import brotli
+import pytest
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from src.api.utils.compression import (
+    CompressionMiddleware,
+    parse_accept_encoding,
+    select_encoding,
+)
+
+LARGE_JSON = json.dumps([{"id": index, "name": "task"} for index in range(200)])
+
+
+class TestSelectEncoding:
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding("gzip, br;q=0.5, identity;q=x") == {
+            "gzip": 1.0,
+            "br": 0.5,
+            "identity": 0.0,
+        }
+        assert parse_accept_encoding(None) == {}
+
+    def test_prefers_brotli(self):
+        assert select_encoding("gzip, deflate, br") == "br"
+
+    def test_respects_quality(self):
+        assert select_encoding("br;q=0.1, gzip") == "gzip"
+        assert select_encoding("br;q=0, gzip;q=0") is None
+
+    def test_wildcard(self):
+        assert select_encoding("*") == "br"
+        assert select_encoding("br;q=0, *") == "gzip"
+
+    def test_unsupported(self):
+        assert select_encoding("deflate") is None
+        assert select_encoding("") is None
+
+
+async def _call(response, accept_encoding="gzip", path="/", **kwargs):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        # the client stays connected until the response is sent
+        await asyncio.Event().wait()
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+    await CompressionMiddleware(response, **kwargs)(scope, receive, send)
+
+    start = messages[0]
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start, headers, [message["body"] for message in messages[1:]]
+
+
+@pytest.mark.asyncio
+class TestCompressionMiddleware:
+    async def test_gzip(self):
+        response = Response(
+            LARGE_JSON, media_type="application/json", headers={"ETag": '"abc"'}
+        )
+
+        _, headers, bodies = await _call(response)
+
+        assert headers["content-encoding"] == "gzip"
+        assert headers["vary"] == "Accept-Encoding"
+        assert headers["etag"] == 'W/"abc"'
+        assert int(headers["content-length"]) == len(bodies[0])
+        assert gzip.decompress(bodies[0]).decode() == LARGE_JSON
+
+    async def test_brotli(self):
+        response = Response(LARGE_JSON, media_type="application/json")
+
+        _, headers, bodies = await _call(response, accept_encoding="br, gzip")
+
+        assert headers["content-encoding"] == "br"
+        assert brotli.decompress(bodies[0]).decode() == LARGE_JSON
+
+    async def test_below_minimum_size(self):
+        response = Response('{"id": 1}', media_type="application/json")
+
+        _, headers, bodies = await _call(response)
+
+        assert "content-encoding" not in headers
+        assert bodies == [b'{"id": 1}']
+
+    async def test_configurable_minimum_size(self):
+        response = Response('{"id": 1}', media_type="application/json")
+
+        _, headers, bodies = await _call(response, minimum_size=0)
+
+        assert headers["content-encoding"] == "gzip"
+        assert gzip.decompress(bodies[0]) == b'{"id": 1}'
+
+    async def test_without_accept_encoding(self):
+        response = Response(LARGE_JSON, media_type="application/json")
+
+        _, headers, bodies = await _call(response, accept_encoding="identity")
+
+        assert "content-encoding" not in headers
+        assert bodies == [LARGE_JSON.encode()]
+
+    async def test_not_compressible(self):
+        response = Response(b"\x00" * 2000, media_type="image/png")
+
+        _, headers, _ = await _call(response)
+
+        assert "content-encoding" not in headers
+
+    async def test_excluded_paths(self):
+        response = PlainTextResponse("a" * 2000)
+
+        _, headers, _ = await _call(response, path="/uploads/file.txt")
+
+        assert "content-encoding" not in headers
+
+    async def test_already_encoded(self):
+        response = Response(
+            gzip.compress(LARGE_JSON.encode()),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+        _, headers, bodies = await _call(response)
+
+        assert gzip.decompress(bodies[0]).decode() == LARGE_JSON
+
+    @pytest.mark.parametrize(
+        "accept_encoding,decompressor",
+        [
+            ("gzip", lambda: zlib.decompressobj(31)),
+            ("br", brotli.Decompressor),
+        ],
+    )
+    async def test_streaming_is_flushed_per_chunk(self, accept_encoding, decompressor):
+        lines = [json.dumps({"chunk": index}) + "\n" for index in range(3)]
+
+        async def stream():
+            for line in lines:
+                yield line
+
+        response = StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        _, headers, bodies = await _call(response, accept_encoding=accept_encoding)
+
+        assert headers["content-encoding"] == accept_encoding
+        assert "content-length" not in headers
+
+        # every chunk decodes to its line on its own, without waiting for the end
+        decoder = decompressor()
+        decode = getattr(decoder, "decompress", None) or decoder.process
+        for line, body in zip(lines, bodies):
+            assert decode(body).decode() == line
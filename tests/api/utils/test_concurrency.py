@@ -1,7 +1,11 @@
 import pytest
 import asyncio
 from unittest.mock import patch, AsyncMock
-from src.api.utils.concurrency import async_batch_gather, async_index_wrapper
+from src.api.utils.concurrency import (
+    async_batch_gather,
+    async_index_wrapper,
+    run_in_process,
+)
 
 
 @pytest.mark.asyncio
@@ -95,3 +99,31 @@ class TestAsyncIndexWrapper:
 
         # Check the results
         assert result == (42, "test-value")
+
+
+def _add(a, b):
+    return a + b
+
+
+def _fail():
+    raise ValueError("failed in the process")
+
+
+def _sleep(seconds):
+    import time
+
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+class TestRunInProcess:
+    async def test_returns_result(self):
+        assert await run_in_process(_add, 1, 2, timeout=60) == 3
+
+    async def test_raises_exception(self):
+        with pytest.raises(ValueError, match="failed in the process"):
+            await run_in_process(_fail, timeout=60)
+
+    async def test_timeout(self):
+        with pytest.raises(asyncio.TimeoutError):
+            await run_in_process(_sleep, 60, timeout=1)
@@ -12,6 +12,8 @@ from src.api.utils.db import (
     deserialise_list_from_str,
     trace_callback,
     check_table_exists,
+    get_values_placeholder,
+    log_statement_count,
 )
 
 
@@ -58,6 +60,28 @@ class TestTraceCallback:
         mock_logger.info.assert_called_once_with(f"Executing operation: {sql}")
 
 
+@pytest.mark.asyncio
+class TestLogStatementCount:
+    @patch("src.api.utils.db.logger")
+    async def test_log_statement_count(self, mock_logger):
+        """Test that the statements run inside the block are counted and logged."""
+        mock_conn = AsyncMock()
+
+        async with log_statement_count(mock_conn, "save"):
+            count_statement = mock_conn.set_trace_callback.call_args[0][0]
+            count_statement("INSERT INTO test VALUES (1)")
+            count_statement("COMMIT")
+
+        mock_conn.set_trace_callback.assert_called_with(trace_callback)
+        mock_logger.info.assert_called_with("save executed 2 statements")
+
+
+def test_get_values_placeholder():
+    """Test building the placeholders of a multi-row VALUES clause."""
+    assert get_values_placeholder(2, 3) == "(?, ?), (?, ?), (?, ?)"
+    assert get_values_placeholder(1, 1) == "(?)"
+
+
 @pytest.mark.asyncio
 class TestCheckTableExists:
     async def test_check_table_exists_true(self):
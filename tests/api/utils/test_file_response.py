@@ -0,0 +1,130 @@
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+from src.api.utils.file_response import (
+    CachedStaticFiles,
+    RangeNotSatisfiable,
+    build_file_response,
+    guess_media_type,
+    get_file_etag,
+    is_not_modified,
+    parse_range_header,
+)
+
+
+class TestParseRangeHeader:
+    def test_closed_range(self):
+        assert parse_range_header("bytes=0-99", 1000) == (0, 99)
+
+    def test_open_ended_range(self):
+        assert parse_range_header("bytes=900-", 1000) == (900, 999)
+
+    def test_suffix_range(self):
+        assert parse_range_header("bytes=-100", 1000) == (900, 999)
+
+    def test_suffix_range_larger_than_file(self):
+        assert parse_range_header("bytes=-5000", 1000) == (0, 999)
+
+    def test_end_clamped_to_file_size(self):
+        assert parse_range_header("bytes=500-5000", 1000) == (500, 999)
+
+    def test_ignored_ranges(self):
+        assert parse_range_header("items=0-1", 1000) is None
+        assert parse_range_header("bytes=0-1,5-6", 1000) is None
+        assert parse_range_header("bytes=abc-", 1000) is None
+        assert parse_range_header("bytes=10-5", 1000) is None
+
+    def test_unsatisfiable_range(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=1000-", 1000)
+
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=-0", 1000)
+
+        # no byte of an empty file can be served
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=-500", 0)
+
+
+class TestConditionalHeaders:
+    def test_guess_media_type(self):
+        assert guess_media_type("file.pdf") == "application/pdf"
+        assert guess_media_type("file.unknownext") == "application/octet-stream"
+
+    @pytest.mark.asyncio
+    async def test_etag_is_content_hash(self, tmp_path):
+        first = tmp_path / "a.txt"
+        second = tmp_path / "b.txt"
+        first.write_bytes(b"same")
+        second.write_bytes(b"same")
+
+        first_etag = await get_file_etag(str(first), os.stat(first))
+        second_etag = await get_file_etag(str(second), os.stat(second))
+
+        assert first_etag == second_etag
+        assert first_etag.startswith('"') and first_etag.endswith('"')
+
+    def test_is_not_modified(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"data")
+        stat_result = os.stat(path)
+
+        assert is_not_modified(
+            Headers({"if-none-match": '"abc"'}), '"abc"', stat_result
+        )
+        assert is_not_modified(
+            Headers({"if-none-match": 'W/"abc", "def"'}), '"abc"', stat_result
+        )
+        assert is_not_modified(Headers({"if-none-match": "*"}), '"abc"', stat_result)
+        assert not is_not_modified(
+            Headers({"if-none-match": '"def"'}), '"abc"', stat_result
+        )
+        assert is_not_modified(
+            Headers({"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}),
+            '"abc"',
+            stat_result,
+        )
+        assert not is_not_modified(Headers({}), '"abc"', stat_result)
+
+    @pytest.mark.asyncio
+    async def test_stale_if_range_returns_full_file(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"0123456789")
+
+        response = await build_file_response(
+            Headers({"range": "bytes=0-1", "if-range": '"stale"'}), str(path)
+        )
+
+        assert response.status_code == 200
+
+
+class TestCachedStaticFiles:
+    def test_static_files_range_and_etag(self, tmp_path):
+        (tmp_path / "audio.mp3").write_bytes(b"0123456789")
+
+        app = FastAPI()
+        app.mount("/uploads", CachedStaticFiles(directory=str(tmp_path)))
+        client = TestClient(app)
+
+        response = client.get("/uploads/audio.mp3")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "content-disposition" not in response.headers
+
+        response = client.get(
+            "/uploads/audio.mp3",
+            headers={"range": "bytes=-3", "if-range": response.headers["etag"]},
+        )
+        assert response.status_code == 206
+        assert response.content == b"789"
+
+        response = client.get(
+            "/uploads/audio.mp3", headers={"if-none-match": response.headers["etag"]}
+        )
+        assert response.status_code == 304
+
+        response = client.get("/uploads/missing.mp3")
+        assert response.status_code == 404
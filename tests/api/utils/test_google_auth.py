@@ -0,0 +1,197 @@
+import base64
+import time
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+from src.api.utils.google_auth import (
+    GoogleCertsCache,
+    convert_jwks_to_pem,
+    get_max_age,
+    verify_google_id_token,
+    DEFAULT_CERTS_MAX_AGE,
+)
+
+CLIENT_ID = "test-client-id"
+
+
+def _generate_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _to_jwk(private_key, key_id: str):
+    numbers = private_key.public_key().public_numbers()
+
+    def encode(value: int) -> str:
+        raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    return {
+        "kty": "RSA",
+        "alg": "RS256",
+        "use": "sig",
+        "kid": key_id,
+        "n": encode(numbers.n),
+        "e": encode(numbers.e),
+    }
+
+
+def _to_pem(private_key) -> str:
+    return (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+def _sign(private_key, key_id: str, **claims) -> str:
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "email": "test@example.com",
+        "iat": now,
+        "exp": now + 3600,
+        **claims,
+    }
+    return jwt.encode(signer, payload).decode()
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return _generate_key()
+
+
+@pytest.fixture
+def certs_cache(private_key):
+    # a local stand-in key set so that no test talks to Google
+    cache = GoogleCertsCache()
+    cache.set_certs({"test-key": _to_pem(private_key)})
+    return cache
+
+
+class TestCertsParsing:
+    def test_get_max_age(self):
+        assert get_max_age("public, max-age=19602, must-revalidate") == 19602
+        assert get_max_age("no-cache") == DEFAULT_CERTS_MAX_AGE
+        assert get_max_age(None) == DEFAULT_CERTS_MAX_AGE
+
+    def test_convert_jwks_to_pem(self, private_key):
+        jwks = {
+            "keys": [
+                _to_jwk(private_key, "test-key"),
+                {"kty": "EC", "kid": "ec-key"},
+            ]
+        }
+
+        assert convert_jwks_to_pem(jwks) == {"test-key": _to_pem(private_key)}
+
+
+@pytest.mark.asyncio
+class TestVerifyGoogleIdToken:
+    async def test_valid_token(self, private_key, certs_cache):
+        token = _sign(private_key, "test-key")
+
+        id_info = await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+        assert id_info["email"] == "test@example.com"
+
+    async def test_wrong_audience(self, private_key, certs_cache):
+        token = _sign(private_key, "test-key", aud="another-client")
+
+        with pytest.raises(ValueError):
+            await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+    async def test_wrong_issuer(self, private_key, certs_cache):
+        token = _sign(private_key, "test-key", iss="https://evil.example.com")
+
+        with pytest.raises(ValueError, match="Wrong issuer"):
+            await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+    async def test_expired_token(self, private_key, certs_cache):
+        token = _sign(private_key, "test-key", iat=1000, exp=2000)
+
+        with pytest.raises(ValueError):
+            await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+    async def test_wrong_signature(self, certs_cache):
+        token = _sign(_generate_key(), "test-key")
+
+        with pytest.raises(ValueError):
+            await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+    async def test_malformed_token(self, certs_cache):
+        with pytest.raises(ValueError):
+            await verify_google_id_token("not-a-token", CLIENT_ID, certs_cache)
+
+
+def _mock_response(jwks, cache_control="public, max-age=100"):
+    response = MagicMock()
+    response.json.return_value = jwks
+    response.headers = {"cache-control": cache_control}
+    return response
+
+
+@pytest.mark.asyncio
+class TestGoogleCertsCache:
+    @patch("src.api.utils.google_auth.httpx.AsyncClient")
+    async def test_fetches_once_until_expiry(self, mock_client_cls, private_key):
+        mock_client = AsyncMock()
+        mock_client.get.return_value = _mock_response(
+            {"keys": [_to_jwk(private_key, "test-key")]}
+        )
+        mock_client_cls.return_value.__aenter__.return_value = mock_client
+
+        cache = GoogleCertsCache()
+        token = _sign(private_key, "test-key")
+
+        for _ in range(3):
+            await verify_google_id_token(token, CLIENT_ID, cache)
+
+        mock_client.get.assert_called_once_with(cache.certs_url)
+
+        with patch(
+            "src.api.utils.google_auth.time.monotonic",
+            return_value=time.monotonic() + 101,
+        ):
+            await cache.get_certs("test-key")
+
+        assert mock_client.get.call_count == 2
+
+    @patch("src.api.utils.google_auth.httpx.AsyncClient")
+    async def test_unknown_key_refresh_is_rate_limited(
+        self, mock_client_cls, private_key, certs_cache
+    ):
+        rotated_key = _generate_key()
+        mock_client = AsyncMock()
+        mock_client.get.return_value = _mock_response(
+            {"keys": [_to_jwk(rotated_key, "rotated-key")]}
+        )
+        mock_client_cls.return_value.__aenter__.return_value = mock_client
+
+        token = _sign(rotated_key, "rotated-key")
+
+        # the keys were just fetched, so an unknown key does not trigger a refetch yet
+        with pytest.raises(ValueError):
+            await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+        mock_client.get.assert_not_called()
+
+        with patch(
+            "src.api.utils.google_auth.time.monotonic",
+            return_value=time.monotonic() + 61,
+        ):
+            id_info = await verify_google_id_token(token, CLIENT_ID, certs_cache)
+
+        assert id_info["email"] == "test@example.com"
+        mock_client.get.assert_called_once()
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.models import Course, TaskType
+from src.api.utils.json_response import ORJSONResponse, dumps, json_fragment
+
+
+class TestDumps:
+    def test_matches_standard_json(self):
+        content = {"id": 1, "name": "Café", "scores": [0.5, None], "done": True}
+
+        assert json.loads(dumps(content)) == content
+
+    def test_non_str_keys(self):
+        assert dumps({1: "a", 2: "b"}) == b'{"1":"a","2":"b"}'
+
+    def test_enum_datetime_and_numpy(self):
+        content = {
+            "type": TaskType.QUIZ,
+            "at": datetime(2024, 1, 1, 10, 30),
+            "values": np.array([1, 2]),
+        }
+
+        assert json.loads(dumps(content)) == {
+            "type": "quiz",
+            "at": "2024-01-01T10:30:00",
+            "values": [1, 2],
+        }
+
+    def test_pydantic_models(self):
+        assert json.loads(dumps([Course(id=1, name="Course")])) == [
+            {"id": 1, "name": "Course"}
+        ]
+
+    def test_unsupported_type(self):
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+
+
+class TestJsonFragment:
+    def test_fragment_is_embedded_as_is(self):
+        content = {"id": 1, "blocks": json_fragment('[{"type": "paragraph"}]')}
+
+        assert dumps(content) == b'{"id":1,"blocks":[{"type": "paragraph"}]}'
+
+    def test_none(self):
+        assert json_fragment(None) is None
+        assert dumps({"blocks": json_fragment(None)}) == b'{"blocks":null}'
+
+
+class TestORJSONResponse:
+    def test_default_response_class(self):
+        app = FastAPI(default_response_class=ORJSONResponse)
+
+        @app.get("/course", response_model=Course)
+        async def get_course():
+            return {"id": 1, "name": "Course", "extra": "dropped"}
+
+        @app.get("/raw")
+        async def get_raw():
+            return ORJSONResponse({"blocks": json_fragment("[]")})
+
+        client = TestClient(app)
+
+        response = client.get("/course")
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"id": 1, "name": "Course"}
+
+        assert client.get("/raw").content == b'{"blocks":[]}'
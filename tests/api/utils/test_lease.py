@@ -0,0 +1,55 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from src.api.utils.lease import Lease
+
+
+def _mock_connection(mock_db_conn, rowcount=1):
+    mock_cursor = AsyncMock()
+    mock_cursor.rowcount = rowcount
+    mock_conn = AsyncMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_db_conn.return_value.__aenter__.return_value = mock_conn
+    return mock_cursor, mock_conn
+
+
+def test_holders_are_unique():
+    assert Lease("scheduler").holder != Lease("scheduler").holder
+
+
+@pytest.mark.asyncio
+class TestLease:
+    @patch("src.api.utils.lease.get_new_db_connection")
+    async def test_acquire(self, mock_db_conn):
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+        lease = Lease("scheduler", ttl_seconds=30)
+
+        assert await lease.acquire() is True
+        assert lease.is_held is True
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "ON CONFLICT(name) DO UPDATE" in query
+        assert params == ("scheduler", lease.holder, "+30 seconds")
+        mock_conn.commit.assert_called_once()
+
+    @patch("src.api.utils.lease.get_new_db_connection")
+    async def test_acquire_held_by_another_process(self, mock_db_conn):
+        _mock_connection(mock_db_conn, rowcount=0)
+        lease = Lease("scheduler")
+
+        assert await lease.acquire() is False
+        assert lease.is_held is False
+
+    @patch("src.api.utils.lease.get_new_db_connection")
+    async def test_release(self, mock_db_conn):
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+        lease = Lease("scheduler")
+        lease.is_held = True
+
+        await lease.release()
+
+        mock_cursor.execute.assert_called_once_with(
+            "DELETE FROM leases WHERE name = ? AND holder = ?",
+            ("scheduler", lease.holder),
+        )
+        mock_conn.commit.assert_called_once()
+        assert lease.is_held is False
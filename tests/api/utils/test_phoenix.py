@@ -0,0 +1,309 @@
+import json
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from src.api.utils.phoenix import (
+    LocalTraceStore,
+    S3TraceStore,
+    get_trace_store,
+    get_traces_export_watermark,
+    prepare_feedback_traces_for_annotation,
+    prepare_spans_for_parquet,
+    save_daily_traces,
+    set_traces_export_watermark,
+)
+
+
+def _spans_dataframe(span_ids, **columns):
+    # phoenix indexes the spans by their id and keeps the id as a column as well
+    return pd.DataFrame({"context.span_id": span_ids, **columns}).set_index(
+        "context.span_id", drop=False
+    )
+
+
+def _learning_material_span(task_id, user_id, start_time, question, answer):
+    return {
+        "attributes.metadata": {
+            "stage": "feedback",
+            "type": "learning_material",
+            "task_id": task_id,
+        },
+        "attributes.user.id": user_id,
+        "start_time": start_time,
+        "attributes.llm.input_messages": [
+            {"message.role": "system", "message.content": "system"},
+            {"message.role": "user", "message.content": question},
+            {"message.role": "user", "message.content": "Reference Material: notes"},
+        ],
+        "attributes.llm.output_messages": [
+            {
+                "message.tool_calls": [
+                    {"tool_call.function.arguments": json.dumps({"answer": answer})}
+                ]
+            }
+        ],
+    }
+
+
+class TestPrepareFeedbackTracesForAnnotation:
+    def test_collapses_spans_into_conversations(self):
+        start_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        df = pd.DataFrame(
+            [
+                _learning_material_span(
+                    1, 7, start_time + timedelta(minutes=1), "second", "b"
+                ),
+                _learning_material_span(1, 7, start_time, "first", "a"),
+                _learning_material_span(2, 7, start_time, "other", "c"),
+                {
+                    "attributes.metadata": {"stage": "router", "type": "quiz"},
+                    "attributes.user.id": 7,
+                    "start_time": start_time,
+                    "attributes.llm.input_messages": [],
+                    "attributes.llm.output_messages": [],
+                },
+            ]
+        )
+
+        result = prepare_feedback_traces_for_annotation(df)
+
+        assert len(result) == 2
+        # the last span of the conversation, with the turns in chronological order
+        first = result.iloc[0]
+        assert first["attributes.metadata"]["task_id"] == 1
+        assert first["start_time"] == start_time + timedelta(minutes=1)
+        assert first["context"] == "Reference Material: notes"
+        assert first["chat_history"] == [
+            {"role": "user", "content": "first"},
+            {"role": "assistant", "content": {"answer": "a"}},
+            {"role": "user", "content": "second"},
+            {"role": "assistant", "content": {"answer": "b"}},
+        ]
+        assert "task_id" not in result.columns
+        assert result.iloc[1]["attributes.metadata"]["task_id"] == 2
+
+    def test_without_feedback_spans(self):
+        df = pd.DataFrame(
+            [
+                {
+                    "attributes.metadata": {"stage": "router"},
+                    "attributes.user.id": 7,
+                }
+            ]
+        )
+
+        assert prepare_feedback_traces_for_annotation(df).empty
+
+
+class TestTraceStores:
+    def test_local_store(self, tmp_path):
+        store = LocalTraceStore(str(tmp_path))
+        source = tmp_path / "source.txt"
+        source.write_bytes(b"spans")
+
+        assert store.read("date=2025-01-01/000000-010000.parquet") is None
+
+        store.write(str(source), "date=2025-01-01/000000-010000.parquet")
+
+        assert store.read("date=2025-01-01/000000-010000.parquet") == b"spans"
+
+    @patch("src.api.utils.phoenix.download_file_from_s3_as_bytes")
+    def test_s3_store_missing_key(self, mock_download):
+        from botocore.exceptions import ClientError
+
+        mock_download.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+        )
+
+        assert S3TraceStore("prefix").read("_watermark.json") is None
+        mock_download.assert_called_once_with("prefix/_watermark.json")
+
+    @patch("src.api.utils.phoenix.settings")
+    def test_get_trace_store(self, mock_settings):
+        mock_settings.s3_folder_name = "bucket-folder"
+        store = get_trace_store()
+        assert isinstance(store, S3TraceStore)
+        assert store.prefix == "bucket-folder/phoenix/spans"
+
+        mock_settings.s3_folder_name = None
+        mock_settings.local_traces_folder = "traces"
+        assert isinstance(get_trace_store(), LocalTraceStore)
+
+    def test_watermark(self, tmp_path):
+        store = LocalTraceStore(str(tmp_path))
+        exported_until = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+        assert get_traces_export_watermark(store) is None
+
+        set_traces_export_watermark(store, exported_until)
+
+        assert get_traces_export_watermark(store) == exported_until
+
+
+def test_prepare_spans_for_parquet():
+    df = _spans_dataframe(
+        ["span-1", "span-2"],
+        **{
+            "name": ["a", "b"],
+            "attributes.metadata": [{"stage": "feedback"}, None],
+            "attributes.llm.input_messages": [[{"message.role": "user"}], float("nan")],
+        },
+    )
+
+    result = prepare_spans_for_parquet(df)
+
+    assert list(result.columns) == [
+        "context.span_id",
+        "name",
+        "attributes.metadata",
+        "attributes.llm.input_messages",
+    ]
+    assert list(result["context.span_id"]) == ["span-1", "span-2"]
+    assert list(result["name"]) == ["a", "b"]
+    assert result["attributes.metadata"][0] == '{"stage": "feedback"}'
+    assert result["attributes.metadata"][1] is None
+    assert result["attributes.llm.input_messages"][0] == '[{"message.role": "user"}]'
+
+
+def _spans_between(start_time, end_time, count=1):
+    return _spans_dataframe(
+        [f"{start_time.isoformat()}-{index}" for index in range(count)],
+        **{
+            "name": [f"span-{start_time.hour}"] * count,
+            "attributes.metadata": [{"stage": "feedback"}] * count,
+        },
+    )
+
+
+class TestSaveDailyTraces:
+    @pytest.fixture
+    def store(self, tmp_path):
+        return LocalTraceStore(str(tmp_path / "spans"))
+
+    @pytest.fixture
+    def mock_spans(self, tmp_path):
+        with patch("phoenix.client.Client") as mock_client, patch(
+            "src.api.utils.phoenix.settings"
+        ) as mock_settings, patch.dict("os.environ"):
+            mock_settings.env = "production"
+            mock_settings.s3_folder_name = None
+            mock_settings.local_traces_folder = str(tmp_path)
+            mock_settings.phoenix_endpoint = "http://phoenix"
+            mock_settings.phoenix_api_key = "key"
+            get_spans_dataframe = mock_client.return_value.spans.get_spans_dataframe
+            get_spans_dataframe.side_effect = lambda **kwargs: _spans_between(
+                kwargs["start_time"], kwargs["end_time"]
+            )
+            yield get_spans_dataframe
+
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_exports_hourly_windows_up_to_the_lag(
+        self, mock_save_conversations, store, mock_spans
+    ):
+        set_traces_export_watermark(
+            store, datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc)
+        )
+
+        save_daily_traces(now=datetime(2025, 1, 1, 13, 10, tzinfo=timezone.utc))
+
+        windows = [
+            (call.kwargs["start_time"].hour, call.kwargs["start_time"].minute)
+            for call in mock_spans.call_args_list
+        ]
+        assert windows == [(10, 30), (11, 0), (12, 0)]
+
+        df = mock_save_conversations.call_args[0][0]
+        assert list(df["name"]) == ["span-10", "span-11", "span-12"]
+
+        # the spans of the last 15 minutes are left for the next export
+        assert get_traces_export_watermark(store) == datetime(
+            2025, 1, 1, 12, 55, tzinfo=timezone.utc
+        )
+
+        exported = pd.read_parquet(
+            f"{store.root}/date=2025-01-01/103000-110000.parquet"
+        )
+        assert list(exported["name"]) == ["span-10"]
+        assert exported["attributes.metadata"][0] == '{"stage": "feedback"}'
+        assert store.read("date=2025-01-01/120000-125500.parquet") is not None
+
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_first_export_starts_from_the_previous_day(
+        self, mock_save_conversations, store, mock_spans
+    ):
+        save_daily_traces(now=datetime(2025, 1, 2, 0, 30, tzinfo=timezone.utc))
+
+        assert mock_spans.call_args_list[0].kwargs["start_time"] == datetime(
+            2025, 1, 1, tzinfo=timezone.utc
+        )
+        assert mock_spans.call_count == 25
+        # the conversations are saved once per day of spans
+        assert mock_save_conversations.call_count == 2
+
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_watermark_kept_when_conversations_are_not_saved(
+        self, mock_save_conversations, store, mock_spans
+    ):
+        exported_until = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+        set_traces_export_watermark(store, exported_until)
+        mock_save_conversations.side_effect = Exception("S3 unavailable")
+
+        with pytest.raises(Exception, match="S3 unavailable"):
+            save_daily_traces(now=datetime(2025, 1, 1, 13, tzinfo=timezone.utc))
+
+        assert get_traces_export_watermark(store) == exported_until
+
+    @patch("src.api.utils.phoenix.TRACES_EXPORT_SPANS_LIMIT", 2)
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_window_at_the_limit_is_split(
+        self, mock_save_conversations, store, mock_spans
+    ):
+        set_traces_export_watermark(
+            store, datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+        )
+        mock_spans.side_effect = lambda **kwargs: _spans_between(
+            kwargs["start_time"],
+            kwargs["end_time"],
+            2 if kwargs["end_time"] - kwargs["start_time"] == timedelta(hours=1) else 1,
+        )
+
+        save_daily_traces(now=datetime(2025, 1, 1, 11, 15, tzinfo=timezone.utc))
+
+        assert len(mock_save_conversations.call_args[0][0]) == 2
+        assert store.read("date=2025-01-01/100000-103000.parquet") is not None
+        assert store.read("date=2025-01-01/103000-110000.parquet") is not None
+        assert store.read("date=2025-01-01/100000-110000.parquet") is None
+
+    @patch("src.api.utils.phoenix.TRACES_EXPORT_SPANS_LIMIT", 1)
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_stops_when_a_minute_is_at_the_limit(
+        self, mock_save_conversations, store, mock_spans
+    ):
+        exported_until = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+        set_traces_export_watermark(store, exported_until)
+
+        with pytest.raises(RuntimeError, match="reached the limit"):
+            save_daily_traces(now=datetime(2025, 1, 1, 11, 15, tzinfo=timezone.utc))
+
+        mock_save_conversations.assert_not_called()
+        assert get_traces_export_watermark(store) == exported_until
+
+    @patch("src.api.utils.phoenix.save_feedback_conversations")
+    def test_nothing_new_to_export(self, mock_save_conversations, store, mock_spans):
+        now = datetime(2025, 1, 1, 13, tzinfo=timezone.utc)
+        set_traces_export_watermark(store, now - timedelta(minutes=15))
+
+        save_daily_traces(now=now)
+
+        mock_spans.assert_not_called()
+        mock_save_conversations.assert_not_called()
+
+    @patch("src.api.utils.phoenix.get_trace_store")
+    @patch("src.api.utils.phoenix.settings")
+    def test_only_runs_in_production(self, mock_settings, mock_get_trace_store):
+        mock_settings.env = "staging"
+
+        save_daily_traces()
+
+        mock_get_trace_store.assert_not_called()
@@ -0,0 +1,127 @@
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+from src.api.utils.pubsub import Broker, InProcessBroker, SQLiteBroker, get_broker
+
+
+def _mock_connection(mock_db_conn, rows=None, max_id=0):
+    mock_cursor = AsyncMock()
+    mock_cursor.fetchone.return_value = (max_id,)
+    mock_cursor.fetchall.return_value = rows or []
+    mock_conn = AsyncMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_db_conn.return_value.__aenter__.return_value = mock_conn
+    return mock_cursor, mock_conn
+
+
+@pytest.mark.asyncio
+class TestInProcessBroker:
+    async def test_publish_reaches_handler(self):
+        handler = AsyncMock()
+        broker = InProcessBroker()
+        broker.subscribe(handler)
+
+        await broker.publish("1", {"event": "task_created"})
+
+        handler.assert_called_once_with("1", {"event": "task_created"})
+
+    async def test_publish_without_subscriber(self):
+        await InProcessBroker().publish("1", {"event": "task_created"})
+
+
+@pytest.mark.asyncio
+class TestSQLiteBroker:
+    @patch("src.api.utils.pubsub.get_new_db_connection")
+    async def test_publish_stores_and_delivers_locally(self, mock_db_conn):
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+        handler = AsyncMock()
+        broker = SQLiteBroker()
+        broker.subscribe(handler)
+
+        await broker.publish("1", {"event": "task_created"})
+
+        mock_cursor.execute.assert_called_once_with(
+            "INSERT INTO websocket_messages (channel, message, origin) VALUES (?, ?, ?)",
+            ("1", json.dumps({"event": "task_created"}), broker.origin),
+        )
+        mock_conn.commit.assert_called_once()
+        handler.assert_called_once_with("1", {"event": "task_created"})
+
+    @patch("src.api.utils.pubsub.get_new_db_connection")
+    async def test_poll_delivers_messages_from_other_processes(self, mock_db_conn):
+        broker = SQLiteBroker()
+        handler = AsyncMock()
+        broker.subscribe(handler)
+        broker.last_message_id = 4
+
+        mock_cursor, _ = _mock_connection(
+            mock_db_conn,
+            rows=[
+                (5, "1", json.dumps({"event": "module_created"}), "other"),
+                (6, "2", json.dumps({"event": "task_created"}), broker.origin),
+                (7, "2", json.dumps({"event": "task_completed"}), "other"),
+            ],
+        )
+
+        await broker.poll()
+
+        # messages published by this process were already delivered on publish
+        assert handler.call_args_list == [
+            (("1", {"event": "module_created"}),),
+            (("2", {"event": "task_completed"}),),
+        ]
+        assert mock_cursor.execute.call_args_list[0][0][1] == (4,)
+        assert broker.last_message_id == 7
+
+    @patch("src.api.utils.pubsub.get_new_db_connection")
+    async def test_poll_prunes_old_messages(self, mock_db_conn):
+        mock_cursor, mock_conn = _mock_connection(mock_db_conn)
+        broker = SQLiteBroker(retention_seconds=60)
+
+        await broker.poll()
+        await broker.poll()
+
+        delete_calls = [
+            call
+            for call in mock_cursor.execute.call_args_list
+            if call[0][0].startswith("DELETE")
+        ]
+        # pruning happens at most once per retention period
+        assert len(delete_calls) == 1
+        assert delete_calls[0][0][1] == ("-60 seconds",)
+        mock_conn.commit.assert_called_once()
+
+    @patch("src.api.utils.pubsub.get_new_db_connection")
+    async def test_start_skips_earlier_messages_and_stop(self, mock_db_conn):
+        _mock_connection(mock_db_conn, max_id=42)
+        broker = SQLiteBroker(poll_interval=60)
+
+        await broker.start()
+        assert broker.last_message_id == 42
+
+        await broker.stop()
+        assert broker._poll_task is None
+
+        # stopping twice is harmless
+        await broker.stop()
+
+
+def test_broker_without_publish():
+    class IncompleteBroker(Broker):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteBroker()
+
+
+class TestGetBroker:
+    def test_get_broker(self):
+        assert isinstance(get_broker("memory"), InProcessBroker)
+
+        broker = get_broker("sqlite", poll_interval=0.5)
+        assert isinstance(broker, SQLiteBroker)
+        assert broker.poll_interval == 0.5
+
+    def test_unknown_broker(self):
+        with pytest.raises(ValueError, match="Unknown websocket broker"):
+            get_broker("kafka")
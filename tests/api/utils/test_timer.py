@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+from src.api.utils.timer import DeadlineTimer, as_utc
+
+
+def test_as_utc():
+    assert as_utc(datetime(2030, 1, 1, 10)) == datetime(
+        2030, 1, 1, 10, tzinfo=timezone.utc
+    )
+    assert as_utc(
+        datetime(2030, 1, 1, 15, 30, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    ) == datetime(2030, 1, 1, 10, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+class TestDeadlineTimer:
+    async def test_start_loads_deadlines(self):
+        later = datetime.now(timezone.utc) + timedelta(hours=1)
+        earlier = datetime.now(timezone.utc) + timedelta(minutes=1)
+        timer = DeadlineTimer(AsyncMock(), AsyncMock(return_value=[later, earlier]))
+
+        await timer.start()
+
+        assert timer.deadlines == [earlier, later]
+
+        await timer.stop()
+
+        # kept only while the timer runs
+        assert timer.deadlines == []
+
+    async def test_callback_runs_when_deadline_passes(self):
+        callback = AsyncMock()
+        timer = DeadlineTimer(callback, AsyncMock(return_value=[]))
+
+        await timer.start()
+        timer.schedule(datetime.now(timezone.utc) + timedelta(milliseconds=50))
+        timer.schedule(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        await asyncio.sleep(0.01)
+        callback.assert_not_called()
+
+        await asyncio.sleep(0.1)
+
+        callback.assert_called_once()
+        # only the deadline that passed is removed
+        assert len(timer.deadlines) == 1
+
+        await timer.stop()
+
+    async def test_deadlines_already_due_run_right_away(self):
+        callback = AsyncMock()
+        timer = DeadlineTimer(
+            callback,
+            AsyncMock(return_value=[datetime(2020, 1, 1), datetime(2020, 1, 2)]),
+        )
+
+        await timer.start()
+        await asyncio.sleep(0.01)
+
+        # both deadlines are handled by one call
+        callback.assert_called_once()
+        assert timer.deadlines == []
+
+        await timer.stop()
+
+    async def test_failing_callback_keeps_the_timer_running(self):
+        callback = AsyncMock(side_effect=[Exception("db is locked"), None])
+        timer = DeadlineTimer(callback, AsyncMock(return_value=[datetime(2020, 1, 1)]))
+
+        await timer.start()
+        await asyncio.sleep(0.01)
+        timer.schedule(datetime(2020, 1, 1))
+        await asyncio.sleep(0.01)
+        await timer.stop()
+
+        assert callback.call_count == 2
+
+    async def test_schedule_without_deadline(self):
+        timer = DeadlineTimer(AsyncMock(), AsyncMock(return_value=[]))
+        await timer.start()
+
+        timer.schedule(None)
+
+        assert timer.deadlines == []
+
+        await timer.stop()
+
+    async def test_schedule_ignored_when_not_running(self):
+        timer = DeadlineTimer(AsyncMock(), AsyncMock())
+
+        timer.schedule(datetime.now(timezone.utc) + timedelta(hours=1))
+        await timer.reload()
+
+        assert timer.deadlines == []
+        timer.load_deadlines.assert_not_called()
+
+    async def test_deadline_scheduled_during_reload_is_kept(self):
+        loaded = datetime.now(timezone.utc) + timedelta(hours=2)
+        scheduled = datetime.now(timezone.utc) + timedelta(hours=1)
+        timer = DeadlineTimer(AsyncMock(), AsyncMock(return_value=[loaded]))
+        await timer.start()
+
+        async def load_deadlines():
+            # written after the upcoming deadlines were read
+            timer.schedule(scheduled)
+            return [loaded]
+
+        timer.load_deadlines = load_deadlines
+        await timer.reload()
+
+        assert timer.deadlines == [scheduled, loaded]
+
+        await timer.stop()
+
+    async def test_start_twice(self):
+        load_deadlines = AsyncMock(return_value=[])
+        timer = DeadlineTimer(AsyncMock(), load_deadlines)
+
+        await timer.start()
+        await timer.start()
+
+        load_deadlines.assert_awaited_once()
+
+        await timer.stop()
+
+    async def test_stop_without_start(self):
+        await DeadlineTimer(AsyncMock(), AsyncMock()).stop()